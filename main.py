@@ -6,7 +6,6 @@ from contextlib import asynccontextmanager
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from datetime import timedelta
 import logging
-import redis.asyncio as redis
 import redis.exceptions as redis_exceptions
 from aiobreaker import CircuitBreaker, CircuitBreakerError
 
@@ -19,16 +18,21 @@ from src.controllers.portfolio import router as portfolio_router
 from src.controllers.reports import router as reports_router
 from src.controllers.threads import router as threads_router
 from src.controllers.auth import router as auth_router
+from src.controllers.admin import router as admin_router
 from src.lifecycle.tasks import cleanup_research_cache
-from src.graph.persistence import get_checkpointer
+from src.graph.persistence import checkpointer_pool
+from src.graph.graph import get_graph
+from src.graph.agents.analyst.subgraph import get_debate_graph
+from src.services.llm import llm_registry
+from src.services.usage import usage_ledger
+from src.services.run_lock import run_locks
+from src.services.run_stream import run_streams
+from src.services.redis_client import shared_redis, stream_redis
 
 # Setup logging
 logging.basicConfig(level=settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
-# Global set for thread concurrency protection
-active_threads = set()
-
 # Redis Circuit Breaker: Fail fast if Redis is down
 # 5 failures opens the breaker for 60 seconds
 redis_cb = CircuitBreaker(fail_max=5, timeout_duration=timedelta(seconds=60))
@@ -40,7 +44,7 @@ async def lifespan(app: FastAPI):
     
     # Initialize Redis client
     try:
-        app.state.redis = redis.from_url(settings.REDIS_URL, decode_responses=False)
+        app.state.redis = shared_redis.open()
         # Health check via circuit breaker
         await redis_cb.call_async(app.state.redis.ping)
         logger.info("Redis client initialized and connection verified")
@@ -48,14 +52,20 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to initialize Redis: {e}")
         # We don't raise here yet; Task 3 will handle the 503s
     
-    # Initialize LangGraph checkpointer tables
+    # Initialize shared LLM clients (pooled HTTP connections)
+    llm_registry.init()
+    llm_registry.add_callback(usage_ledger.callback)
+    logger.info("LLM client registry initialized")
+    
+    # Open the shared LangGraph checkpointer (creates its indexes if they don't exist)
+    # and compile the graphs once for every request
     try:
-        async with get_checkpointer() as checkpointer:
-            # setup() creates the tables if they don't exist
-            await checkpointer.setup()
-        logger.info("LangGraph persistence tables initialized")
+        checkpointer = await checkpointer_pool.open()
+        get_graph(checkpointer)
+        logger.info("LangGraph persistence initialized and graph compiled")
     except Exception as e:
         logger.error(f"Failed to initialize LangGraph persistence: {e}")
+    get_debate_graph()
 
     # Setup Scheduler
     scheduler = AsyncIOScheduler()
@@ -70,6 +80,16 @@ async def lifespan(app: FastAPI):
         replace_existing=True
     )
     
+    # Persist buffered LLM usage records
+    scheduler.add_job(
+        usage_ledger.flush,
+        "interval",
+        seconds=settings.LLM_USAGE_FLUSH_SECONDS,
+        id="flush_llm_usage",
+        name="LLM usage ledger flush",
+        replace_existing=True
+    )
+    
     scheduler.start()
     logger.info("Background task scheduler started")
     
@@ -80,10 +100,20 @@ async def lifespan(app: FastAPI):
     scheduler.shutdown()
     logger.info("Background task scheduler shut down")
     
-    # Close Redis connection
-    if hasattr(app.state, "redis"):
-        await app.state.redis.aclose()
-        logger.info("Redis client shut down")
+    # Background runs end with an error event, then other workers can pick up their threads
+    await run_streams.cancel_all()
+    await run_locks.release_all()
+    
+    # Close the shared Redis clients and their pools
+    await stream_redis.aclose()
+    await shared_redis.aclose()
+    
+    await checkpointer_pool.aclose()
+    logger.info("LangGraph checkpointer shut down")
+    
+    await usage_ledger.flush()
+    await llm_registry.aclose()
+    logger.info("LLM client registry shut down")
     
     await engine.dispose()
 
@@ -114,32 +144,6 @@ async def redis_connection_error_handler(request: Request, exc: redis_exceptions
         content={"detail": "Service Temporarily Unavailable: Redis Connection Failure"}
     )
 
-@app.middleware("http")
-async def thread_concurrency_protection(request: Request, call_next):
-    """
-    Protects against concurrent runs for the same thread_id.
-    Looks for 'X-Thread-ID' in request headers.
-    """
-    thread_id = request.headers.get("X-Thread-ID")
-    
-    # Apply to standard LangGraph stream endpoints
-    if thread_id and ("/runs/stream" in request.url.path):
-        if thread_id in active_threads:
-            logger.warning(f"Rejecting concurrent request for thread_id: {thread_id}")
-            return JSONResponse(
-                status_code=409,
-                content={"detail": f"Conflict: Thread {thread_id} is already being processed."}
-            )
-        
-        active_threads.add(thread_id)
-        try:
-            response = await call_next(request)
-            return response
-        finally:
-            active_threads.discard(thread_id)
-    
-    return await call_next(request)
-
 # Add correlation ID middleware for request tracking
 app.add_middleware(CorrelationIdMiddleware)
 
@@ -159,6 +163,7 @@ app.include_router(portfolio_router)
 app.include_router(auth_router)
 app.include_router(reports_router)
 app.include_router(threads_router)
+app.include_router(admin_router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,51 @@
+"""add llm usage table
+
+Revision ID: 3b8d1f6c2a94
+Revises: 7bebec5d2f46
+Create Date: 2026-10-18 10:12:31.482615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8d1f6c2a94'
+down_revision: Union[str, Sequence[str], None] = '7bebec5d2f46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('llm_usage',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('thread_id', sa.String(), nullable=True),
+    sa.Column('correlation_id', sa.String(), nullable=True),
+    sa.Column('node', sa.String(), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('prompt_tokens', sa.Integer(), nullable=False),
+    sa.Column('completion_tokens', sa.Integer(), nullable=False),
+    sa.Column('total_tokens', sa.Integer(), nullable=False),
+    sa.Column('latency_ms', sa.Float(), nullable=False),
+    sa.Column('cache_hit', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_llm_usage_created_at'), 'llm_usage', ['created_at'], unique=False)
+    op.create_index(op.f('ix_llm_usage_id'), 'llm_usage', ['id'], unique=False)
+    op.create_index(op.f('ix_llm_usage_model'), 'llm_usage', ['model'], unique=False)
+    op.create_index(op.f('ix_llm_usage_node'), 'llm_usage', ['node'], unique=False)
+    op.create_index(op.f('ix_llm_usage_thread_id'), 'llm_usage', ['thread_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_llm_usage_thread_id'), table_name='llm_usage')
+    op.drop_index(op.f('ix_llm_usage_node'), table_name='llm_usage')
+    op.drop_index(op.f('ix_llm_usage_model'), table_name='llm_usage')
+    op.drop_index(op.f('ix_llm_usage_id'), table_name='llm_usage')
+    op.drop_index(op.f('ix_llm_usage_created_at'), table_name='llm_usage')
+    op.drop_table('llm_usage')
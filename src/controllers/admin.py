@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.session import get_db
+from src.database.models import User
+from src.schemas.usage import AdminToolsResponse, AdminUsageResponse, RunAdmissionStats, RunLockStats
+from src.services.auth import get_admin_user
+from src.services.usage import aggregate_usage, rollup, usage_views
+from src.graph.utils.tool_call import tool_metrics
+from src.services.run_lock import run_locks
+from src.services.admission import run_admission
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+@router.get("/usage", response_model=AdminUsageResponse)
+async def get_usage(
+    group_by: Literal["node", "model", "thread_id"] = Query("model"),
+    since: Optional[datetime] = Query(None, description="Only count calls made at or after this time (UTC)"),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(get_admin_user)
+):
+    """
+    Aggregate LLM usage across all threads, grouped by node, model or thread, heaviest first.
+    """
+    if since is not None and since.tzinfo is not None:
+        # created_at is stored as naive UTC
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    groups = await aggregate_usage(db, (group_by,), since=since)
+    return AdminUsageResponse(
+        group_by=group_by,
+        since=since,
+        groups=usage_views(rollup(groups, 0))[:limit]
+    )
+
+@router.get("/tools", response_model=AdminToolsResponse)
+async def get_tool_stats(admin: User = Depends(get_admin_user)):
+    """
+    Research tool outcomes and latency histograms since this worker started.
+    """
+    return AdminToolsResponse(tools=tool_metrics.snapshot())
+
+@router.get("/locks", response_model=RunLockStats)
+async def get_run_lock_stats(admin: User = Depends(get_admin_user)):
+    """
+    Per-thread run lock counters and lock-wait times for this worker.
+    """
+    return RunLockStats(**run_locks.snapshot())
+
+@router.get("/runs", response_model=RunAdmissionStats)
+async def get_run_admission_stats(admin: User = Depends(get_admin_user)):
+    """
+    Concurrent graph runs, queue length, queue waits and 429 rejections for this worker.
+    """
+    return RunAdmissionStats(**run_admission.snapshot())
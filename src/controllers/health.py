@@ -2,7 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from src.database.session import get_db
-from src.schemas.health import HealthResponse
+from src.schemas.health import HealthResponse, CrawlMetricsResponse, LLMCacheMetricsResponse
+from src.graph.utils.crawl import crawl_scheduler
+from src.services.llm_cache import llm_cache
 
 router = APIRouter(tags=["Health"])
 
@@ -21,3 +23,17 @@ async def health_check(db: AsyncSession = Depends(get_db)):
             status_code=503,
             detail=f"Database connectivity failed: {str(e)}"
         )
+
+@router.get("/health/crawl", response_model=CrawlMetricsResponse)
+async def crawl_metrics():
+    """
+    Report crawl scheduler queue depth, in-flight fetches and queue wait times.
+    """
+    return CrawlMetricsResponse(**crawl_scheduler.metrics())
+
+@router.get("/health/llm-cache", response_model=LLMCacheMetricsResponse)
+async def llm_cache_metrics():
+    """
+    Report LLM response cache hit rates and tokens saved, overall and per call site.
+    """
+    return LLMCacheMetricsResponse(**llm_cache.stats())
@@ -2,25 +2,35 @@ from fastapi import APIRouter, Depends, Query, HTTPException, BackgroundTasks, H
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc, update
+from src.config import settings
 from src.database.session import get_db
 from src.database.models import ChatThread, ChatMessage, User
-from src.schemas.threads import ThreadListResponse, ThreadBase, MessageSchema, HistoryResponse, CursorInfo, ThreadRunStreamRequest
+from src.schemas.threads import ThreadListResponse, ThreadBase, MessageSchema, HistoryResponse, CursorInfo, ThreadRunStreamRequest, ThreadRunResponse
 from src.services.auth import set_user_context
 from src.services.history import backfill_history_if_needed, sync_conversation_background
 from src.services.context_injection import get_user_context_data
 from src.services.titler import update_thread_title_background
-from src.graph.graph import create_graph
-from src.graph.persistence import get_checkpointer
+from src.services.usage import aggregate_usage, empty_stats, rollup, usage_view, usage_views
+from src.schemas.usage import ThreadUsageResponse
+from src.graph.graph import get_persistent_graph
+from src.graph.utils.deadline import BUDGET_EVENT, DEADLINE_KEY, budget_event, deadline_config
+from src.services.run_lock import RunLease, run_locks
+from src.services.admission import RunTicket, run_admission
+from src.services.run_stream import TERMINAL_EVENTS, run_streams
 from langchain_core.messages import HumanMessage
+import asyncio
 import logging
 import json
 import uuid
 from datetime import datetime, timezone
-from typing import Optional, Any
+from contextlib import aclosing
+from typing import AsyncIterator, Optional, Any, Tuple
 
 router = APIRouter(tags=["Threads"])
 logger = logging.getLogger(__name__)
 
+QUEUE_EVENT = "queue"
+
 def default_serializer(obj: Any) -> Any:
     """
     Custom JSON serializer for LangChain/LangGraph objects.
@@ -31,82 +41,193 @@ def default_serializer(obj: Any) -> Any:
         return obj.dict()
     return str(obj)
 
-async def langgraph_event_generator(
+async def release_run(lease: Optional[RunLease], ticket: Optional[RunTicket]):
+    """Gives back the run slot, then the thread's lease. Both releases are idempotent."""
+    if ticket is not None:
+        await run_admission.release(ticket)
+    if lease is not None:
+        await lease.release()
+
+class RunStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that releases its run's slot and lease however the response ends,
+    including when the body never started (early disconnect, send error).
+    """
+
+    def __init__(self, content: Any, lease: Optional[RunLease] = None, ticket: Optional[RunTicket] = None, **kwargs):
+        super().__init__(content, **kwargs)
+        self.lease = lease
+        self.ticket = ticket
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await asyncio.shield(release_run(self.lease, self.ticket))
+
+def format_sse(event: str, data: str, event_id: Optional[str] = None) -> str:
+    """One SSE message; `id` lets clients resume with Last-Event-ID."""
+    prefix = f"id: {event_id}\n" if event_id else ""
+    return f"{prefix}event: {event}\ndata: {data}\n\n"
+
+async def run_graph_events(
     thread_id: str,
     initial_input: dict,
     request: ThreadRunStreamRequest,
     current_user: User,
     background_tasks: BackgroundTasks,
     thread_title: Optional[str],
-    payload_message: Optional[str]
-) -> Any:
+    payload_message: Optional[str],
+    lease: Optional[RunLease] = None,
+    ticket: Optional[RunTicket] = None
+) -> AsyncIterator[Tuple[str, str]]:
     """
-    Async generator that yields SSE-formatted strings from LangGraph events.
-    Moved to module level to avoid re-initialization overhead.
+    Runs the graph and yields (event, JSON data) pairs, ending with `end` or `error`.
+    A queued run first yields its queue position until it is admitted.
+    Releases the run slot and the thread's lease when the run ends, fails or is cancelled.
     """
     full_response_content = ""
     try:
-        async with get_checkpointer() as checkpointer:
-            graph = create_graph(checkpointer=checkpointer)
-            
-            # Merge user config with mandatory thread_id
-            config = (request.config or {}).copy()
-            config["configurable"] = {
-                **config.get("configurable", {}),
-                "thread_id": thread_id
-            }
-            
-            if request.checkpoint_id:
-                config["configurable"]["checkpoint_id"] = request.checkpoint_id
-
-            # Run graph stream
-            async for mode, data in graph.astream(
-                initial_input, 
-                config, 
-                stream_mode=request.stream_mode
-            ):
-                # Protocol specifies that 'data' lines must be JSON arrays
-                payload = json.dumps([data], default=default_serializer)
-                yield f"event: {mode}\ndata: {payload}\n\n"
-                
-                # Capture content for titling
-                if mode == "messages":
-                    if isinstance(data, list) and len(data) > 0:
-                        chunk = data[0]
-                        if hasattr(chunk, "content"):
-                            full_response_content += str(chunk.content)
-            
-            # Success signal
-            yield "event: end\ndata: {}\n\n"
-            
-            # 3. Background Sync & Titling
-            # Use a fresh config with ONLY thread_id to ensure we get the LATEST state
-            # (If config has checkpoint_id from request, aget_state returns the old snapshot)
-            latest_config = {"configurable": {"thread_id": thread_id}}
-            final_state = await graph.aget_state(latest_config)
-            
-            if final_state.values and "session_context" in final_state.values:
-                final_messages = final_state.values["session_context"].get("messages", [])
-                if final_messages:
-                    background_tasks.add_task(
-                        sync_conversation_background,
-                        thread_id,
-                        current_user.id,
-                        final_messages
-                    )
+        # Wait for run capacity, telling the client its place in the queue
+        if ticket is not None:
+            async for position in run_admission.positions(ticket):
+                yield QUEUE_EVENT, json.dumps([{"position": position, "queued": len(run_admission.waiting)}])
+
+        graph = await get_persistent_graph()
+        
+        # Merge user config with mandatory thread_id and the run deadline
+        config = (request.config or {}).copy()
+        config["configurable"] = {
+            **config.get("configurable", {}),
+            **deadline_config(request.budget_seconds),
+            "thread_id": thread_id
+        }
+        
+        if request.checkpoint_id:
+            config["configurable"]["checkpoint_id"] = request.checkpoint_id
+
+        # Budget events travel on the custom stream, added here if the client did not ask for it
+        stream_mode = list(request.stream_mode)
+        forward_custom = "custom" in stream_mode
+        if DEADLINE_KEY in config["configurable"] and not forward_custom:
+            stream_mode.append("custom")
+
+        # Run graph stream
+        async for mode, data in graph.astream(
+            initial_input, 
+            config, 
+            stream_mode=stream_mode
+        ):
+            if lease is not None and lease.lost:
+                raise RuntimeError(f"Run lock for thread {thread_id} was lost; stopping to protect its checkpoints")
+
+            if mode == "custom" and isinstance(data, dict) and data.get("type") == BUDGET_EVENT:
+                yield BUDGET_EVENT, json.dumps([data])
+                continue
+            if mode == "custom" and not forward_custom:
+                continue
+
+            # Protocol specifies that 'data' lines must be JSON arrays
+            yield mode, json.dumps([data], default=default_serializer)
             
-            if thread_title == "New Conversation" and full_response_content and payload_message:
+            # Capture content for titling
+            if mode == "messages":
+                if isinstance(data, list) and len(data) > 0:
+                    chunk = data[0]
+                    if hasattr(chunk, "content"):
+                        full_response_content += str(chunk.content)
+        
+        # Budget spent by the whole run, then the success signal
+        final_budget = budget_event("end", config=config)
+        if final_budget is not None:
+            yield BUDGET_EVENT, json.dumps([final_budget])
+        yield "end", "{}"
+        
+        # 3. Background Sync & Titling
+        # Use a fresh config with ONLY thread_id to ensure we get the LATEST state
+        # (If config has checkpoint_id from request, aget_state returns the old snapshot)
+        latest_config = {"configurable": {"thread_id": thread_id}}
+        final_state = await graph.aget_state(latest_config)
+        
+        if final_state.values and "session_context" in final_state.values:
+            final_messages = final_state.values["session_context"].get("messages", [])
+            if final_messages:
                 background_tasks.add_task(
-                    update_thread_title_background,
+                    sync_conversation_background,
                     thread_id,
-                    payload_message,
-                    full_response_content
+                    current_user.id,
+                    final_messages
                 )
+        
+        if thread_title == "New Conversation" and full_response_content and payload_message:
+            background_tasks.add_task(
+                update_thread_title_background,
+                thread_id,
+                payload_message,
+                full_response_content
+            )
 
     except Exception as e:
         logger.error(f"Error in graph stream: {e}", exc_info=True)
-        error_payload = json.dumps([{"detail": str(e)}])
-        yield f"event: error\ndata: {error_payload}\n\n"
+        yield "error", json.dumps([{"detail": str(e)}])
+    finally:
+        # Shielded: on disconnect the stream is being cancelled, the releases must still finish
+        await asyncio.shield(release_run(lease, ticket))
+
+async def langgraph_event_generator(*args, **kwargs) -> Any:
+    """
+    Async generator that yields SSE-formatted strings from LangGraph events.
+    Moved to module level to avoid re-initialization overhead.
+    Takes the arguments of run_graph_events, which it closes when the client disconnects.
+    """
+    async with aclosing(run_graph_events(*args, **kwargs)) as events:
+        async for event, data in events:
+            yield format_sse(event, data)
+
+async def run_in_background(
+    run_id: str,
+    thread_id: str,
+    initial_input: dict,
+    request: ThreadRunStreamRequest,
+    current_user: User,
+    thread_title: Optional[str],
+    payload_message: Optional[str],
+    lease: Optional[RunLease] = None,
+    ticket: Optional[RunTicket] = None
+):
+    """
+    Worker task of a background run: publishes every event to the run's log.
+    Sync and titling run here once the graph is done, as there is no response to attach them to.
+    """
+    background_tasks = BackgroundTasks()
+    finished = False
+    try:
+        async with aclosing(run_graph_events(
+            thread_id, initial_input, request, current_user, background_tasks,
+            thread_title, payload_message, lease=lease, ticket=ticket
+        )) as events:
+            async for event, data in events:
+                await run_streams.publish(run_id, event, data)
+                finished = finished or event in TERMINAL_EVENTS
+        await background_tasks()
+    finally:
+        if not finished:
+            # Cancelled (shutdown): readers still get a terminal event
+            detail = json.dumps([{"detail": f"Run {run_id} was interrupted"}])
+            await asyncio.shield(run_streams.publish(run_id, "error", detail))
+
+async def run_event_generator(run_id: str, last_event_id: Optional[str]) -> Any:
+    """SSE from a background run's log, starting after last_event_id; comments keep idle connections open."""
+    try:
+        async for entry in run_streams.events(run_id, last_event_id):
+            if entry is None:
+                yield ": keep-alive\n\n"
+                continue
+            event_id, event, data = entry
+            yield format_sse(event, data, event_id)
+    except Exception as e:
+        logger.error(f"Error reading run {run_id}: {e}")
+        yield format_sse("error", json.dumps([{"detail": str(e)}]))
 
 @router.get("/threads", response_model=ThreadListResponse)
 async def get_threads(
@@ -211,6 +332,33 @@ async def get_history(
         )
     )
 
+@router.get("/threads/{thread_id}/usage", response_model=ThreadUsageResponse)
+async def get_thread_usage(
+    thread_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(set_user_context)
+):
+    """
+    Returns LLM token usage, latency and cache hits for a thread, per node and per model.
+    Includes calls still buffered in the usage ledger.
+    """
+    # Verify thread ownership (Stealth 404)
+    thread_res = await db.execute(select(ChatThread).where(
+        ChatThread.id == thread_id,
+        ChatThread.user_id == current_user.id,
+        ChatThread.deleted_at.is_(None)
+    ))
+    if not thread_res.scalar_one_or_none():
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    groups = await aggregate_usage(db, ("node", "model"), thread_id=thread_id)
+    return ThreadUsageResponse(
+        thread_id=thread_id,
+        totals=usage_view(rollup(groups).get(None, empty_stats())),
+        by_node=usage_views(rollup(groups, 0)),
+        by_model=usage_views(rollup(groups, 1))
+    )
+
 @router.delete("/threads/{thread_id}", status_code=204)
 async def delete_thread(
     thread_id: str,
@@ -299,7 +447,137 @@ async def stream_run(
     if not thread:
         raise HTTPException(status_code=404, detail="Not Found")
 
-    # 2. Prepare inputs (Context Injection)
+    # 2. Run lock, admission and input
+    lease, ticket, initial_input, payload_message = await start_run(db, thread_id, request, current_user, user_agent)
+
+    return RunStreamingResponse(
+        langgraph_event_generator(
+            thread_id=thread_id,
+            initial_input=initial_input,
+            request=request,
+            current_user=current_user,
+            background_tasks=background_tasks,
+            thread_title=thread.title,
+            payload_message=payload_message,
+            lease=lease,
+            ticket=ticket
+        ),
+        lease=lease,
+        ticket=ticket,
+        media_type="text/event-stream"
+    )
+
+@router.post("/threads/{thread_id}/runs", response_model=ThreadRunResponse, status_code=202)
+async def create_run(
+    thread_id: str,
+    request: ThreadRunStreamRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(set_user_context),
+    user_agent: Optional[str] = Header(None)
+):
+    """
+    Starts a background run and returns its run_id at once.
+    The run keeps going if the client disconnects; follow it with GET .../runs/{run_id}/stream.
+    """
+    # 1. Verify thread ownership (Stealth 404)
+    thread_res = await db.execute(select(ChatThread).where(
+        ChatThread.id == thread_id,
+        ChatThread.user_id == current_user.id,
+        ChatThread.deleted_at.is_(None)
+    ))
+    thread = thread_res.scalar_one_or_none()
+    if not thread:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    # 2. Run lock, admission and input
+    lease, ticket, initial_input, payload_message = await start_run(db, thread_id, request, current_user, user_agent)
+
+    # 3. Event log first, so a client can attach as soon as it has the run_id
+    run_id = str(uuid.uuid4())
+    try:
+        await run_streams.create(run_id, thread_id, str(current_user.id))
+    except Exception as e:
+        await release_run(lease, ticket)
+        logger.error(f"Could not create event log for run on thread {thread_id}: {e}")
+        raise HTTPException(status_code=503, detail="Background runs are unavailable.")
+
+    run_streams.spawn(run_id, run_in_background(
+        run_id=run_id,
+        thread_id=thread_id,
+        initial_input=initial_input,
+        request=request,
+        current_user=current_user,
+        thread_title=thread.title,
+        payload_message=payload_message,
+        lease=lease,
+        ticket=ticket
+    ))
+    return ThreadRunResponse(
+        run_id=run_id,
+        thread_id=thread_id,
+        stream_url=f"/threads/{thread_id}/runs/{run_id}/stream"
+    )
+
+@router.get("/threads/{thread_id}/runs/{run_id}/stream")
+async def join_run_stream(
+    thread_id: str,
+    run_id: str,
+    current_user: User = Depends(set_user_context),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Streams a background run's events, replaying those after Last-Event-ID (all of them without it).
+    Reconnecting never reruns the graph; a finished run replays up to its `end` or `error` event.
+    """
+    # The run's own record decides access (Stealth 404 for other users' runs)
+    meta = await run_streams.meta(run_id)
+    if not meta or meta["thread_id"] != thread_id or meta["user_id"] != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    return StreamingResponse(run_event_generator(run_id, last_event_id), media_type="text/event-stream")
+
+def lock_hold_seconds(budget_seconds: Optional[float]) -> float:
+    """
+    Longest a run keeps its thread lock: the queue wait, the run's budget and one
+    lock TTL to finish up, capped at RUN_LOCK_MAX_HOLD_SECONDS (the cap alone for unbounded runs).
+    """
+    budget = budget_seconds if budget_seconds is not None else settings.RUN_BUDGET_SECONDS
+    if not budget:
+        return settings.RUN_LOCK_MAX_HOLD_SECONDS
+    hold = settings.RUN_QUEUE_TIMEOUT_SECONDS + budget + settings.RUN_LOCK_TTL_SECONDS
+    return min(hold, settings.RUN_LOCK_MAX_HOLD_SECONDS)
+
+async def start_run(db: AsyncSession, thread_id: str, request: ThreadRunStreamRequest, current_user: User, user_agent: Optional[str]):
+    """
+    Takes the thread's run lock and a run slot or queue place, then builds the input.
+    Returns (lease, ticket, initial_input, payload_message); raises 409 / 429 HTTPExceptions.
+    """
+    # One run per thread across all workers; the run holds the lease until it ends
+    lease = await run_locks.acquire(thread_id, max_hold_seconds=lock_hold_seconds(request.budget_seconds))
+    if lease is None:
+        raise HTTPException(status_code=409, detail=f"Conflict: Thread {thread_id} is already being processed.")
+
+    # Admission: a run slot now, a place in the queue, or 429 when the queue is full
+    ticket = await run_admission.admit(current_user.id)
+    if ticket is None:
+        await lease.release()
+        raise HTTPException(
+            status_code=429,
+            detail="Too many runs in progress. Please retry later.",
+            headers={"Retry-After": str(run_admission.retry_after())}
+        )
+    try:
+        initial_input, payload_message = await build_run_input(db, request, current_user, user_agent)
+    except Exception:
+        await release_run(lease, ticket)
+        raise
+    return lease, ticket, initial_input, payload_message
+
+async def build_run_input(db: AsyncSession, request: ThreadRunStreamRequest, current_user: User, user_agent: Optional[str]):
+    """
+    Prepares the graph input (Context Injection).
+    Returns (initial_input, payload_message); a plain `message` becomes a full initial state.
+    """
     initial_input = request.input or {}
     payload_message = None
     
@@ -330,16 +608,4 @@ async def stream_run(
             "agent_interactions": [],
             "output": ""
         }
-
-    return StreamingResponse(
-        langgraph_event_generator(
-            thread_id=thread_id,
-            initial_input=initial_input,
-            request=request,
-            current_user=current_user,
-            background_tasks=background_tasks,
-            thread_title=thread.title,
-            payload_message=payload_message
-        ), 
-        media_type="text/event-stream"
-    )
+    return initial_input, payload_message
@@ -1,6 +1,6 @@
 import enum
 import uuid_utils as uuid7
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Text, Numeric, Enum, Computed, Index
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Date, Text, Numeric, Enum, Computed, Index, Boolean, Float
 from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -232,3 +232,18 @@ class Report(Base):
     __table_args__ = (
         Index("ix_report_search_vector", "search_vector", postgresql_using="gin"),
     )
+
+class LLMUsage(Base):
+    __tablename__ = "llm_usage"
+
+    id = Column(Integer, primary_key=True, index=True)
+    thread_id = Column(String, index=True, nullable=True) # Null for calls outside a graph run
+    correlation_id = Column(String, nullable=True)
+    node = Column(String, index=True, nullable=False)
+    model = Column(String, index=True, nullable=False)
+    prompt_tokens = Column(Integer, default=0, nullable=False)
+    completion_tokens = Column(Integer, default=0, nullable=False)
+    total_tokens = Column(Integer, default=0, nullable=False)
+    latency_ms = Column(Float, default=0.0, nullable=False)
+    cache_hit = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None), index=True)
@@ -1,26 +1,46 @@
 from langchain_core.runnables import RunnableConfig
 from src.graph.state import AgentState
-from src.graph.agents.analyst.subgraph import create_debate_graph
-from src.graph.utils.agents import with_logging, get_next_interaction_id
+from src.graph.agents.analyst.subgraph import get_debate_graph
+from src.graph.utils.agents import with_logging, get_next_interaction_id, get_event_writer
+from src.graph.utils.prefetch import current_thread_id, tool_prefetcher
+from src.graph.utils.deadline import budget_below, emit_budget
+from src.services.blobs import blob_store
+from src.config import settings
 
 @with_logging
 async def analyst_agent(state: AgentState, config: RunnableConfig):
     """
     Adversarial Analyst: Orchestrates a 'Bull vs. Bear' debate out of research results, and synthesizes a final report.
     """
+    # Research is done: speculative calls no plan asked for are no longer needed
+    tool_prefetcher.discard(current_thread_id())
+
+    # Deadline: without time for the debate, the summarizer works from the research directly
+    if budget_below(settings.RUN_MIN_DEBATE_SECONDS, config):
+        emit_budget("analyst", skipped=["debate", "follow_up"], config=config)
+        return {
+            "agent_interactions": [{
+                "id": get_next_interaction_id(state),
+                "agent": "analyst",
+                "answer": "Bull/bear debate skipped because the run budget is nearly spent; answer from the research above.",
+                "next_agent": "summarizer"
+            }]
+        }
+    emit_budget("analyst", config=config)
+
     user_input = state.get("user_input", "Analyze the current portfolio and provide recommendations.")
     
     # Retrieve all research data from specialized interactions
     research_agents = ["fundamental_researcher", "sentiment_researcher", "macro_researcher", "narrative_researcher", "research"]
     research_data = []
-    for interaction in state.get("agent_interactions", []):
+    for interaction in await blob_store.resolve_interactions(state.get("agent_interactions", [])):
         if interaction.get("agent") in research_agents:
             research_data.append(f"--- Data from {interaction['agent']} ---\n{interaction['answer']}")
     
     research_context = "\n\n".join(research_data)
 
-    # Analysis is now always computed fresh
-    debate_graph = create_debate_graph()
+    # Analysis is always computed fresh; only the compiled subgraph is reused
+    debate_graph = get_debate_graph()
     debate_input = {
         "research_data": research_context,
         "user_input": user_input,
@@ -28,7 +48,14 @@ async def analyst_agent(state: AgentState, config: RunnableConfig):
         "agent_interactions": state.get("agent_interactions", [])
     }
     
-    debate_results = await debate_graph.ainvoke(debate_input, config=config)
+    # Debate token events are re-emitted on this graph's custom stream
+    write_event = get_event_writer()
+    debate_results = {}
+    async for mode, data in debate_graph.astream(debate_input, config=config, stream_mode=["custom", "values"]):
+        if mode == "custom":
+            write_event(data)
+        else:
+            debate_results = data
     report = debate_results.get("final_report", "")
     
     initial_interactions_count = len(state.get("agent_interactions", []))
@@ -64,5 +91,5 @@ async def analyst_agent(state: AgentState, config: RunnableConfig):
     new_interactions.append(analyst_interaction)
     
     return {
-        "agent_interactions": new_interactions
+        "agent_interactions": await blob_store.offload_interactions(new_interactions)
     }
@@ -1,14 +1,18 @@
 from src.graph.utils.agents import with_logging
+from functools import lru_cache
 from typing import TypedDict, Optional, Annotated, List
 import operator
 from langgraph.graph import StateGraph, START, END
-from langchain_openai import ChatOpenAI
+from src.services.llm import llm_registry
 from langchain_core.messages import SystemMessage
 from pydantic import BaseModel, Field
 from src.graph.agents.analyst.prompts import INSTRUCTION_GENERATOR_PROMPT, BULL_PROMPT, BEAR_PROMPT, SYNTHESIS_PROMPT
-from src.graph.utils.prompt import convert_state_to_prompt
+from src.graph.utils.prompt import render_state_prompt
 from src.graph.state import AgentInteraction, SessionContext
-from src.graph.utils.agents import get_next_interaction_id
+from src.graph.utils.agents import get_next_interaction_id, get_event_writer
+
+# Custom stream event carrying one token chunk of a debate argument
+DEBATE_TOKEN_EVENT = "debate_token"
 
 class DebateState(TypedDict):
     research_data: str
@@ -26,18 +30,17 @@ class Instructions(BaseModel):
     bull_instruction: str = Field(description="Adversarial prompt for the Bull Analyst")
     bear_instruction: str = Field(description="Adversarial prompt for the Bear Analyst")
 
-def generate_instructions(state: DebateState):
+async def generate_instructions(state: DebateState):
     """
     Debate Orchestrator: Analyzes research data to generate adversarial instructions for sub-agents.
     """
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-    structured_llm = llm.with_structured_output(Instructions, method="function_calling")
+    structured_llm = llm_registry.get("gpt-4o", 0, Instructions, method="function_calling")
     
     prompt = INSTRUCTION_GENERATOR_PROMPT.format(
-        current_context=convert_state_to_prompt(state)
+        current_context=await render_state_prompt(state, "debate")
     )
     
-    result = structured_llm.invoke([SystemMessage(content=prompt)])
+    result = await structured_llm.ainvoke([SystemMessage(content=prompt)])
     return {
         "bull_instruction": result.bull_instruction,
         "bear_instruction": result.bear_instruction,
@@ -49,44 +52,56 @@ def generate_instructions(state: DebateState):
         }]
     }
 
+async def stream_argument(agent: str, prompt: str) -> str:
+    """
+    Streams one debate argument, emitting each token chunk as a custom
+    DEBATE_TOKEN_EVENT, and returns the full text.
+    """
+    llm = llm_registry.get("gpt-4o", 0.7)
+    write_event = get_event_writer()
+    parts = []
+    async for chunk in llm.astream([SystemMessage(content=prompt)]):
+        if chunk.content:
+            parts.append(chunk.content)
+            write_event({"type": DEBATE_TOKEN_EVENT, "agent": agent, "content": chunk.content})
+    return "".join(parts)
+
 @with_logging
-def bull_agent(state: DebateState):
+async def bull_agent(state: DebateState):
     """
     Bull Analyst: Build the strongest possible 'Buy' case for the focus stocks.
     """
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.7)
     prompt = BULL_PROMPT.format(
         instruction=state["bull_instruction"],
-        current_context=convert_state_to_prompt(state)
+        current_context=await render_state_prompt(state, "debate")
     )
-    response = llm.invoke([SystemMessage(content=prompt)])
+    argument = await stream_argument("bull", prompt)
     return {
-        "bull_argument": response.content,
+        "bull_argument": argument,
         "agent_interactions": [{
             "id": get_next_interaction_id(state),
             "agent": "bull",
-            "answer": response.content,
+            "answer": argument,
             "next_agent": "synthesizer"
         }]
     }
 
 @with_logging
-def bear_agent(state: DebateState):
+async def bear_agent(state: DebateState):
     """
     Bear Analyst: Build the strongest possible 'Sell' or 'Avoid' case for the focus stocks.
     """
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.7)
     prompt = BEAR_PROMPT.format(
         instruction=state["bear_instruction"],
-        current_context=convert_state_to_prompt(state)
+        current_context=await render_state_prompt(state, "debate")
     )
-    response = llm.invoke([SystemMessage(content=prompt)])
+    argument = await stream_argument("bear", prompt)
     return {
-        "bear_argument": response.content,
+        "bear_argument": argument,
         "agent_interactions": [{
             "id": get_next_interaction_id(state),
             "agent": "bear",
-            "answer": response.content,
+            "answer": argument,
             "next_agent": "synthesizer"
         }]
     }
@@ -95,20 +110,19 @@ class FinalSynthesis(BaseModel):
     report: str = Field(description="The full synthesized report in Markdown")
     confidence_score: int = Field(description="Overall confidence in the synthesis (0-100)")
 
-def synthesizer(state: DebateState):
+async def synthesizer(state: DebateState):
     """
     Moderator: Synthesizes a final, unbiased report based on the adversarial arguments.
     """
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-    structured_llm = llm.with_structured_output(FinalSynthesis, method="function_calling")
+    structured_llm = llm_registry.get("gpt-4o", 0, FinalSynthesis, method="function_calling")
     
     prompt = SYNTHESIS_PROMPT.format(
         bull_argument=state["bull_argument"],
         bear_argument=state["bear_argument"],
-        current_context=convert_state_to_prompt(state)
+        current_context=await render_state_prompt(state, "debate")
     )
     
-    result = structured_llm.invoke([SystemMessage(content=prompt)])
+    result = await structured_llm.ainvoke([SystemMessage(content=prompt)])
     return {
         "final_report": result.report,
         "confidence_score": result.confidence_score,
@@ -129,9 +143,15 @@ def create_debate_graph():
     builder.add_node("synthesizer", synthesizer)
     
     builder.add_edge(START, "generator")
+    # Bull and bear run concurrently in the same superstep
     builder.add_edge("generator", "bull")
     builder.add_edge("generator", "bear")
     builder.add_edge(["bull", "bear"], "synthesizer")
     builder.add_edge("synthesizer", END)
     
     return builder.compile()
+
+@lru_cache(maxsize=1)
+def get_debate_graph():
+    """The debate subgraph, compiled on first use and shared by every analyst run."""
+    return create_debate_graph()
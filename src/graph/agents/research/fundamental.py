@@ -1,14 +1,16 @@
 import asyncio
-from langchain_openai import ChatOpenAI
+from src.services.llm import llm_registry
 from langchain_core.messages import SystemMessage, HumanMessage
 from src.graph.state import AgentState
-from src.graph.utils.prompt import convert_state_to_prompt, convert_tools_to_prompt
+from src.graph.utils.prompt import render_state_prompt, convert_tools_to_prompt
+from src.graph.agents.research.utils import ToolRegistry
 from src.graph.tools.sec import get_sec_filing_section, get_sec_filing_delta
 from src.graph.tools.research import get_stock_financials
 from src.graph.tools.news import web_search
 from src.graph.agents.research.prompts import FUNDAMENTAL_RESEARCHER_PROMPT, RESEARCH_PLANNER_PLAN_PROMPT
 from src.graph.agents.research.research_plan import ResearchPlan
 from src.graph.utils.agents import get_next_interaction_id, with_logging
+from src.services.blobs import blob_store
 
 TOOLS_LIST = [
     get_stock_financials,
@@ -17,6 +19,7 @@ TOOLS_LIST = [
     web_search
 ]
 
+TOOL_REGISTRY = ToolRegistry(TOOLS_LIST)
 AVAILABLE_TOOLS_PROMPT = convert_tools_to_prompt(TOOLS_LIST)
 
 @with_logging
@@ -24,12 +27,11 @@ async def fundamental_researcher(state: AgentState):
     """
     Fundamental Research Specialist: Analyzes financial statements and SEC filings.
     """
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-    structured_llm = llm.with_structured_output(ResearchPlan, method="function_calling")
+    structured_llm = llm_registry.get("gpt-4o", 0, ResearchPlan, method="function_calling")
     
     messages = [
         SystemMessage(content=FUNDAMENTAL_RESEARCHER_PROMPT.format(
-            current_context=convert_state_to_prompt(state),
+            current_context=await render_state_prompt(state, "researcher"),
             available_tools=AVAILABLE_TOOLS_PROMPT
         )),
         HumanMessage(content=RESEARCH_PLANNER_PLAN_PROMPT.format(dummy=""))
@@ -41,7 +43,7 @@ async def fundamental_researcher(state: AgentState):
 
     # Execute tool calls
     from src.graph.agents.research.utils import execute_tool
-    tasks = [execute_tool(step, TOOLS_LIST, client_ua, local_plan.subject) for step in local_plan.steps]
+    tasks = [execute_tool(step, TOOL_REGISTRY, client_ua, local_plan.subject) for step in local_plan.steps]
     results = await asyncio.gather(*tasks)
     
     for result_str in results:
@@ -49,10 +51,10 @@ async def fundamental_researcher(state: AgentState):
             research_data += result_str + "\n"
 
     return {
-        "agent_interactions": [{
+        "agent_interactions": await blob_store.offload_interactions([{
             "id": get_next_interaction_id(state),
             "agent": "fundamental_researcher",
             "answer": research_data,
             "next_agent": "analyst"
-        }]
+        }])
     }
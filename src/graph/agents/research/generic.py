@@ -1,17 +1,20 @@
 import asyncio
-from langchain_openai import ChatOpenAI
+from src.services.llm import llm_registry
 from langchain_core.messages import SystemMessage, HumanMessage
 from src.graph.state import AgentState
-from src.graph.utils.prompt import convert_state_to_prompt, convert_tools_to_prompt
+from src.graph.utils.prompt import render_state_prompt, convert_tools_to_prompt
+from src.graph.agents.research.utils import ToolRegistry
 from src.graph.tools.news import web_search
 from src.graph.agents.research.prompts import GENERIC_RESEARCHER_PROMPT, RESEARCH_PLANNER_PLAN_PROMPT
 from src.graph.agents.research.research_plan import ResearchPlan
 from src.graph.utils.agents import get_next_interaction_id, with_logging
+from src.services.blobs import blob_store
 
 TOOLS_LIST = [
     web_search
 ]
 
+TOOL_REGISTRY = ToolRegistry(TOOLS_LIST)
 AVAILABLE_TOOLS_PROMPT = convert_tools_to_prompt(TOOLS_LIST)
 
 @with_logging
@@ -19,12 +22,11 @@ async def generic_researcher(state: AgentState):
     """
     General Research Specialist: Acts as a catch-all for broad queries using web search.
     """
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-    structured_llm = llm.with_structured_output(ResearchPlan, method="function_calling")
+    structured_llm = llm_registry.get("gpt-4o", 0, ResearchPlan, method="function_calling")
     
     messages = [
         SystemMessage(content=GENERIC_RESEARCHER_PROMPT.format(
-            current_context=convert_state_to_prompt(state),
+            current_context=await render_state_prompt(state, "researcher"),
             available_tools=AVAILABLE_TOOLS_PROMPT
         )),
         HumanMessage(content=RESEARCH_PLANNER_PLAN_PROMPT.format(dummy=""))
@@ -36,7 +38,7 @@ async def generic_researcher(state: AgentState):
 
     # Execute tool calls
     from src.graph.agents.research.utils import execute_tool
-    tasks = [execute_tool(step, TOOLS_LIST, client_ua, local_plan.subject) for step in local_plan.steps]
+    tasks = [execute_tool(step, TOOL_REGISTRY, client_ua, local_plan.subject) for step in local_plan.steps]
     results = await asyncio.gather(*tasks)
     
     for result_str in results:
@@ -44,10 +46,10 @@ async def generic_researcher(state: AgentState):
             research_data += result_str + "\n"
 
     return {
-        "agent_interactions": [{
+        "agent_interactions": await blob_store.offload_interactions([{
             "id": get_next_interaction_id(state),
             "agent": "generic_researcher",
             "answer": research_data,
             "next_agent": "analyst"
-        }]
+        }])
     }
@@ -1,8 +1,8 @@
 import asyncio
-from langchain_openai import ChatOpenAI
+from src.services.llm import llm_registry
 from langchain_core.messages import SystemMessage, HumanMessage
 from src.graph.state import AgentState
-from src.graph.utils.prompt import convert_state_to_prompt, convert_tools_to_prompt
+from src.graph.utils.prompt import render_state_prompt, convert_tools_to_prompt
 from src.graph.tools.narrative import (
     get_indices_performance, 
     get_historical_narrative, 
@@ -12,7 +12,8 @@ from src.graph.tools.news import get_stock_news, web_search
 from src.graph.agents.research.prompts import NARRATIVE_RESEARCHER_PROMPT, RESEARCH_PLANNER_PLAN_PROMPT
 from src.graph.agents.research.research_plan import ResearchPlan
 from src.graph.utils.agents import get_next_interaction_id, with_logging
-from src.graph.agents.research.utils import execute_tool
+from src.services.blobs import blob_store
+from src.graph.agents.research.utils import ToolRegistry, execute_tool
 
 TOOLS_LIST = [
     get_indices_performance,
@@ -22,6 +23,7 @@ TOOLS_LIST = [
     synthesize_growth_narrative
 ]
 
+TOOL_REGISTRY = ToolRegistry(TOOLS_LIST)
 AVAILABLE_TOOLS_PROMPT = convert_tools_to_prompt(TOOLS_LIST)
 
 @with_logging
@@ -30,12 +32,11 @@ async def narrative_researcher(state: AgentState):
     Narrative Research Specialist: Analyzes growth narratives and narrative shifts.
     Decides which data points to gather (indices, news, history) before synthesizing.
     """
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-    structured_llm = llm.with_structured_output(ResearchPlan, method="function_calling")
+    structured_llm = llm_registry.get("gpt-4o", 0, ResearchPlan, method="function_calling")
     
     messages = [
         SystemMessage(content=NARRATIVE_RESEARCHER_PROMPT.format(
-            current_context=convert_state_to_prompt(state),
+            current_context=await render_state_prompt(state, "researcher"),
             available_tools=AVAILABLE_TOOLS_PROMPT
         )),
         HumanMessage(content=RESEARCH_PLANNER_PLAN_PROMPT.format(dummy=""))
@@ -47,20 +48,21 @@ async def narrative_researcher(state: AgentState):
 
     # Execute tool calls
     # Improved execute_tool now handles the mapping internally if we pass the subject
-    tasks = [execute_tool(step, TOOLS_LIST, client_ua, local_plan.subject) for step in local_plan.steps]
+    tasks = [execute_tool(step, TOOL_REGISTRY, client_ua, local_plan.subject) for step in local_plan.steps]
     results = await asyncio.gather(*tasks)
     
     for result_str in results:
         if result_str:
             research_data += result_str + "\n"
 
-    # Store the final synthesized report or context
+    # Store the final synthesized report or context (a preview when offloaded to the blob store)
+    interactions = await blob_store.offload_interactions([{
+        "id": get_next_interaction_id(state),
+        "agent": "narrative_researcher",
+        "answer": research_data,
+        "next_agent": "analyst"
+    }])
     return {
-        "agent_interactions": [{
-            "id": get_next_interaction_id(state),
-            "agent": "narrative_researcher",
-            "answer": research_data,
-            "next_agent": "analyst"
-        }],
-        "market_context": research_data
+        "agent_interactions": interactions,
+        "market_context": interactions[0]["answer"]
     }
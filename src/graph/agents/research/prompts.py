@@ -38,6 +38,7 @@ SENTIMENT_RESEARCHER_PROMPT = ChatPromptTemplate.from_template(
 Guidelines for Tool Selection:
 - Use `get_stock_news` for recent headlines. Provide the 'ticker' in tool_params.
 - Use `get_market_sentiment` for an aggregated pulse from multiple sources.
+- Use `get_portfolio_sentiment` instead of several `get_market_sentiment` calls when the question covers multiple tickers (e.g. a whole portfolio). Provide the 'tickers' list in tool_params.
 - Use `web_search` for social trends or other sentiment drivers.
 """
 )
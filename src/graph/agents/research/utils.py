@@ -1,60 +1,227 @@
+import asyncio
+import functools
 import inspect
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Union
+from src.graph.tools.research import get_stock_financials
+from src.graph.tools.news import get_stock_news
+from src.graph.tools.narrative import get_indices_performance
+from src.graph.utils.prefetch import PrefetchCall, current_thread_id, extract_symbols, tool_prefetcher
+from src.graph.utils.tool_call import ToolPolicy, default_policy, tool_metrics
+from src.graph.utils.deadline import MIN_ATTEMPT_SECONDS, bounded_timeout, budget_below
+from src.config import settings
 
-async def execute_tool(step, tools_list, user_agent="", subject=None):
+# Tool name -> stand-in callable (e.g. offline backends for benchmarks)
+tool_overrides: Dict[str, Callable] = {}
+
+def set_tool_overrides(overrides: Optional[Dict[str, Callable]]):
+    """
+    Replaces tools by name wherever a researcher calls them.
+    Only tools already in a researcher's list can be replaced. Passing None restores the real tools.
+    """
+    tool_overrides.clear()
+    tool_overrides.update(overrides or {})
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """A tool with the signature facts execute_tool needs, computed once."""
+    name: str
+    func: Callable
+    params: FrozenSet[str]
+    accepts_user_agent: bool
+    is_coroutine: bool
+    policy: ToolPolicy
+
+    @classmethod
+    def build(cls, func: Callable, name: Optional[str] = None, policy: Optional[ToolPolicy] = None) -> "ToolSpec":
+        """Precomputes func's metadata; policy applies only if func does not declare its own."""
+        signature = inspect.signature(func).parameters
+        accepts_kwargs = any(p.kind == inspect.Parameter.VAR_KEYWORD for p in signature.values())
+        declared = getattr(func, "tool_policy", None)
+        return cls(
+            name=name or func.__name__,
+            func=func,
+            params=frozenset(signature),
+            accepts_user_agent="user_agent" in signature or accepts_kwargs,
+            is_coroutine=inspect.iscoroutinefunction(func),
+            policy=declared if isinstance(declared, ToolPolicy) else policy or default_policy()
+        )
+
+class ToolRegistry:
+    """
+    The tools one researcher may call, keyed by name. Built once at import;
+    overrides keep the replaced tool's policy unless they declare their own.
+    """
+
+    def __init__(self, tools: Sequence[Callable]):
+        self.specs: Dict[str, ToolSpec] = {tool.__name__: ToolSpec.build(tool) for tool in tools}
+        self._overrides: Dict[str, ToolSpec] = {}
+
+    def resolve(self, name: str) -> Optional[ToolSpec]:
+        spec = self.specs.get(name)
+        override = tool_overrides.get(name)
+        if spec is None or override is None:
+            return spec
+        cached = self._overrides.get(name)
+        if cached is None or cached.func is not override:
+            cached = self._overrides[name] = ToolSpec.build(override, name, spec.policy)
+        return cached
+
+# Per-tool concurrency limits shared by every researcher
+_tool_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+def tool_semaphore(spec: ToolSpec) -> asyncio.Semaphore:
+    semaphore = _tool_semaphores.get(spec.name)
+    if semaphore is None:
+        semaphore = _tool_semaphores[spec.name] = asyncio.Semaphore(spec.policy.max_concurrency)
+    return semaphore
+
+def reset_tool_limits():
+    """Drops the per-tool semaphores (they belong to the event loop that first waited on them)."""
+    _tool_semaphores.clear()
+
+# Calls researchers predictably make for a ticker in the question, and once per question
+PREFETCH_SYMBOL_TOOLS = [get_stock_financials, get_stock_news]
+PREFETCH_MARKET_TOOLS = [get_indices_performance]
+PREFETCH_REGISTRY = ToolRegistry(PREFETCH_SYMBOL_TOOLS + PREFETCH_MARKET_TOOLS)
+# execute_tool's "no speculative result" marker; None is a valid tool result
+_NO_RESULT = object()
+
+def prefetch_calls(user_input: str, user_agent: str = "") -> List[PrefetchCall]:
+    """Speculative (tool_name, tool, params) calls for the tickers mentioned in user_input."""
+    symbols = extract_symbols(user_input)
+    if not symbols:
+        return []
+
+    calls = []
+    for tool in PREFETCH_SYMBOL_TOOLS:
+        calls.extend(_prefetch_call(tool, user_agent, symbol=symbol) for symbol in symbols)
+    calls.extend(_prefetch_call(tool, user_agent) for tool in PREFETCH_MARKET_TOOLS)
+    return calls
+
+def _prefetch_call(tool: Callable, user_agent: str, **params) -> PrefetchCall:
+    """
+    The call execute_tool would make: override applied, user_agent passed where accepted,
+    and run through run_tool so it shares the tool's concurrency limit, timeout, retries and metrics.
+    """
+    spec = PREFETCH_REGISTRY.resolve(tool.__name__)
+    if spec.accepts_user_agent:
+        params["user_agent"] = user_agent
+
+    # wraps keeps the tool's signature visible to call_key
+    @functools.wraps(spec.func)
+    async def speculative(**call_params):
+        return await run_tool(spec, call_params)
+    return spec.name, speculative, params
+
+def prepare_params(spec: ToolSpec, step, user_agent: str = "", subject: Optional[str] = None) -> Dict[str, Any]:
+    """Fills in the step's parameters: user_agent where accepted, the plan subject for a missing symbol/ticker."""
+    if spec.accepts_user_agent:
+        step.tool_params["user_agent"] = user_agent
+
+    # AUTO-MAPPING for missing symbol/ticker from global subject
+    if subject:
+        # 1. Map to 'symbol' if missing but required
+        if "symbol" in spec.params and "symbol" not in step.tool_params:
+            step.tool_params["symbol"] = subject
+        # 2. Map to 'ticker' if missing but required
+        if "ticker" in spec.params and "ticker" not in step.tool_params:
+            step.tool_params["ticker"] = subject
+        # 3. Fallback for mixed naming
+        if step.tool_name == "get_stock_financials" and "symbol" not in step.tool_params:
+            step.tool_params["symbol"] = subject
+
+    # Quick fix for web_search arguments
+    if step.tool_name == "web_search":
+        if "query" in step.tool_params and "queries" not in step.tool_params:
+            step.tool_params["queries"] = [step.tool_params.pop("query")]
+        elif "q" in step.tool_params and "queries" not in step.tool_params:
+            step.tool_params["queries"] = [step.tool_params.pop("q")]
+        elif "queries" in step.tool_params and isinstance(step.tool_params["queries"], str):
+            step.tool_params["queries"] = [step.tool_params["queries"]]
+        elif "queries" not in step.tool_params:
+            # Fallback if somehow it's empty but called
+            step.tool_params["queries"] = ["latest market news"]
+    return step.tool_params
+
+async def _call_limited(spec: ToolSpec, params: Dict[str, Any]) -> Any:
+    async with tool_semaphore(spec):
+        if spec.is_coroutine:
+            return await spec.func(**params)
+        # Sync tools run in a thread so their timeout can be enforced
+        return await asyncio.to_thread(spec.func, **params)
+
+async def run_tool(spec: ToolSpec, params: Dict[str, Any], timeout: Optional[float] = None) -> Any:
     """
-    Executes a tool from a given list of tools based on the step definition.
+    Calls a tool under its policy and records each attempt in tool_metrics.
+    The timeout (the policy's unless given) covers waiting for a concurrency slot, and each
+    attempt's is cut to the run's remaining budget. Exceptions are retried with exponential
+    backoff while the budget still covers the backoff plus a minimal attempt; timeouts are
+    not retried and raise asyncio.TimeoutError.
     """
-    # Build a lookup mapping for tool names from the provided function list
-    tool_map = {tool.__name__: tool for tool in tools_list}
-    tool = tool_map.get(step.tool_name)
-    if tool:
+    policy = spec.policy
+    timeout = timeout if timeout is not None else policy.timeout
+    attempt = 0
+    while True:
+        start = time.perf_counter()
         try:
-            # Check if the tool accepts a user_agent parameter or **kwargs
-            sig = inspect.signature(tool)
-            params = sig.parameters
-            accepts_kwargs = any(
-                p.kind == inspect.Parameter.VAR_KEYWORD for p in params.values()
-            )
-            
-            if "user_agent" in params or accepts_kwargs:
-                step.tool_params["user_agent"] = user_agent
-                
-            # AUTO-MAPPING for missing symbol/ticker from global subject
-            if subject:
-                # 1. Map to 'symbol' if missing but required
-                if "symbol" in params and "symbol" not in step.tool_params:
-                    step.tool_params["symbol"] = subject
-                # 2. Map to 'ticker' if missing but required
-                if "ticker" in params and "ticker" not in step.tool_params:
-                    step.tool_params["ticker"] = subject
-                # 3. Fallback for mixed naming
-                if step.tool_name == "get_stock_financials" and "symbol" not in step.tool_params:
-                    step.tool_params["symbol"] = subject
-
-            # Quick fix for web_search arguments
-            if step.tool_name == "web_search":
-                if "query" in step.tool_params and "queries" not in step.tool_params:
-                    step.tool_params["queries"] = [step.tool_params.pop("query")]
-                elif "q" in step.tool_params and "queries" not in step.tool_params:
-                    step.tool_params["queries"] = [step.tool_params.pop("q")]
-                elif "queries" in step.tool_params and isinstance(step.tool_params["queries"], str):
-                    step.tool_params["queries"] = [step.tool_params["queries"]]
-                elif "queries" not in step.tool_params:
-                    # Fallback if somehow it's empty but called
-                    step.tool_params["queries"] = ["latest market news"]
-                
-            # Execute standard function with unpacked dictionary parameters
-            if inspect.iscoroutinefunction(tool):
-                result = await tool(**step.tool_params)
-            else:
-                result = tool(**step.tool_params)
-                
-            if isinstance(result, str):
-                return result
-            return str(result) + "\n"
+            result = await asyncio.wait_for(_call_limited(spec, params), bounded_timeout(timeout))
+        except asyncio.TimeoutError:
+            tool_metrics.record(spec.name, time.perf_counter() - start, "timeout")
+            raise
         except Exception as e:
-            print(f"Error executing tool {step.tool_name}: {e}")
-            return f"Error executing tool {step.tool_name}: {e}\n"
-    else:
-            print(f"Tool {step.tool_name} not found in the allowed tools list.")
-            return f"Tool {step.tool_name} not found.\n"
+            tool_metrics.record(spec.name, time.perf_counter() - start, "error")
+            if attempt >= policy.retries:
+                raise
+            backoff = policy.retry_backoff * 2 ** attempt
+            if budget_below(backoff + MIN_ATTEMPT_SECONDS + settings.RUN_SUMMARY_RESERVE_SECONDS):
+                print(f"Tool {spec.name} failed and the run's budget leaves no time to retry: {e}")
+                raise
+            attempt += 1
+            print(f"Tool {spec.name} failed (attempt {attempt} of {policy.retries + 1}), retrying: {e}")
+            await asyncio.sleep(backoff)
+            continue
+        tool_metrics.record(spec.name, time.perf_counter() - start)
+        return result
+
+async def execute_tool(step, tools: Union[ToolRegistry, Sequence[Callable]], user_agent="", subject=None):
+    """
+    Executes a tool from a researcher's registry (or plain list of tools) based on the step definition.
+    A tool that times out yields a note instead of an exception, so the researcher keeps its other results.
+    Timeouts are cut short when the run's deadline is closer than the tool's own limit.
+    """
+    registry = tools if isinstance(tools, ToolRegistry) else ToolRegistry(tools)
+    spec = registry.resolve(step.tool_name)
+    if spec is None:
+        print(f"Tool {step.tool_name} not found in the allowed tools list.")
+        return f"Tool {step.tool_name} not found.\n"
+
+    timeout = bounded_timeout(spec.policy.timeout)
+    try:
+        params = prepare_params(spec, step, user_agent, subject)
+
+        # Reuse the supervisor's speculative call for the same tool and arguments
+        # A speculative call may legitimately return None, so a miss needs its own marker
+        result = _NO_RESULT
+        speculative = tool_prefetcher.lookup(current_thread_id(), spec.name, spec.func, params)
+        if speculative is not None:
+            try:
+                result = await asyncio.wait_for(speculative, timeout)
+            except asyncio.TimeoutError:
+                raise
+            except Exception as e:
+                print(f"Speculative {step.tool_name} failed, calling it again: {e}")
+
+        if result is _NO_RESULT:
+            result = await run_tool(spec, params)
+
+        if isinstance(result, str):
+            return result
+        return str(result) + "\n"
+    except asyncio.TimeoutError:
+        print(f"Tool {step.tool_name} timed out after {timeout:g}s")
+        return f"Tool {step.tool_name} timed out after {timeout:g}s; its results are missing from this research.\n"
+    except Exception as e:
+        print(f"Error executing tool {step.tool_name}: {e}")
+        return f"Error executing tool {step.tool_name}: {e}\n"
@@ -1,12 +1,30 @@
-from typing import List
+from typing import Any, Dict, List, Tuple
+import logging
+import time
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
+from langgraph.constants import TAG_NOSTREAM
+from src.config import settings
+from src.services.llm import llm_registry
 from langchain_core.messages import SystemMessage, AIMessage
 from src.graph.state import AgentState
 import uuid
-from src.graph.agents.summarizer.prompts import SUMMARIZER_SYSTEM_PROMPT
+from src.graph.agents.summarizer.prompts import SUMMARIZER_SYSTEM_PROMPT, SUMMARIZER_ANSWER_PROMPT, SUMMARIZER_METADATA_PROMPT
 from src.graph.utils.agents import get_next_interaction_id, with_logging
-from src.graph.utils.prompt import convert_state_to_prompt
+from src.graph.utils.prompt import render_state_prompt
+from src.graph.utils.prefetch import current_thread_id, tool_prefetcher
+from src.graph.utils.deadline import emit_budget, remaining_budget
+from src.services.blobs import blob_store
+
+logger = logging.getLogger(__name__)
+
+class SummaryMetadata(BaseModel):
+    """
+    Report metadata generated after the streamed answer.
+    """
+    title: str = Field(description="A concise and descriptive title for the report.")
+    category: str = Field(description="The primary category of the report: STOCK, REAL_ESTATE, MACRO, FUND, or GENERAL.")
+    topic: str = Field(description="The specific topic of the report (e.g., 'NVDA', 'Gold Market').")
+    tags: List[str] = Field(description="2-3 hashtags summarizing the content (e.g., #growth, #volatility).")
 
 class SummarizerOutput(BaseModel):
     """
@@ -18,30 +36,78 @@ class SummarizerOutput(BaseModel):
     topic: str = Field(description="The specific topic of the report (e.g., 'NVDA', 'Gold Market').")
     tags: List[str] = Field(description="2-3 hashtags summarizing the content (e.g., #growth, #volatility).")
 
+async def stream_final_answer(current_context: str) -> Tuple[str, float]:
+    """
+    Streams the final answer as plain text, so LangGraph's `messages` stream
+    forwards tokens as they are generated.
+    Returns (answer, time to first token in seconds).
+    """
+    llm = llm_registry.get("gpt-4o", 0)
+    system_msg = SystemMessage(content=SUMMARIZER_ANSWER_PROMPT.format(current_context=current_context))
+
+    started = time.perf_counter()
+    ttft = 0.0
+    parts = []
+    async for chunk in llm.astream([system_msg]):
+        if chunk.content:
+            if not parts:
+                ttft = time.perf_counter() - started
+            parts.append(chunk.content)
+    return "".join(parts), ttft
+
+async def generate_metadata(final_answer: str) -> Dict[str, Any]:
+    """
+    Cheap follow-up call for title, category, topic and tags.
+    Tagged nostream so its output never appears in the `messages` stream.
+    Returns {} if the call fails; the answer has already been delivered.
+    """
+    try:
+        structured_llm = llm_registry.get("gpt-4o-mini", 0, SummaryMetadata, method="function_calling")
+        system_msg = SystemMessage(content=SUMMARIZER_METADATA_PROMPT.format(final_answer=final_answer))
+        metadata = await structured_llm.ainvoke([system_msg], config={"tags": [TAG_NOSTREAM]})
+        return metadata.model_dump()
+    except Exception as e:
+        logger.warning(f"[SUMMARIZER] Metadata generation failed: {e}")
+        return {}
+
 @with_logging
 async def summarizer_agent(state: AgentState):
     """
     Summarizer Agent: Reviews all agent interactions and synthesizes a final answer.
+    With SUMMARIZER_STREAMING the answer is streamed first and metadata is filled in afterwards.
     """
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-    structured_llm = llm.with_structured_output(SummarizerOutput)
-        
-    system_msg = SystemMessage(content=SUMMARIZER_SYSTEM_PROMPT.format(
-        current_context=convert_state_to_prompt(state)
-    ))
-        
-    response = await structured_llm.ainvoke([system_msg])
-    final_content = response.final_answer
-        
+    tool_prefetcher.close(current_thread_id())
+    emit_budget("summarizer")
+    current_context = await render_state_prompt(state, "summarizer")
+
+    if settings.SUMMARIZER_STREAMING:
+        final_content, ttft = await stream_final_answer(current_context)
+        logger.info(f"[SUMMARIZER] Time to first token: {ttft * 1000:.0f} ms")
+        if remaining_budget() == 0.0:
+            # Past the run deadline: deliver the answer without the metadata call
+            emit_budget("summarizer", skipped=["report_metadata"])
+            report_metadata = {}
+        else:
+            report_metadata = await generate_metadata(final_content)
+    else:
+        structured_llm = llm_registry.get("gpt-4o", 0, SummarizerOutput)
+        system_msg = SystemMessage(content=SUMMARIZER_SYSTEM_PROMPT.format(
+            current_context=current_context
+        ))
+        response = await structured_llm.ainvoke([system_msg])
+        final_content = response.final_answer
+        report_metadata = response.model_dump(exclude={"final_answer"})
+
     return {
         "output": final_content,
+        "report_metadata": report_metadata,
         "session_context": {
             "messages": [AIMessage(content=final_content, id=str(uuid.uuid4()))]
         },
-        "agent_interactions": [{
+        "agent_interactions": await blob_store.offload_interactions([{
             "id": get_next_interaction_id(state),
             "agent": "summarizer",
             "answer": final_content,
             "next_agent": "end"
-        }]
+        }])
     }
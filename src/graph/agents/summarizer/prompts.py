@@ -1,6 +1,6 @@
 from langchain_core.prompts import ChatPromptTemplate
 
-SUMMARIZER_SYSTEM_PROMPT = ChatPromptTemplate.from_template("""
+SUMMARIZER_INSTRUCTIONS = """
 You are the final summarizing agent for the Stock Planner application.
 Your task is to review all the agent interaction answers between the various specialized agents that worked on the user's request, and produce a single, cohesive, and comprehensive 'output'.
 
@@ -13,10 +13,28 @@ Current Context:
 {current_context}
 
 Synthesize these interactions into a clean, well-formatted final response that directly addresses the user's overarching question in user's language. Use Markdown formatting.
+"""
 
+SUMMARIZER_SYSTEM_PROMPT = ChatPromptTemplate.from_template(SUMMARIZER_INSTRUCTIONS + """
 Additionally, generate metadata for this synthesis:
 1. Title: A short, engaging title.
 2. Category: Choose from [STOCK, REAL_ESTATE, MACRO, FUND, GENERAL].
 3. Topic: The primary subject (e.g., a ticker or a market name).
 4. Tags: 2-3 specific tags starting with #.
 """)
+
+# Streaming mode: the answer alone, metadata is generated afterwards
+SUMMARIZER_ANSWER_PROMPT = ChatPromptTemplate.from_template(SUMMARIZER_INSTRUCTIONS + """
+Respond with the final response only.
+""")
+
+SUMMARIZER_METADATA_PROMPT = ChatPromptTemplate.from_template("""
+Generate metadata for the following financial report:
+1. Title: A short, engaging title, in the same language as the report.
+2. Category: Choose from [STOCK, REAL_ESTATE, MACRO, FUND, GENERAL].
+3. Topic: The primary subject (e.g., a ticker or a market name).
+4. Tags: 2-3 specific tags starting with #.
+
+Report:
+{final_answer}
+""")
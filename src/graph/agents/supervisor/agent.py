@@ -1,23 +1,39 @@
-from langchain_openai import ChatOpenAI
+from src.services.llm import llm_registry
 from langchain_core.messages import SystemMessage, HumanMessage
 from src.graph.state import AgentState
 from src.graph.agents.supervisor.prompts import SUPERVISOR_PROMPT, SUPERVISOR_PLAN_PROMPT
 from src.graph.agents.supervisor.response import SupervisorResponse
-from src.graph.utils.prompt import convert_state_to_prompt
+from src.graph.utils.prompt import render_state_prompt
 from src.graph.agents.supervisor.next_agents import get_supervisor_next_agents_prompt
 from src.graph.utils.agents import get_next_interaction_id, with_logging
+from src.graph.utils.prefetch import current_thread_id, tool_prefetcher
+from src.graph.agents.research import fundamental, sentiment, macro, narrative, generic
+from src.graph.agents.research.utils import prefetch_calls
+from src.graph.utils.deadline import budget_below, emit_budget
+from src.config import settings
+
+# Tools each routable researcher may call, to cancel prefetches the route cannot use
+RESEARCHER_TOOLS = {
+    "fundamental_researcher": fundamental.TOOLS_LIST,
+    "sentiment_researcher": sentiment.TOOLS_LIST,
+    "macro_researcher": macro.TOOLS_LIST,
+    "narrative_researcher": narrative.TOOLS_LIST,
+    "generic_researcher": generic.TOOLS_LIST
+}
+
+def routed_tool_names(next_agents) -> set:
+    return {tool.__name__ for agent in next_agents for tool in RESEARCHER_TOOLS.get(agent, [])}
 
 @with_logging
 async def supervisor_agent(state: AgentState):
     """
     Strategic Investment Planner: Decides the initial step and routes to the appropriate agents.
     """
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-    structured_llm = llm.with_structured_output(SupervisorResponse, method="function_calling")
+    structured_llm = llm_registry.get("gpt-4o", 0, SupervisorResponse, method="function_calling")
     
     # Use utility functions for prompt context
     system_msg = SystemMessage(content=SUPERVISOR_PROMPT.format(
-        current_context=convert_state_to_prompt(state),
+        current_context=await render_state_prompt(state, "supervisor"),
         available_agents=get_supervisor_next_agents_prompt()
     ))
     human_msg = HumanMessage(content=SUPERVISOR_PLAN_PROMPT.format(dummy=""))
@@ -38,8 +54,31 @@ async def supervisor_agent(state: AgentState):
                 "next_agent": "summarizer"
             }]
         }
+
+    # Deadline: too little time left for research, answer from what is already known
+    if budget_below(settings.RUN_MIN_RESEARCH_SECONDS):
+        print("--- SUPERVISOR: Run budget nearly spent, skipping research ---")
+        emit_budget("supervisor", skipped=["research"])
+        return {
+            "session_context": {"revision_count": 1},
+            "agent_interactions": [{
+                "id": get_next_interaction_id(state),
+                "agent": "supervisor",
+                "answer": "Run budget nearly spent",
+                "next_agent": "summarizer"
+            }]
+        }
+    emit_budget("supervisor")
     
+    # Warm predictable tool calls for tickers in the question while the plan is generated
+    thread_id = current_thread_id()
+    user_input = state.get("user_input", "")
+    if not tool_prefetcher.active(thread_id, user_input):
+        client_ua = state.get("session_context", {}).get("user_agent", "")
+        tool_prefetcher.start(thread_id, user_input, prefetch_calls(user_input, client_ua))
+
     plan_output = await structured_llm.ainvoke(messages)
+    tool_prefetcher.retain(thread_id, routed_tool_names(plan_output.next_agents or []))
     
     # next_agent is kept for legacy compatibility with routers that expect a single string
     # We join them with a comma for parallel nodes
@@ -10,16 +10,30 @@ from src.graph.agents.research.generic import generic_researcher
 from src.graph.agents.analyst.agent import analyst_agent
 from src.graph.agents.off_topic.agent import off_topic_agent
 from src.graph.agents.summarizer.agent import summarizer_agent
-from typing import List, Union
+from src.graph.persistence import checkpointer_pool
+from src.graph.utils.deadline import budget_below, emit_budget
+from src.config import settings
+from typing import List, Optional, Union
 
 class MeshRouter:
     """
     Router for the multi-agent mesh.
     Determines the next agent based on the last agent interaction.
     Supports parallel fan-out if next_agent contains a comma.
+    Optional destinations (follow-ups) are skipped in favour of the summarizer
+    once the run has less than RUN_MIN_FOLLOW_UP_SECONDS left.
     """
-    def __init__(self, allowed_destinations: List[str]):
+    def __init__(self, allowed_destinations: List[str], optional_destinations: Optional[List[str]] = None):
         self.allowed_destinations = allowed_destinations
+        self.optional_destinations = set(optional_destinations or [])
+
+    def skip_optional(self, source: str, agents: List[str]) -> bool:
+        skipped = [a for a in agents if a in self.optional_destinations]
+        if not skipped or not budget_below(settings.RUN_MIN_FOLLOW_UP_SECONDS):
+            return False
+        print(f"--- ROUTER: Run budget nearly spent, skipping {', '.join(skipped)} after {source} ---")
+        emit_budget(source, skipped=skipped)
+        return True
 
     def __call__(self, state: AgentState) -> Union[str, List[Send]]:
         interactions = state.get("agent_interactions", [])
@@ -28,17 +42,22 @@ class MeshRouter:
         
         last_interaction = interactions[-1]
         next_agent_raw = last_interaction.get("next_agent", "summarizer").lower()
+        source = last_interaction.get("agent", "router")
         
         # Handle parallel fan-out
         if "," in next_agent_raw:
             agents = [a.strip() for a in next_agent_raw.split(",")]
             valid_agents = [a for a in agents if a in self.allowed_destinations]
+            if valid_agents and self.skip_optional(source, valid_agents):
+                return "summarizer"
             if valid_agents:
                 # Return a list of Send objects for parallel execution
                 return [Send(a, state) for a in valid_agents]
         
         # Single destination
         if next_agent_raw in self.allowed_destinations:
+            if self.skip_optional(source, [next_agent_raw]):
+                return "summarizer"
             return next_agent_raw
             
         print(f"WARNING: Invalid next_agent '{next_agent_raw}'. Falling back.")
@@ -84,16 +103,34 @@ def create_graph(checkpointer=None):
     workflow.add_edge("generic_researcher", "analyst")
     
     # Analyst routes to Supervisor (for follow-ups) or Summarizer
+    follow_ups = ["supervisor", "fundamental_researcher", "sentiment_researcher", "macro_researcher", "narrative_researcher", "generic_researcher"]
     workflow.add_conditional_edges(
         "analyst",
-        MeshRouter(["supervisor", "fundamental_researcher", "sentiment_researcher", "macro_researcher", "narrative_researcher", "generic_researcher", "summarizer"])
+        MeshRouter(follow_ups + ["summarizer"], optional_destinations=follow_ups)
     )
     
     workflow.add_conditional_edges(
         "off_topic",
-        MeshRouter(["fundamental_researcher", "sentiment_researcher", "macro_researcher", "narrative_researcher", "generic_researcher", "supervisor", "summarizer"])
+        MeshRouter(follow_ups + ["summarizer"], optional_destinations=follow_ups)
     )
 
     workflow.add_edge("summarizer", END)
     
     return workflow.compile(checkpointer=checkpointer)
+
+# Compiled main graph and the checkpointer it is bound to
+_compiled = {"checkpointer": None, "graph": None}
+
+def get_graph(checkpointer=None):
+    """
+    The main graph compiled once and reused while the checkpointer stays the same.
+    Compiled graphs hold no per-run state, so concurrent runs can share one.
+    """
+    if _compiled["graph"] is None or _compiled["checkpointer"] is not checkpointer:
+        _compiled["graph"] = create_graph(checkpointer=checkpointer)
+        _compiled["checkpointer"] = checkpointer
+    return _compiled["graph"]
+
+async def get_persistent_graph():
+    """The main graph bound to the shared Redis checkpointer."""
+    return get_graph(await checkpointer_pool.get())
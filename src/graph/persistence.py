@@ -1,24 +1,86 @@
+import asyncio
+import logging
+from typing import Optional
+import redis.asyncio as redis
 from langgraph.checkpoint.redis.aio import AsyncRedisSaver
 from src.config import settings
 
-def get_checkpointer() -> AsyncRedisSaver:
-    """
-    Creates and returns an AsyncRedisSaver instance connected to Redis.
-    Configures a 30-minute sliding TTL for checkpoints.
-    
-    Note: This checkpointer must be used within an 'async with' block to 
-    initialize its connection pool.
-    """
+logger = logging.getLogger(__name__)
+
+def checkpoint_ttl() -> dict:
     # 30-minute sliding window (Note: AsyncRedisSaver uses minutes for default_ttl)
     # refresh_on_read=True ensures TTL is reset every time the state is accessed
-    ttl_config = {
+    return {
         "default_ttl": settings.REDIS_CHECKPOINT_TTL_MIN,
         "refresh_on_read": True
     }
-    
+
+def get_checkpointer() -> AsyncRedisSaver:
+    """
+    Creates and returns an AsyncRedisSaver instance connected to Redis.
+    Configures a 30-minute sliding TTL for checkpoints.
+
+    Note: This checkpointer must be used within an 'async with' block to
+    initialize its connection pool. Request handlers use the shared
+    checkpointer_pool instead.
+    """
     # We use from_conn_string as it is the official way to create a managed checkpointer
     # with the correct internal configuration and serializer.
     return AsyncRedisSaver.from_conn_string(
         settings.REDIS_URL,
-        ttl=ttl_config
+        ttl=checkpoint_ttl()
     )
+
+class CheckpointerPool:
+    """
+    One long-lived AsyncRedisSaver on a shared Redis connection pool.
+    Opened at startup (main.lifespan) and reused by every request, instead of
+    building a pool and re-creating the indexes per run. Opens lazily if a
+    request arrives first.
+    """
+
+    def __init__(self):
+        self._client: Optional[redis.Redis] = None
+        self._checkpointer: Optional[AsyncRedisSaver] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def checkpointer(self) -> Optional[AsyncRedisSaver]:
+        return self._checkpointer
+
+    async def open(self) -> AsyncRedisSaver:
+        """Connects the pool and creates the checkpoint indexes if they don't exist. Safe to call twice."""
+        if self._checkpointer is not None:
+            return self._checkpointer
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self._checkpointer is None:
+                client = redis.Redis(connection_pool=redis.ConnectionPool.from_url(
+                    settings.REDIS_URL,
+                    max_connections=settings.REDIS_CHECKPOINT_MAX_CONNECTIONS
+                ))
+                checkpointer = AsyncRedisSaver(redis_client=client, ttl=checkpoint_ttl())
+                try:
+                    await checkpointer.asetup()
+                except Exception:
+                    await client.aclose(close_connection_pool=True)
+                    raise
+                self._client = client
+                self._checkpointer = checkpointer
+                logger.info("Shared LangGraph checkpointer opened")
+        return self._checkpointer
+
+    async def get(self) -> AsyncRedisSaver:
+        return self._checkpointer or await self.open()
+
+    async def aclose(self):
+        """Closes the shared Redis pool."""
+        self._checkpointer = None
+        self._lock = None
+        if self._client is not None:
+            await self._client.aclose(close_connection_pool=True)
+            self._client = None
+
+checkpointer_pool = CheckpointerPool()
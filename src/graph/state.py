@@ -13,12 +13,14 @@ class AgentInteraction(TypedDict):
     - answer: The result or output produced by the CURRENT agent.
     - next_agent: The destination for the next step.
     - debate_output: Optional metadata for the Analyst agent.
+    - answer_ref: Set when a large answer was moved to the blob store; answer then holds a preview.
     """
     id: int
     agent: str
     answer: str
     next_agent: str
     debate_output: NotRequired[Dict[str, Any]]
+    answer_ref: NotRequired[str]
 
 class SessionContext(TypedDict):
     current_datetime: str
@@ -61,3 +63,4 @@ class AgentState(TypedDict):
     agent_interactions: Annotated[List[AgentInteraction], operator.add]
     output: str
     market_context: NotRequired[str]
+    report_metadata: NotRequired[Dict[str, Any]]
@@ -1,7 +1,7 @@
 import asyncio
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List
-from langchain_openai import ChatOpenAI
+from src.services.llm_cache import llm_cache
 from sqlalchemy import select
 
 from src.database.session import AsyncSessionLocal
@@ -10,6 +10,10 @@ from src.services.macro import fed_service, calendar_service
 from src.services.market_data import get_historical_prices_async
 from src.graph.tools.sentiment import analyze_sentiment
 from src.services.social import x_client
+from src.graph.utils.tool_call import tool_policy
+
+# The analysis prompt embeds the latest data points, so it only repeats until the data moves
+MACRO_ANALYSIS_CACHE_TTL = 3600
 
 def format_series(name: str, data: List[Dict[str, str]], unit: str) -> str:
     """Helper to format FRED series data for the report."""
@@ -25,6 +29,7 @@ def format_series(name: str, data: List[Dict[str, str]], unit: str) -> str:
         
     return line
 
+@tool_policy(timeout=30)
 async def get_political_sentiment(**kwargs) -> str:
     """
     Monitor and analyze the latest political sentiment from key figures (e.g., Trump's X account).
@@ -91,6 +96,7 @@ async def get_performance_summary(symbols_map: Dict[str, str]) -> Dict[str, str]
             performance[name] = "Data unavailable"
     return performance
 
+@tool_policy(timeout=20, retries=1)
 async def get_key_macro_indicators(**kwargs) -> str:
     """
     Fetch the latest key US macroeconomic indicators (GDP, CPI, Payrolls, Interest Rates, DXY),
@@ -145,7 +151,6 @@ async def get_key_macro_indicators(**kwargs) -> str:
     ]
     
     # 4. Synthesize Analysis with LLM
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
     analysis_prompt = f"""
     Analyze the following market data and provide:
     1. A summary of commodity trends and their likely impact on the economy (e.g. inflation, manufacturing).
@@ -156,7 +161,9 @@ async def get_key_macro_indicators(**kwargs) -> str:
     {chr(10).join(raw_data)}
     """
     
-    analysis_response = await llm.ainvoke(analysis_prompt)
+    analysis_response = await llm_cache.ainvoke(
+        "macro_analysis", analysis_prompt, "gpt-4o", 0, ttl_seconds=MACRO_ANALYSIS_CACHE_TTL
+    )
     analysis_text = analysis_response.content
 
     # 5. Format Final Output
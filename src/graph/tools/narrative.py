@@ -3,13 +3,14 @@ from datetime import datetime, timezone, timedelta, date
 from typing import List, Dict, Optional, Any
 from pydantic import BaseModel, Field
 from sqlalchemy import select
-from langchain_openai import ChatOpenAI
+from src.services.llm import llm_registry
 
 from src.database.session import AsyncSessionLocal
 from src.database.models import ResearchCache, ResearchSourceType
 from src.services.market_data import get_historical_prices_async
 from src.graph.utils.calendar import get_previous_trading_day
 from src.graph.utils.agents import with_logging
+from src.graph.utils.tool_call import tool_policy
 
 class NarrativeShift(BaseModel):
     current_narrative: str = Field(description="Synthesis of today's market drivers")
@@ -34,6 +35,7 @@ You are a senior market strategist. Synthesize the provided research data into a
 {subject_instruction}
 """
 
+@tool_policy(timeout=20, retries=1)
 @with_logging
 async def get_indices_performance(**kwargs) -> str:
     """
@@ -65,6 +67,7 @@ async def get_indices_performance(**kwargs) -> str:
     
     return "\n".join(output) + "\n"
 
+@tool_policy(timeout=20)
 @with_logging
 async def get_historical_narrative(subject: Optional[str] = None) -> str:
     """
@@ -92,6 +95,7 @@ async def get_historical_narrative(subject: Optional[str] = None) -> str:
             
     return f"### Previous Narrative for {subject or 'Broad Market'}\n[DATA MISSING: No historical narrative found in cache for the last 7 days]\n"
 
+@tool_policy(timeout=60)
 @with_logging
 async def synthesize_growth_narrative(
     research_context: Optional[str] = None, 
@@ -126,8 +130,7 @@ async def synthesize_growth_narrative(
         prev_narrative = context.split("### Previous Narrative")[1].split("###")[0].strip()
 
     # Analyze with LLM
-    llm = ChatOpenAI(model="gpt-4o", temperature=0)
-    structured_llm = llm.with_structured_output(NarrativeShift)
+    structured_llm = llm_registry.get("gpt-4o", 0, NarrativeShift)
     
     subject_instr = f"\nNote: The focus is specifically on the growth narrative of '{final_subject}'." if final_subject else ""
     
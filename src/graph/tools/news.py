@@ -1,25 +1,24 @@
 import asyncio
 from typing import List
-from src.graph.utils.news import get_summary_result, fetch_ddgs_urls
-from src.services.market_data import fetch_yfinance_news_urls, _parse_yf_news_item, get_stock_news_data
+from src.graph.utils.news import get_summary_result, get_summary_results, fetch_ddgs_urls, search_many
+from src.graph.utils.crawl import PRIORITY_BACKGROUND
+from src.services.market_data import fetch_yfinance_news_urls_many, news_feed_index
+from src.graph.utils.tool_call import tool_policy
 
+@tool_policy(timeout=45)
 async def get_stock_news(symbol: str, max_results: int = 3, **kwargs) -> str:
     """
     Fetch and summarize the latest news for a specific stock ticker.
     """
     results = []
     try:
-        news_items = await get_stock_news_data(symbol)
+        news_items = await news_feed_index.get_news(symbol)
         
         if not news_items:
              return None
 
         tasks = []
-        for item in news_items[:max_results]:
-            parsed = _parse_yf_news_item(item)
-            if not parsed:
-                continue
-                
+        for parsed in news_items[:max_results]:
             parsed["user_agent"] = kwargs.get("user_agent", "")
             expire_at = kwargs.get("expire_at", None)
             tasks.append(get_summary_result(parsed, expire_at=expire_at))
@@ -39,16 +38,17 @@ async def get_stock_news(symbol: str, max_results: int = 3, **kwargs) -> str:
         print(f"Error fetching news for {symbol}: {e}")
         return f"Error fetching news for {symbol}: {e}\n"
 
+@tool_policy(timeout=45)
 async def get_macro_economic_news(**kwargs) -> str:
     """
     Fetch and summarize the latest global macroeconomic news and indicators.
     """
     title_and_urls = []
 
-    # 1. Collect URLs from yfinance tickers
+    # 1. Collect URLs from yfinance tickers (fetched concurrently, cached briefly)
     tickers = ["^GSPC", "^VIX", "^TNX", "DX-Y.NYB"]
-    for ticker in tickers:
-        title_and_urls.extend(await fetch_yfinance_news_urls(ticker))
+    for items in (await fetch_yfinance_news_urls_many(tickers)).values():
+        title_and_urls.extend(items)
     
     # 2. Collect URLs from DuckDuckGo queries (Focused on narrative/geopolitical context)
     queries = [
@@ -57,8 +57,8 @@ async def get_macro_economic_news(**kwargs) -> str:
         "Trade policy and tariff news",
         "US fiscal policy news",
     ]
-    for query in queries:
-        title_and_urls.extend(fetch_ddgs_urls(query))
+    for items in await search_many(queries):
+        title_and_urls.extend(items)
             
     # 3. Deduplicate by URL
     seen_urls = set()
@@ -69,10 +69,10 @@ async def get_macro_economic_news(**kwargs) -> str:
             unique_candidates.append(item)
             seen_urls.add(item["link"])
             
-    # 4. Fetch summaries in parallel
+    # 4. Fetch pages in parallel (behind user-facing fetches in the crawl queue)
+    #    and summarize several articles per LLM call
     expire_at = kwargs.get("expire_at", None)
-    tasks = [get_summary_result(item, expire_at=expire_at) for item in unique_candidates]
-    all_results = await asyncio.gather(*tasks)
+    all_results = await get_summary_results(unique_candidates, expire_at=expire_at, priority=PRIORITY_BACKGROUND)
         
     valid_results = [r for r in all_results if r]
     if not valid_results:
@@ -84,14 +84,14 @@ async def get_macro_economic_news(**kwargs) -> str:
         
     return "\n".join(result_lines) + "\n"
 
+@tool_policy(timeout=45, max_concurrency=4)
 async def web_search(queries: List[str], **kwargs) -> str:
     """
     Perform web search and get title and page summary by the queries.
     Returns a formatted markdown string of the results grouped by query.
     """
-    # 1. Fetch URLs for each query
-    # fetch_ddgs_urls is synchronous but we wrap it in basic loop for now
-    query_results = [fetch_ddgs_urls(q) for q in queries]
+    # 1. Fetch URLs for all queries concurrently (cached per query and day)
+    query_results = await search_many(queries)
     
     # 2. Collect unique candidate URLs to speed up summary extraction
     unique_candidates = {}
@@ -1,5 +1,7 @@
 from src.services.market_data import get_stock_financials_data
+from src.graph.utils.tool_call import tool_policy
 
+@tool_policy(timeout=20, retries=1)
 async def get_stock_financials(symbol: str) -> str:
     """
     Fetch fundamental financial data (PE, Market Cap, EPS, etc.) for a specific ticker.
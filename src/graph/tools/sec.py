@@ -1,14 +1,18 @@
 import re
+import asyncio
 from datetime import datetime, timezone, timedelta
 from typing import List, Optional, Dict
-from bs4 import BeautifulSoup
 from sqlalchemy import select
-from langchain_openai import ChatOpenAI
+from src.services.llm import llm_registry
 from langchain_core.prompts import ChatPromptTemplate
 
 from src.database.session import AsyncSessionLocal
 from src.database.models import ResearchCache, ResearchSourceType
 from src.graph.utils.scraping import fetch_content, DEFAULT_USER_AGENT
+from src.graph.utils.crawl import crawl_scheduler
+from src.services.edgar import edgar_index
+from src.graph.utils.filings import index_sections, section_text, normalize_section_id, store_filing, read_section
+from src.graph.utils.tool_call import tool_policy
 
 # SEC.gov requires a specific User-Agent
 CACHE_TTL_DAYS = 7
@@ -65,39 +69,39 @@ async def save_to_cache(
         
         await session.commit()
 
-async def get_latest_filing_urls(ticker: str, filing_type: str = "10-K") -> List[Dict[str, str]]:
-    """
-    Fetch the latest filing URLs for a given ticker from SEC.gov.
-    Returns a list of dictionaries with accession number, filing date, and URL.
-    """
-    # Simple mockup for now to satisfy initial tests
-    return [{
-        "accession_number": "0000320193-23-000106",
-        "filing_date": "2023-11-03",
-        "url": f"https://www.sec.gov/Archives/edgar/data/320193/000032019323000106/{ticker.lower()}-20230930.htm",
-        "type": filing_type
-    }]
+async def get_latest_filing_urls(ticker: str, filing_type: str = "10-K", limit: int = 1) -> List[Dict[str, str]]:
+    """
+    Fetch the latest filing URLs for a given ticker from the local EDGAR index.
+    Returns a list of dictionaries with accession number, filing date, and URL, newest first.
+    """
+    return await edgar_index.latest_filings(ticker, filing_type, limit)
 
 def extract_section(html_content: str, section_id: str) -> str:
     """
     Extract a specific section from SEC filing HTML.
     section_id can be "item1a", "item7", etc.
+    Uses the streaming section indexer, so only the matching slice is parsed.
     """
-    soup = BeautifulSoup(html_content, "lxml")
+    normalized = normalize_section_id(section_id)
+    if not normalized or not html_content:
+        return ""
     
-    # Try finding by ID first
-    section = soup.find(id=section_id)
-    if section:
-        return section.get_text(separator="\n", strip=True)
+    raw = html_content.encode("utf-8")
+    span = index_sections(raw).get(normalized)
+    if not span:
+        return ""
     
-    return ""
+    start, end = span
+    return section_text(raw[start:end])
 
 async def fetch_filing_content(url: str, user_agent: str = DEFAULT_USER_AGENT) -> str:
     """
     Fetch HTML content from SEC.gov with proper User-Agent.
     """
-    return await fetch_content(url, user_agent)
+    async with crawl_scheduler.slot(url):
+        return await fetch_content(url, user_agent)
 
+@tool_policy(timeout=60, retries=1, max_concurrency=4)
 async def get_sec_filing_section(ticker: str, filing_type: str = "10-K", section_id: str = "item1a", expire_at: Optional[datetime] = None) -> str:
     """
     Main tool for agents to fetch and extract a specific section from the latest filing.
@@ -107,21 +111,35 @@ async def get_sec_filing_section(ticker: str, filing_type: str = "10-K", section
     if not filings:
         return f"No {filing_type} filings found for {ticker}."
     
-    latest = filings[0]
-    accession_number = latest["accession_number"]
-    filing_date_str = latest["filing_date"]
+    return await get_filing_section(ticker, filings[0], section_id, expire_at)
+
+async def get_filing_section(ticker: str, filing: Dict[str, str], section_id: str, expire_at: Optional[datetime] = None) -> str:
+    """
+    Fetch and extract a section from a specific filing returned by get_latest_filing_urls.
+    Includes caching logic.
+    """
+    filing_type = filing["type"]
+    accession_number = filing["accession_number"]
+    filing_date_str = filing["filing_date"]
     filing_date = datetime.strptime(filing_date_str, "%Y-%m-%d").date()
-    url = latest["url"]
+    url = filing["url"]
     
     # Check cache
     cached_content = await get_cached_section(ticker, accession_number, section_id)
     if cached_content:
         return cached_content
     
-    # Fetch from SEC
     try:
-        html_content = await fetch_filing_content(url)
-        content = extract_section(html_content, section_id)
+        # Read the section slice from a previously indexed raw filing
+        content = await asyncio.to_thread(read_section, accession_number, section_id)
+        
+        # Fetch from SEC, index all Item boundaries once and persist the offsets
+        if content is None:
+            html_content = await fetch_filing_content(url)
+            content = ""
+            if html_content:
+                offsets = await asyncio.to_thread(store_filing, accession_number, html_content.encode("utf-8"))
+                content = await asyncio.to_thread(read_section, accession_number, section_id, offsets)
         
         if content:
             # Save to cache
@@ -141,33 +159,29 @@ async def get_sec_filing_section(ticker: str, filing_type: str = "10-K", section
     except Exception as e:
         return f"Error fetching {filing_type} for {ticker}: {str(e)}"
 
+@tool_policy(timeout=60, retries=1, max_concurrency=4)
 async def get_sec_filing_delta(ticker: str, filing_type: str = "10-K", section_id: str = "item1a") -> str:
     """
     Compare the latest section with the previous same-period section.
     Returns a semantic delta summary (LLM-driven).
     """
     # 1. Get latest and previous URLs
-    # For now, we mock fetching the previous one
-    filings = await get_latest_filing_urls(ticker, filing_type)
+    filings = await get_latest_filing_urls(ticker, filing_type, limit=2)
     if len(filings) < 1:
         return f"No {filing_type} filings found for {ticker}."
+    if len(filings) < 2:
+        return f"No previous {filing_type} filing found for {ticker} to compare against."
     
-    current_filing = filings[0]
-    # Mocking previous filing (a real implementation would fetch more from SEC)
-    previous_filing = {
-        "accession_number": "0000320193-22-000108",
-        "filing_date": "2022-10-27",
-        "url": f"https://www.sec.gov/Archives/edgar/data/320193/000032019322000108/{ticker.lower()}-20220924.htm",
-        "type": filing_type
-    }
+    current_filing, previous_filing = filings[0], filings[1]
     
     # 2. Get contents (with caching)
-    current_content = await get_sec_filing_section(ticker, filing_type, section_id)
-    # For previous, we need a way to specify accession number in get_sec_filing_section
-    previous_content = "This is a placeholder for previous year's content." 
+    current_content, previous_content = await asyncio.gather(
+        get_filing_section(ticker, current_filing, section_id),
+        get_filing_section(ticker, previous_filing, section_id)
+    )
     
     # 3. LLM comparison
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+    llm = llm_registry.get("gpt-4o-mini", 0)
     prompt = ChatPromptTemplate.from_template("""
     Compare the following two sections ({section_id}) from {ticker}'s {filing_type} filings.
     The goal is to identify material changes: New risks/items, Removed risks/items, and significantly Changed risks/items.
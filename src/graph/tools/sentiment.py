@@ -4,19 +4,84 @@ from typing import List, Dict, Optional
 
 from pydantic import BaseModel, Field
 from sqlalchemy import select
-from langchain_openai import ChatOpenAI
+from src.config import settings
+from src.services.llm_cache import llm_cache
 
 from src.database.session import AsyncSessionLocal
 from src.database.models import ResearchCache, ResearchSourceType
-from src.graph.utils.prompt import FINANCIAL_SENTIMENT_PROMPT
+from src.graph.utils.prompt import FINANCIAL_SENTIMENT_PROMPT, BATCH_SENTIMENT_PROMPT
+from src.graph.utils.news import pack_articles, ARTICLE_CHAR_LIMIT
+from src.graph.utils.lexicon import lexicon_score, lexicon_scores
 from src.graph.tools.news import get_stock_news, fetch_ddgs_urls
 from src.graph.tools.sec import get_sec_filing_section
 from src.services.social import x_client
+from src.graph.utils.tool_call import tool_policy
+
+# Sentiment of an identical text does not change; covers unkeyed calls the ResearchCache misses
+SENTIMENT_CACHE_TTL = 24 * 3600
+SENTIMENT_TEXT_CHAR_LIMIT = 8000
+# Same per-text limit pack_articles budgets for
+BATCH_SENTIMENT_TEXT_CHAR_LIMIT = ARTICLE_CHAR_LIMIT
+MIN_SENTIMENT_TEXT_LENGTH = 20
+
+# (source key prefix, display name, weight) in breakdown order
+SENTIMENT_SOURCES = [
+    ("news", "News", 0.3),
+    ("sec", "SEC", 0.4),
+    ("x", "X (Social)", 0.15),
+    ("reddit", "Reddit (Social)", 0.15)
+]
+
+# Low-weight sources the lexicon pre-scorer may settle without the LLM
+LEXICON_SOURCE_TYPES = {ResearchSourceType.X, ResearchSourceType.SOCIAL}
 
 class SentimentResult(BaseModel):
     sentiment_score: float = Field(description="Sentiment score from -1.0 to 1.0")
     rationale: str = Field(description="Concise reason for the score")
 
+class KeyedSentimentResult(SentimentResult):
+    id: str = Field(description="ID of the text, exactly as given")
+
+class SentimentBatch(BaseModel):
+    results: List[KeyedSentimentResult] = Field(description="One result per text")
+
+class SentimentRequest(BaseModel):
+    """One source text to score, cached in ResearchCache under `key`."""
+    key: str
+    text: str
+    source_type: ResearchSourceType
+    ticker: Optional[str] = None
+
+def insufficient_text(text: Optional[str]) -> bool:
+    return not text or len(text.strip()) < MIN_SENTIMENT_TEXT_LENGTH
+
+def default_sentiment_expiry(source_type: ResearchSourceType) -> datetime:
+    ttl_days = 1 if source_type in [ResearchSourceType.SOCIAL, ResearchSourceType.X] else 7
+    return datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=ttl_days)
+
+def lexicon_prescore(requests: List["SentimentRequest"]) -> Dict[str, SentimentResult]:
+    """
+    Scores low-weight source texts with the local lexicon in one pass.
+    Returns only the confident ones; the rest still need the LLM.
+    """
+    eligible = [request for request in requests if request.source_type in LEXICON_SOURCE_TYPES]
+    return {
+        request.key: SentimentResult(sentiment_score=pre.score, rationale=pre.rationale)
+        for request, pre in zip(eligible, lexicon_scores([request.text for request in eligible]))
+        if pre.confidence >= settings.SENTIMENT_LEXICON_CONFIDENCE
+    }
+
+async def score_text(text: str) -> SentimentResult:
+    """Scores one text with the LLM (through the response cache)."""
+    return await llm_cache.ainvoke(
+        "sentiment",
+        FINANCIAL_SENTIMENT_PROMPT.format(text=text[:SENTIMENT_TEXT_CHAR_LIMIT]),
+        "gpt-4o-mini",
+        0,
+        schema=SentimentResult,
+        ttl_seconds=SENTIMENT_CACHE_TTL
+    )
+
 async def analyze_sentiment(
     text: str, 
     source_type: ResearchSourceType = ResearchSourceType.NEWS, 
@@ -28,9 +93,14 @@ async def analyze_sentiment(
     Analyze the sentiment of a given financial text.
     Uses ResearchCache to avoid redundant LLM calls.
     """
-    if not text or len(text.strip()) < 20:
+    if insufficient_text(text):
         return SentimentResult(sentiment_score=0.0, rationale="Insufficient text for analysis.")
 
+    if source_type in LEXICON_SOURCE_TYPES:
+        pre = lexicon_score(text)
+        if pre.confidence >= settings.SENTIMENT_LEXICON_CONFIDENCE:
+            return SentimentResult(sentiment_score=pre.score, rationale=pre.rationale)
+
     # 1. Check Cache if key provided
     if key:
         async with AsyncSessionLocal() as db:
@@ -51,13 +121,7 @@ async def analyze_sentiment(
 
     # 2. Analyze with LLM
     try:
-        llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-        structured_llm = llm.with_structured_output(SentimentResult)
-        
-        # Simple truncation for token limits
-        res = await structured_llm.ainvoke(
-            FINANCIAL_SENTIMENT_PROMPT.format(text=text[:8000])
-        )
+        res = await score_text(text)
         
         # 3. Update Cache if key provided
         if key:
@@ -68,8 +132,7 @@ async def analyze_sentiment(
                     cached = result.scalar_one_or_none()
                     
                     if expire_at is None:
-                        ttl_days = 1 if source_type in [ResearchSourceType.SOCIAL, ResearchSourceType.X] else 7
-                        expire_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=ttl_days)
+                        expire_at = default_sentiment_expiry(source_type)
 
                     if cached:
                         cached.sentiment_score = res.sentiment_score
@@ -95,68 +158,188 @@ async def analyze_sentiment(
         print(f"Error in analyze_sentiment: {e}")
         return SentimentResult(sentiment_score=0.0, rationale=f"Analysis failed: {str(e)}")
 
-async def get_market_sentiment(ticker: str, **kwargs) -> str:
+async def get_cached_sentiments(db, keys: List[str]) -> Dict[str, SentimentResult]:
+    """Reads unexpired sentiment scores for several keys in one query."""
+    stmt = select(ResearchCache).where(
+        ResearchCache.key.in_(keys),
+        ResearchCache.expire_at > datetime.now(timezone.utc).replace(tzinfo=None)
+    )
+    result = await db.execute(stmt)
+    return {
+        cached.key: SentimentResult(sentiment_score=float(cached.sentiment_score), rationale=cached.sentiment_reason)
+        for cached in result.scalars().all() if cached.sentiment_score is not None
+    }
+
+async def save_sentiments(
+    db,
+    requests: List[SentimentRequest],
+    results: Dict[str, SentimentResult],
+    expire_at: Optional[datetime] = None
+):
+    """Upserts scores for several keys with one read and one commit."""
+    stmt = select(ResearchCache).where(ResearchCache.key.in_([r.key for r in requests]))
+    result = await db.execute(stmt)
+    existing = {cached.key: cached for cached in result.scalars().all()}
+
+    for request in requests:
+        res = results[request.key]
+        expiry = expire_at or default_sentiment_expiry(request.source_type)
+        cached = existing.get(request.key)
+        if cached:
+            cached.sentiment_score = res.sentiment_score
+            cached.sentiment_reason = res.rationale
+            cached.expire_at = expiry
+        else:
+            db.add(ResearchCache(
+                source_type=request.source_type,
+                ticker=request.ticker,
+                key=request.key,
+                content=request.text[:1000],
+                sentiment_score=res.sentiment_score,
+                sentiment_reason=res.rationale,
+                expire_at=expiry
+            ))
+    await db.commit()
+
+def format_sentiment_batch(requests: List[SentimentRequest]) -> str:
+    return "\n\n".join(
+        f"[Text {i}]\nID: {i}\nSource: {request.source_type.value}\nContent:\n{request.text[:BATCH_SENTIMENT_TEXT_CHAR_LIMIT]}"
+        for i, request in enumerate(requests, 1)
+    )
+
+async def score_batch(requests: List[SentimentRequest]) -> Dict[str, SentimentResult]:
     """
-    Aggregate sentiment from News, SEC, and Social (X/Reddit) for a given ticker.
-    Returns a weighted sentiment analysis.
+    Scores several texts with one structured-output call, keyed by request key.
+    Texts the batch call fails on (schema errors, missing or unknown IDs)
+    fall back to individual score_text calls; texts that fail again are left out.
+    """
+    scores: Dict[str, SentimentResult] = {}
+    if len(requests) > 1:
+        try:
+            ids = {str(i): request.key for i, request in enumerate(requests, 1)}
+            batch = await llm_cache.ainvoke(
+                "sentiment_batch",
+                BATCH_SENTIMENT_PROMPT.format(texts=format_sentiment_batch(requests)),
+                "gpt-4o-mini",
+                0,
+                schema=SentimentBatch,
+                ttl_seconds=SENTIMENT_CACHE_TTL
+            )
+            for item in batch.results:
+                if item.id.strip() in ids:
+                    scores[ids[item.id.strip()]] = SentimentResult(
+                        sentiment_score=max(-1.0, min(1.0, item.sentiment_score)),
+                        rationale=item.rationale
+                    )
+        except Exception as e:
+            print(f"Error in batch sentiment scoring, falling back to single texts: {e}")
+
+    missing = [request for request in requests if request.key not in scores]
+    if missing:
+        fallback = await asyncio.gather(*[score_text(request.text) for request in missing], return_exceptions=True)
+        for request, res in zip(missing, fallback):
+            if isinstance(res, Exception):
+                print(f"Error in analyze_sentiment for {request.key}: {res}")
+            else:
+                scores[request.key] = res
+    return scores
+
+async def analyze_sentiments(
+    requests: List[SentimentRequest],
+    expire_at: Optional[datetime] = None
+) -> Dict[str, SentimentResult]:
+    """
+    Batch counterpart of analyze_sentiment, keyed by request key.
+    Settles confident low-weight texts with the lexicon, resolves the ResearchCache
+    for the remaining keys in one query, scores every uncached text in as few
+    structured-output calls as the token budget allows, and saves the new scores
+    in one commit.
     """
-    # 1. Fetch data from multiple sources in parallel
-    tasks = [
+    results: Dict[str, SentimentResult] = {}
+    unique: Dict[str, SentimentRequest] = {}
+    for request in requests:
+        if insufficient_text(request.text):
+            results[request.key] = SentimentResult(sentiment_score=0.0, rationale="Insufficient text for analysis.")
+        else:
+            unique.setdefault(request.key, request)
+
+    for key, res in lexicon_prescore(list(unique.values())).items():
+        results[key] = res
+        del unique[key]
+    if not unique:
+        return results
+
+    try:
+        async with AsyncSessionLocal() as db:
+            results.update(await get_cached_sentiments(db, list(unique)))
+    except Exception as e:
+        print(f"Cache check error in analyze_sentiments: {e}")
+
+    uncached = [request for key, request in unique.items() if key not in results]
+    if not uncached:
+        return results
+
+    by_key = {request.key: request for request in uncached}
+    batches = pack_articles(
+        [(request.key, request.text) for request in uncached],
+        max_tokens=settings.SENTIMENT_BATCH_MAX_TOKENS,
+        max_articles=settings.SENTIMENT_BATCH_MAX_TEXTS
+    )
+    scored: Dict[str, SentimentResult] = {}
+    for batch_scores in await asyncio.gather(*[score_batch([by_key[key] for key, _ in batch]) for batch in batches]):
+        scored.update(batch_scores)
+    results.update(scored)
+
+    # Failed analyses are returned neutral and not cached
+    for request in uncached:
+        if request.key not in scored:
+            results[request.key] = SentimentResult(sentiment_score=0.0, rationale="Analysis failed.")
+    to_save = [request for request in uncached if request.key in scored]
+    if to_save:
+        try:
+            async with AsyncSessionLocal() as db:
+                await save_sentiments(db, to_save, scored, expire_at)
+        except Exception as e:
+            print(f"Cache update error in analyze_sentiments: {e}")
+    return results
+
+async def fetch_sentiment_sources(ticker: str, **kwargs) -> List[SentimentRequest]:
+    """Fetches news, SEC risk factors, X and Reddit posts for a ticker in parallel."""
+    results = await asyncio.gather(
         get_stock_news(ticker, max_results=3, **kwargs),
         get_sec_filing_section(ticker, filing_type="10-K", section_id="item1a"),
         x_client.get_recent_cashtag_tweets(ticker, max_results=5),
         asyncio.to_thread(fetch_ddgs_urls, f"site:reddit.com/r/wallstreetbets ${ticker}")
-    ]
-    
-    results = await asyncio.gather(*tasks)
+    )
     news_data, sec_data, x_tweets, reddit_data = results
+    current_hour = datetime.now(timezone.utc).strftime("%Y%m%d%H")
 
-    # 2. Analyze sentiment for each source
-    sentiment_tasks = []
-    
-    # News sentiment
+    requests = []
     if news_data:
-        sentiment_tasks.append(analyze_sentiment(news_data, ResearchSourceType.NEWS, ticker, f"news_{ticker}"))
-    else:
-        sentiment_tasks.append(asyncio.sleep(0, result=None))
-
-    # SEC sentiment
+        requests.append(SentimentRequest(key=f"news_{ticker}", text=news_data, source_type=ResearchSourceType.NEWS, ticker=ticker))
     if sec_data and "Error" not in sec_data:
-        sentiment_tasks.append(analyze_sentiment(sec_data, ResearchSourceType.SEC, ticker, f"sec_{ticker}_item1a"))
-    else:
-        sentiment_tasks.append(asyncio.sleep(0, result=None))
-
-    # X (Social) sentiment
+        requests.append(SentimentRequest(key=f"sec_{ticker}_item1a", text=sec_data, source_type=ResearchSourceType.SEC, ticker=ticker))
     if x_tweets:
         combined_tweets = "\n".join([t['text'] for t in x_tweets])
-        current_hour = datetime.now(timezone.utc).strftime("%Y%m%d%H")
-        sentiment_tasks.append(analyze_sentiment(combined_tweets, ResearchSourceType.X, ticker, f"x_{ticker}_{current_hour}"))
-    else:
-        sentiment_tasks.append(asyncio.sleep(0, result=None))
-
-    # Reddit (Social) sentiment
+        requests.append(SentimentRequest(key=f"x_{ticker}_{current_hour}", text=combined_tweets, source_type=ResearchSourceType.X, ticker=ticker))
     if reddit_data:
         combined_reddit = "\n".join([r['title'] for r in reddit_data])
-        current_hour = datetime.now(timezone.utc).strftime("%Y%m%d%H")
-        sentiment_tasks.append(analyze_sentiment(combined_reddit, ResearchSourceType.SOCIAL, ticker, f"reddit_{ticker}_{current_hour}"))
-    else:
-        sentiment_tasks.append(asyncio.sleep(0, result=None))
+        requests.append(SentimentRequest(key=f"reddit_{ticker}_{current_hour}", text=combined_reddit, source_type=ResearchSourceType.SOCIAL, ticker=ticker))
+    return requests
 
-    sentiment_results = await asyncio.gather(*sentiment_tasks)
-    
-    # 3. Aggregate and weight
-    # Weights: SEC (0.4), News (0.3), X (0.15), Reddit (0.15)
-    weights = [0.3, 0.4, 0.15, 0.15]
+def format_market_sentiment(ticker: str, requests: List[SentimentRequest], results: Dict[str, SentimentResult]) -> str:
+    """Weighted aggregate and per-source breakdown for one ticker."""
+    by_source = {request.key.split("_")[0]: results.get(request.key) for request in requests}
     total_score = 0.0
     total_weight = 0.0
-    source_names = ["News", "SEC", "X (Social)", "Reddit (Social)"]
     breakdown = []
 
-    for i, res in enumerate(sentiment_results):
+    for source, name, weight in SENTIMENT_SOURCES:
+        res = by_source.get(source)
         if res:
-            total_score += res.sentiment_score * weights[i]
-            total_weight += weights[i]
-            breakdown.append(f"- **{source_names[i]}**: {res.sentiment_score} ({res.rationale})")
+            total_score += res.sentiment_score * weight
+            total_weight += weight
+            breakdown.append(f"- **{name}**: {res.sentiment_score} ({res.rationale})")
 
     final_score = total_score / total_weight if total_weight > 0 else 0.0
     
@@ -168,3 +351,27 @@ async def get_market_sentiment(ticker: str, **kwargs) -> str:
     ]
     
     return "\n".join(output) + "\n"
+
+@tool_policy(timeout=60)
+async def get_market_sentiment(ticker: str, **kwargs) -> str:
+    """
+    Aggregate sentiment from News, SEC, and Social (X/Reddit) for a given ticker.
+    Returns a weighted sentiment analysis.
+    """
+    requests = await fetch_sentiment_sources(ticker, **kwargs)
+    results = await analyze_sentiments(requests)
+    return format_market_sentiment(ticker, requests, results)
+
+@tool_policy(timeout=60)
+async def get_portfolio_sentiment(tickers: List[str], **kwargs) -> str:
+    """
+    Aggregate News, SEC, and Social sentiment for several tickers at once (e.g. a whole portfolio).
+    All sources of all tickers are scored together in batched calls.
+    """
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+    if not tickers:
+        return "No tickers provided for sentiment analysis.\n"
+
+    sources = await asyncio.gather(*[fetch_sentiment_sources(ticker, **kwargs) for ticker in tickers])
+    results = await analyze_sentiments([request for requests in sources for request in requests])
+    return "\n".join(format_market_sentiment(ticker, requests, results) for ticker, requests in zip(tickers, sources))
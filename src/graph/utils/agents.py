@@ -1,12 +1,17 @@
 from typing import Dict, Any, Callable
+from contextvars import ContextVar
 import traceback
 from functools import wraps
 import inspect
 import logging
 from asgi_correlation_id import correlation_id
+from langgraph.config import get_stream_writer
 
 logger = logging.getLogger(__name__)
 
+# Name of the agent currently running, for attributing work done outside LangGraph callbacks
+agent_name_ctx: ContextVar[str] = ContextVar("agent_name", default="N/A")
+
 def with_logging(func: Callable) -> Callable:
     """Decorator to catch, log, and re-throw exceptions in agent functions. Async-aware."""
     @wraps(func)
@@ -22,11 +27,14 @@ def with_logging(func: Callable) -> Callable:
         request_id = correlation_id.get() or "N/A"
         
         logger.info(f"[{agent_name}] [Thread: {thread_id}] [Request: {request_id}] Starting...")
+        token = agent_name_ctx.set(func.__name__)
         try:
             return await func(*args, **kwargs)
         except Exception as e:
             logger.error(f"[{agent_name}] [Thread: {thread_id}] [Request: {request_id}] Error: {e}\n{traceback.format_exc()}")
             raise
+        finally:
+            agent_name_ctx.reset(token)
 
     @wraps(func)
     def sync_wrapper(*args, **kwargs):
@@ -46,3 +54,16 @@ def with_logging(func: Callable) -> Callable:
 def get_next_interaction_id(state: Dict[str, Any]) -> int:
     """Returns the next sequential interaction ID."""
     return len(state.get("agent_interactions", [])) + 1
+
+def _discard_event(payload: Any) -> None:
+    pass
+
+def get_event_writer() -> Callable[[Any], None]:
+    """
+    Returns LangGraph's custom stream writer for the current run.
+    Outside a graph run (e.g. a node called directly, or with a bare config) events are discarded.
+    """
+    try:
+        return get_stream_writer()
+    except (RuntimeError, KeyError):
+        return _discard_event
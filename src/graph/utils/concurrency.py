@@ -0,0 +1,44 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one execution.
+    Callers that arrive while a call is in flight await its result instead of
+    starting their own; the key is released as soon as the call finishes.
+    If the caller running it is cancelled, the waiting callers run it again
+    instead of inheriting the cancellation.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._in_flight
+
+    async def do(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Runs func(*args, **kwargs) unless the same key is already running, then shares its outcome."""
+        while key in self._in_flight:
+            future = self._in_flight[key]
+            # asyncio.wait neither cancels the shared future nor raises when it was cancelled
+            await asyncio.wait({future})
+            if not future.cancelled():
+                return future.result()
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
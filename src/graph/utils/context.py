@@ -0,0 +1,242 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from src.graph.utils.tokens import estimate_tokens
+from src.services.blobs import blob_store, interaction_answer
+
+# Prompt context budget (estimated tokens) per agent role
+ROLE_TOKEN_BUDGETS = {
+    "supervisor": 4000,
+    "researcher": 6000,
+    "debate": 10000,
+    "summarizer": 12000,
+    "off_topic": 1500,
+    "default": 8000,
+}
+DEFAULT_ROLE = "default"
+
+# Chat turns rendered verbatim; older turns are condensed to one line each
+RECENT_TURNS = 4
+CONDENSED_TURN_CHARS = 160
+# Sections that cannot get at least this many tokens are dropped, lowest rank first
+MIN_SECTION_TOKENS = 64
+PORTFOLIO_MAX_TOKENS = 800
+RENDER_CACHE_SIZE = 256
+TRUNCATION_MARKER = " ... [truncated]"
+
+# Section ranks; lower ranks are dropped first when the budget is tight
+RANK_CONDENSED = 0
+RANK_SUPERSEDED = 1
+RANK_LATEST = 2
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cuts text to roughly max_tokens, keeping the head and marking the cut."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    keep = max(0, max_tokens * 4 - len(TRUNCATION_MARKER))
+    return text[:keep].rstrip() + TRUNCATION_MARKER
+
+def fair_shares(sizes: List[int], budget: int) -> List[int]:
+    """Max-min fair split: sections under the fair share keep their size, larger ones share the rest."""
+    shares = [0] * len(sizes)
+    remaining = max(0, budget)
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    for position, i in enumerate(order):
+        share = remaining // (len(sizes) - position)
+        shares[i] = min(sizes[i], share)
+        remaining -= shares[i]
+    return shares
+
+def message_turn(msg: Any) -> Tuple[str, str]:
+    """(role label, content) for a BaseMessage or a (role, content) tuple."""
+    if isinstance(msg, tuple):
+        role, content = msg
+    else:
+        role = getattr(msg, "type", "")
+        content = getattr(msg, "content", str(msg))
+    label = "User" if role in ["human", "user"] else "AI"
+    return label, content if isinstance(content, str) else str(content)
+
+def condense_turn(label: str, content: str) -> str:
+    """One-line extract of an older chat turn."""
+    text = " ".join(content.split())
+    if len(text) > CONDENSED_TURN_CHARS:
+        text = text[:CONDENSED_TURN_CHARS].rstrip() + "..."
+    return f"{label}: {text}"
+
+def _digest(*parts: Any) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        # Length-prefixed, so neighbouring parts cannot run into each other
+        encoded = repr(part).encode("utf-8")
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.digest()
+
+def _message_key(msg: Any) -> Any:
+    """A message's id (stable for its content), else a digest of its turn."""
+    msg_id = getattr(msg, "id", None)
+    return ("id", msg_id) if msg_id else _digest(*message_turn(msg))
+
+def _interaction_key(itr: Dict[str, Any]) -> Any:
+    """
+    An offloaded answer is keyed by its answer_ref (a content digest) and whether
+    the full answer is loaded, since the preview renders until it is; inline answers are hashed.
+    """
+    agent, next_agent = itr.get("agent", "unknown"), itr.get("next_agent", "end")
+    ref = itr.get("answer_ref")
+    if ref:
+        return agent, next_agent, ref, blob_store.cached(ref) is not None
+    return _digest(agent, next_agent, str(itr.get("answer", "")))
+
+class Section:
+    """One budgeted piece of the prompt: a chat turn, condensed history or an agent answer."""
+
+    def __init__(self, kind: str, prefix: str, text: str, rank: int, position: int):
+        self.kind = kind
+        self.prefix = prefix
+        self.text = text
+        self.rank = rank
+        self.position = position
+        self.tokens = estimate_tokens(text)
+
+class PromptContextBuilder:
+    """
+    Renders AgentState into prompt context under a per-role token budget.
+    The latest chat turns and the latest answer of each agent rank highest;
+    older turns are condensed and superseded or oldest sections are dropped
+    first. Remaining sections share the budget fairly, so one long SEC section
+    or search dump is truncated instead of crowding out everything else.
+    Renders are memoized per state version and role.
+    """
+
+    def __init__(self, cache_size: int = RENDER_CACHE_SIZE):
+        self.cache_size = cache_size
+        self.reset()
+
+    def reset(self):
+        self._rendered: "OrderedDict[Tuple[Any, ...], str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def budget_for(self, role: str) -> int:
+        return ROLE_TOKEN_BUDGETS.get(role, ROLE_TOKEN_BUDGETS[DEFAULT_ROLE])
+
+    def _version(self, state: Dict[str, Any], role: str) -> Tuple[Any, ...]:
+        """
+        Render key: a tuple of short per-segment keys. Messages with an id and
+        offloaded answers are keyed by their id / answer_ref without reading their
+        content; only the header and segments without either are hashed. Nothing
+        in the key is large, so memoized renders do not keep run states alive.
+        """
+        session_ctx = state.get("session_context", {})
+        user_ctx = state.get("user_context", {})
+        header = _digest(
+            state.get("user_input"),
+            session_ctx.get("current_datetime"),
+            session_ctx.get("revision_count"),
+            user_ctx.get("portfolio_summary")
+        )
+        messages = tuple(_message_key(msg) for msg in session_ctx.get("messages", []))
+        interactions = tuple(_interaction_key(itr) for itr in state.get("agent_interactions", []))
+        return role, header, messages, interactions
+
+    def render(self, state: Dict[str, Any], role: str = DEFAULT_ROLE) -> str:
+        """Returns the prompt context for `state`, reusing the render of an identical state."""
+        version = self._version(state, role)
+        cached = self._rendered.get(version)
+        if cached is not None:
+            self._rendered.move_to_end(version)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        rendered = self._build(state, self.budget_for(role))
+        self._rendered[version] = rendered
+        while len(self._rendered) > self.cache_size:
+            self._rendered.popitem(last=False)
+        return rendered
+
+    def _sections(self, state: Dict[str, Any]) -> List[Section]:
+        sections = []
+        turns = [message_turn(msg) for msg in state.get("session_context", {}).get("messages", [])]
+        older, recent = turns[:-RECENT_TURNS], turns[-RECENT_TURNS:]
+        if older:
+            condensed = "\n".join(condense_turn(label, content) for label, content in older)
+            sections.append(Section("history", "[Earlier conversation, condensed]\n", condensed, RANK_CONDENSED, 0))
+        for label, content in recent:
+            sections.append(Section("history", f"{label}: ", content, RANK_LATEST, len(sections)))
+
+        interactions = state.get("agent_interactions", [])
+        latest_by_agent = {itr.get("agent", "unknown"): i for i, itr in enumerate(interactions)}
+        for i, itr in enumerate(interactions):
+            agent = itr.get("agent", "unknown")
+            rank = RANK_LATEST if latest_by_agent[agent] == i else RANK_SUPERSEDED
+            prefix = f"[{agent} -> {itr.get('next_agent', 'end')}]: "
+            sections.append(Section("interaction", prefix, interaction_answer(itr), rank, len(sections)))
+        return sections
+
+    def _fit(self, sections: List[Section], budget: int) -> List[Tuple[Section, str]]:
+        """Drops the lowest-ranked (then oldest) sections until the rest fit, then truncates fairly."""
+        kept = sorted(sections, key=lambda s: (s.rank, s.position), reverse=True)
+        while kept:
+            overhead = sum(estimate_tokens(s.prefix) + 1 for s in kept)
+            if len(kept) * MIN_SECTION_TOKENS + overhead <= budget or sum(s.tokens for s in kept) + overhead <= budget:
+                break
+            kept.pop()
+
+        kept.sort(key=lambda s: s.position)
+        overhead = sum(estimate_tokens(s.prefix) + 1 for s in kept)
+        shares = fair_shares([s.tokens for s in kept], budget - overhead)
+        return [(s, truncate_to_tokens(s.text, share)) for s, share in zip(kept, shares)]
+
+    def _build(self, state: Dict[str, Any], budget: int) -> str:
+        session_ctx = state.get("session_context", {})
+        header = []
+        if "user_input" in state:
+            header.append(f"User Input: {state['user_input']}")
+        if "current_datetime" in session_ctx:
+            header.append(f"Current Date/Time: {session_ctx['current_datetime']}")
+
+        footer = []
+        if "revision_count" in session_ctx:
+            footer.append(f"Revision Count: {session_ctx['revision_count']}")
+        user_ctx = state.get("user_context", {})
+        if "portfolio_summary" in user_ctx and user_ctx["portfolio_summary"]:
+            footer.append("--- USER PORTFOLIO SUMMARY ---")
+            footer.append(truncate_to_tokens(user_ctx["portfolio_summary"], PORTFOLIO_MAX_TOKENS))
+            footer.append("--- END USER PORTFOLIO SUMMARY ---")
+
+        # Block markers and omission notes
+        reserved = estimate_tokens("\n".join(header + footer)) + 60
+        sections = self._sections(state)
+        fitted = self._fit(sections, budget - reserved)
+
+        context = list(header)
+        history = [s.prefix + text for s, text in fitted if s.kind == "history"]
+        history_total = sum(1 for s in sections if s.kind == "history")
+        if history_total:
+            context.append("--- CHAT HISTORY ---")
+            if len(history) < history_total:
+                context.append(f"[... {history_total - len(history)} earlier chat entries omitted ...]")
+            context.extend(history)
+            context.append("--- END CHAT HISTORY ---")
+        else:
+            context.append("Chat History: None.")
+
+        interactions = [s.prefix + text for s, text in fitted if s.kind == "interaction"]
+        interactions_total = len(state.get("agent_interactions", []))
+        if interactions_total:
+            context.append("--- AGENT INTERACTIONS ---")
+            if len(interactions) < interactions_total:
+                context.append(f"[... {interactions_total - len(interactions)} agent interactions omitted ...]")
+            context.extend(interactions)
+            context.append("--- END AGENT INTERACTIONS ---")
+        else:
+            context.append("Agent Interactions: None.")
+
+        context.extend(footer)
+        return "\n".join(context)
+
+prompt_context = PromptContextBuilder()
@@ -0,0 +1,191 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from src.config import settings
+
+# Lower values are dispatched first
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 10
+PRIORITY_NAMES = {PRIORITY_USER: "user", PRIORITY_BACKGROUND: "background"}
+
+# Wait samples kept per priority for the metrics percentiles
+WAIT_SAMPLE_SIZE = 1000
+
+def host_key(url: str) -> str:
+    """Normalizes a URL to the host that politeness limits are applied to."""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+class HostState:
+    """Concurrency and token-bucket state for a single host."""
+
+    def __init__(self, burst: float):
+        self.active = 0
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def refill(self, rate: float, burst: float, now: float):
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+class CrawlScheduler:
+    """
+    Admission control for outbound page fetches.
+    Enforces a global in-flight cap plus a per-host concurrency limit and
+    token-bucket rate, dispatching waiting fetches in priority order.
+    Fetches for other hosts may overtake a blocked host, so one slow site
+    never stalls the whole queue. Hosts with nothing in flight and a full
+    bucket are dropped, since a fresh bucket behaves the same.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        per_host_concurrency: Optional[int] = None,
+        per_host_rate: Optional[float] = None,
+        per_host_burst: Optional[float] = None
+    ):
+        self.max_in_flight = max_in_flight or settings.CRAWL_MAX_IN_FLIGHT
+        self.per_host_concurrency = per_host_concurrency or settings.CRAWL_PER_HOST_CONCURRENCY
+        self.per_host_rate = per_host_rate or settings.CRAWL_PER_HOST_RATE
+        self.per_host_burst = per_host_burst or settings.CRAWL_PER_HOST_BURST
+        self.reset()
+
+    def reset(self):
+        """Clears queue state and metrics."""
+        self._queue: List[Tuple[int, int, str, asyncio.Future, float]] = []
+        self._sequence = itertools.count()
+        self._hosts: Dict[str, HostState] = {}
+        self._next_sweep = 0.0
+        self._in_flight = 0
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._wakeup_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waits: Dict[int, Deque[float]] = {}
+        self._dispatched: Dict[int, int] = {}
+
+    def _host(self, host: str) -> HostState:
+        if host not in self._hosts:
+            self._hosts[host] = HostState(self.per_host_burst)
+        return self._hosts[host]
+
+    def _evict_idle(self, now: float):
+        """Drops idle hosts whose buckets have refilled, at most once per refill period."""
+        if now < self._next_sweep:
+            return
+        refill_seconds = self.per_host_burst / self.per_host_rate
+        self._next_sweep = now + refill_seconds
+        for host in [h for h, state in self._hosts.items() if not state.active and now - state.updated >= refill_seconds]:
+            del self._hosts[host]
+
+    def _record_wait(self, priority: int, waited: float):
+        if priority not in self._waits:
+            self._waits[priority] = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self._waits[priority].append(waited)
+        self._dispatched[priority] = self._dispatched.get(priority, 0) + 1
+
+    def _dispatch(self):
+        """Grants slots to waiting fetches that fit within every limit."""
+        now = time.monotonic()
+        self._evict_idle(now)
+        deferred = []
+        retry_in: Optional[float] = None
+
+        while self._queue and self._in_flight < self.max_in_flight:
+            entry = heapq.heappop(self._queue)
+            priority, _, host, future, enqueued_at = entry
+            if future.done():
+                # Waiter was cancelled
+                continue
+
+            state = self._host(host)
+            state.refill(self.per_host_rate, self.per_host_burst, now)
+            if state.active >= self.per_host_concurrency:
+                deferred.append(entry)
+                continue
+            if state.tokens < 1:
+                deferred.append(entry)
+                delay = (1 - state.tokens) / self.per_host_rate
+                retry_in = delay if retry_in is None else min(retry_in, delay)
+                continue
+
+            state.tokens -= 1
+            state.active += 1
+            self._in_flight += 1
+            self._record_wait(priority, now - enqueued_at)
+            future.set_result(None)
+
+        for entry in deferred:
+            heapq.heappush(self._queue, entry)
+
+        if retry_in is not None:
+            self._schedule_wakeup(retry_in)
+
+    def _schedule_wakeup(self, delay: float):
+        """Re-runs dispatch once the earliest rate-limited host has a token."""
+        loop = asyncio.get_running_loop()
+        if self._wakeup is not None and self._wakeup_loop is loop and not self._wakeup.cancelled():
+            if self._wakeup.when() <= loop.time() + delay:
+                return
+            self._wakeup.cancel()
+        self._wakeup = loop.call_later(delay, self._on_wakeup)
+        self._wakeup_loop = loop
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self._dispatch()
+
+    def _release(self, host: str):
+        state = self._host(host)
+        state.active -= 1
+        self._in_flight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, url: str, priority: int = PRIORITY_USER):
+        """
+        Waits until a fetch of `url` is allowed, then holds the slot for the block.
+        Usage: async with crawl_scheduler.slot(url, PRIORITY_BACKGROUND): ...
+        """
+        host = host_key(url)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), host, future, time.monotonic()))
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted just before cancellation
+                self._release(host)
+            raise
+
+        try:
+            yield
+        finally:
+            self._release(host)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, in-flight counts and queue wait times (ms) per priority."""
+        wait_times = {}
+        for priority, samples in sorted(self._waits.items()):
+            ordered = sorted(samples)
+            wait_times[PRIORITY_NAMES.get(priority, str(priority))] = {
+                "dispatched": self._dispatched.get(priority, 0),
+                "avg_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+                "max_ms": round(ordered[-1] * 1000, 2)
+            }
+        return {
+            "in_flight": self._in_flight,
+            "queued": sum(1 for entry in self._queue if not entry[3].done()),
+            "hosts_active": {host: state.active for host, state in self._hosts.items() if state.active},
+            "wait_times": wait_times
+        }
+
+crawl_scheduler = CrawlScheduler()
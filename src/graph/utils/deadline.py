@@ -0,0 +1,73 @@
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.runnables.config import var_child_runnable_config
+
+from src.config import settings
+from src.graph.utils.agents import get_event_writer
+
+# Keys in config["configurable"]: absolute deadline (epoch seconds) and the budget it came from
+DEADLINE_KEY = "deadline"
+BUDGET_KEY = "budget_seconds"
+BUDGET_EVENT = "budget"
+# Shortest time a tool call is given, however little budget is left
+MIN_ATTEMPT_SECONDS = 1.0
+
+def deadline_config(budget_seconds: Optional[float] = None, now: Optional[float] = None) -> Dict[str, float]:
+    """
+    configurable entries bounding a run to budget_seconds (RUN_BUDGET_SECONDS if unset).
+    Empty when neither is set, which leaves the run unbounded.
+    """
+    budget = budget_seconds if budget_seconds is not None else settings.RUN_BUDGET_SECONDS
+    if not budget:
+        return {}
+    start = now if now is not None else time.time()
+    return {DEADLINE_KEY: start + budget, BUDGET_KEY: budget}
+
+def _configurable(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    config = config if config is not None else (var_child_runnable_config.get() or {})
+    return config.get("configurable") or {}
+
+def remaining_budget(config: Optional[Dict[str, Any]] = None) -> Optional[float]:
+    """Seconds left before the current run's deadline (never negative), or None for unbounded runs."""
+    deadline = _configurable(config).get(DEADLINE_KEY)
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.time())
+
+def budget_below(seconds: float, config: Optional[Dict[str, Any]] = None) -> bool:
+    remaining = remaining_budget(config)
+    return remaining is not None and remaining < seconds
+
+def bounded_timeout(timeout: float, config: Optional[Dict[str, Any]] = None) -> float:
+    """
+    A tool timeout cut to what the run can still spend on it, keeping
+    RUN_SUMMARY_RESERVE_SECONDS for the final answer (at least MIN_ATTEMPT_SECONDS).
+    """
+    remaining = remaining_budget(config)
+    if remaining is None:
+        return timeout
+    return max(MIN_ATTEMPT_SECONDS, min(timeout, remaining - settings.RUN_SUMMARY_RESERVE_SECONDS))
+
+def budget_event(stage: str, skipped: Optional[List[str]] = None, config: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Time used and left in the current run when a stage starts or is skipped (None for unbounded runs)."""
+    configurable = _configurable(config)
+    deadline = configurable.get(DEADLINE_KEY)
+    if deadline is None:
+        return None
+    budget = configurable.get(BUDGET_KEY, 0.0)
+    remaining = max(0.0, deadline - time.time())
+    return {
+        "type": BUDGET_EVENT,
+        "stage": stage,
+        "budget_seconds": budget,
+        "elapsed_seconds": round(max(0.0, budget - remaining), 3),
+        "remaining_seconds": round(remaining, 3),
+        "skipped": skipped or []
+    }
+
+def emit_budget(stage: str, skipped: Optional[List[str]] = None, config: Optional[Dict[str, Any]] = None):
+    """Writes a budget_event to the run's custom stream."""
+    event = budget_event(stage, skipped, config)
+    if event is not None:
+        get_event_writer()(event)
@@ -0,0 +1,200 @@
+import json
+import os
+import re
+import tempfile
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from lxml import etree
+from lxml import html as lxml_html
+
+from src.config import settings
+
+# Container ids such as "item1a", "item_7" or "Item7A"
+ITEM_ID_RE = re.compile(r'item[\s_\-]*(\d{1,2}[a-z]?)', re.IGNORECASE)
+# Heading text such as "Item 1A. Risk Factors" or "ITEM 7 - MD&A"
+ITEM_HEADING_RE = re.compile(r'^\s*item\s+(\d{1,2}[a-z]?)(?:\s*[\.:–—\-]|\s*$|\s+[A-Z])', re.IGNORECASE)
+# Headings are short; longer text nodes are body copy that happens to start with "Item"
+MAX_HEADING_CHARS = 200
+
+# Tags whose text never belongs in an extracted section
+NON_TEXT_TAGS = ("script", "style", "template", "head", "title")
+
+def normalize_section_id(section_id: str) -> Optional[str]:
+    """Maps "Item 1A", "item_1a" or "item1a" to "item1a"; returns None for non-item ids."""
+    match = ITEM_ID_RE.fullmatch(section_id.strip())
+    if not match:
+        return None
+    return f"item{match.group(1).lower()}"
+
+class SectionBoundaryParser(HTMLParser):
+    """
+    Event-driven scan of a filing for Item boundaries without building a DOM.
+    Works on latin-1 decoded text so character positions equal byte offsets.
+    Records id-tagged Item containers and "Item N." headings in one pass.
+    """
+
+    def __init__(self, text: str):
+        super().__init__(convert_charrefs=True)
+        self._text = text
+        self._line_starts = [0] + [m.end() for m in re.finditer(r'\n', text)]
+        self._last_start = 0
+        # Open id-tagged containers: [section_id, tag, start, depth, has_text]
+        self._open_containers: List[list] = []
+        self.containers: Dict[str, Tuple[int, int]] = {}
+        self.headings: List[Tuple[int, str]] = []
+
+    def _offset(self) -> int:
+        line, col = self.getpos()
+        return self._line_starts[line - 1] + col
+
+    def handle_starttag(self, tag, attrs):
+        offset = self._offset()
+        self._last_start = offset
+        for open_container in self._open_containers:
+            if open_container[1] == tag:
+                open_container[3] += 1
+
+        element_id = dict(attrs).get("id") or ""
+        section_id = normalize_section_id(element_id) if element_id else None
+        if section_id and section_id not in self.containers:
+            self._open_containers.append([section_id, tag, offset, 1, False])
+
+    def handle_endtag(self, tag):
+        offset = self._offset()
+        for open_container in list(self._open_containers):
+            if open_container[1] != tag:
+                continue
+            open_container[3] -= 1
+            if open_container[3] == 0:
+                self._open_containers.remove(open_container)
+                if not open_container[4]:
+                    # Empty anchors (<a id="item1a"></a>) only mark where a section starts
+                    self.headings.append((open_container[2], open_container[0]))
+                    continue
+                end = self._text.find(">", offset)
+                end = len(self._text) if end == -1 else end + 1
+                self.containers[open_container[0]] = (open_container[2], end)
+
+    def handle_data(self, data):
+        if data.strip():
+            for open_container in self._open_containers:
+                open_container[4] = True
+        if len(data) > MAX_HEADING_CHARS:
+            return
+        match = ITEM_HEADING_RE.match(data)
+        if match:
+            self.headings.append((self._last_start, f"item{match.group(1).lower()}"))
+
+    def close(self):
+        super().close()
+        # Unclosed containers run to the end of the document
+        for section_id, _, start, _, _ in self._open_containers:
+            self.containers[section_id] = (start, len(self._text))
+        self._open_containers = []
+
+def index_sections(raw: bytes) -> Dict[str, List[int]]:
+    """
+    Finds every Item section in a raw filing in a single streaming pass.
+    Returns {section_id: [start_byte, end_byte]}.
+    Id-tagged containers win; otherwise a heading runs until the next Item
+    boundary and, when a heading repeats (table of contents), the longest span wins.
+    """
+    text = raw.decode("latin-1")
+    parser = SectionBoundaryParser(text)
+    parser.feed(text)
+    parser.close()
+
+    boundaries = sorted(
+        set(parser.headings) | {(start, section_id) for section_id, (start, _) in parser.containers.items()}
+    )
+    offsets: Dict[str, List[int]] = {}
+    for position, (start, section_id) in enumerate(boundaries):
+        if section_id in parser.containers:
+            continue
+        end = boundaries[position + 1][0] if position + 1 < len(boundaries) else len(raw)
+        current = offsets.get(section_id)
+        if current is None or end - start > current[1] - current[0]:
+            offsets[section_id] = [start, end]
+
+    for section_id, (start, end) in parser.containers.items():
+        offsets[section_id] = [start, end]
+    return offsets
+
+def section_text(fragment: bytes) -> str:
+    """
+    Extracts newline-separated text from a raw section slice.
+    The slice may start or end mid-element; lxml repairs it.
+    """
+    markup = fragment.decode("utf-8", "replace").strip()
+    if not markup:
+        return ""
+    try:
+        root = lxml_html.fragment_fromstring(markup, create_parent="div")
+    except (etree.ParserError, ValueError):
+        return ""
+    etree.strip_elements(root, etree.Comment, *NON_TEXT_TAGS, with_tail=False)
+    return "\n".join(s.strip() for s in root.itertext() if s.strip())
+
+def _filing_paths(accession_number: str) -> Tuple[str, str]:
+    """Raw filing and offsets paths for an accession number under SEC_CACHE_DIR."""
+    base = os.path.join(settings.SEC_CACHE_DIR, accession_number)
+    return f"{base}.htm", f"{base}.offsets.json"
+
+def _atomic_write(path: str, data: bytes) -> None:
+    """
+    Writes via a uniquely named temporary file so readers never see a partial
+    filing and concurrent writers of the same filing never share a temp file.
+    """
+    f = tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp", delete=False)
+    try:
+        with f:
+            f.write(data)
+        os.replace(f.name, path)
+    except Exception:
+        os.unlink(f.name)
+        raise
+
+def store_filing(accession_number: str, raw: bytes) -> Dict[str, List[int]]:
+    """
+    Indexes a raw filing and persists both the filing and its section offsets.
+    Returns the offsets that were written.
+    """
+    offsets = index_sections(raw)
+    raw_path, offsets_path = _filing_paths(accession_number)
+    os.makedirs(os.path.dirname(raw_path), exist_ok=True)
+    _atomic_write(raw_path, raw)
+    _atomic_write(offsets_path, json.dumps(offsets).encode("utf-8"))
+    return offsets
+
+def load_section_offsets(accession_number: str) -> Optional[Dict[str, List[int]]]:
+    """Returns the persisted offsets for a filing, or None if it was never indexed."""
+    raw_path, offsets_path = _filing_paths(accession_number)
+    if not (os.path.exists(raw_path) and os.path.exists(offsets_path)):
+        return None
+    try:
+        with open(offsets_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error reading section offsets for {accession_number}: {e}")
+        return None
+
+def read_section(accession_number: str, section_id: str, offsets: Optional[Dict[str, List[int]]] = None) -> Optional[str]:
+    """
+    Reads one section of a cached filing by seeking to its persisted byte range.
+    Returns None when the filing is not cached and "" when the section does not exist.
+    """
+    if offsets is None:
+        offsets = load_section_offsets(accession_number)
+    if offsets is None:
+        return None
+
+    normalized = normalize_section_id(section_id)
+    span = offsets.get(normalized) if normalized else None
+    if not span:
+        return ""
+
+    raw_path, _ = _filing_paths(accession_number)
+    start, end = span
+    with open(raw_path, "rb") as f:
+        f.seek(start)
+        return section_text(f.read(end - start))
@@ -0,0 +1,141 @@
+import re
+from collections import Counter
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+# Compact Loughran-McDonald style word lists, plus common market/social slang
+POSITIVE_WORDS = frozenset("""
+achieve achieved achievement advance advanced advances advantage advantageous attractive beat beats
+benefit benefited benefits best better boom booming boost boosted breakout breakthrough bull bullish buy
+buying calls climb climbed climbing confident exceed exceeded exceeding exceeds excellent expand expanded
+expansion favorable gain gained gaining gains good great greatest grow growing grows growth high higher
+highs improve improved improvement improves improving increase increased innovative moon mooning
+opportunities opportunity optimism optimistic outperform outperformed outperforming outperforms positive
+profit profitability profitable profits progress raise raised rallied rallies rally rallying rebound
+rebounded record recover recovered recovery resilient rise rising robust rocket soar soared soaring solid
+strength strengthen strong stronger strongest succeed success successful surge surged surging surpass
+surpassed tailwind tailwinds top undervalued up upbeat upgrade upgraded upgrades upside win winning
+""".split())
+
+NEGATIVE_WORDS = frozenset("""
+adverse against bad bankrupt bankruptcy bear bearish bleak breach burden collapse collapsed concern
+concerns crash crashed crashing crisis critical cut cuts cutting decline declined declines declining
+decrease decreased default defaults deficit delay delayed deteriorate deteriorated deteriorating
+disappoint disappointed disappointing disappointment downgrade downgraded downgrades downside downturn
+drop dropped dropping dump dumped dumping fail failed failing failure fall falling falls fear fears fell
+fraud headwind headwinds hurt impairment investigation lawsuit layoff layoffs litigation lose losing loss
+losses low lower lowest miss missed misses negative overvalued penalty plunge plunged plunging poor puts
+recall recession restatement restructuring risk risks risky sell selloff shortfall shrink slump slumped
+slowdown slowing sink sinking slash slashed slump tank tanked tanking terrible threat threats tumble
+tumbled underperform underperformed underperforming unfavorable volatile volatility warn warned warning
+weak weaken weakened weakening weaker weakness worse worst writedown
+""".split())
+
+UNCERTAINTY_WORDS = frozenset("""
+almost anticipate appear appears approximately assume assumption believe could depend depends doubt
+doubtful estimate estimated exposure fluctuate fluctuation may maybe might possible possibly predict
+preliminary probable probably roughly seems speculative suggest tentative uncertain uncertainties
+uncertainty unclear unknown unpredictable unproven variable volatile
+""".split())
+
+NEGATORS = frozenset({"no", "not", "never", "neither", "nor", "none", "without", "isn't", "wasn't", "aren't", "don't", "doesn't", "didn't", "won't", "can't"})
+NEGATION_WINDOW = 3
+NEGATED_POSITIVE = "__negated_positive__"
+
+# Hits at which a one-sided text reaches full strength
+SATURATION_HITS = 4
+# Sentiment-free texts this long are confidently neutral boilerplate
+NEUTRAL_TOKENS = 40
+NEUTRAL_CONFIDENCE = 0.7
+
+TOKEN_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+VOCABULARY: List[str] = sorted(POSITIVE_WORDS | NEGATIVE_WORDS | UNCERTAINTY_WORDS) + [NEGATED_POSITIVE]
+VOCABULARY_INDEX: Dict[str, int] = {word: i for i, word in enumerate(VOCABULARY)}
+
+# Columns: positive, negative, uncertainty. A word can be both negative and uncertain (e.g. volatile).
+WEIGHTS = np.array([
+    [word in POSITIVE_WORDS, word in NEGATIVE_WORDS or word == NEGATED_POSITIVE, word in UNCERTAINTY_WORDS]
+    for word in VOCABULARY
+], dtype=float)
+
+class LexiconScore(NamedTuple):
+    score: float
+    confidence: float
+    positive: int
+    negative: int
+    uncertain: int
+    tokens: int
+
+    @property
+    def rationale(self) -> str:
+        return (
+            f"Lexicon pre-score: {self.positive} positive, {self.negative} negative and "
+            f"{self.uncertain} uncertain finance terms in {self.tokens} words."
+        )
+
+def term_counts(text: str) -> Tuple[Counter, int]:
+    """
+    Lexicon term counts and word count for one text. A positive word within
+    NEGATION_WINDOW words after a negator ("not strong") counts as negative.
+    """
+    counts: Counter = Counter()
+    last_negator = -NEGATION_WINDOW - 1
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    for i, token in enumerate(tokens):
+        if token in NEGATORS:
+            last_negator = i
+        elif token in VOCABULARY_INDEX:
+            negated = token in POSITIVE_WORDS and i - last_negator <= NEGATION_WINDOW
+            counts[NEGATED_POSITIVE if negated else token] += 1
+    return counts, len(tokens)
+
+def count_matrix(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """(texts x vocabulary) term count matrix and per-text token totals."""
+    matrix = np.zeros((len(texts), len(VOCABULARY)))
+    totals = np.zeros(len(texts))
+    for row, text in enumerate(texts):
+        counts, totals[row] = term_counts(text or "")
+        for term, count in counts.items():
+            matrix[row, VOCABULARY_INDEX[term]] = count
+    return matrix, totals
+
+def lexicon_scores(texts: Sequence[str]) -> List[LexiconScore]:
+    """
+    Scores many texts at once: one matrix product over term counts.
+    score = net tone in [-1, 1], damped until SATURATION_HITS sentiment terms;
+    confidence = how one-sided and well-supported the tone is, reduced by
+    uncertainty terms. Long texts without polar terms are confidently neutral
+    boilerplate unless they hedge.
+    """
+    if not texts:
+        return []
+    matrix, totals = count_matrix(texts)
+    hits = matrix @ WEIGHTS
+    positive, negative, uncertain = hits[:, 0], hits[:, 1], hits[:, 2]
+    polar = positive + negative
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tone = np.where(polar > 0, (positive - negative) / polar, 0.0)
+        uncertainty_share = np.where(polar + uncertain > 0, uncertain / (polar + uncertain), 0.0)
+    support = np.minimum(1.0, polar / SATURATION_HITS)
+    scores = tone * support
+    confidence = np.abs(tone) * support * (1.0 - uncertainty_share)
+    neutral_confidence = NEUTRAL_CONFIDENCE * np.minimum(1.0, totals / NEUTRAL_TOKENS) / (1.0 + uncertain)
+    confidence = np.where(polar == 0, neutral_confidence, confidence)
+
+    return [
+        LexiconScore(
+            score=round(float(scores[i]), 3),
+            confidence=round(float(confidence[i]), 3),
+            positive=int(positive[i]),
+            negative=int(negative[i]),
+            uncertain=int(uncertain[i]),
+            tokens=int(totals[i])
+        )
+        for i in range(len(texts))
+    ]
+
+def lexicon_score(text: str) -> LexiconScore:
+    return lexicon_scores([text])[0]
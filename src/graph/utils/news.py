@@ -1,20 +1,218 @@
-from typing import Dict, List, Optional
-from datetime import datetime, timezone, timedelta
-from sqlalchemy import select
+import asyncio
+import hashlib
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone, timedelta, date, time
+from sqlalchemy import select, or_
 from sqlalchemy.exc import IntegrityError
 from ddgs import DDGS
-from langchain_openai import ChatOpenAI
+from src.services.llm_cache import llm_cache
+from src.graph.utils.tokens import estimate_tokens
 from langchain_core.messages import SystemMessage, HumanMessage
+from pydantic import BaseModel, Field
 
+from src.config import settings
 from src.database.session import AsyncSessionLocal
 from src.database.models import ResearchCache, ResearchSourceType
-from src.graph.utils.prompt import ARTICLE_SUMMARY_PROMPT
+from src.graph.utils.prompt import ARTICLE_SUMMARY_PROMPT, BATCH_ARTICLE_SUMMARY_PROMPT
 from src.graph.utils.scraping import fetch_content, clean_html, DEFAULT_USER_AGENT
+from src.graph.utils.crawl import crawl_scheduler, PRIORITY_USER
+from src.graph.utils.concurrency import SingleFlight
 
-async def get_summary_result(item: Dict[str, str], expire_at: Optional[datetime] = None) -> Optional[Dict[str, str]]:
+# DDGS is synchronous; searches run on a bounded pool instead of the event loop
+search_executor = ThreadPoolExecutor(max_workers=settings.SEARCH_MAX_WORKERS, thread_name_prefix="ddgs")
+search_flight = SingleFlight()
+SEARCH_CACHE_PREFIX = "ddgs"
+
+# Identical article text summarizes identically; reuse LLM output for a week
+ARTICLE_SUMMARY_CACHE_TTL = 7 * 24 * 3600
+# Article text sent to the LLM, per article
+ARTICLE_CHAR_LIMIT = 4000
+# URL, separators and the summary itself, per packed article
+BATCH_ARTICLE_OVERHEAD_TOKENS = 150
+
+# SimHash near-duplicate detection for syndicated articles
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4  # Near-duplicates within BANDS - 1 bits always share one exact band
+SIMHASH_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+NEAR_DUPLICATE_MAX_DISTANCE = 3
+FINGERPRINT_KEY_PREFIX = "news_simhash"
+# Band rows hold this plus the URL whose row has the summary, so it is stored once
+FINGERPRINT_REF_PREFIX = "ref:"
+FINGERPRINT_INDEX_SIZE = 2048
+SHINGLE_SIZE = 3
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word shingles of the text the summarizer would see."""
+    words = WORD_RE.findall(text[:4000].lower())
+    if not words:
+        return 0
+    counts = [0] * SIMHASH_BITS
+    for i in range(max(len(words) - SHINGLE_SIZE + 1, 1)):
+        shingle = " ".join(words[i:i + SHINGLE_SIZE]).encode("utf-8")
+        value = int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            counts[bit] += 1 if (value >> bit) & 1 else -1
+    return sum(1 << bit for bit in range(SIMHASH_BITS) if counts[bit] > 0)
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def simhash_bands(fingerprint: int) -> List[int]:
+    mask = (1 << SIMHASH_BAND_BITS) - 1
+    return [(fingerprint >> (i * SIMHASH_BAND_BITS)) & mask for i in range(SIMHASH_BANDS)]
+
+def fingerprint_band_prefix(band_index: int, band: int) -> str:
+    return f"{FINGERPRINT_KEY_PREFIX}_{band_index}_{band:04x}_"
+
+def fingerprint_keys(fingerprint: int) -> List[str]:
+    """One ResearchCache key per band so near-duplicates can be found by key prefix."""
+    return [
+        f"{fingerprint_band_prefix(i, band)}{fingerprint:016x}"
+        for i, band in enumerate(simhash_bands(fingerprint))
+    ]
+
+class ArticleFingerprintIndex:
+    """
+    Process-local SimHash index of summarized and in-flight articles.
+    Lets concurrent fetches of syndicated copies share a single LLM summary.
+    """
+
+    def __init__(self, max_size: int = FINGERPRINT_INDEX_SIZE):
+        self.max_size = max_size
+        self.reset()
+
+    def reset(self):
+        self._summaries: "OrderedDict[int, str]" = OrderedDict()
+        self._in_flight: Dict[int, asyncio.Future] = {}
+        self._bands: Dict[Tuple[int, int], set] = {}
+
+    def _candidates(self, fingerprint: int) -> set:
+        candidates = set()
+        for i, band in enumerate(simhash_bands(fingerprint)):
+            candidates |= self._bands.get((i, band), set())
+        return candidates
+
+    def _add_bands(self, fingerprint: int):
+        for i, band in enumerate(simhash_bands(fingerprint)):
+            self._bands.setdefault((i, band), set()).add(fingerprint)
+
+    def _remove_bands(self, fingerprint: int):
+        for i, band in enumerate(simhash_bands(fingerprint)):
+            members = self._bands.get((i, band))
+            if members:
+                members.discard(fingerprint)
+                if not members:
+                    del self._bands[(i, band)]
+
+    def _nearest(self, fingerprint: int) -> Optional[int]:
+        best, best_distance = None, NEAR_DUPLICATE_MAX_DISTANCE + 1
+        for candidate in self._candidates(fingerprint):
+            distance = hamming_distance(candidate, fingerprint)
+            if distance < best_distance:
+                best, best_distance = candidate, distance
+        return best
+
+    def claim(self, fingerprint: int) -> Tuple[Optional[str], Optional[asyncio.Future], bool]:
+        """
+        Returns (summary, future, owner).
+        summary is set when a near-duplicate was already summarized; otherwise
+        future resolves to the summary and owner says whether the caller must produce it.
+        """
+        match = self._nearest(fingerprint)
+        if match is not None:
+            if match in self._summaries:
+                self._summaries.move_to_end(match)
+                return self._summaries[match], None, False
+            return None, self._in_flight[match], False
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[fingerprint] = future
+        self._add_bands(fingerprint)
+        return None, future, True
+
+    def resolve(self, fingerprint: int, summary: Optional[str]):
+        """Publishes the owner's result to waiters; failed summaries are forgotten."""
+        future = self._in_flight.pop(fingerprint, None)
+        if future is not None and not future.done():
+            future.set_result(summary)
+        if not summary:
+            self._remove_bands(fingerprint)
+            return
+
+        self._summaries[fingerprint] = summary
+        while len(self._summaries) > self.max_size:
+            evicted, _ = self._summaries.popitem(last=False)
+            self._remove_bands(evicted)
+
+article_index = ArticleFingerprintIndex()
+
+async def get_fingerprint_summary(db, fingerprint: int) -> Optional[str]:
+    """
+    Looks up a near-duplicate summary stored by another request in ResearchCache.
+    Band rows point at the summary's URL row; older rows still hold the summary itself.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    prefixes = [fingerprint_band_prefix(i, band) for i, band in enumerate(simhash_bands(fingerprint))]
+    stmt = select(ResearchCache).where(
+        or_(*[ResearchCache.key.startswith(prefix) for prefix in prefixes]),
+        ResearchCache.expire_at > now
+    )
+    result = await db.execute(stmt)
+    for cached in result.scalars().all():
+        try:
+            candidate = int(cached.key.rsplit("_", 1)[-1], 16)
+        except (AttributeError, ValueError):
+            continue
+        if hamming_distance(candidate, fingerprint) > NEAR_DUPLICATE_MAX_DISTANCE:
+            continue
+        if not cached.content.startswith(FINGERPRINT_REF_PREFIX):
+            return cached.content
+        summary_row = await db.execute(select(ResearchCache).where(
+            ResearchCache.key == cached.content[len(FINGERPRINT_REF_PREFIX):],
+            ResearchCache.expire_at > now
+        ))
+        summary = summary_row.scalar_one_or_none()
+        if summary:
+            return summary.content
+    return None
+
+async def summarize_unique(db, content: str, url: str, fingerprint: int) -> Tuple[Optional[str], bool]:
+    """
+    Summarizes content unless a near-duplicate article was already summarized
+    (in this process, in flight, or in ResearchCache).
+    Returns (summary, is_new) where is_new means the LLM produced it here.
+    """
+    summary, future, owner = article_index.claim(fingerprint)
+    if summary:
+        return summary, False
+
+    if not owner:
+        summary = await asyncio.shield(future)
+        if summary:
+            return summary, False
+        # The original failed; summarize this copy ourselves
+        return await summarize_content(content, url), True
+
+    summary = None
+    is_new = False
+    try:
+        summary = await get_fingerprint_summary(db, fingerprint)
+        if not summary:
+            summary = await summarize_content(content, url)
+            is_new = True
+    finally:
+        article_index.resolve(fingerprint, summary if summary and "Error" not in summary else None)
+    return summary, is_new
+
+async def get_summary_result(item: Dict[str, str], expire_at: Optional[datetime] = None, priority: int = PRIORITY_USER) -> Optional[Dict[str, str]]:
     """Helper to fetch summary and return a structured result."""
     user_agent = item.get("user_agent", "")
-    summary = await get_summary(item['link'], user_agent, expire_at=expire_at)
+    summary = await get_summary(item['link'], user_agent, expire_at=expire_at, priority=priority)
     if summary:
         return {
             "title": item["title"],
@@ -40,10 +238,75 @@ def fetch_ddgs_urls(query: str) -> List[Dict[str, str]]:
         print(f"Error for query {query}: {e}")
     return results
 
-async def get_summary(url: str, user_agent: str = "", expire_at: Optional[datetime] = None) -> Optional[str]:
+def search_cache_key(query: str, day: date) -> str:
+    """ResearchCache key for a query's results on a given (UTC) day."""
+    normalized = " ".join(query.lower().split())
+    return f"{SEARCH_CACHE_PREFIX}_{day.isoformat()}_{normalized}"
+
+async def get_cached_search(key: str) -> Optional[List[Dict[str, str]]]:
+    """Returns cached search results, or None on a miss or cache error."""
+    try:
+        async with AsyncSessionLocal() as db:
+            stmt = select(ResearchCache).where(
+                ResearchCache.key == key,
+                ResearchCache.expire_at > datetime.now(timezone.utc).replace(tzinfo=None)
+            )
+            result = await db.execute(stmt)
+            cached = result.scalar_one_or_none()
+            if cached:
+                return json.loads(cached.content)
+    except Exception as e:
+        print(f"Error reading search cache: {e}")
+    return None
+
+async def save_search(key: str, results: List[Dict[str, str]], day: date):
+    """Caches search results until the end of the (UTC) day."""
+    try:
+        async with AsyncSessionLocal() as db:
+            db.add(ResearchCache(
+                source_type=ResearchSourceType.NEWS,
+                key=key,
+                content=json.dumps(results),
+                expire_at=datetime.combine(day + timedelta(days=1), time.min)
+            ))
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Another worker cached the same query first
+                await db.rollback()
+    except Exception as e:
+        print(f"Error saving search cache: {e}")
+
+async def run_search(query: str, key: str, day: date) -> List[Dict[str, str]]:
+    """Cache lookup, then a DDGS search on the search pool for misses."""
+    results = await get_cached_search(key)
+    if results is None:
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(search_executor, fetch_ddgs_urls, query)
+        if results:
+            await save_search(key, results, day)
+    return results
+
+async def search_urls(query: str) -> List[Dict[str, str]]:
+    """
+    Async, cached DDGS search for a single query.
+    Results are cached per (query, day) and identical concurrent queries share one search.
+    """
+    day = datetime.now(timezone.utc).date()
+    key = search_cache_key(query, day)
+    results = await search_flight.do(key, run_search, query, key, day)
+    # Callers annotate result items, so each gets its own copies
+    return [dict(item) for item in results]
+
+async def search_many(queries: List[str]) -> List[List[Dict[str, str]]]:
+    """Runs several searches concurrently; results are in query order."""
+    return list(await asyncio.gather(*[search_urls(q) for q in queries]))
+
+async def get_summary(url: str, user_agent: str = "", expire_at: Optional[datetime] = None, priority: int = PRIORITY_USER) -> Optional[str]:
     """
     Get news summary from cache or fetch and summarize.
     TTL: Default 7 days if expire_at not provided.
+    Page fetches go through the crawl scheduler at the given priority.
     """
     if not url:
         return None
@@ -62,48 +325,249 @@ async def get_summary(url: str, user_agent: str = "", expire_at: Optional[dateti
                 
             # 2. Cache miss - Fetch and Summarize
             ua = user_agent if user_agent else DEFAULT_USER_AGENT
-            html = await fetch_content(url, ua)
+            async with crawl_scheduler.slot(url, priority):
+                html = await fetch_content(url, ua)
             if html:
                 content = clean_html(html)
                 if content:
-                    summary = await summarize_content(content, url)
+                    # Syndicated copies reuse the summary of their near-duplicate
+                    fingerprint = simhash(content)
+                    summary, is_new = await summarize_unique(db, content, url, fingerprint)
                     if summary and "Error" not in summary:
                         # Save to unified ResearchCache
-                        if expire_at is None:
-                            expire_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=7)
-                        
-                        new_cache = ResearchCache(
-                            source_type=ResearchSourceType.NEWS,
-                            key=url,
-                            content=summary,
-                            expire_at=expire_at
-                        )
-                        db.add(new_cache)
-                        try:
-                            await db.commit()
-                        except IntegrityError:
-                            # Concurrent insert occurred, ignore and proceed
-                            await db.rollback()
+                        expire_at = expire_at or default_summary_expiry()
+                        await save_summary(db, url, summary, expire_at)
+                        if is_new:
+                            await save_fingerprint(db, fingerprint, url, expire_at)
                         return summary
         except Exception as e:
             print(f"Error in get_summary: {e}")
             
     return None
 
+def default_summary_expiry() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=7)
+
+async def save_summary(db, url: str, summary: str, expire_at: datetime):
+    """Caches a summary under its URL."""
+    db.add(ResearchCache(
+        source_type=ResearchSourceType.NEWS,
+        key=url,
+        content=summary,
+        expire_at=expire_at
+    ))
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Concurrent insert occurred, ignore and proceed
+        await db.rollback()
+
+async def save_fingerprint(db, fingerprint: int, url: str, expire_at: datetime):
+    """Indexes a new summary by SimHash bands; each band row points at the summary's URL row."""
+    for key in fingerprint_keys(fingerprint):
+        db.add(ResearchCache(
+            source_type=ResearchSourceType.NEWS,
+            key=key,
+            content=f"{FINGERPRINT_REF_PREFIX}{url}",
+            expire_at=expire_at
+        ))
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Same fingerprint indexed concurrently
+        await db.rollback()
+
 async def summarize_content(content: str, url: str) -> Optional[str]:
     """Summarize content using an LLM."""
     if not content or len(content) < 100:
         return None
         
     try:
-        llm = ChatOpenAI(model="gpt-4o", temperature=0)
-        prompt = ARTICLE_SUMMARY_PROMPT.format(content=content[:4000])
+        prompt = ARTICLE_SUMMARY_PROMPT.format(content=content[:ARTICLE_CHAR_LIMIT])
         messages = [
             SystemMessage(content="You are a helpful financial research assistant."),
             HumanMessage(content=prompt)
         ]
-        response = await llm.ainvoke(messages)
+        response = await llm_cache.ainvoke(
+            "article_summary", messages, "gpt-4o", 0, ttl_seconds=ARTICLE_SUMMARY_CACHE_TTL
+        )
         return response.content.strip()
     except Exception as e:
         print(f"Error summarizing content: {e}")
         return None
+
+class ArticleSummary(BaseModel):
+    url: str = Field(description="URL of the article, exactly as given")
+    summary: str = Field(description="2-3 sentence summary of the article's key financial insights")
+
+class ArticleSummaryBatch(BaseModel):
+    summaries: List[ArticleSummary] = Field(description="One summary per article")
+
+def pack_articles(
+    articles: List[Tuple[str, str]],
+    max_tokens: Optional[int] = None,
+    max_articles: Optional[int] = None
+) -> List[List[Tuple[str, str]]]:
+    """
+    Greedily packs (url, content) pairs into batches, in order, so each batch stays
+    under the token budget and article cap. An article never spans batches.
+    """
+    max_tokens = max_tokens or settings.SUMMARY_BATCH_MAX_TOKENS
+    max_articles = max_articles or settings.SUMMARY_BATCH_MAX_ARTICLES
+    batches: List[List[Tuple[str, str]]] = []
+    current: List[Tuple[str, str]] = []
+    used = 0
+    for url, content in articles:
+        tokens = estimate_tokens(content[:ARTICLE_CHAR_LIMIT]) + BATCH_ARTICLE_OVERHEAD_TOKENS
+        if current and (used + tokens > max_tokens or len(current) >= max_articles):
+            batches.append(current)
+            current, used = [], 0
+        current.append((url, content))
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def format_batch(articles: List[Tuple[str, str]]) -> str:
+    return "\n\n".join(
+        f"[Article {i}]\nURL: {url}\nContent:\n{content[:ARTICLE_CHAR_LIMIT]}"
+        for i, (url, content) in enumerate(articles, 1)
+    )
+
+async def summarize_batch(articles: List[Tuple[str, str]]) -> Dict[str, Optional[str]]:
+    """
+    Summarizes several articles with one structured-output call, keyed by URL.
+    Articles the batch call fails on (schema errors, missing or unknown URLs)
+    fall back to individual summarize_content calls.
+    """
+    summaries: Dict[str, Optional[str]] = {}
+    if len(articles) > 1:
+        try:
+            prompt = BATCH_ARTICLE_SUMMARY_PROMPT.format(articles=format_batch(articles))
+            messages = [
+                SystemMessage(content="You are a helpful financial research assistant."),
+                HumanMessage(content=prompt)
+            ]
+            result = await llm_cache.ainvoke(
+                "article_summary_batch", messages, "gpt-4o", 0,
+                schema=ArticleSummaryBatch, ttl_seconds=ARTICLE_SUMMARY_CACHE_TTL
+            )
+            expected = {url for url, _ in articles}
+            for item in result.summaries:
+                if item.url in expected and item.summary.strip():
+                    summaries[item.url] = item.summary.strip()
+        except Exception as e:
+            print(f"Error in batch summarization, falling back to single articles: {e}")
+
+    missing = [(url, content) for url, content in articles if url not in summaries]
+    if missing:
+        fallback = await asyncio.gather(*[summarize_content(content, url) for url, content in missing])
+        summaries.update(zip([url for url, _ in missing], fallback))
+    return summaries
+
+async def summarize_many(articles: List[Tuple[str, str]]) -> Dict[str, Optional[str]]:
+    """Packs articles into token-bounded batches and summarizes the batches concurrently."""
+    summaries: Dict[str, Optional[str]] = {}
+    for batch_summaries in await asyncio.gather(*[summarize_batch(batch) for batch in pack_articles(articles)]):
+        summaries.update(batch_summaries)
+    return summaries
+
+async def get_cached_summaries(db, urls: List[str]) -> Dict[str, str]:
+    """Reads unexpired summaries for several URLs in one query."""
+    stmt = select(ResearchCache).where(
+        ResearchCache.key.in_(urls),
+        ResearchCache.expire_at > datetime.now(timezone.utc).replace(tzinfo=None)
+    )
+    result = await db.execute(stmt)
+    return {cached.key: cached.content for cached in result.scalars().all() if cached.content}
+
+async def fetch_article(item: Dict[str, str], priority: int = PRIORITY_USER) -> Optional[str]:
+    """Fetches and cleans one article through the crawl scheduler."""
+    url = item["link"]
+    try:
+        async with crawl_scheduler.slot(url, priority):
+            html = await fetch_content(url, item.get("user_agent") or DEFAULT_USER_AGENT)
+        return clean_html(html) if html else None
+    except Exception as e:
+        print(f"Error fetching article {url}: {e}")
+        return None
+
+async def summarize_fetched(db, articles: List[Tuple[str, str]], expire_at: datetime) -> Dict[str, str]:
+    """
+    Batch counterpart of summarize_unique for fetched (url, content) pairs.
+    Near-duplicates reuse existing summaries; the rest are summarized in batches.
+    Every summary is cached under its own URL and new ones are fingerprinted.
+    """
+    summaries: Dict[str, str] = {}
+    new_fingerprints: Dict[str, int] = {}
+    owned: Dict[str, int] = {}
+    waiting = []
+    pending = []
+    try:
+        for url, content in articles:
+            fingerprint = simhash(content)
+            summary, future, owner = article_index.claim(fingerprint)
+            if summary:
+                summaries[url] = summary
+            elif not owner:
+                waiting.append((url, content, future))
+            else:
+                owned[url] = fingerprint
+                summary = await get_fingerprint_summary(db, fingerprint)
+                if summary:
+                    summaries[url] = summary
+                else:
+                    pending.append((url, content))
+
+        for url, summary in (await summarize_many(pending)).items():
+            if summary and "Error" not in summary:
+                summaries[url] = summary
+                new_fingerprints[url] = owned[url]
+    finally:
+        for url, fingerprint in owned.items():
+            article_index.resolve(fingerprint, summaries.get(url))
+
+    for url, content, future in waiting:
+        summary = await asyncio.shield(future)
+        if not summary:
+            # The original failed; summarize this copy ourselves
+            summary = await summarize_content(content, url)
+            if summary and "Error" not in summary:
+                new_fingerprints[url] = simhash(content)
+        if summary and "Error" not in summary:
+            summaries[url] = summary
+
+    for url, summary in summaries.items():
+        await save_summary(db, url, summary, expire_at)
+        if url in new_fingerprints:
+            await save_fingerprint(db, new_fingerprints[url], url, expire_at)
+    return summaries
+
+async def get_summary_results(
+    items: List[Dict[str, str]],
+    expire_at: Optional[datetime] = None,
+    priority: int = PRIORITY_USER
+) -> List[Optional[Dict[str, str]]]:
+    """
+    Batch counterpart of get_summary_result for many articles.
+    Cached summaries are read in one query and uncached articles are summarized
+    several per LLM call. Results are in item order, None where no summary was produced.
+    """
+    links = list(dict.fromkeys(item["link"] for item in items if item.get("link")))
+    summaries: Dict[str, str] = {}
+    if links:
+        async with AsyncSessionLocal() as db:
+            try:
+                summaries = await get_cached_summaries(db, links)
+                to_fetch = {item["link"]: item for item in items if item.get("link") and item["link"] not in summaries}
+                contents = await asyncio.gather(*[fetch_article(item, priority) for item in to_fetch.values()])
+                fetched = [(url, content) for url, content in zip(to_fetch, contents) if content]
+                summaries.update(await summarize_fetched(db, fetched, expire_at or default_summary_expiry()))
+            except Exception as e:
+                print(f"Error in get_summary_results: {e}")
+
+    return [
+        {"title": item["title"], "summary": summaries[item["link"]], "url": item["link"]}
+        if item.get("link") in summaries else None
+        for item in items
+    ]
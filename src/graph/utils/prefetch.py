@@ -0,0 +1,185 @@
+import asyncio
+import inspect
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables.config import var_child_runnable_config
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# $AAPL always counts; bare upper-case words only in mixed-case text
+CASHTAG_PATTERN = re.compile(r"\$([A-Za-z]{1,5})\b")
+WORD_PATTERN = re.compile(r"\b([A-Z]{2,5})\b")
+
+# Upper-case words in questions that are not tickers
+NON_TICKERS = frozenset("""
+AI API ATH BUY CAGR CEO CFO CPI CTO DCF EBIT EPS ESG ETF EU EUR FAQ FED FOMC FX GBP GDP HODL IMF IPO
+IT JPY LLM MOM NASDAQ NYSE OK PCE PE PMI PPI QOQ REIT ROE ROI SEC SELL TLDR UK US USA USD VAT VS WTI YOY YTD
+""".split())
+
+# Parameter values compared case-insensitively when matching a plan step to a prefetch
+SYMBOL_PARAMS = ("symbol", "ticker")
+IGNORED_PARAMS = ("user_agent",)
+
+PrefetchCall = Tuple[str, Callable, Dict[str, Any]]
+
+def extract_symbols(text: str, limit: Optional[int] = None) -> List[str]:
+    """
+    Likely tickers mentioned in a question, in order of appearance.
+    Cashtags ($NVDA) always count. Bare upper-case words count unless they are
+    common finance acronyms or the whole text is shouted.
+    """
+    limit = limit or settings.PREFETCH_MAX_SYMBOLS
+    text = text or ""
+    symbols = [match.upper() for match in CASHTAG_PATTERN.findall(text)]
+
+    if any(c.islower() for c in CASHTAG_PATTERN.sub("", text)):
+        symbols += [word for word in WORD_PATTERN.findall(text) if word not in NON_TICKERS]
+
+    return list(dict.fromkeys(symbols))[:limit]
+
+def call_key(tool: Callable, params: Dict[str, Any]) -> Tuple:
+    """
+    Comparable form of a tool call: named arguments with defaults applied,
+    symbols upper-cased and pass-through values (user_agent, **kwargs) left out,
+    so {"symbol": "aapl"} and {"symbol": "AAPL", "max_results": 3} match.
+    """
+    signature = inspect.signature(tool)
+    named = {
+        name: value for name, value in params.items()
+        if name in signature.parameters and name not in IGNORED_PARAMS
+        and signature.parameters[name].kind != inspect.Parameter.VAR_KEYWORD
+    }
+    try:
+        bound = signature.bind_partial(**named)
+    except TypeError:
+        return tuple(sorted((name, repr(value)) for name, value in named.items()))
+    bound.apply_defaults()
+
+    items = []
+    for name, value in bound.arguments.items():
+        if signature.parameters[name].kind in (inspect.Parameter.VAR_KEYWORD, inspect.Parameter.VAR_POSITIONAL):
+            continue
+        if name in SYMBOL_PARAMS and isinstance(value, str):
+            value = value.upper()
+        items.append((name, repr(value)))
+    return tuple(sorted(items))
+
+def current_thread_id() -> Optional[str]:
+    """thread_id of the graph run the caller is part of, if any."""
+    config = var_child_runnable_config.get() or {}
+    return (config.get("configurable") or {}).get("thread_id") or (config.get("metadata") or {}).get("thread_id")
+
+@dataclass
+class Prefetch:
+    user_input: str
+    tasks: Dict[Tuple[str, Tuple], asyncio.Task] = field(default_factory=dict)
+    used: set = field(default_factory=set)
+    expiry: Optional[asyncio.TimerHandle] = None
+
+class ToolPrefetcher:
+    """
+    Speculative tool calls per graph thread.
+    The supervisor starts calls whose need is predictable from the question
+    (e.g. financials for a mentioned ticker) while it plans; researchers reuse
+    a call when their plan asks for the same tool and arguments. Calls no routed
+    researcher can use are cancelled as soon as the route is known, the rest
+    once research is done, and everything after PREFETCH_TTL_SECONDS.
+    """
+
+    def __init__(self):
+        self._runs: Dict[str, Prefetch] = {}
+        self.reset()
+
+    def reset(self):
+        for thread_id in list(self._runs):
+            self.close(thread_id)
+        self.stats = {"started": 0, "used": 0, "cancelled": 0}
+
+    def active(self, thread_id: Optional[str], user_input: str) -> bool:
+        """Whether this question already has prefetches (e.g. on a follow-up supervisor pass)."""
+        run = self._runs.get(thread_id)
+        return run is not None and run.user_input == user_input
+
+    def start(self, thread_id: Optional[str], user_input: str, calls: Iterable[PrefetchCall]) -> int:
+        """Starts (tool_name, tool, params) calls in the background; returns how many were started."""
+        if not settings.PREFETCH_ENABLED or thread_id is None or self.active(thread_id, user_input):
+            return 0
+
+        self.close(thread_id)
+        run = Prefetch(user_input)
+        for name, tool, params in calls:
+            key = (name, call_key(tool, params))
+            if key not in run.tasks and inspect.iscoroutinefunction(tool):
+                run.tasks[key] = asyncio.create_task(tool(**params), name=f"prefetch:{name}")
+                run.tasks[key].add_done_callback(_consume_exception)
+        if not run.tasks:
+            return 0
+
+        run.expiry = asyncio.get_running_loop().call_later(settings.PREFETCH_TTL_SECONDS, self.close, thread_id)
+        self._runs[thread_id] = run
+        self.stats["started"] += len(run.tasks)
+        return len(run.tasks)
+
+    def lookup(self, thread_id: Optional[str], name: str, tool: Callable, params: Dict[str, Any]) -> Optional[asyncio.Future]:
+        """
+        The speculative call matching this tool call, shielded so one caller giving
+        up does not cancel it for others. None if nothing matching was prefetched.
+        """
+        run = self._runs.get(thread_id)
+        if run is None:
+            return None
+        key = (name, call_key(tool, params))
+        task = run.tasks.get(key)
+        if task is None or task.cancelled():
+            return None
+        if key not in run.used:
+            run.used.add(key)
+            self.stats["used"] += 1
+        return asyncio.shield(task)
+
+    def retain(self, thread_id: Optional[str], tool_names: Sequence[str]):
+        """Cancels speculative calls to tools outside tool_names (what the routed researchers can call)."""
+        run = self._runs.get(thread_id)
+        if run is None:
+            return
+        for key in list(run.tasks):
+            if key[0] not in tool_names:
+                self._cancel(run, key)
+
+    def discard(self, thread_id: Optional[str]):
+        """Cancels speculative calls no plan asked for; keeps the run marked as prefetched."""
+        run = self._runs.get(thread_id)
+        if run is None:
+            return
+        for key in list(run.tasks):
+            if key not in run.used:
+                self._cancel(run, key)
+
+    def close(self, thread_id: Optional[str]):
+        """Drops everything prefetched for the thread."""
+        run = self._runs.pop(thread_id, None)
+        if run is None:
+            return
+        if run.expiry is not None:
+            run.expiry.cancel()
+        for key in list(run.tasks):
+            if key not in run.used:
+                self._cancel(run, key)
+
+    def _cancel(self, run: Prefetch, key: Tuple[str, Tuple]):
+        task = run.tasks.pop(key)
+        if not task.done():
+            task.cancel()
+            self.stats["cancelled"] += 1
+
+def _consume_exception(task: asyncio.Task):
+    """Speculative failures surface only if a researcher awaits them; don't log them as never retrieved."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug(f"Speculative {task.get_name()} failed: {task.exception()}")
+
+tool_prefetcher = ToolPrefetcher()
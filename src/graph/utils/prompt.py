@@ -2,6 +2,8 @@ import inspect
 from typing import List, Callable, Dict
 from langchain_core.prompts import ChatPromptTemplate
 from src.graph.state import AgentState
+from src.graph.utils.context import prompt_context, DEFAULT_ROLE
+from src.services.blobs import blob_store
 
 ARTICLE_SUMMARY_PROMPT = ChatPromptTemplate.from_template("""
 Summarize the key financial insights from the following article. 
@@ -12,6 +14,15 @@ Article Content:
 {content}
 """)
 
+BATCH_ARTICLE_SUMMARY_PROMPT = ChatPromptTemplate.from_template("""
+Summarize the key financial insights from each of the following articles separately.
+Focus on information relevant to stock analysis, market trends, and economic indicators.
+Keep each summary concise (2-3 sentences) and based only on its own article.
+Return exactly one summary per article, with the article's URL copied exactly as given.
+
+{articles}
+""")
+
 FINANCIAL_SENTIMENT_PROMPT = ChatPromptTemplate.from_template("""
 You are a Senior Equity Analyst specializing in quantitative sentiment analysis.
 Analyze the provided [FINANCIAL_TEXT] and assign a sentiment score between -1.0 (extremely bearish) and 1.0 (extremely bullish). 0.0 is neutral.
@@ -29,65 +40,29 @@ Return your analysis in JSON format:
 }}
 """)
 
-def convert_state_to_prompt(state: AgentState) -> str:
+BATCH_SENTIMENT_PROMPT = ChatPromptTemplate.from_template("""
+You are a Senior Equity Analyst specializing in quantitative sentiment analysis.
+Score each of the following financial texts separately, between -1.0 (extremely bearish) and 1.0 (extremely bullish). 0.0 is neutral.
+For each text give a concise 1-2 sentence rationale based only on that text.
+Return exactly one result per text, with the text's ID copied exactly as given.
+
+{texts}
+""")
+
+def convert_state_to_prompt(state: AgentState, role: str = DEFAULT_ROLE) -> str:
     """
     Converts AgentState or a similar dict into a readable string for inclusion in LLM prompts.
+    The context is fitted to the token budget of the agent role (see ROLE_TOKEN_BUDGETS).
     """
-    context = []
-    
-    if "user_input" in state:
-        context.append(f"User Input: {state['user_input']}")
-        
-    session_ctx = state.get("session_context", {})
-        
-    # 2. Current Datetime
-    if "current_datetime" in session_ctx:
-        context.append(f"Current Date/Time: {session_ctx['current_datetime']}")
-        
-    # 3. Chat History
-    messages = session_ctx.get("messages", [])
-    if messages:
-        context.append("--- CHAT HISTORY ---")
-        for msg in messages:
-            # Handle both BaseMessage objects and tuples
-            if isinstance(msg, tuple):
-                role, content = msg
-                role_label = "User" if role in ["human", "user"] else "AI"
-                context.append(f"{role_label}: {content}")
-            else:
-                role = getattr(msg, "type", "")
-                content = getattr(msg, "content", str(msg))
-                role_label = "User" if role in ["human", "user"] else "AI"
-                context.append(f"{role_label}: {content}")
-        context.append("--- END CHAT HISTORY ---")
-    else:
-        context.append("Chat History: None.")
-        
-    # 4. Agent Interactions
-    interactions = state.get("agent_interactions", [])
-    if interactions:
-        context.append("--- AGENT INTERACTIONS ---")
-        for itr in interactions:
-            agent = itr.get("agent", "unknown")
-            answer = itr.get("answer", "")
-            dest = itr.get("next_agent", "end")
-            context.append(f"[{agent} -> {dest}]: {answer}")
-        context.append("--- END AGENT INTERACTIONS ---")
-    else:
-        context.append("Agent Interactions: None.")
-
-    # 5. Revision Count
-    if "revision_count" in session_ctx:
-        context.append(f"Revision Count: {session_ctx['revision_count']}")
+    return prompt_context.render(state, role)
 
-    # 6. User Portfolio Summary
-    user_ctx = state.get("user_context", {})
-    if "portfolio_summary" in user_ctx and user_ctx["portfolio_summary"]:
-        context.append("--- USER PORTFOLIO SUMMARY ---")
-        context.append(user_ctx["portfolio_summary"])
-        context.append("--- END USER PORTFOLIO SUMMARY ---")
-    
-    return "\n".join(context)
+async def render_state_prompt(state: AgentState, role: str = DEFAULT_ROLE) -> str:
+    """
+    convert_state_to_prompt for graph nodes: first loads offloaded answers the
+    state refers to (see blob_store), so the prompt gets full text, not previews.
+    """
+    await blob_store.load_interactions(state.get("agent_interactions", []))
+    return convert_state_to_prompt(state, role)
 
 def _get_function_signature(func: Callable) -> str:
     """Extracts a clean string representing the function's signature, skipping kwargs."""
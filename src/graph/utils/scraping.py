@@ -1,12 +1,36 @@
 import httpx
 import re
-from typing import Optional
+from typing import Optional, Tuple, List, Dict
 from bs4 import BeautifulSoup
 from readability import Document
+from lxml import etree
+from lxml import html as lxml_html
 
 # SEC.gov requires a specific User-Agent
 DEFAULT_USER_AGENT = "StockPlanner/1.0 (contact@stockplanner.com)"
 
+# Control characters that break both lxml and readability
+CONTROL_CHARS_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Subtrees that never carry article text
+BOILERPLATE_TAGS = (
+    "script", "style", "noscript", "template", "header", "footer", "nav", "aside",
+    "form", "iframe", "svg", "button", "select", "input", "object", "embed"
+)
+
+# class/id tokens used to demote or promote containers
+NEGATIVE_HINTS = {
+    "ad", "ads", "advert", "advertisement", "banner", "breadcrumb", "breadcrumbs", "comment",
+    "comments", "cookie", "footer", "header", "masthead", "menu", "modal", "nav", "newsletter",
+    "outbrain", "popup", "promo", "related", "share", "sharing", "sidebar", "social",
+    "sponsored", "subscribe", "taboola", "trending", "widget"
+}
+POSITIVE_HINTS = {"article", "body", "content", "entry", "main", "post", "story", "text"}
+HINT_SPLIT_RE = re.compile(r'[\s_\-]+')
+
+# Fast path results below this confidence are re-extracted with readability
+FAST_PATH_MIN_CONFIDENCE = 0.6
+
 async def fetch_content(url: str, user_agent: str = DEFAULT_USER_AGENT) -> str:
     """
     Fetch HTML content from a URL with proper User-Agent.
@@ -32,16 +56,136 @@ async def fetch_content(url: str, user_agent: str = DEFAULT_USER_AGENT) -> str:
         print(f"Exception fetching {url}: {e}")
         return ""
 
-def clean_html(html: str) -> str:
+def _class_weight(el) -> int:
+    """Scores an element's class/id tokens: +25 for content hints, -25 for boilerplate hints."""
+    hints = f"{el.get('class', '')} {el.get('id', '')}".lower()
+    if not hints.strip():
+        return 0
+    tokens = set(HINT_SPLIT_RE.split(hints))
+    weight = 0
+    if tokens & NEGATIVE_HINTS:
+        weight -= 25
+    if tokens & POSITIVE_HINTS:
+        weight += 25
+    return weight
+
+def _base_score(el) -> float:
+    """Initial candidate score from tag name and class/id hints."""
+    tag = el.tag
+    if tag == "article":
+        bonus = 10
+    elif tag in ("main", "div"):
+        bonus = 5
+    elif tag in ("pre", "td", "blockquote", "section"):
+        bonus = 3
+    else:
+        bonus = 0
+    return bonus + _class_weight(el)
+
+def _link_density(el, text_len: int) -> float:
+    """Share of an element's text that sits inside links."""
+    if text_len == 0:
+        return 1.0
+    link_len = sum(len(a.text_content()) for a in el.iter("a"))
+    return min(link_len / text_len, 1.0)
+
+def _strip_boilerplate(tree) -> None:
+    """Removes scripts, chrome tags and negatively-hinted containers in place."""
+    etree.strip_elements(tree, etree.Comment, *BOILERPLATE_TAGS, with_tail=False)
+    for el in tree.xpath("//*[@class or @id]"):
+        if el.tag in ("html", "body", "article", "main"):
+            continue
+        if _class_weight(el) < 0:
+            el.drop_tree()
+
+def extract_article_text(html: str) -> Tuple[str, float]:
+    """
+    Fast-path article extraction on a single lxml tree.
+    Scores paragraph containers by text length, comma count and class/id hints,
+    keeps the best container plus strong siblings, and returns (text, confidence).
+    Confidence is 0.0 when no usable content was found.
+    """
+    if not html:
+        return "", 0.0
+
+    try:
+        parser = lxml_html.HTMLParser(encoding="utf-8", remove_comments=True)
+        tree = lxml_html.document_fromstring(
+            CONTROL_CHARS_RE.sub('', html).encode("utf-8", "replace"), parser=parser
+        )
+    except (etree.ParserError, ValueError):
+        return "", 0.0
+
+    _strip_boilerplate(tree)
+
+    # 1. Score paragraph parents (full credit) and grandparents (half credit)
+    scores: Dict[object, float] = {}
+    paragraph_counts: Dict[object, int] = {}
+    for para in tree.iter("p", "pre", "td", "blockquote"):
+        text = para.text_content().strip()
+        if len(text) < 25:
+            continue
+        parent = para.getparent()
+        if parent is None:
+            continue
+        points = 1 + text.count(",") + min(len(text) // 100, 3)
+        if parent not in scores:
+            scores[parent] = _base_score(parent)
+        scores[parent] += points
+        paragraph_counts[parent] = paragraph_counts.get(parent, 0) + 1
+
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            if grandparent not in scores:
+                scores[grandparent] = _base_score(grandparent)
+            scores[grandparent] += points / 2
+
+    if not scores:
+        return "", 0.0
+
+    # 2. Pick the top candidate after penalising link-heavy containers
+    top, top_score = None, float("-inf")
+    for candidate, score in scores.items():
+        adjusted = score * (1 - _link_density(candidate, len(candidate.text_content())))
+        if adjusted > top_score:
+            top, top_score = candidate, adjusted
+
+    # 3. Merge siblings that scored strongly on their own (split article bodies)
+    selected: List[object] = [top]
+    parent = top.getparent()
+    if parent is not None and top_score > 0:
+        threshold = max(10.0, top_score * 0.2)
+        selected = [
+            sibling for sibling in parent
+            if sibling is top or scores.get(sibling, 0) >= threshold
+        ]
+
+    text = " ".join(" ".join(el.itertext()) for el in selected)
+    text = re.sub(r'\s+', ' ', text).strip()
+    if not text:
+        return "", 0.0
+
+    # 4. Confidence from body length, paragraph count and link density
+    para_count = sum(paragraph_counts.get(el, 0) for el in selected)
+    link_density = sum(_link_density(el, len(el.text_content())) for el in selected) / len(selected)
+    confidence = (
+        0.4 * min(len(text) / 1500, 1.0)
+        + 0.3 * min(para_count / 5, 1.0)
+        + 0.3 * (1 - link_density)
+    )
+    return text, round(confidence, 3)
+
+def clean_html_readability(html: str) -> str:
     """
-    Extract core content from HTML using readability-lxml and BeautifulSoup.
+    Extract core content with readability-lxml followed by a BeautifulSoup text pass.
+    Slower than the lxml fast path; used as the low-confidence fallback.
     """
     if not html:
         return ""
-        
+
     try:
         # 1. Clean boilerplate with readability
-        clean_html_text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', html)
+        clean_html_text = CONTROL_CHARS_RE.sub('', html)
         doc = Document(clean_html_text)
         summary_html = doc.summary()
         
@@ -57,3 +201,21 @@ def clean_html(html: str) -> str:
     except Exception as e:
         print(f"Error cleaning HTML: {e}")
         return ""
+
+def clean_html(html: str) -> str:
+    """
+    Extract core content from HTML.
+    Tries the single-tree lxml fast path first and falls back to readability
+    only when the fast path is not confident in its result.
+    """
+    if not html:
+        return ""
+
+    try:
+        text, confidence = extract_article_text(html)
+        if text and confidence >= FAST_PATH_MIN_CONFIDENCE:
+            return text
+    except Exception as e:
+        print(f"Fast-path extraction failed, falling back to readability: {e}")
+
+    return clean_html_readability(html)
@@ -0,0 +1,6 @@
+# Rough ratio used wherever the API reports no token usage
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) when the API reports no usage."""
+    return max(1, len(text) // CHARS_PER_TOKEN)
@@ -1,6 +1,96 @@
+import bisect
+from dataclasses import dataclass
 from pydantic import BaseModel, Field
-from typing import Dict, Any
+from typing import Any, Callable, Dict, List, Optional
+from src.config import settings
 
 class ToolCall(BaseModel):
     tool_name: str = Field(description="Name of the tool to call")
-    tool_params: Dict[str, Any] = Field(default_factory=dict, description="Parameters for the tool as a dictionary of keyword arguments (e.g. {'symbol': 'AAPL'})")
\ No newline at end of file
+    tool_params: Dict[str, Any] = Field(default_factory=dict, description="Parameters for the tool as a dictionary of keyword arguments (e.g. {'symbol': 'AAPL'})")
+
+@dataclass(frozen=True)
+class ToolPolicy:
+    """
+    Execution limits for one tool. Timeouts are per attempt and are not retried;
+    exceptions are retried `retries` times with exponential backoff.
+    max_concurrency caps calls across all researchers in the process.
+    """
+    timeout: float
+    retries: int = 0
+    retry_backoff: float = 0.5
+    max_concurrency: int = 8
+
+def default_policy() -> ToolPolicy:
+    return ToolPolicy(
+        timeout=settings.TOOL_TIMEOUT_SECONDS,
+        retries=settings.TOOL_RETRIES,
+        max_concurrency=settings.TOOL_MAX_CONCURRENCY
+    )
+
+def tool_policy(timeout: Optional[float] = None, retries: Optional[int] = None, retry_backoff: float = 0.5, max_concurrency: Optional[int] = None) -> Callable:
+    """Declares a tool's ToolPolicy; unset fields use the TOOL_* settings. The tool itself is not wrapped."""
+    def decorate(func: Callable) -> Callable:
+        base = default_policy()
+        func.tool_policy = ToolPolicy(
+            timeout=timeout if timeout is not None else base.timeout,
+            retries=retries if retries is not None else base.retries,
+            retry_backoff=retry_backoff,
+            max_concurrency=max_concurrency if max_concurrency is not None else base.max_concurrency
+        )
+        return func
+    return decorate
+
+# Latency histogram bucket upper bounds (ms); the last bucket is open-ended
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+OUTCOMES = ("ok", "error", "timeout")
+
+class ToolMetrics:
+    """Per-tool call counts by outcome and latency histograms, for GET /admin/tools."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._tools: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, tool_name: str, seconds: float, outcome: str = "ok"):
+        entry = self._tools.get(tool_name)
+        if entry is None:
+            entry = self._tools[tool_name] = {
+                "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                "outcomes": dict.fromkeys(OUTCOMES, 0),
+                "total_ms": 0.0
+            }
+        ms = seconds * 1000
+        entry["buckets"][bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        entry["outcomes"][outcome] += 1
+        entry["total_ms"] += ms
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """One row per tool with its outcome counts, average and bucketed latency."""
+        rows = []
+        for name, entry in sorted(self._tools.items()):
+            calls = sum(entry["outcomes"].values())
+            labels = [f"le_{bound}" for bound in LATENCY_BUCKETS_MS] + ["inf"]
+            rows.append({
+                "tool": name,
+                "calls": calls,
+                **entry["outcomes"],
+                "avg_latency_ms": round(entry["total_ms"] / calls, 2) if calls else 0.0,
+                "p95_latency_ms": self._percentile(entry["buckets"], 0.95),
+                "buckets": dict(zip(labels, entry["buckets"]))
+            })
+        return rows
+
+    @staticmethod
+    def _percentile(buckets: List[int], fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of calls (None if it is the open bucket)."""
+        target = sum(buckets) * fraction
+        seen = 0
+        for i, count in enumerate(buckets):
+            seen += count
+            if count and seen >= target:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else None
+        return None
+
+tool_metrics = ToolMetrics()
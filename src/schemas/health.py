@@ -1,6 +1,38 @@
+from typing import Dict
 from pydantic import BaseModel
 
 class HealthResponse(BaseModel):
     """Schema for health check response."""
     status: str
     database: str
+
+class QueueWaitStats(BaseModel):
+    """Queue wait times for one crawl priority."""
+    dispatched: int
+    avg_ms: float
+    p95_ms: float
+    max_ms: float
+
+class CrawlMetricsResponse(BaseModel):
+    """Schema for crawl scheduler metrics."""
+    in_flight: int
+    queued: int
+    hosts_active: Dict[str, int]
+    wait_times: Dict[str, QueueWaitStats]
+
+class LLMCacheSiteStats(BaseModel):
+    """LLM cache counters for one call site."""
+    hits: int
+    misses: int
+    errors: int
+    saved_tokens: int
+    hit_rate: float
+
+class LLMCacheMetricsResponse(BaseModel):
+    """Schema for LLM response cache metrics."""
+    hits: int
+    misses: int
+    errors: int
+    saved_tokens: int
+    hit_rate: float
+    sites: Dict[str, LLMCacheSiteStats]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from typing import List, Optional
 
@@ -38,6 +38,10 @@ class ThreadRunStreamRequest(BaseModel):
     stream_mode: List[str] = ["messages"]
     config: Optional[dict] = None
     checkpoint_id: Optional[str] = None
+    budget_seconds: Optional[float] = Field(
+        None, gt=0, le=3600,
+        description="Latency budget for the run; optional stages are skipped as it runs out (defaults to RUN_BUDGET_SECONDS)"
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -48,8 +52,15 @@ class ThreadRunStreamRequest(BaseModel):
                             "messages": [{"role": "user", "content": "What are the latest news for TSLA?"}]
                         }
                     },
-                    "stream_mode": ["messages"]
+                    "stream_mode": ["messages"],
+                    "budget_seconds": 90
                 }
             ]
         }
     )
+
+class ThreadRunResponse(BaseModel):
+    run_id: str
+    thread_id: str
+    status: str = "pending"
+    stream_url: str  # GET with Last-Event-ID to resume after a dropped connection
@@ -0,0 +1,72 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, List, Optional
+
+class UsageStats(BaseModel):
+    """Summed LLM usage for a set of calls."""
+    calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    cache_hits: int
+    total_latency_ms: float
+    avg_latency_ms: float
+
+class UsageGroup(UsageStats):
+    """Usage for one node, model or thread."""
+    key: Optional[str] = None
+
+class ThreadUsageResponse(BaseModel):
+    thread_id: str
+    totals: UsageStats
+    by_node: List[UsageGroup]
+    by_model: List[UsageGroup]
+
+class AdminUsageResponse(BaseModel):
+    group_by: str
+    since: Optional[datetime] = None
+    groups: List[UsageGroup]
+
+class ToolStats(BaseModel):
+    """Research tool calls since startup, with a latency histogram (bucket upper bounds in ms)."""
+    tool: str
+    calls: int
+    ok: int
+    error: int
+    timeout: int
+    avg_latency_ms: float
+    p95_latency_ms: Optional[float] = None
+    buckets: Dict[str, int]
+
+class AdminToolsResponse(BaseModel):
+    tools: List[ToolStats]
+
+class RunLockStats(BaseModel):
+    """Per-thread run lock activity in this worker since startup."""
+    held: int
+    acquired: int
+    conflicts: int
+    released: int
+    renewals: int
+    lost: int
+    errors: int
+    waited: int
+    wait_avg_ms: float
+    wait_max_ms: float
+    wait_total_ms: float
+
+class RunAdmissionStats(BaseModel):
+    """Graph run admission in this worker since startup: load, queue and rejections."""
+    running: int
+    waiting: int
+    admitted: int
+    queued: int
+    rejected: int
+    timed_out: int
+    cancelled: int
+    cluster_full: int
+    errors: int
+    wait_avg_ms: float
+    wait_max_ms: float
+    wait_total_ms: float
+    avg_run_seconds: float
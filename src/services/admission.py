@@ -0,0 +1,318 @@
+import asyncio
+import itertools
+import logging
+import math
+import time
+import uuid
+from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Optional
+
+import redis.asyncio as redis
+
+from src.config import settings
+from src.services.redis_client import shared_redis
+
+logger = logging.getLogger(__name__)
+
+SLOTS_KEY = "runslots"
+
+# Drops expired slots, then takes one if the cluster is below its limit (server clock, so workers agree)
+ACQUIRE_SCRIPT = """
+local t = redis.call('time')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+redis.call('zremrangebyscore', KEYS[1], '-inf', now)
+if redis.call('zcard', KEYS[1]) < tonumber(ARGV[1]) then
+    redis.call('zadd', KEYS[1], now + tonumber(ARGV[2]), ARGV[3])
+    return 1
+end
+return 0
+"""
+RENEW_SCRIPT = """
+local t = redis.call('time')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+if redis.call('zscore', KEYS[1], ARGV[2]) then
+    redis.call('zadd', KEYS[1], now + tonumber(ARGV[1]), ARGV[2])
+    return 1
+end
+return 0
+"""
+
+class RedisSlotBackend:
+    """Cluster-wide run slots: a sorted set of slot tokens scored by expiry, renewed while runs are active."""
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self._client = client
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or shared_redis.client
+
+    async def acquire(self, token: str, limit: int, ttl_seconds: float) -> bool:
+        return bool(await self.client.eval(ACQUIRE_SCRIPT, 1, SLOTS_KEY, limit, int(ttl_seconds * 1000), token))
+
+    async def renew(self, tokens: List[str], ttl_seconds: float):
+        async with self.client.pipeline(transaction=False) as pipe:
+            for token in tokens:
+                pipe.eval(RENEW_SCRIPT, 1, SLOTS_KEY, int(ttl_seconds * 1000), token)
+            await pipe.execute()
+
+    async def release(self, token: str):
+        await self.client.zrem(SLOTS_KEY, token)
+
+class MemorySlotBackend:
+    """Process-local stand-in for RedisSlotBackend (tests, single-worker runs)."""
+
+    def __init__(self):
+        self._slots: Dict[str, float] = {}
+
+    async def acquire(self, token: str, limit: int, ttl_seconds: float) -> bool:
+        now = time.monotonic()
+        self._slots = {t: expiry for t, expiry in self._slots.items() if expiry > now}
+        if len(self._slots) >= limit:
+            return False
+        self._slots[token] = now + ttl_seconds
+        return True
+
+    async def renew(self, tokens: List[str], ttl_seconds: float):
+        for token in tokens:
+            if token in self._slots:
+                self._slots[token] = time.monotonic() + ttl_seconds
+
+    async def release(self, token: str):
+        self._slots.pop(token, None)
+
+class RunTicket:
+    """One run's place in admission: queued until `admitted` is set, then holding a slot until released."""
+
+    def __init__(self, user_id: str, weight: float, seq: int):
+        self.user_id = user_id
+        self.weight = weight
+        self.seq = seq
+        self.position = 0
+        self.slot: Optional[str] = None
+        self.admitted = asyncio.Event()
+        self.changed = asyncio.Event()
+        self.released = False
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+
+class RunAdmission:
+    """
+    Admission control for graph runs.
+    At most RUN_MAX_CONCURRENT runs per worker and RUN_MAX_CONCURRENT_CLUSTER
+    across workers (0 disables the cluster limit). Runs beyond that wait in a
+    queue of RUN_QUEUE_MAX_SIZE; admit() returns None when it is full.
+    The queue is ordered by weighted fairness: the next run goes to the user
+    with the fewest active runs relative to their RUN_USER_WEIGHTS weight, so
+    one user's burst cannot take every slot. If the cluster backend fails,
+    admission falls back to the per-worker limit.
+    """
+
+    def __init__(self, backend=None):
+        self.reset(backend)
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            if settings.RUN_ADMISSION_BACKEND == "memory":
+                self._backend = MemorySlotBackend()
+            else:
+                self._backend = RedisSlotBackend()
+        return self._backend
+
+    def reset(self, backend=None):
+        """Swaps the backend (None re-reads RUN_ADMISSION_BACKEND), forgets runs and queue, clears stats."""
+        self._backend = backend
+        self.running: List[RunTicket] = []
+        self.waiting: List[RunTicket] = []
+        self.active_by_user: Dict[str, int] = defaultdict(int)
+        self._seq = itertools.count()
+        self._lock: Optional[asyncio.Lock] = None
+        self._pump: Optional[asyncio.Task] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self.avg_run_seconds = settings.RUN_QUEUE_RETRY_AFTER_SECONDS
+        self.stats = {
+            "admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0, "cancelled": 0,
+            "cluster_full": 0, "errors": 0, "wait_total_ms": 0.0, "wait_max_ms": 0.0
+        }
+
+    def weight(self, user_id: str) -> float:
+        return max(0.01, settings.RUN_USER_WEIGHTS.get(user_id, 1.0))
+
+    async def admit(self, user_id: str) -> Optional[RunTicket]:
+        """
+        A ticket that is admitted at once or queued (wait with positions()).
+        None if the queue is full; the caller answers 429 with retry_after().
+        """
+        ticket = RunTicket(user_id, self.weight(user_id), next(self._seq))
+        async with self._get_lock():
+            if not self.waiting and await self._start(ticket):
+                return ticket
+        if len(self.waiting) >= settings.RUN_QUEUE_MAX_SIZE:
+            self.stats["rejected"] += 1
+            logger.warning(f"Run queue full ({len(self.waiting)} waiting); rejecting run for user {user_id}")
+            return None
+        self.waiting.append(ticket)
+        self.stats["queued"] += 1
+        self._reposition()
+        self._ensure_pump()
+        return ticket
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up, from the average run time."""
+        per_slot = self.avg_run_seconds / max(1, settings.RUN_MAX_CONCURRENT)
+        return max(1, math.ceil(per_slot * (len(self.waiting) + 1)))
+
+    async def positions(self, ticket: RunTicket, timeout: Optional[float] = None) -> AsyncIterator[int]:
+        """
+        Yields the ticket's 1-based queue position whenever it changes, until admitted.
+        Raises asyncio.TimeoutError after timeout (RUN_QUEUE_TIMEOUT_SECONDS) seconds in the queue.
+        """
+        timeout = settings.RUN_QUEUE_TIMEOUT_SECONDS if timeout is None else timeout
+        give_up_at = ticket.enqueued_at + timeout
+        last = None
+        while not ticket.admitted.is_set():
+            # Cleared before reading, so a move while the caller handles a position is not missed
+            ticket.changed.clear()
+            if ticket.position != last:
+                last = ticket.position
+                yield last
+                continue
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                self.stats["timed_out"] += 1
+                raise asyncio.TimeoutError(f"No run capacity within {timeout:g}s")
+            try:
+                await asyncio.wait_for(ticket.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                continue
+
+    async def release(self, ticket: RunTicket):
+        """Frees the ticket's slot, or drops it from the queue. Safe to call twice."""
+        if ticket.released:
+            return
+        ticket.released = True
+        if ticket in self.waiting:
+            self.waiting.remove(ticket)
+            self.stats["cancelled"] += 1
+            self._reposition()
+            return
+        if ticket not in self.running:
+            return
+        self.running.remove(ticket)
+        self.active_by_user[ticket.user_id] -= 1
+        if ticket.started_at is not None:
+            # Moving average of run time, for Retry-After
+            self.avg_run_seconds = 0.8 * self.avg_run_seconds + 0.2 * (time.monotonic() - ticket.started_at)
+        if ticket.slot is not None:
+            try:
+                await self.backend.release(ticket.slot)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Releasing cluster run slot failed, it expires on its own: {e}")
+        await self.dispatch()
+
+    async def _start(self, ticket: RunTicket) -> bool:
+        """Gives the ticket a worker slot and a cluster slot if both are free."""
+        if len(self.running) >= settings.RUN_MAX_CONCURRENT:
+            return False
+        if settings.RUN_MAX_CONCURRENT_CLUSTER > 0:
+            token = uuid.uuid4().hex
+            try:
+                if not await self.backend.acquire(token, settings.RUN_MAX_CONCURRENT_CLUSTER, settings.RUN_SLOT_TTL_SECONDS):
+                    self.stats["cluster_full"] += 1
+                    return False
+                ticket.slot = token
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Cluster run slots unavailable, admitting on the worker limit only: {e}")
+        self.running.append(ticket)
+        self.active_by_user[ticket.user_id] += 1
+        ticket.started_at = time.monotonic()
+        self._record_wait(ticket.started_at - ticket.enqueued_at)
+        self.stats["admitted"] += 1
+        ticket.admitted.set()
+        ticket.changed.set()
+        self._ensure_heartbeat()
+        return True
+
+    def _record_wait(self, seconds: float):
+        ms = seconds * 1000
+        self.stats["wait_total_ms"] += ms
+        self.stats["wait_max_ms"] = max(self.stats["wait_max_ms"], ms)
+
+    def _fair_order(self) -> List[RunTicket]:
+        """Waiting tickets, next first: fewest (active + earlier queued) runs per unit of weight, then arrival."""
+        ahead: Dict[str, int] = defaultdict(int)
+        keyed = []
+        for ticket in sorted(self.waiting, key=lambda t: t.seq):
+            share = (self.active_by_user[ticket.user_id] + ahead[ticket.user_id]) / ticket.weight
+            ahead[ticket.user_id] += 1
+            keyed.append((share, ticket.seq, ticket))
+        return [ticket for _, _, ticket in sorted(keyed, key=lambda k: (k[0], k[1]))]
+
+    def _reposition(self):
+        self.waiting = self._fair_order()
+        for position, ticket in enumerate(self.waiting, start=1):
+            if ticket.position != position:
+                ticket.position = position
+                ticket.changed.set()
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Created lazily: slot checks and the awaits between them must not interleave
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def dispatch(self):
+        """Admits waiting runs in fair order while worker and cluster slots are free."""
+        async with self._get_lock():
+            admitted = False
+            while self.waiting:
+                ticket = self._fair_order()[0]
+                if not await self._start(ticket):
+                    break
+                self.waiting.remove(ticket)
+                admitted = True
+            if admitted:
+                self._reposition()
+
+    def _ensure_pump(self):
+        """Polls for cluster slots freed by other workers while runs are queued."""
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._pump_queue())
+
+    async def _pump_queue(self):
+        while self.waiting:
+            await self.dispatch()
+            await asyncio.sleep(settings.RUN_ADMISSION_POLL_SECONDS)
+
+    def _ensure_heartbeat(self):
+        if settings.RUN_MAX_CONCURRENT_CLUSTER > 0 and (self._heartbeat is None or self._heartbeat.done()):
+            self._heartbeat = asyncio.create_task(self._renew_slots())
+
+    async def _renew_slots(self):
+        """Keeps this worker's cluster slots alive while its runs are active."""
+        ttl = settings.RUN_SLOT_TTL_SECONDS
+        while self.running:
+            await asyncio.sleep(ttl / 3)
+            tokens = [ticket.slot for ticket in self.running if ticket.slot]
+            if not tokens:
+                continue
+            try:
+                await self.backend.renew(tokens, ttl)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Renewing {len(tokens)} cluster run slots failed: {e}")
+
+    def snapshot(self) -> Dict[str, float]:
+        """Counters, current load and queue-wait averages, for GET /admin/runs."""
+        return {
+            **self.stats,
+            "running": len(self.running),
+            "waiting": len(self.waiting),
+            "wait_avg_ms": round(self.stats["wait_total_ms"] / self.stats["admitted"], 3) if self.stats["admitted"] else 0.0,
+            "avg_run_seconds": round(self.avg_run_seconds, 3)
+        }
+
+run_admission = RunAdmission()
@@ -238,6 +238,15 @@ async def set_user_context(user: User = Depends(get_current_user)) -> Generator[
     finally:
         user_id_ctx.reset(token)
 
+async def get_admin_user(user: User = Depends(get_current_user)) -> User:
+    """Dependency that only admits users listed in ADMIN_EMAILS."""
+    if user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return user
+
 async def rotate_refresh_token(db: AsyncSession, refresh_token: str, user_agent: str) -> tuple[str, str]:
     """
     Implements Refresh Token Rotation with theft detection and grace period.
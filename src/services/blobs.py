@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import redis.asyncio as redis
+
+from src.config import settings
+from src.services.redis_client import shared_redis
+
+logger = logging.getLogger(__name__)
+
+BLOB_KEY_PREFIX = "blob:"
+BLOB_REF_PREFIX = "sha256:"
+# Characters of an offloaded answer kept inline, so unresolved state still reads sensibly
+PREVIEW_CHARS = 280
+
+class RedisBlobBackend:
+    """Stores blobs in Redis; reads refresh the expiry so blobs outlive the checkpoints using them."""
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self._client = client
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or shared_redis.client
+
+    async def get_many(self, keys: Sequence[str], ttl_seconds: int) -> List[Optional[str]]:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.getex(key, ex=ttl_seconds)
+            return await pipe.execute()
+
+    async def put(self, key: str, value: str, ttl_seconds: int):
+        # Content-addressed: an existing blob is identical, only its expiry is extended
+        if not await self.client.set(key, value, ex=ttl_seconds, nx=True):
+            await self.client.expire(key, ttl_seconds)
+
+class MemoryBlobBackend:
+    """Process-local stand-in for RedisBlobBackend (tests, local runs)."""
+
+    def __init__(self):
+        self._entries: Dict[str, tuple] = {}
+
+    async def get_many(self, keys: Sequence[str], ttl_seconds: int) -> List[Optional[str]]:
+        now = time.monotonic()
+        values = []
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                self._entries.pop(key, None)
+                values.append(None)
+            else:
+                self._entries[key] = (now + ttl_seconds, entry[1])
+                values.append(entry[1])
+        return values
+
+    async def put(self, key: str, value: str, ttl_seconds: int):
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+
+def blob_ref(content: str) -> str:
+    return BLOB_REF_PREFIX + hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def preview(content: str, ref: str) -> str:
+    """Inline stand-in for an offloaded answer: its head plus the reference."""
+    head = content[:PREVIEW_CHARS].rstrip()
+    return f"{head} ... [full answer of {len(content)} chars stored as {ref}]"
+
+class BlobStore:
+    """
+    Content-addressed store for large agent answers.
+    Answers of BLOB_OFFLOAD_MIN_CHARS or more are written once under their
+    SHA-256 and replaced in graph state by a short preview plus `answer_ref`,
+    so checkpoints stop re-serializing SEC sections and search dumps at every
+    super-step. Recently used blobs are kept in a bounded in-process cache,
+    which is what prompt rendering reads; load() fills it for state written
+    by another worker or an earlier process.
+    If the backend fails, answers stay inline.
+    """
+
+    def __init__(self, backend=None, cache_size: Optional[int] = None):
+        self._backend = backend
+        self.cache_size = cache_size or settings.BLOB_CACHE_SIZE
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self.reset_stats()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            if settings.BLOB_STORE_BACKEND == "memory":
+                self._backend = MemoryBlobBackend()
+            elif settings.BLOB_STORE_BACKEND == "redis":
+                self._backend = RedisBlobBackend()
+        return self._backend
+
+    def reset(self, backend=None):
+        """Swaps the backend (None re-reads BLOB_STORE_BACKEND), empties the cache and clears stats."""
+        self._backend = backend
+        self._cache.clear()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"offloaded": 0, "offloaded_chars": 0, "fetched": 0, "missing": 0, "errors": 0}
+
+    def _remember(self, ref: str, content: str):
+        self._cache[ref] = content
+        self._cache.move_to_end(ref)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def cached(self, ref: str) -> Optional[str]:
+        content = self._cache.get(ref)
+        if content is not None:
+            self._cache.move_to_end(ref)
+        return content
+
+    async def put(self, content: str) -> Optional[str]:
+        """Stores content and returns its reference, or None if the backend is off or failing."""
+        if self.backend is None:
+            return None
+        ref = blob_ref(content)
+        try:
+            await self.backend.put(BLOB_KEY_PREFIX + ref, content, settings.BLOB_TTL_SECONDS)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Blob write failed, keeping answer inline: {e}")
+            return None
+        self._remember(ref, content)
+        return ref
+
+    async def load(self, refs: Iterable[str]):
+        """Fetches blobs missing from the in-process cache in one round trip."""
+        missing = list(dict.fromkeys(ref for ref in refs if ref and ref not in self._cache))
+        if not missing or self.backend is None:
+            return
+        try:
+            values = await self.backend.get_many([BLOB_KEY_PREFIX + ref for ref in missing], settings.BLOB_TTL_SECONDS)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Blob read failed for {len(missing)} answers: {e}")
+            return
+        for ref, content in zip(missing, values):
+            if content is None:
+                self.stats["missing"] += 1
+                logger.warning(f"Blob {ref} expired or missing; using its preview")
+                continue
+            self.stats["fetched"] += 1
+            self._remember(ref, content)
+
+    async def offload_interactions(self, interactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Interactions with large answers replaced by a preview and an `answer_ref`."""
+        offloaded = []
+        for interaction in interactions:
+            answer = interaction.get("answer")
+            if isinstance(answer, str) and len(answer) >= settings.BLOB_OFFLOAD_MIN_CHARS and "answer_ref" not in interaction:
+                ref = await self.put(answer)
+                if ref is not None:
+                    interaction = {**interaction, "answer": preview(answer, ref), "answer_ref": ref}
+                    self.stats["offloaded"] += 1
+                    self.stats["offloaded_chars"] += len(answer)
+            offloaded.append(interaction)
+        return offloaded
+
+    async def load_interactions(self, interactions: Sequence[Dict[str, Any]]):
+        await self.load(interaction.get("answer_ref") for interaction in interactions)
+
+    async def resolve_interactions(self, interactions: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Copies of interactions with their full answers, for code that reads answers directly."""
+        await self.load_interactions(interactions)
+        return [{**interaction, "answer": interaction_answer(interaction)} for interaction in interactions]
+
+blob_store = BlobStore()
+
+def interaction_answer(interaction: Dict[str, Any]) -> str:
+    """Full answer of an interaction if available, otherwise what is stored inline."""
+    ref = interaction.get("answer_ref")
+    if ref:
+        content = blob_store.cached(ref)
+        if content is not None:
+            return content
+    return str(interaction.get("answer", ""))
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from src.config import settings
+from src.graph.utils.concurrency import SingleFlight
+from src.graph.utils.scraping import DEFAULT_USER_AGENT
+
+logger = logging.getLogger(__name__)
+
+TICKERS_FILE = "company_tickers.json"
+ARCHIVES_URL = "https://www.sec.gov/Archives/edgar/data"
+
+def submissions_file(cik: str) -> str:
+    """EDGAR's file name for a company's submissions, e.g. CIK0000320193.json."""
+    return f"CIK{cik}.json"
+
+class HttpEdgarSource:
+    """Reads the ticker map and submissions metadata from SEC.gov."""
+
+    TICKERS_URL = f"https://www.sec.gov/files/{TICKERS_FILE}"
+    SUBMISSIONS_URL = "https://data.sec.gov/submissions"
+
+    def __init__(self, user_agent: str = DEFAULT_USER_AGENT):
+        self.headers = {"User-Agent": user_agent}
+
+    async def _get_json(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            async with httpx.AsyncClient(headers=self.headers, timeout=15.0, follow_redirects=True) as client:
+                response = await client.get(url)
+                response.raise_for_status()
+                return response.json()
+        except Exception as e:
+            logger.error(f"Error fetching EDGAR metadata from {url}: {e}")
+            return None
+
+    async def get_company_tickers(self) -> Optional[Dict[str, Any]]:
+        return await self._get_json(self.TICKERS_URL)
+
+    async def get_submissions(self, cik: str) -> Optional[Dict[str, Any]]:
+        return await self._get_json(f"{self.SUBMISSIONS_URL}/{submissions_file(cik)}")
+
+class FileEdgarSource:
+    """
+    Offline stand-in for HttpEdgarSource.
+    Reads company_tickers.json and CIK##########.json from a local directory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _read_json(self, name: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    async def get_company_tickers(self) -> Optional[Dict[str, Any]]:
+        return self._read_json(TICKERS_FILE)
+
+    async def get_submissions(self, cik: str) -> Optional[Dict[str, Any]]:
+        return self._read_json(submissions_file(cik))
+
+class EdgarIndex:
+    """
+    In-memory index of ticker -> CIK and per-CIK filings, backed by a disk cache.
+    Lookups are served from memory; submissions are refreshed incrementally once
+    they are older than EDGAR_REFRESH_MINUTES, merging only accessions that are
+    newer than the newest one already indexed. The ticker map is reloaded once
+    older than EDGAR_TICKERS_REFRESH_HOURS. Cache file I/O runs in worker threads.
+    """
+
+    def __init__(self, source=None, cache_dir: Optional[str] = None):
+        self._source = source
+        self._cache_dir = cache_dir
+        self._refreshes = SingleFlight()
+        self.reset()
+
+    def reset(self):
+        """Drops everything held in memory; the disk cache is kept."""
+        self._ciks: Dict[str, str] = {}
+        self._ciks_fetched_at = 0.0
+        # cik -> filings, newest first
+        self._filings: Dict[str, List[Dict[str, str]]] = {}
+        # cik -> form type -> filings, newest first
+        self._by_form: Dict[str, Dict[str, List[Dict[str, str]]]] = {}
+        self._fetched_at: Dict[str, float] = {}
+
+    @property
+    def source(self):
+        if self._source is None:
+            if settings.EDGAR_OFFLINE_DIR:
+                return FileEdgarSource(settings.EDGAR_OFFLINE_DIR)
+            return HttpEdgarSource()
+        return self._source
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir or settings.EDGAR_CACHE_DIR
+
+    def _read_cache(self, name: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.cache_dir, name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable EDGAR cache file {path}: {e}")
+            return None
+
+    def _cache_mtime(self, name: str) -> float:
+        try:
+            return os.path.getmtime(os.path.join(self.cache_dir, name))
+        except OSError:
+            return 0.0
+
+    def _write_cache(self, name: str, data: Dict[str, Any]):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _set_ciks(self, data: Dict[str, Any], fetched_at: float):
+        self._ciks = {str(entry["ticker"]).upper(): str(entry["cik_str"]).zfill(10) for entry in data.values()}
+        self._ciks_fetched_at = fetched_at
+
+    def _ciks_fresh(self) -> bool:
+        return bool(self._ciks) and time.time() - self._ciks_fetched_at < settings.EDGAR_TICKERS_REFRESH_HOURS * 3600
+
+    async def _load_ciks(self):
+        """Populates the ticker map from disk, then from the source when missing or stale; a failed reload keeps the old map."""
+        if not self._ciks:
+            cached = await asyncio.to_thread(self._read_cache, TICKERS_FILE)
+            if cached is not None:
+                self._set_ciks(cached, await asyncio.to_thread(self._cache_mtime, TICKERS_FILE))
+        if self._ciks_fresh():
+            return
+
+        data = await self.source.get_company_tickers()
+        if data is None:
+            return
+        self._set_ciks(data, time.time())
+        await asyncio.to_thread(self._write_cache, TICKERS_FILE, data)
+
+    def _set_filings(self, cik: str, filings: List[Dict[str, str]], fetched_at: float):
+        by_form: Dict[str, List[Dict[str, str]]] = {}
+        for filing in filings:
+            by_form.setdefault(filing["type"], []).append(filing)
+        self._filings[cik] = filings
+        self._by_form[cik] = by_form
+        self._fetched_at[cik] = fetched_at
+
+    def _parse_recent(self, cik: str, submissions: Dict[str, Any], known: set) -> List[Dict[str, str]]:
+        """Turns EDGAR's columnar 'recent' block into filing dicts, stopping at the first known accession."""
+        recent = submissions.get("filings", {}).get("recent", {})
+        accessions = recent.get("accessionNumber", [])
+        filings = []
+        for i, accession in enumerate(accessions):
+            if accession in known:
+                break
+            document = recent["primaryDocument"][i]
+            filings.append({
+                "accession_number": accession,
+                "filing_date": recent["filingDate"][i],
+                "report_date": recent.get("reportDate", [""] * len(accessions))[i],
+                "type": recent["form"][i],
+                "url": f"{ARCHIVES_URL}/{int(cik)}/{accession.replace('-', '')}/{document}"
+            })
+        return filings
+
+    async def _refresh(self, cik: str):
+        """Loads the CIK from disk if needed, then merges newer submissions when stale."""
+        if cik not in self._filings:
+            cached = await asyncio.to_thread(self._read_cache, submissions_file(cik))
+            if cached:
+                self._set_filings(cik, cached["filings"], cached["fetched_at"])
+
+        age = time.time() - self._fetched_at.get(cik, 0)
+        if cik in self._filings and age < settings.EDGAR_REFRESH_MINUTES * 60:
+            return
+
+        submissions = await self.source.get_submissions(cik)
+        if submissions is None:
+            return
+
+        existing = self._filings.get(cik, [])
+        known = {filing["accession_number"] for filing in existing}
+        new_filings = self._parse_recent(cik, submissions, known)
+        merged = new_filings + existing
+        fetched_at = time.time()
+        self._set_filings(cik, merged, fetched_at)
+        await asyncio.to_thread(self._write_cache, submissions_file(cik), {"fetched_at": fetched_at, "filings": merged})
+        if new_filings:
+            logger.info(f"EDGAR index for CIK {cik}: {len(new_filings)} new filings")
+
+    def get_cik(self, ticker: str) -> Optional[str]:
+        """Zero-padded CIK for a ticker from memory, or None if it is not loaded."""
+        return self._ciks.get(ticker.upper())
+
+    def get_filings(self, ticker: str, filing_type: str, limit: int = 1) -> List[Dict[str, str]]:
+        """Latest filings of a type from memory only, newest first."""
+        cik = self.get_cik(ticker)
+        if not cik:
+            return []
+        return self._by_form.get(cik, {}).get(filing_type, [])[:limit]
+
+    async def latest_filings(self, ticker: str, filing_type: str = "10-K", limit: int = 1) -> List[Dict[str, str]]:
+        """
+        Latest `limit` filings of `filing_type` for a ticker, newest first.
+        Returns an empty list for unknown tickers or when EDGAR is unreachable.
+        """
+        # The ticker map and each CIK refresh under their own key
+        if not self._ciks_fresh():
+            await self._refreshes.do(TICKERS_FILE, self._load_ciks)
+        cik = self.get_cik(ticker)
+        if not cik:
+            return []
+        if not self._is_fresh(ticker):
+            # Concurrent lookups of the same company share one refresh; other companies don't wait on it
+            await self._refreshes.do(cik, self._refresh, cik)
+        return self.get_filings(ticker, filing_type, limit)
+
+    def _is_fresh(self, ticker: str) -> bool:
+        cik = self.get_cik(ticker)
+        if not cik or cik not in self._filings:
+            return False
+        return time.time() - self._fetched_at[cik] < settings.EDGAR_REFRESH_MINUTES * 60
+
+edgar_index = EdgarIndex()
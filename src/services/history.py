@@ -7,8 +7,7 @@ from sqlalchemy.future import select
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from src.database.models import ChatMessage, ChatThread
 from src.database.session import AsyncSessionLocal
-from src.graph.persistence import get_checkpointer
-from src.graph.graph import create_graph
+from src.graph.graph import get_persistent_graph
 
 logger = logging.getLogger(__name__)
 
@@ -32,16 +31,15 @@ async def backfill_history_if_needed(db: AsyncSession, thread_id: str, user_id:
     logger.info(f"Relational history missing for thread {thread_id}. Attempting backfill from checkpointer.")
     
     # 2. Fetch state from LangGraph
-    async with get_checkpointer() as checkpointer:
-        graph = create_graph(checkpointer=checkpointer)
-        config = {"configurable": {"thread_id": thread_id}}
-        state = await graph.aget_state(config)
-        
-        if state.values and "session_context" in state.values:
-            messages = state.values["session_context"].get("messages", [])
-            if messages:
-                # 3. Sync to Postgres
-                await sync_conversation_to_postgres(db, thread_id, user_id, messages)
+    graph = await get_persistent_graph()
+    config = {"configurable": {"thread_id": thread_id}}
+    state = await graph.aget_state(config)
+    
+    if state.values and "session_context" in state.values:
+        messages = state.values["session_context"].get("messages", [])
+        if messages:
+            # 3. Sync to Postgres
+            await sync_conversation_to_postgres(db, thread_id, user_id, messages)
 
 async def sync_conversation_background(
     thread_id: str, 
@@ -0,0 +1,121 @@
+import logging
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Type
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o"
+
+class LLMRegistry:
+    """
+    Hands out long-lived chat model clients keyed by (model, temperature, schema).
+    All OpenAI clients share one pooled sync and one pooled async HTTP client.
+    A custom factory (e.g. an offline stand-in) can replace ChatOpenAI in one place.
+    Registered callback handlers (e.g. the usage ledger) are attached to every client.
+    """
+
+    def __init__(self):
+        self._factory: Optional[Callable[..., Any]] = None
+        self._http_client: Optional[httpx.Client] = None
+        self._http_async_client: Optional[httpx.AsyncClient] = None
+        self._models: Dict[Tuple[Hashable, ...], Any] = {}
+        self._callbacks: List[BaseCallbackHandler] = []
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS
+        )
+
+    def init(self):
+        """Creates the pooled HTTP clients. Called from main.lifespan; safe to call twice."""
+        timeout = httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=10.0)
+        if self._http_client is None:
+            self._http_client = httpx.Client(limits=self._limits(), timeout=timeout)
+        if self._http_async_client is None:
+            self._http_async_client = httpx.AsyncClient(limits=self._limits(), timeout=timeout)
+
+    async def aclose(self):
+        """Closes pooled HTTP clients and drops cached models."""
+        self._models.clear()
+        if self._http_async_client is not None:
+            await self._http_async_client.aclose()
+            self._http_async_client = None
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+
+    def add_callback(self, handler: BaseCallbackHandler):
+        """Attaches a callback handler to every client built from now on."""
+        if handler not in self._callbacks:
+            self._callbacks.append(handler)
+            self._models.clear()
+
+    def set_factory(self, factory: Optional[Callable[..., Any]]):
+        """
+        Replaces the chat model constructor, e.g. with an offline stand-in.
+        The factory is called with (model=..., temperature=..., **client_kwargs).
+        Passing None restores ChatOpenAI.
+        """
+        self._factory = factory
+        self._models.clear()
+
+    def reset(self):
+        """Drops cached models and any custom factory; pooled HTTP clients and callbacks are kept."""
+        self._factory = None
+        self._models.clear()
+
+    def _build(self, model: str, temperature: float) -> Any:
+        if self._factory is not None:
+            llm = self._factory(model=model, temperature=temperature)
+            if self._callbacks and isinstance(llm, BaseChatModel):
+                llm.callbacks = list(llm.callbacks or []) + self._callbacks
+            return llm
+
+        self.init()
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            http_client=self._http_client,
+            http_async_client=self._http_async_client,
+            callbacks=list(self._callbacks) or None
+        )
+
+    def get(
+        self,
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0,
+        schema: Optional[Type[BaseModel]] = None,
+        method: Optional[str] = None
+    ) -> Any:
+        """
+        Returns the shared client for (model, temperature), wrapped for structured
+        output when a schema is given (method=None keeps the library default).
+        Clients are built once and reused.
+        """
+        key = (model, temperature, schema, method)
+        if key in self._models:
+            return self._models[key]
+
+        base_key = (model, temperature, None, None)
+        if base_key not in self._models:
+            self._models[base_key] = self._build(model, temperature)
+            logger.debug(f"Created LLM client for {model} (temperature={temperature})")
+
+        llm = self._models[base_key]
+        if schema is not None:
+            if method:
+                llm = llm.with_structured_output(schema, method=method)
+            else:
+                llm = llm.with_structured_output(schema)
+            self._models[key] = llm
+        return llm
+
+llm_registry = LLMRegistry()
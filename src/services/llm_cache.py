@@ -0,0 +1,222 @@
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, Union
+
+import redis.asyncio as redis
+from langchain_core.messages import AIMessage, BaseMessage
+from pydantic import BaseModel
+
+from src.config import settings
+from src.graph.utils.tokens import estimate_tokens
+from src.services.redis_client import shared_redis
+from src.services.llm import llm_registry
+from src.services.usage import usage_ledger
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "llmcache:"
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+class RedisLLMCacheBackend:
+    """Stores cached responses in Redis with per-entry expiry."""
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self._client = client
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or shared_redis.client
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: str, ttl_seconds: int):
+        await self.client.set(key, value, ex=ttl_seconds)
+
+class MemoryLLMCacheBackend:
+    """Process-local stand-in for RedisLLMCacheBackend (tests, local runs)."""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, str]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        return entry[1]
+
+    async def set(self, key: str, value: str, ttl_seconds: int):
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+
+def normalize_messages(messages: Union[str, Sequence[BaseMessage]]) -> List[Dict[str, str]]:
+    """Role + whitespace-collapsed content, so cosmetic prompt differences share a key."""
+    if isinstance(messages, str):
+        messages = [("human", messages)]
+    normalized = []
+    for message in messages:
+        if isinstance(message, BaseMessage):
+            role, content = message.type, message.content
+        else:
+            role, content = message
+        if isinstance(content, str):
+            content = " ".join(content.split())
+        else:
+            content = json.dumps(content, sort_keys=True)
+        normalized.append({"role": role, "content": content})
+    return normalized
+
+def schema_fingerprint(schema: Optional[Type[BaseModel]]) -> Optional[str]:
+    if schema is None:
+        return None
+    schema_json = json.dumps(schema.model_json_schema(), sort_keys=True)
+    return f"{schema.__module__}.{schema.__qualname__}:{hashlib.sha256(schema_json.encode()).hexdigest()[:16]}"
+
+def cache_key(
+    model: str,
+    temperature: float,
+    messages: Union[str, Sequence[BaseMessage]],
+    schema: Optional[Type[BaseModel]] = None,
+    method: Optional[str] = None
+) -> str:
+    """Exact-match key over (model, params, normalized messages, schema)."""
+    payload = json.dumps({
+        "model": model,
+        "params": {"temperature": temperature, "method": method},
+        "messages": normalize_messages(messages),
+        "schema": schema_fingerprint(schema)
+    }, sort_keys=True)
+    return CACHE_KEY_PREFIX + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """
+    Exact-match cache in front of llm_registry models.
+    Call sites opt in through ainvoke() with their own TTL; stats are kept per site.
+    Backend failures are logged and treated as misses.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self.reset_stats()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            if settings.LLM_CACHE_BACKEND == "memory":
+                self._backend = MemoryLLMCacheBackend()
+            elif settings.LLM_CACHE_BACKEND == "redis":
+                self._backend = RedisLLMCacheBackend()
+        return self._backend
+
+    def reset(self, backend=None):
+        """Swaps the backend (None re-reads LLM_CACHE_BACKEND) and clears stats."""
+        self._backend = backend
+        self.reset_stats()
+
+    def reset_stats(self):
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _site(self, site: str) -> Dict[str, int]:
+        if site not in self._stats:
+            self._stats[site] = {"hits": 0, "misses": 0, "errors": 0, "saved_tokens": 0}
+        return self._stats[site]
+
+    async def _read(self, site: str, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            cached = await self.backend.get(key)
+            return json.loads(cached) if cached else None
+        except Exception as e:
+            self._site(site)["errors"] += 1
+            logger.warning(f"LLM cache read failed for {site}: {e}")
+            return None
+
+    async def _write(self, site: str, key: str, entry: Dict[str, Any], ttl_seconds: int):
+        try:
+            await self.backend.set(key, json.dumps(entry), ttl_seconds)
+        except Exception as e:
+            self._site(site)["errors"] += 1
+            logger.warning(f"LLM cache write failed for {site}: {e}")
+
+    def _to_entry(self, response: Any, prompt_text: str, schema: Optional[Type[BaseModel]]) -> Optional[Dict[str, Any]]:
+        """Serializes a response, or returns None for anything that cannot be replayed."""
+        if schema is not None:
+            if not isinstance(response, schema):
+                return None
+            output = response.model_dump_json()
+            return {"structured": json.loads(output), "tokens": estimate_tokens(prompt_text + output)}
+
+        content = getattr(response, "content", None)
+        if not isinstance(content, str):
+            return None
+        usage = getattr(response, "usage_metadata", None)
+        tokens = usage.get("total_tokens") if isinstance(usage, dict) else None
+        if not isinstance(tokens, int):
+            tokens = estimate_tokens(prompt_text + content)
+        return {"content": content, "tokens": tokens}
+
+    def _from_entry(self, entry: Dict[str, Any], schema: Optional[Type[BaseModel]]) -> Any:
+        if schema is not None:
+            return schema.model_validate(entry["structured"])
+        return AIMessage(content=entry["content"])
+
+    async def ainvoke(
+        self,
+        site: str,
+        messages: Union[str, Sequence[BaseMessage]],
+        model: str,
+        temperature: float = 0,
+        schema: Optional[Type[BaseModel]] = None,
+        method: Optional[str] = None,
+        ttl_seconds: Optional[int] = None
+    ) -> Any:
+        """
+        Returns a cached response for an identical request, otherwise calls the
+        model from llm_registry and caches the result for ttl_seconds.
+        Returns an AIMessage, or a schema instance when schema is given.
+        """
+        llm = llm_registry.get(model, temperature, schema, method)
+        if self.backend is None:
+            return await llm.ainvoke(messages)
+
+        key = cache_key(model, temperature, messages, schema, method)
+        stats = self._site(site)
+        entry = await self._read(site, key)
+        if entry is not None:
+            try:
+                response = self._from_entry(entry, schema)
+                usage_ledger.record_cache_hit(model)
+                stats["hits"] += 1
+                stats["saved_tokens"] += entry.get("tokens", 0)
+                return response
+            except Exception as e:
+                logger.warning(f"Discarding unreadable LLM cache entry for {site}: {e}")
+
+        stats["misses"] += 1
+        response = await llm.ainvoke(messages)
+        prompt_text = "".join(m["content"] for m in normalize_messages(messages))
+        new_entry = self._to_entry(response, prompt_text, schema)
+        if new_entry is not None:
+            await self._write(site, key, new_entry, ttl_seconds or DEFAULT_TTL_SECONDS)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits, misses, hit rate and saved tokens per call site and overall."""
+        sites = {}
+        totals = {"hits": 0, "misses": 0, "errors": 0, "saved_tokens": 0}
+        for site, counts in sorted(self._stats.items()):
+            lookups = counts["hits"] + counts["misses"]
+            sites[site] = {**counts, "hit_rate": round(counts["hits"] / lookups, 4) if lookups else 0.0}
+            for name in totals:
+                totals[name] += counts[name]
+        lookups = totals["hits"] + totals["misses"]
+        return {
+            **totals,
+            "hit_rate": round(totals["hits"] / lookups, 4) if lookups else 0.0,
+            "sites": sites
+        }
+
+llm_cache = LLMResponseCache()
@@ -1,11 +1,14 @@
 import asyncio
+import time
 from decimal import Decimal
 from datetime import date, datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.models import FXRate, Asset, AssetType, Transaction, RecordStatus
 import yfinance as yf
+from src.config import settings
+from src.graph.utils.concurrency import SingleFlight
 
 def get_ticker(symbol: str) -> yf.Ticker:
     """
@@ -178,16 +181,73 @@ def _parse_yf_news_item(item: Dict[str, Any]) -> Optional[Dict[str, str]]:
         print(f"Error parsing news item: {e}")
     return None
 
+class NewsFeedIndex:
+    """
+    Short-lived cache of parsed yfinance news lists per ticker.
+    Concurrent requests for the same ticker share one fetch, and multi-ticker
+    requests fetch all missing tickers in parallel.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds
+        self._flight = SingleFlight()
+        self.reset()
+
+    def reset(self):
+        self._entries: Dict[str, Tuple[float, List[Dict[str, str]]]] = {}
+
+    @property
+    def ttl(self) -> int:
+        return self.ttl_seconds if self.ttl_seconds is not None else settings.NEWS_FEED_TTL_SECONDS
+
+    async def _load(self, symbol: str) -> List[Dict[str, str]]:
+        news_items = await get_stock_news_data(symbol)
+        parsed_items = []
+        for item in news_items or []:
+            parsed = _parse_yf_news_item(item)
+            if parsed:
+                parsed_items.append(parsed)
+        self._entries[symbol] = (time.monotonic(), parsed_items)
+        return parsed_items
+
+    async def get_news(self, symbol: str) -> List[Dict[str, str]]:
+        """
+        Parsed news ({title, link}) for a ticker, served from cache within the TTL.
+        Raises if yfinance fails; failures are not cached.
+        """
+        key = symbol.upper()
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            items = entry[1]
+        else:
+            items = await self._flight.do(key, self._load, key)
+        # Callers annotate items (e.g. user_agent), so each gets its own copies
+        return [dict(item) for item in items]
+
+    async def get_news_many(self, symbols: List[str]) -> Dict[str, List[Dict[str, str]]]:
+        """
+        Parsed news for several tickers (e.g. all holdings) in one call.
+        Tickers that fail map to an empty list.
+        """
+        results = await asyncio.gather(*[self.get_news(s) for s in symbols], return_exceptions=True)
+        news = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                print(f"Error fetching news for {symbol}: {result}")
+                result = []
+            news[symbol] = result
+        return news
+
+news_feed_index = NewsFeedIndex()
+
 async def fetch_yfinance_news_urls(ticker_symbol: str) -> List[Dict[str, str]]:
     """Fetch news URLs for a single ticker."""
-    results = []
     try:
-        news_items = await get_stock_news_data(ticker_symbol)
-        if news_items:
-            for item in news_items:
-                parsed = _parse_yf_news_item(item)
-                if parsed:
-                    results.append(parsed)
+        return await news_feed_index.get_news(ticker_symbol)
     except Exception as e:
         print(f"Error fetching news for {ticker_symbol}: {e}")
-    return results
+        return []
+
+async def fetch_yfinance_news_urls_many(ticker_symbols: List[str]) -> Dict[str, List[Dict[str, str]]]:
+    """Fetch news URLs for several tickers concurrently."""
+    return await news_feed_index.get_news_many(ticker_symbols)
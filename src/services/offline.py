@@ -0,0 +1,307 @@
+import asyncio
+import hashlib
+import json
+import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel, Field
+
+DEFAULT_SUBJECT = "AAPL"
+DEFAULT_TEXT = (
+    "Offline answer: revenue growth is steady, margins are stable and valuation "
+    "sits near its five-year average."
+)
+
+# Tool calls each researcher plans when no scenario overrides its ResearchPlan
+DEFAULT_RESEARCH_STEPS: Dict[str, List[Dict[str, Any]]] = {
+    "fundamental_researcher": [
+        {"tool_name": "get_stock_financials", "tool_params": {}},
+        {"tool_name": "get_sec_filing_section", "tool_params": {"section_id": "item1a"}}
+    ],
+    "sentiment_researcher": [
+        {"tool_name": "get_stock_news", "tool_params": {}},
+        {"tool_name": "get_market_sentiment", "tool_params": {}}
+    ],
+    "macro_researcher": [
+        {"tool_name": "get_key_macro_indicators", "tool_params": {}},
+        {"tool_name": "get_macro_economic_news", "tool_params": {}},
+        {"tool_name": "get_political_sentiment", "tool_params": {}}
+    ],
+    "narrative_researcher": [
+        {"tool_name": "get_indices_performance", "tool_params": {}},
+        {"tool_name": "get_historical_narrative", "tool_params": {}}
+    ],
+    "generic_researcher": [
+        {"tool_name": "web_search", "tool_params": {"queries": ["latest market news"]}}
+    ]
+}
+
+def research_plan(node: Optional[str]) -> Dict[str, Any]:
+    return {
+        "next_agent": "analyst",
+        "steps": DEFAULT_RESEARCH_STEPS.get(node or "", DEFAULT_RESEARCH_STEPS["generic_researcher"]),
+        "subject": DEFAULT_SUBJECT
+    }
+
+# Templated structured outputs by schema name; callables receive the calling node
+DEFAULT_STRUCTURED_RESPONSES: Dict[str, Any] = {
+    "SupervisorResponse": {"next_agents": ["fundamental_researcher", "sentiment_researcher"]},
+    "ResearchPlan": research_plan,
+    "Instructions": {
+        "bull_instruction": "Argue the growth case from the research data.",
+        "bear_instruction": "Argue the downside risks from the research data."
+    },
+    "FinalSynthesis": {
+        "report": "Balanced view: growth offsets valuation risk.\nFOLLOW_UP: None",
+        "confidence_score": 70
+    },
+    "SummarizerOutput": {
+        "final_answer": DEFAULT_TEXT,
+        "title": "Offline report",
+        "category": "STOCK",
+        "topic": DEFAULT_SUBJECT,
+        "tags": ["#offline", "#benchmark"]
+    },
+    "SummaryMetadata": {
+        "title": "Offline report",
+        "category": "STOCK",
+        "topic": DEFAULT_SUBJECT,
+        "tags": ["#offline", "#benchmark"]
+    },
+    "OffTopicAnswer": {"next_agent": "summarizer", "answer": "Hello! Ask me about markets or your portfolio."}
+}
+
+def parse_structured(schema: Type[BaseModel], message: AIMessage) -> BaseModel:
+    return schema.model_validate_json(message.content)
+
+class OfflineChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for ChatOpenAI.
+    Structured calls return the response registered for "<node>:<Schema>" or
+    "<Schema>" (falling back to DEFAULT_STRUCTURED_RESPONSES); plain calls return
+    "<node>:text", "text" or DEFAULT_TEXT. Each call takes `latency` seconds and
+    reports token usage estimated from text length.
+    """
+
+    model_name: str = "offline"
+    latency: float = 0.0
+    responses: Dict[str, Any] = Field(default_factory=dict)
+
+    @property
+    def _llm_type(self) -> str:
+        return "offline"
+
+    def _content(self, schema_name: Optional[str], node: Optional[str]) -> str:
+        kind = schema_name or "text"
+        for key in (f"{node}:{kind}", kind):
+            if key in self.responses:
+                value = self.responses[key]
+                break
+        else:
+            if schema_name is None:
+                return DEFAULT_TEXT
+            if schema_name not in DEFAULT_STRUCTURED_RESPONSES:
+                raise ValueError(f"No offline response registered for {schema_name}")
+            value = DEFAULT_STRUCTURED_RESPONSES[schema_name]
+
+        if callable(value):
+            value = value(node)
+        return value if isinstance(value, str) else json.dumps(value)
+
+    def _message(self, messages, run_manager, offline_schema: Optional[str]) -> AIMessage:
+        node = (run_manager.metadata or {}).get("langgraph_node") if run_manager else None
+        content = self._content(offline_schema, node)
+        prompt_tokens = max(1, sum(len(str(m.content)) for m in messages) // 4)
+        completion_tokens = max(1, len(content) // 4)
+        return AIMessage(content=content, usage_metadata={
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        })
+
+    def _generate(self, messages, stop=None, run_manager=None, offline_schema: Optional[str] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, run_manager, offline_schema))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, offline_schema: Optional[str] = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, run_manager, offline_schema))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, offline_schema: Optional[str] = None, **kwargs: Any):
+        message = self._message(messages, run_manager, offline_schema)
+        words = message.content.split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.latency / len(words))
+            token = word if i == len(words) - 1 else word + " "
+            last = i == len(words) - 1
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=token,
+                usage_metadata=message.usage_metadata if last else None
+            ))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema: Type[BaseModel], *, method: Optional[str] = None, **kwargs: Any) -> Runnable:
+        return self.bind(offline_schema=schema.__name__) | RunnableLambda(partial(parse_structured, schema))
+
+def build_offline_model(responses: Dict[str, Any], latency: float, model: str, temperature: float) -> OfflineChatModel:
+    return OfflineChatModel(model_name=model, latency=latency, responses=responses)
+
+def offline_model_factory(responses: Optional[Dict[str, Any]] = None, latency: float = 0.0) -> Callable[..., OfflineChatModel]:
+    """Factory for llm_registry.set_factory that builds OfflineChatModels."""
+    return partial(build_offline_model, responses or {}, latency)
+
+def stable_number(*parts: str, low: float = 0.0, high: float = 1.0) -> float:
+    """Deterministic pseudo-random number in [low, high) derived from parts."""
+    digest = hashlib.sha256("|".join(parts).encode()).digest()
+    return low + (high - low) * int.from_bytes(digest[:4], "big") / 2 ** 32
+
+class OfflineMarketData:
+    """Fake yfinance: fundamentals and daily moves derived from the symbol."""
+
+    def financials(self, symbol: str) -> Dict[str, Any]:
+        return {
+            "marketCap": round(stable_number(symbol, "cap", low=5e9, high=3e12)),
+            "trailingPE": round(stable_number(symbol, "pe", low=8, high=45), 2),
+            "trailingEps": round(stable_number(symbol, "eps", low=0.5, high=12), 2),
+            "totalRevenue": round(stable_number(symbol, "revenue", low=1e9, high=4e11)),
+            "profitMargins": round(stable_number(symbol, "margin", low=0.02, high=0.35), 4)
+        }
+
+    def daily_change(self, symbol: str) -> Dict[str, float]:
+        return {
+            "close": round(stable_number(symbol, "close", low=20, high=600), 2),
+            "change_pct": round(stable_number(symbol, "change", low=-3, high=3), 2)
+        }
+
+class OfflineNews:
+    """Fake news feed and web search: fixed headlines per symbol or query."""
+
+    def headlines(self, subject: str, count: int = 3) -> List[Dict[str, str]]:
+        return [{
+            "title": f"{subject} headline {i + 1}",
+            "summary": f"{subject} reported results {'above' if stable_number(subject, str(i)) > 0.5 else 'below'} expectations."
+        } for i in range(count)]
+
+class OfflineFred:
+    """Fake FRED: recent observations for any series id."""
+
+    def series(self, series_id: str, limit: int = 6) -> List[Dict[str, str]]:
+        base = stable_number(series_id, low=1, high=300)
+        return [
+            {"date": f"2026-{month:02d}-01", "value": f"{base * (1 + 0.002 * month):.2f}"}
+            for month in range(1, limit + 1)
+        ]
+
+class OfflineX:
+    """Fake X (Twitter) search: a handful of posts per query."""
+
+    def posts(self, query: str, count: int = 3) -> List[str]:
+        moods = ["bullish", "cautious", "bearish"]
+        return [f"{query}: feeling {moods[int(stable_number(query, str(i)) * 3)]} today" for i in range(count)]
+
+class OfflineToolkit:
+    """
+    Offline versions of the research tools, backed by the fake market, news,
+    FRED and X backends. `tools()` maps tool names to the stand-ins for
+    research.utils.set_tool_overrides. Each call takes `latency` seconds.
+    """
+
+    TOOL_NAMES = (
+        "get_stock_financials", "get_sec_filing_section", "get_sec_filing_delta", "web_search",
+        "get_stock_news", "get_market_sentiment", "get_portfolio_sentiment", "get_key_macro_indicators",
+        "get_macro_economic_news", "get_political_sentiment", "get_indices_performance",
+        "get_historical_narrative", "synthesize_growth_narrative"
+    )
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.market = OfflineMarketData()
+        self.news = OfflineNews()
+        self.fred = OfflineFred()
+        self.x = OfflineX()
+
+    def tools(self) -> Dict[str, Callable]:
+        return {name: getattr(self, name) for name in self.TOOL_NAMES}
+
+    async def get_stock_financials(self, symbol: str, **kwargs) -> str:
+        await asyncio.sleep(self.latency)
+        info = self.market.financials(symbol)
+        return "\n".join([
+            f"**Financial Data for {symbol}**",
+            f"- Market Cap: ${info['marketCap']:,.0f}",
+            f"- P/E Ratio: {info['trailingPE']}",
+            f"- EPS: {info['trailingEps']}",
+            f"- Total Revenue: ${info['totalRevenue']:,.0f}",
+            f"- Profit Margin: {info['profitMargins'] * 100:.2f}%"
+        ])
+
+    async def get_sec_filing_section(self, ticker: str, filing_type: str = "10-K", section_id: str = "item1a", **kwargs) -> str:
+        await asyncio.sleep(self.latency)
+        return f"### {ticker} {filing_type} {section_id}\nCompetition, supply chain and regulation remain the main risks.\n"
+
+    async def get_sec_filing_delta(self, ticker: str, filing_type: str = "10-K", section_id: str = "item1a", **kwargs) -> str:
+        await asyncio.sleep(self.latency)
+        return f"### {ticker} {filing_type} {section_id} changes\n- Added: expanded discussion of AI regulation.\n"
+
+    async def web_search(self, queries: List[str], **kwargs) -> str:
+        await asyncio.sleep(self.latency)
+        lines = []
+        for query in queries:
+            lines.extend(f"- **{item['title']}**: {item['summary']}" for item in self.news.headlines(query, 2))
+        return "\n".join(lines) + "\n"
+
+    async def get_stock_news(self, symbol: str, max_results: int = 3, **kwargs) -> str:
+        await asyncio.sleep(self.latency)
+        lines = [f"News for {symbol}:"]
+        lines.extend(f"- **{item['title']}**: {item['summary']}" for item in self.news.headlines(symbol, max_results))
+        return "\n".join(lines) + "\n"
+
+    async def get_market_sentiment(self, ticker: str, **kwargs) -> str:
+        await asyncio.sleep(self.latency)
+        score = stable_number(ticker, "sentiment", low=-1, high=1)
+        posts = "\n".join(f"- {post}" for post in self.x.posts(f"${ticker}"))
+        return f"### Market Sentiment for {ticker}\nScore: {score:+.2f}\n{posts}\n"
+
+    async def get_portfolio_sentiment(self, tickers: List[str], **kwargs) -> str:
+        return "".join([await self.get_market_sentiment(ticker) for ticker in tickers])
+
+    async def get_key_macro_indicators(self, **kwargs) -> str:
+        await asyncio.sleep(self.latency)
+        lines = ["### Macro Data"]
+        for series_id in ("GDP", "CPI", "FEDFUNDS", "PAYEMS", "DXY"):
+            latest = self.fred.series(series_id)[-1]
+            lines.append(f"- {series_id}: {latest['value']} ({latest['date']})")
+        return "\n".join(lines) + "\n"
+
+    async def get_macro_economic_news(self, **kwargs) -> str:
+        await asyncio.sleep(self.latency)
+        lines = ["### Macro News"]
+        lines.extend(f"- **{item['title']}**: {item['summary']}" for item in self.news.headlines("Economy"))
+        return "\n".join(lines) + "\n"
+
+    async def get_political_sentiment(self, **kwargs) -> str:
+        await asyncio.sleep(self.latency)
+        return "### Political Sentiment\n" + "\n".join(f"- {post}" for post in self.x.posts("Federal Reserve")) + "\n"
+
+    async def get_indices_performance(self, **kwargs) -> str:
+        await asyncio.sleep(self.latency)
+        lines = ["### Major Indices Pulse (5D)"]
+        for symbol in ("SPY", "QQQ", "DIA", "^VIX"):
+            move = self.market.daily_change(symbol)
+            lines.append(f"- **{symbol}**: {move['close']:.2f} ({move['change_pct']:+.2f}%)")
+        return "\n".join(lines) + "\n"
+
+    async def get_historical_narrative(self, subject: Optional[str] = None, **kwargs) -> str:
+        await asyncio.sleep(self.latency)
+        return f"### Previous Narrative ({subject or 'Market'})\nNo baseline available.\n"
+
+    async def synthesize_growth_narrative(self, subject: Optional[str] = None, **kwargs) -> str:
+        await asyncio.sleep(self.latency)
+        return f"### Growth Narrative ({subject or 'Market'})\n1. AI capex\n2. Rate cuts\n3. Resilient consumer\n"
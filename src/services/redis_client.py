@@ -0,0 +1,54 @@
+import logging
+from typing import Optional
+
+import redis.asyncio as redis
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+class SharedRedis:
+    """
+    A process-wide Redis client (string responses) on a bounded blocking pool, sized by
+    the `max_connections_setting` setting. Opened at startup and closed at shutdown by
+    main.lifespan; created lazily if used first.
+
+    Two pools, so callers that hold a connection for seconds cannot starve quick ones:
+    shared_redis serves short commands (run locks, admission, LLM cache, blobs, run stream
+    writes) and stream_redis serves blocking XREADs of run stream readers. The checkpointer
+    keeps its own pool (checkpointer_pool), as it needs byte responses.
+    """
+
+    def __init__(self, name: str, max_connections_setting: str):
+        self.name = name
+        self.max_connections_setting = max_connections_setting
+        self._client: Optional[redis.Redis] = None
+
+    @property
+    def max_connections(self) -> int:
+        return getattr(settings, self.max_connections_setting)
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            # Blocking pool: past the cap callers wait (up to REDIS_POOL_TIMEOUT_SECONDS) for a connection
+            self._client = redis.Redis(connection_pool=redis.BlockingConnectionPool.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                max_connections=self.max_connections,
+                timeout=settings.REDIS_POOL_TIMEOUT_SECONDS
+            ))
+        return self._client
+
+    def open(self) -> redis.Redis:
+        return self.client
+
+    async def aclose(self):
+        """Closes the client and its pool; a later use opens a new one."""
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose(close_connection_pool=True)
+            logger.info(f"Redis {self.name} client shut down")
+
+shared_redis = SharedRedis("shared", "REDIS_MAX_CONNECTIONS")
+stream_redis = SharedRedis("stream", "REDIS_STREAM_MAX_CONNECTIONS")
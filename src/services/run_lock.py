@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+import redis.asyncio as redis
+
+from src.config import settings
+from src.services.redis_client import shared_redis
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY_PREFIX = "runlock:"
+
+# Renew / release only while the lock still holds this lease's token
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class RedisRunLockBackend:
+    """Run locks as Redis keys holding the owner's token, expiring unless renewed."""
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self._client = client
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or shared_redis.client
+
+    async def acquire(self, key: str, token: str, ttl_seconds: float) -> bool:
+        return bool(await self.client.set(key, token, px=int(ttl_seconds * 1000), nx=True))
+
+    async def renew(self, key: str, token: str, ttl_seconds: float) -> bool:
+        return bool(await self.client.eval(RENEW_SCRIPT, 1, key, token, int(ttl_seconds * 1000)))
+
+    async def release(self, key: str, token: str) -> bool:
+        return bool(await self.client.eval(RELEASE_SCRIPT, 1, key, token))
+
+class MemoryRunLockBackend:
+    """Process-local stand-in for RedisRunLockBackend (tests, single-worker runs)."""
+
+    def __init__(self):
+        self._locks: Dict[str, Tuple[float, str]] = {}
+
+    def _owner(self, key: str) -> Optional[str]:
+        entry = self._locks.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._locks.pop(key, None)
+            return None
+        return entry[1]
+
+    async def acquire(self, key: str, token: str, ttl_seconds: float) -> bool:
+        if self._owner(key) is not None:
+            return False
+        self._locks[key] = (time.monotonic() + ttl_seconds, token)
+        return True
+
+    async def renew(self, key: str, token: str, ttl_seconds: float) -> bool:
+        if self._owner(key) != token:
+            return False
+        self._locks[key] = (time.monotonic() + ttl_seconds, token)
+        return True
+
+    async def release(self, key: str, token: str) -> bool:
+        if self._owner(key) != token:
+            return False
+        del self._locks[key]
+        return True
+
+class RunLease:
+    """
+    A held run lock. A heartbeat renews it every third of RUN_LOCK_TTL_SECONDS
+    until release(), or until max_hold_seconds so a lease whose stream never
+    finished still expires. `lost` is set if the lock expired, was taken, or
+    outlived its max hold; the run checks it and stops.
+    """
+
+    def __init__(self, manager: "RunLockManager", thread_id: str, token: str, max_hold_seconds: Optional[float] = None):
+        self.manager = manager
+        self.thread_id = thread_id
+        self.key = LOCK_KEY_PREFIX + thread_id
+        self.token = token
+        self.max_hold_seconds = settings.RUN_LOCK_MAX_HOLD_SECONDS if max_hold_seconds is None else max_hold_seconds
+        self.lost = False
+        self.released = False
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._heartbeat = asyncio.create_task(self._renew_until_released())
+
+    async def _renew_until_released(self):
+        ttl = settings.RUN_LOCK_TTL_SECONDS
+        stop_at = time.monotonic() + self.max_hold_seconds
+        while time.monotonic() < stop_at:
+            await asyncio.sleep(min(ttl / 3, max(0.0, stop_at - time.monotonic())))
+            if time.monotonic() >= stop_at:
+                break
+            try:
+                renewed = await self.manager.backend.renew(self.key, self.token, ttl)
+            except Exception as e:
+                # The lock survives one missed renewal; later ones may still succeed
+                self.manager.stats["errors"] += 1
+                logger.warning(f"Run lock renewal failed for thread {self.thread_id}: {e}")
+                continue
+            if not renewed:
+                self.lost = True
+                self.manager.stats["lost"] += 1
+                logger.error(f"Run lock for thread {self.thread_id} expired or was taken over")
+                return
+            self.manager.stats["renewals"] += 1
+        # The lock lapses within a TTL from here, so the run must stop before another can start
+        self.lost = True
+        self.manager.stats["lost"] += 1
+        logger.error(f"Run lock for thread {self.thread_id} held past {self.max_hold_seconds:g}s; letting it expire")
+
+    async def release(self):
+        """Stops the heartbeat and deletes the lock if this lease still owns it. Safe to call twice."""
+        if self.released:
+            return
+        self.released = True
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+        self.manager.held.pop(self.thread_id, None)
+        try:
+            await self.manager.backend.release(self.key, self.token)
+            self.manager.stats["released"] += 1
+        except Exception as e:
+            self.manager.stats["errors"] += 1
+            logger.warning(f"Run lock release failed for thread {self.thread_id}, it expires on its own: {e}")
+
+class RunLockManager:
+    """
+    One graph run per thread across every worker and pod.
+    A run takes the thread's lock before streaming and holds it (with
+    heartbeat renewal) until the stream ends or the client disconnects.
+    A second run waits up to RUN_LOCK_WAIT_SECONDS, then gets None.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self.held: Dict[str, RunLease] = {}
+        self.reset_stats()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            if settings.RUN_LOCK_BACKEND == "memory":
+                self._backend = MemoryRunLockBackend()
+            else:
+                self._backend = RedisRunLockBackend()
+        return self._backend
+
+    def reset(self, backend=None):
+        """Swaps the backend (None re-reads RUN_LOCK_BACKEND) and clears stats. Held leases are not released."""
+        self._backend = backend
+        self.held.clear()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {
+            "acquired": 0, "conflicts": 0, "released": 0, "renewals": 0, "lost": 0, "errors": 0,
+            "waited": 0, "wait_total_ms": 0.0, "wait_max_ms": 0.0
+        }
+
+    def _record_wait(self, seconds: float):
+        ms = seconds * 1000
+        self.stats["wait_total_ms"] += ms
+        self.stats["wait_max_ms"] = max(self.stats["wait_max_ms"], ms)
+
+    async def acquire(
+        self, thread_id: str, wait_seconds: Optional[float] = None, max_hold_seconds: Optional[float] = None
+    ) -> Optional[RunLease]:
+        """
+        Takes the thread's run lock, polling for up to wait_seconds. None if another run keeps it.
+        The lease stops renewing after max_hold_seconds (RUN_LOCK_MAX_HOLD_SECONDS if unset).
+        """
+        wait_seconds = settings.RUN_LOCK_WAIT_SECONDS if wait_seconds is None else wait_seconds
+        key = LOCK_KEY_PREFIX + thread_id
+        token = uuid.uuid4().hex
+        start = time.monotonic()
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                acquired = await self.backend.acquire(key, token, settings.RUN_LOCK_TTL_SECONDS)
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+            waited = time.monotonic() - start
+            if acquired:
+                break
+            if waited >= wait_seconds:
+                self.stats["conflicts"] += 1
+                self._record_wait(waited)
+                logger.warning(f"Thread {thread_id} is already running; gave up after {waited * 1000:.0f} ms")
+                return None
+            await asyncio.sleep(min(settings.RUN_LOCK_RETRY_SECONDS, wait_seconds - waited))
+
+        self.stats["acquired"] += 1
+        if attempts > 1:
+            self.stats["waited"] += 1
+        self._record_wait(waited)
+        lease = RunLease(self, thread_id, token, max_hold_seconds)
+        lease.start()
+        self.held[thread_id] = lease
+        return lease
+
+    async def release_all(self):
+        """Releases every lease this process holds (shutdown)."""
+        for lease in list(self.held.values()):
+            await lease.release()
+
+    def snapshot(self) -> Dict[str, float]:
+        """Counters plus lock-wait averages, for GET /admin/locks."""
+        attempts = self.stats["acquired"] + self.stats["conflicts"]
+        return {
+            **self.stats,
+            "held": len(self.held),
+            "wait_avg_ms": round(self.stats["wait_total_ms"] / attempts, 3) if attempts else 0.0
+        }
+
+run_locks = RunLockManager()
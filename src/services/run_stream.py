@@ -0,0 +1,233 @@
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+
+from src.config import settings
+from src.services.redis_client import shared_redis, stream_redis
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY_PREFIX = "runstream:"
+META_KEY_PREFIX = "runmeta:"
+TERMINAL_EVENTS = ("end", "error")
+
+# (event id, event name, JSON data)
+RunEvent = Tuple[str, str, str]
+
+class RedisRunStreamBackend:
+    """
+    Run events in a Redis Stream per run, plus a small meta key; both expire after RUN_STREAM_TTL_SECONDS.
+    Writes use the short-command client; blocking reads use stream_redis, at most
+    REDIS_STREAM_MAX_CONNECTIONS at once so they never wait on its pool. Readers past
+    that cap see an empty read (a keep-alive) and try again.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None, stream_client: Optional[redis.Redis] = None):
+        self._client = client
+        self._stream_client = stream_client
+        self._readers: Optional[asyncio.Semaphore] = None
+
+    @property
+    def client(self) -> redis.Redis:
+        return self._client or shared_redis.client
+
+    @property
+    def stream_client(self) -> redis.Redis:
+        return self._stream_client or stream_redis.client
+
+    def _reader_slots(self) -> asyncio.Semaphore:
+        if self._readers is None:
+            self._readers = asyncio.Semaphore(settings.REDIS_STREAM_MAX_CONNECTIONS)
+        return self._readers
+
+    async def create(self, run_id: str, meta: dict):
+        await self.client.set(META_KEY_PREFIX + run_id, json.dumps(meta), ex=int(settings.RUN_STREAM_TTL_SECONDS))
+
+    async def meta(self, run_id: str) -> Optional[dict]:
+        raw = await self.client.get(META_KEY_PREFIX + run_id)
+        return json.loads(raw) if raw else None
+
+    async def append(self, run_id: str, event: str, data: str) -> str:
+        key = STREAM_KEY_PREFIX + run_id
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.xadd(key, {"event": event, "data": data}, maxlen=settings.RUN_STREAM_MAX_EVENTS, approximate=True)
+            pipe.expire(key, int(settings.RUN_STREAM_TTL_SECONDS))
+            event_id, _ = await pipe.execute()
+        return event_id
+
+    async def read(self, run_id: str, after: Optional[str], block_seconds: float) -> List[RunEvent]:
+        slots = self._reader_slots()
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(slots.acquire(), block_seconds)
+        except asyncio.TimeoutError:
+            return []
+        try:
+            # Block only for what is left of this read's window
+            block_ms = max(1, int((block_seconds - (time.monotonic() - start)) * 1000))
+            response = await self.stream_client.xread(
+                {STREAM_KEY_PREFIX + run_id: after or "0"}, count=100, block=block_ms
+            )
+        finally:
+            slots.release()
+        if not response:
+            return []
+        _, entries = response[0]
+        return [(event_id, fields["event"], fields["data"]) for event_id, fields in entries]
+
+class MemoryRunStreamBackend:
+    """
+    Process-local stand-in for RedisRunStreamBackend (tests, single-worker runs).
+    Applies the same limits: RUN_STREAM_MAX_EVENTS per run, and a run is dropped
+    RUN_STREAM_TTL_SECONDS after its last event.
+    """
+
+    def __init__(self):
+        self._meta: Dict[str, dict] = {}
+        self._events: Dict[str, List[RunEvent]] = {}
+        self._next_seq: Dict[str, int] = {}
+        self._expiry: Dict[str, float] = {}
+        self._appended: Dict[str, asyncio.Condition] = {}
+
+    def _condition(self, run_id: str) -> asyncio.Condition:
+        if run_id not in self._appended:
+            self._appended[run_id] = asyncio.Condition()
+        return self._appended[run_id]
+
+    def _touch(self, run_id: str):
+        """Extends the run's expiry and drops runs whose expiry has passed."""
+        now = time.monotonic()
+        for expired in [r for r, expiry in self._expiry.items() if expiry <= now]:
+            for entries in (self._meta, self._events, self._next_seq, self._expiry, self._appended):
+                entries.pop(expired, None)
+        self._expiry[run_id] = now + settings.RUN_STREAM_TTL_SECONDS
+
+    async def create(self, run_id: str, meta: dict):
+        self._touch(run_id)
+        self._meta[run_id] = dict(meta)
+        self._events.setdefault(run_id, [])
+
+    async def meta(self, run_id: str) -> Optional[dict]:
+        if self._expiry.get(run_id, 0) <= time.monotonic():
+            return None
+        return self._meta.get(run_id)
+
+    async def append(self, run_id: str, event: str, data: str) -> str:
+        self._touch(run_id)
+        seq = self._next_seq.get(run_id, 1)
+        self._next_seq[run_id] = seq + 1
+        event_id = f"{seq}-0"
+        events = self._events.setdefault(run_id, [])
+        events.append((event_id, event, data))
+        # Oldest events trimmed, like XADD MAXLEN
+        del events[:-settings.RUN_STREAM_MAX_EVENTS]
+        condition = self._condition(run_id)
+        async with condition:
+            condition.notify_all()
+        return event_id
+
+    def _after(self, run_id: str, after: Optional[str]) -> List[RunEvent]:
+        events = self._events.get(run_id, [])
+        if not events:
+            return []
+        seq = int(after.split("-")[0]) if after else 0
+        first = int(events[0][0].split("-")[0])
+        return events[max(0, seq - first + 1):]
+
+    async def read(self, run_id: str, after: Optional[str], block_seconds: float) -> List[RunEvent]:
+        if run_id not in self._expiry:
+            # Unknown or expired: wait like an empty stream, without recreating its entries
+            await asyncio.sleep(block_seconds)
+            return []
+        condition = self._condition(run_id)
+        async with condition:
+            if not self._after(run_id, after):
+                try:
+                    await asyncio.wait_for(condition.wait(), block_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        return self._after(run_id, after)
+
+class RunStreams:
+    """
+    Event logs for background runs.
+    A background run publishes every SSE event to its log as it happens;
+    clients read the log from the start or from a Last-Event-ID, so a
+    dropped connection resumes where it left off instead of rerunning.
+    The log ends with an `end` or `error` event.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            if settings.RUN_STREAM_BACKEND == "memory":
+                self._backend = MemoryRunStreamBackend()
+            else:
+                self._backend = RedisRunStreamBackend()
+        return self._backend
+
+    def reset(self, backend=None):
+        """Swaps the backend (None re-reads RUN_STREAM_BACKEND). Running tasks are not cancelled."""
+        self._backend = backend
+        self.tasks.clear()
+
+    async def create(self, run_id: str, thread_id: str, user_id: str):
+        await self.backend.create(run_id, {"thread_id": thread_id, "user_id": user_id})
+
+    async def meta(self, run_id: str) -> Optional[dict]:
+        return await self.backend.meta(run_id)
+
+    async def publish(self, run_id: str, event: str, data: str) -> Optional[str]:
+        """Appends an event; None if the log could not be written (the run carries on)."""
+        try:
+            return await self.backend.append(run_id, event, data)
+        except Exception as e:
+            logger.warning(f"Dropping {event} event of run {run_id}: {e}")
+            return None
+
+    def spawn(self, run_id: str, coro) -> asyncio.Task:
+        """Runs coro as the run's worker task, detached from any HTTP request."""
+        task = asyncio.create_task(coro)
+        self.tasks[run_id] = task
+        task.add_done_callback(lambda _: self.tasks.pop(run_id, None))
+        return task
+
+    async def events(self, run_id: str, last_event_id: Optional[str] = None) -> AsyncIterator[Optional[RunEvent]]:
+        """
+        Yields the run's events after last_event_id until its terminal event.
+        Yields None every RUN_STREAM_BLOCK_SECONDS without events (for keep-alives);
+        gives up after RUN_STREAM_IDLE_TIMEOUT_SECONDS of silence, e.g. when its worker died.
+        """
+        after = last_event_id
+        idle = 0.0
+        while True:
+            entries = await self.backend.read(run_id, after, settings.RUN_STREAM_BLOCK_SECONDS)
+            if not entries:
+                idle += settings.RUN_STREAM_BLOCK_SECONDS
+                if idle >= settings.RUN_STREAM_IDLE_TIMEOUT_SECONDS:
+                    raise asyncio.TimeoutError(f"Run {run_id} sent no events for {idle:g}s")
+                yield None
+                continue
+            idle = 0.0
+            for entry in entries:
+                after = entry[0]
+                yield entry
+                if entry[1] in TERMINAL_EVENTS:
+                    return
+
+    async def cancel_all(self):
+        """Cancels this process's background runs (shutdown); each publishes its error event first."""
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+run_streams = RunStreams()
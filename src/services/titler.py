@@ -1,4 +1,4 @@
-from langchain_openai import ChatOpenAI
+from src.services.llm import llm_registry
 from langchain_core.messages import HumanMessage
 from src.database.session import AsyncSessionLocal
 from src.database.models import ChatThread
@@ -23,7 +23,7 @@ async def generate_thread_title(user_msg: str, ai_msg: str) -> str:
     """
     try:
         # Using gpt-4o-mini as requested in RESEARCH.md for cost efficiency
-        llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7)
+        llm = llm_registry.get("gpt-4o-mini", 0.7)
         prompt = TITLER_PROMPT.format(user_msg=user_msg, ai_msg=ai_msg)
         response = await llm.ainvoke([HumanMessage(content=prompt)])
         title = response.content.strip().strip('"').strip("'")
@@ -0,0 +1,247 @@
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from asgi_correlation_id import correlation_id
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables.config import var_child_runnable_config
+from sqlalchemy import case, func, select
+
+from src.config import settings
+from src.database.models import LLMUsage
+from src.database.session import AsyncSessionLocal
+from src.graph.utils.agents import agent_name_ctx
+from src.graph.utils.tokens import CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+STAT_FIELDS = ("calls", "prompt_tokens", "completion_tokens", "total_tokens", "latency_ms", "cache_hits")
+
+def call_context(metadata: Optional[Dict[str, Any]] = None) -> Tuple[Optional[str], str, Optional[str]]:
+    """
+    (thread_id, node, correlation_id) for the current LLM call.
+    LangGraph puts thread_id and langgraph_node in the run metadata; calls made
+    outside a graph run fall back to the agent name set by with_logging.
+    """
+    if metadata is None:
+        config = var_child_runnable_config.get()
+        metadata = (config or {}).get("metadata") or {}
+    node = metadata.get("langgraph_node") or agent_name_ctx.get()
+    return metadata.get("thread_id"), node, correlation_id.get()
+
+def usage_from_result(response: LLMResult) -> Optional[Tuple[int, int]]:
+    """(prompt_tokens, completion_tokens) reported by the provider, if any."""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    token_usage = (response.llm_output or {}).get("token_usage")
+    if token_usage:
+        return token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0)
+    return None
+
+class UsageCallbackHandler(AsyncCallbackHandler):
+    """Times every chat model call and records its token usage in the ledger."""
+
+    def __init__(self, ledger: "UsageLedger"):
+        self.ledger = ledger
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        params = kwargs.get("invocation_params") or {}
+        self._runs[run_id] = {
+            "started": time.perf_counter(),
+            "model": metadata.get("ls_model_name") or params.get("model") or params.get("model_name") or "unknown",
+            "metadata": metadata,
+            "prompt_chars": sum(len(str(m.content)) for batch in messages for m in batch)
+        }
+
+    async def on_llm_end(self, response: LLMResult, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+
+        usage = usage_from_result(response)
+        if usage is None:
+            # Streaming without usage reporting; estimate from text length
+            output_chars = sum(len(g.text) for generations in response.generations for g in generations)
+            usage = (run["prompt_chars"] // CHARS_PER_TOKEN, output_chars // CHARS_PER_TOKEN)
+
+        thread_id, node, request_id = call_context(run["metadata"])
+        self.ledger.record(
+            model=run["model"],
+            node=node,
+            thread_id=thread_id,
+            correlation_id=request_id,
+            prompt_tokens=usage[0],
+            completion_tokens=usage[1],
+            latency_ms=(time.perf_counter() - run["started"]) * 1000
+        )
+
+    async def on_llm_error(self, error, *, run_id, **kwargs):
+        self._runs.pop(run_id, None)
+
+class UsageLedger:
+    """
+    Ring buffer of per-call LLM usage records, flushed to Postgres periodically.
+    When the buffer is full (e.g. the database is down) the oldest records are dropped.
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity or settings.LLM_USAGE_BUFFER_SIZE
+        self.callback = UsageCallbackHandler(self)
+        self.reset()
+
+    def reset(self):
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=self.capacity)
+        self._flushing: List[Dict[str, Any]] = []
+        self.dropped = 0
+
+    def record(
+        self,
+        model: str,
+        node: str,
+        thread_id: Optional[str] = None,
+        correlation_id: Optional[str] = None,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        latency_ms: float = 0.0,
+        cache_hit: bool = False
+    ):
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append({
+            "thread_id": thread_id,
+            "correlation_id": correlation_id,
+            "node": node,
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "latency_ms": round(latency_ms, 2),
+            "cache_hit": cache_hit,
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None)
+        })
+
+    def record_cache_hit(self, model: str, latency_ms: float = 0.0):
+        """Records a call served by the LLM response cache (no tokens spent)."""
+        thread_id, node, request_id = call_context()
+        self.record(model, node, thread_id, request_id, latency_ms=latency_ms, cache_hit=True)
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Records not yet committed to Postgres."""
+        return self._flushing + list(self._buffer)
+
+    async def flush(self) -> int:
+        """Writes buffered records to Postgres; returns how many were written."""
+        if not self._buffer or self._flushing:
+            return 0
+
+        batch = list(self._buffer)
+        self._buffer.clear()
+        self._flushing = batch
+        try:
+            async with AsyncSessionLocal() as db:
+                db.add_all([LLMUsage(**entry) for entry in batch])
+                await db.commit()
+            return len(batch)
+        except Exception as e:
+            logger.error(f"Error flushing {len(batch)} LLM usage records: {e}")
+            # Retry next time, ahead of newer records
+            for entry in reversed(batch):
+                if len(self._buffer) == self._buffer.maxlen:
+                    self.dropped += 1
+                    continue
+                self._buffer.appendleft(entry)
+            return 0
+        finally:
+            self._flushing = []
+
+usage_ledger = UsageLedger()
+
+def empty_stats() -> Dict[str, float]:
+    return {name: 0 for name in STAT_FIELDS}
+
+def add_stats(total: Dict[str, float], other: Dict[str, float]):
+    for name in STAT_FIELDS:
+        total[name] += other[name]
+
+async def aggregate_usage(
+    db,
+    group_by: Sequence[str],
+    thread_id: Optional[str] = None,
+    since: Optional[datetime] = None
+) -> Dict[Tuple, Dict[str, float]]:
+    """
+    Sums usage per group (any of thread_id, node, model) across flushed rows
+    and records still in the ledger buffer.
+    """
+    columns = [getattr(LLMUsage, name) for name in group_by]
+    stmt = select(
+        *columns,
+        func.count(LLMUsage.id),
+        func.coalesce(func.sum(LLMUsage.prompt_tokens), 0),
+        func.coalesce(func.sum(LLMUsage.completion_tokens), 0),
+        func.coalesce(func.sum(LLMUsage.total_tokens), 0),
+        func.coalesce(func.sum(LLMUsage.latency_ms), 0),
+        func.coalesce(func.sum(case((LLMUsage.cache_hit, 1), else_=0)), 0)
+    ).group_by(*columns)
+    if thread_id is not None:
+        stmt = stmt.where(LLMUsage.thread_id == thread_id)
+    if since is not None:
+        stmt = stmt.where(LLMUsage.created_at >= since)
+
+    groups: Dict[Tuple, Dict[str, float]] = {}
+    result = await db.execute(stmt)
+    for row in result.all():
+        key = tuple(row[:len(columns)])
+        groups[key] = dict(zip(STAT_FIELDS, row[len(columns):]))
+
+    for entry in usage_ledger.pending():
+        if thread_id is not None and entry["thread_id"] != thread_id:
+            continue
+        if since is not None and entry["created_at"] < since:
+            continue
+        key = tuple(entry[name] for name in group_by)
+        stats = groups.setdefault(key, empty_stats())
+        add_stats(stats, {
+            "calls": 1,
+            "prompt_tokens": entry["prompt_tokens"],
+            "completion_tokens": entry["completion_tokens"],
+            "total_tokens": entry["total_tokens"],
+            "latency_ms": entry["latency_ms"],
+            "cache_hits": 1 if entry["cache_hit"] else 0
+        })
+    return groups
+
+def rollup(groups: Dict[Tuple, Dict[str, float]], index: Optional[int] = None) -> Dict[Any, Dict[str, float]]:
+    """Re-sums groups by one position of their key, or into a single total when index is None."""
+    merged: Dict[Any, Dict[str, float]] = {}
+    for key, stats in groups.items():
+        add_stats(merged.setdefault(key[index] if index is not None else None, empty_stats()), stats)
+    return merged
+
+def usage_view(stats: Dict[str, float], key: Any = None) -> Dict[str, Any]:
+    """API shape of one group: integer counters plus total and average latency."""
+    calls = int(stats["calls"])
+    return {
+        "key": key,
+        "calls": calls,
+        "prompt_tokens": int(stats["prompt_tokens"]),
+        "completion_tokens": int(stats["completion_tokens"]),
+        "total_tokens": int(stats["total_tokens"]),
+        "cache_hits": int(stats["cache_hits"]),
+        "total_latency_ms": round(float(stats["latency_ms"]), 2),
+        "avg_latency_ms": round(float(stats["latency_ms"]) / calls, 2) if calls else 0.0
+    }
+
+def usage_views(groups: Dict[Any, Dict[str, float]]) -> List[Dict[str, Any]]:
+    """Groups as API rows, most tokens first."""
+    rows = [usage_view(stats, key) for key, stats in groups.items()]
+    return sorted(rows, key=lambda row: row["total_tokens"], reverse=True)
@@ -28,13 +28,9 @@ async def test_chat_manual_is_disconnected_mock(client, mocker, test_user, auth_
     mocker.patch("src.controllers.threads.sync_conversation_background")
     mocker.patch("src.controllers.threads.update_thread_title_background")
     
-    mock_checkpointer = AsyncMock()
-    mock_checkpointer.__aenter__.return_value = mock_checkpointer
-    mocker.patch("src.controllers.threads.get_checkpointer", return_value=mock_checkpointer)
-    
     mock_graph = MagicMock()
     mock_graph.aget_state = AsyncMock(return_value=MagicMock(values={}))
-    mocker.patch("src.controllers.threads.create_graph", return_value=mock_graph)
+    mocker.patch("src.controllers.threads.get_persistent_graph", new_callable=AsyncMock, return_value=mock_graph)
 
     state = {"events_yielded": 0}
 
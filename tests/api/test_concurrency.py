@@ -5,7 +5,7 @@ from src.database.session import get_db
 from unittest.mock import patch, AsyncMock, MagicMock
 
 @pytest.mark.asyncio
-async def test_thread_concurrency_409(client, mock_session, test_user, auth_headers):
+async def test_thread_concurrency_409(client, mock_session, test_user, auth_headers, run_lock_memory):
     """
     Verify that concurrent requests for the same thread_id return 409 Conflict.
     """
@@ -19,37 +19,164 @@ async def test_thread_concurrency_409(client, mock_session, test_user, auth_head
     mock_thread_result = MagicMock()
     mock_thread_result.scalar_one_or_none.return_value = MagicMock(id=thread_id, user_id=test_user.id)
     
+    # Both requests pass auth and the ownership check; the run lock rejects the second
     mock_session.execute.side_effect = [mock_user_result, mock_thread_result, mock_user_result, mock_thread_result]
 
     # Mock the underlying event generator's graph call to add delay
-    with patch("src.controllers.threads.get_checkpointer") as mock_cp_ctx:
-        # get_checkpointer is an async context manager
-        mock_cp = AsyncMock()
-        mock_cp_ctx.return_value.__aenter__.return_value = mock_cp
+    with patch("src.controllers.threads.get_persistent_graph", new_callable=AsyncMock) as mock_create, \
+         patch("src.controllers.threads.get_user_context_data", new_callable=AsyncMock, return_value={}):
+        mock_graph = MagicMock()
         
-        with patch("src.controllers.threads.create_graph") as mock_create:
-            mock_graph = MagicMock()
+        async def slow_stream(*args, **kwargs):
+            await asyncio.sleep(0.5)
+            yield ("metadata", {"langgraph_node": "end"})
             
-            async def slow_stream(*args, **kwargs):
-                await asyncio.sleep(0.5)
-                yield ("metadata", {"langgraph_node": "end"})
-                
-            mock_graph.astream.side_effect = slow_stream
-            mock_create.return_value = mock_graph
-            
-            app.dependency_overrides[get_db] = lambda: mock_session
+        mock_graph.astream.side_effect = slow_stream
+        mock_create.return_value = mock_graph
+        
+        app.dependency_overrides[get_db] = lambda: mock_session
 
-            # Send two requests concurrently
-            tasks = [
-                client.post(f"/threads/{thread_id}/runs/stream", json={"input": {"message": "hello"}}, headers={**auth_headers, "X-Thread-ID": thread_id}),
-                client.post(f"/threads/{thread_id}/runs/stream", json={"input": {"message": "hello"}}, headers={**auth_headers, "X-Thread-ID": thread_id})
-            ]
-            
-            responses = await asyncio.gather(*tasks)
+        # Send two requests concurrently
+        tasks = [
+            client.post(f"/threads/{thread_id}/runs/stream", json={"input": {"message": "hello"}}, headers={**auth_headers, "X-Thread-ID": thread_id}),
+            client.post(f"/threads/{thread_id}/runs/stream", json={"input": {"message": "hello"}}, headers={**auth_headers, "X-Thread-ID": thread_id})
+        ]
+        
+        responses = await asyncio.gather(*tasks)
+        
+        status_codes = [r.status_code for r in responses]
+        assert 409 in status_codes
+        # One should be 200 (StreamingResponse)
+        assert 200 in status_codes
+        # The winner's lease is released once its stream ends
+        assert run_lock_memory.stats["conflicts"] == 1
+        assert not run_lock_memory.held
             
-            status_codes = [r.status_code for r in responses]
-            assert 409 in status_codes
-            # One should be 200 (StreamingResponse)
-            assert 200 in status_codes
-                
-            app.dependency_overrides.clear()
+        app.dependency_overrides.clear()
+
+@pytest.mark.asyncio
+async def test_run_lease_released_on_disconnect(test_user, run_lock_memory):
+    """
+    A client that goes away mid-stream closes the generator, which must give the thread back.
+    """
+    from src.controllers.threads import langgraph_event_generator
+    from src.schemas.threads import ThreadRunStreamRequest
+
+    async def endless_stream(*args, **kwargs):
+        while True:
+            yield ("messages", [{"content": "token", "type": "ai"}, {}])
+            await asyncio.sleep(0.01)
+
+    mock_graph = MagicMock()
+    mock_graph.astream.side_effect = endless_stream
+    lease = await run_lock_memory.acquire("disconnect-thread")
+
+    with patch("src.controllers.threads.get_persistent_graph", new_callable=AsyncMock, return_value=mock_graph):
+        events = langgraph_event_generator(
+            "disconnect-thread", {}, ThreadRunStreamRequest(budget_seconds=60), test_user,
+            MagicMock(), "New Conversation", None, lease=lease
+        )
+        assert (await events.__anext__()).startswith("event: messages")
+        await events.aclose()
+
+    assert lease.released
+    assert await run_lock_memory.acquire("disconnect-thread") is not None
+
+@pytest.mark.asyncio
+async def test_full_run_queue_returns_429(client, mock_session, test_user, auth_headers, run_lock_memory, run_admission_memory, monkeypatch):
+    """
+    With every run slot taken and no queue room, a new run is turned away with Retry-After.
+    """
+    monkeypatch.setattr("src.config.settings.RUN_MAX_CONCURRENT", 1)
+    monkeypatch.setattr("src.config.settings.RUN_QUEUE_MAX_SIZE", 0)
+    busy = await run_admission_memory.admit("someone-else")
+
+    mock_user_result = MagicMock()
+    mock_user_result.scalar_one_or_none.return_value = test_user
+    mock_thread_result = MagicMock()
+    mock_thread_result.scalar_one_or_none.return_value = MagicMock(id="busy-thread", user_id=test_user.id)
+    mock_session.execute.side_effect = [mock_user_result, mock_thread_result]
+    app.dependency_overrides[get_db] = lambda: mock_session
+
+    response = await client.post("/threads/busy-thread/runs/stream", json={"input": {"message": "hello"}}, headers=auth_headers)
+    app.dependency_overrides.clear()
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert run_admission_memory.stats["rejected"] == 1
+    # The thread lock taken before admission is given back
+    assert not run_lock_memory.held
+    await run_admission_memory.release(busy)
+
+@pytest.mark.asyncio
+async def test_queued_run_streams_position_then_runs(test_user, run_admission_memory, monkeypatch):
+    """
+    A queued run reports its queue position as SSE, then streams the graph once admitted.
+    """
+    from src.controllers.threads import langgraph_event_generator
+    from src.schemas.threads import ThreadRunStreamRequest
+
+    monkeypatch.setattr("src.config.settings.RUN_MAX_CONCURRENT", 1)
+    busy = await run_admission_memory.admit("someone-else")
+    ticket = await run_admission_memory.admit(test_user.id)
+
+    async def short_stream(*args, **kwargs):
+        yield ("messages", [{"content": "token", "type": "ai"}, {}])
+
+    mock_graph = MagicMock()
+    mock_graph.astream.side_effect = short_stream
+
+    with patch("src.controllers.threads.get_persistent_graph", new_callable=AsyncMock, return_value=mock_graph):
+        events = langgraph_event_generator(
+            "queued-thread", {}, ThreadRunStreamRequest(budget_seconds=60), test_user,
+            MagicMock(), "New Conversation", None, ticket=ticket
+        )
+        first = await events.__anext__()
+        assert first.startswith("event: queue")
+        assert '"position": 1' in first
+
+        await run_admission_memory.release(busy)
+        rest = [event async for event in events]
+
+    assert rest[0].startswith("event: messages")
+    assert ticket.released and not run_admission_memory.running
+
+@pytest.mark.asyncio
+async def test_run_released_when_body_never_starts(test_user, run_lock_memory, run_admission_memory):
+    """
+    If sending fails before the first chunk, the generator never runs; the response
+    itself must still give back the run slot and the thread's lease.
+    """
+    from src.controllers.threads import RunStreamingResponse, langgraph_event_generator
+    from src.schemas.threads import ThreadRunStreamRequest
+
+    lease = await run_lock_memory.acquire("unsent-thread")
+    ticket = await run_admission_memory.admit(test_user.id)
+    events = langgraph_event_generator(
+        "unsent-thread", {}, ThreadRunStreamRequest(), test_user,
+        MagicMock(), "New Conversation", None, lease=lease, ticket=ticket
+    )
+    response = RunStreamingResponse(events, lease=lease, ticket=ticket, media_type="text/event-stream")
+
+    async def broken_send(message):
+        raise OSError("connection reset")
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    with pytest.raises(Exception):
+        await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, broken_send)
+
+    assert lease.released and ticket.released
+    assert not run_admission_memory.running
+    assert await run_lock_memory.acquire("unsent-thread") is not None
+
+def test_lock_hold_follows_run_budget(monkeypatch):
+    from src.controllers.threads import lock_hold_seconds
+    monkeypatch.setattr("src.config.settings.RUN_QUEUE_TIMEOUT_SECONDS", 120.0)
+    monkeypatch.setattr("src.config.settings.RUN_LOCK_TTL_SECONDS", 30.0)
+    monkeypatch.setattr("src.config.settings.RUN_LOCK_MAX_HOLD_SECONDS", 900.0)
+
+    assert lock_hold_seconds(90) == 240.0
+    assert lock_hold_seconds(3600) == 900.0
+    monkeypatch.setattr("src.config.settings.RUN_BUDGET_SECONDS", 0)
+    assert lock_hold_seconds(None) == 900.0
@@ -36,3 +36,26 @@ async def test_failure_hook_behavior(client: AsyncClient):
     response = await client.get("/health")
     assert response.status_code == 200
     # assert response.status_code == 404, "Forcing failure to check Request ID hook"
+
+async def test_crawl_metrics(client: AsyncClient):
+    """
+    Verifies that crawl scheduler metrics are exposed.
+    """
+    response = await client.get("/health/crawl")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["in_flight"] == 0
+    assert data["queued"] == 0
+    assert isinstance(data["wait_times"], dict)
+
+@pytest.mark.asyncio
+async def test_llm_cache_metrics(client: AsyncClient):
+    """
+    Verifies that LLM cache hit rates and saved tokens are exposed.
+    """
+    response = await client.get("/health/llm-cache")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["hits"] == 0
+    assert data["hit_rate"] == 0.0
+    assert data["sites"] == {}
@@ -30,24 +30,22 @@ async def test_input_stress_long_message(client, mock_session, test_user, auth_h
         mock_user_result,     # get_current_user
     ]
 
-    with patch("src.controllers.threads.get_checkpointer") as mock_cp_ctx:
-        mock_cp_ctx.return_value.__aenter__.return_value = AsyncMock()
-        with patch("src.controllers.threads.create_graph") as mock_create:
-            mock_graph = MagicMock()
-            mock_graph.aget_state = AsyncMock(return_value=MagicMock(values={}))
+    with patch("src.controllers.threads.get_persistent_graph", new_callable=AsyncMock) as mock_create:
+        mock_graph = MagicMock()
+        mock_graph.aget_state = AsyncMock(return_value=MagicMock(values={}))
             
-            async def fast_stream(*args, **kwargs):
-                yield ("metadata", {"langgraph_node": "end"})
+        async def fast_stream(*args, **kwargs):
+            yield ("metadata", {"langgraph_node": "end"})
                 
-            mock_graph.astream.side_effect = fast_stream
-            mock_create.return_value = mock_graph
+        mock_graph.astream.side_effect = fast_stream
+        mock_create.return_value = mock_graph
             
-            app.dependency_overrides[get_db] = lambda: mock_session
+        app.dependency_overrides[get_db] = lambda: mock_session
 
-            response = await client.post("/threads/long-msg/runs/stream", json={"input": {"message": long_msg}}, headers=auth_headers)
-            assert response.status_code == 200
+        response = await client.post("/threads/long-msg/runs/stream", json={"input": {"message": long_msg}}, headers=auth_headers)
+        assert response.status_code == 200
                 
-            app.dependency_overrides.clear()
+        app.dependency_overrides.clear()
 
 @pytest.mark.asyncio
 async def test_llm_timeout_resilience(client, mock_session, test_user, auth_headers):
@@ -73,33 +71,31 @@ async def test_llm_timeout_resilience(client, mock_session, test_user, auth_head
         mock_user_result
     ]
 
-    with patch("src.controllers.threads.get_checkpointer") as mock_cp_ctx:
-        mock_cp_ctx.return_value.__aenter__.return_value = AsyncMock()
-        with patch("src.controllers.threads.create_graph") as mock_create:
-            mock_graph = MagicMock()
-            mock_graph.aget_state = AsyncMock(return_value=MagicMock(values={}))
+    with patch("src.controllers.threads.get_persistent_graph", new_callable=AsyncMock) as mock_create:
+        mock_graph = MagicMock()
+        mock_graph.aget_state = AsyncMock(return_value=MagicMock(values={}))
             
-            async def timeout_stream(*args, **kwargs):
-                # Simulate timeout during streaming
-                raise asyncio.TimeoutError("LLM Timeout")
-                yield # Never reached
+        async def timeout_stream(*args, **kwargs):
+            # Simulate timeout during streaming
+            raise asyncio.TimeoutError("LLM Timeout")
+            yield # Never reached
                 
-            mock_graph.astream.side_effect = timeout_stream
-            mock_create.return_value = mock_graph
+        mock_graph.astream.side_effect = timeout_stream
+        mock_create.return_value = mock_graph
             
-            app.dependency_overrides[get_db] = lambda: mock_session
+        app.dependency_overrides[get_db] = lambda: mock_session
 
-            response = await client.post("/threads/timeout/runs/stream", json={"input": {"message": "fail"}}, headers=auth_headers)
+        response = await client.post("/threads/timeout/runs/stream", json={"input": {"message": "fail"}}, headers=auth_headers)
             
-            # It's a StreamingResponse, so status code 200 is sent immediately.
-            # The error is yielded as an SSE event.
-            assert response.status_code == 200
+        # It's a StreamingResponse, so status code 200 is sent immediately.
+        # The error is yielded as an SSE event.
+        assert response.status_code == 200
             
-            # Check for error event in stream
-            content = ""
-            async for line in response.aiter_lines():
-                content += line
+        # Check for error event in stream
+        content = ""
+        async for line in response.aiter_lines():
+            content += line
             
-            assert "error" in content.lower()
+        assert "error" in content.lower()
                 
-            app.dependency_overrides.clear()
+        app.dependency_overrides.clear()
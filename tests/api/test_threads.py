@@ -1,5 +1,6 @@
+import time
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 from datetime import datetime
 from src.database.models import ChatThread, RecordStatus
 from main import app
@@ -142,3 +143,99 @@ async def test_response_headers(client, mock_session, auth_headers, test_user):
     assert "X-Request-ID" in response.headers
     
     del app.dependency_overrides[get_db]
+
+@pytest.mark.asyncio
+async def test_stream_run_propagates_budget(client, mock_session, mock_thread, auth_headers, test_user, mocker):
+    """
+    POST /threads/{id}/runs/stream puts the run deadline in config and streams budget events
+    as `event: budget`, while other custom events stay hidden unless requested.
+    """
+    mock_user_result = MagicMock()
+    mock_user_result.scalar_one_or_none.return_value = test_user
+    mock_thread_result = MagicMock()
+    mock_thread_result.scalar_one_or_none.return_value = mock_thread
+    mock_session.execute.side_effect = [mock_user_result, mock_thread_result]
+    app.dependency_overrides[get_db] = lambda: mock_session
+
+    calls = {}
+    async def mock_astream(graph_input, config, stream_mode):
+        calls.update(config=config, stream_mode=stream_mode)
+        yield ("custom", {"type": "debate_token", "agent": "bull", "content": "Up"})
+        yield ("custom", {"type": "budget", "stage": "supervisor", "remaining_seconds": 89.5, "skipped": []})
+        yield ("messages", [{"content": "Hold.", "type": "ai"}, {"langgraph_node": "summarizer"}])
+
+    mock_graph = MagicMock()
+    mock_graph.astream = mock_astream
+    mock_graph.aget_state = AsyncMock(return_value=MagicMock(values={}))
+    mocker.patch("src.controllers.threads.get_persistent_graph", new_callable=AsyncMock, return_value=mock_graph)
+
+    response = await client.post("/threads/thread_123/runs/stream", json={"input": {}, "budget_seconds": 90}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert calls["stream_mode"] == ["messages", "custom"]
+    assert 0 < calls["config"]["configurable"]["deadline"] - time.time() <= 90
+    events = [line.split(": ", 1)[1] for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events == ["budget", "messages", "budget", "end"]
+    assert "debate_token" not in response.text
+
+    app.dependency_overrides.clear()
+
+@pytest.mark.asyncio
+async def test_background_run_replays_from_last_event_id(client, mock_session, mock_thread, auth_headers, test_user, mocker, run_streams_memory, run_lock_memory):
+    """
+    POST /threads/{id}/runs runs the graph without a connection; the run's stream replays
+    every event with an id, and a reconnect with Last-Event-ID gets only what came after.
+    """
+    mock_user_result = MagicMock()
+    mock_user_result.scalar_one_or_none.return_value = test_user
+    mock_thread_result = MagicMock()
+    mock_thread_result.scalar_one_or_none.return_value = mock_thread
+    # POST: auth + ownership; each GET: auth only
+    mock_session.execute.side_effect = [mock_user_result, mock_thread_result, mock_user_result, mock_user_result]
+    app.dependency_overrides[get_db] = lambda: mock_session
+
+    calls = []
+    async def mock_astream(graph_input, config, stream_mode):
+        calls.append(config)
+        yield ("messages", [{"content": "Buy", "type": "ai"}, {"langgraph_node": "summarizer"}])
+        yield ("messages", [{"content": " AAPL.", "type": "ai"}, {"langgraph_node": "summarizer"}])
+
+    mock_graph = MagicMock()
+    mock_graph.astream = mock_astream
+    mock_graph.aget_state = AsyncMock(return_value=MagicMock(values={}))
+    mocker.patch("src.controllers.threads.get_persistent_graph", new_callable=AsyncMock, return_value=mock_graph)
+
+    response = await client.post("/threads/thread_123/runs", json={"input": {}, "stream_mode": ["messages"]}, headers=auth_headers)
+    assert response.status_code == 202
+    run = response.json()
+    assert run["stream_url"] == f"/threads/thread_123/runs/{run['run_id']}/stream"
+    await run_streams_memory.tasks[run["run_id"]]
+    # The run finished on its own and gave the thread back
+    assert not run_lock_memory.held
+
+    full = await client.get(run["stream_url"], headers=auth_headers)
+    ids = [line[4:] for line in full.text.splitlines() if line.startswith("id: ")]
+    events = [line[7:] for line in full.text.splitlines() if line.startswith("event: ")]
+    assert events == ["messages", "messages", "budget", "end"]
+
+    resumed = await client.get(run["stream_url"], headers={**auth_headers, "Last-Event-ID": ids[1]})
+    assert [line[7:] for line in resumed.text.splitlines() if line.startswith("event: ")] == ["budget", "end"]
+    assert "AAPL" not in resumed.text
+    assert len(calls) == 1
+
+    app.dependency_overrides.clear()
+
+@pytest.mark.asyncio
+async def test_background_run_stream_is_private(client, mock_session, auth_headers, test_user, run_streams_memory):
+    """A run id from another user, or under another thread, is a 404."""
+    await run_streams_memory.create("foreign-run", "thread_123", "someone-else")
+    await run_streams_memory.create("own-run", "thread_123", str(test_user.id))
+    mock_user_result = MagicMock()
+    mock_user_result.scalar_one_or_none.return_value = test_user
+    mock_session.execute.side_effect = [mock_user_result, mock_user_result]
+    app.dependency_overrides[get_db] = lambda: mock_session
+
+    assert (await client.get("/threads/thread_123/runs/foreign-run/stream", headers=auth_headers)).status_code == 404
+    assert (await client.get("/threads/other_thread/runs/own-run/stream", headers=auth_headers)).status_code == 404
+
+    app.dependency_overrides.clear()
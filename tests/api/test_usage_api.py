@@ -0,0 +1,95 @@
+import pytest
+from unittest.mock import MagicMock
+from main import app
+from src.database.session import get_db
+
+@pytest.fixture(autouse=True)
+def override_db(mock_session):
+    app.dependency_overrides[get_db] = lambda: mock_session
+    yield
+    app.dependency_overrides.clear()
+
+def _result(scalar=None, rows=None):
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = scalar
+    result.all.return_value = rows or []
+    return result
+
+@pytest.mark.asyncio
+async def test_thread_usage_per_node_and_model(client, mock_session, auth_headers, test_user, reset_usage_ledger):
+    """
+    GET /threads/{id}/usage combines flushed rows with buffered records.
+    """
+    reset_usage_ledger.record("gpt-4o-mini", "supervisor", thread_id="thread_123", prompt_tokens=40, completion_tokens=10, latency_ms=200)
+    rows = [("analyst", "gpt-4o", 3, 3000, 600, 3600, 4500.0, 1)]
+    mock_session.execute.side_effect = [_result(test_user), _result(MagicMock()), _result(rows=rows)]
+
+    response = await client.get("/threads/thread_123/usage", headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["totals"]["calls"] == 4
+    assert data["totals"]["total_tokens"] == 3650
+    assert data["totals"]["cache_hits"] == 1
+    assert [group["key"] for group in data["by_node"]] == ["analyst", "supervisor"]
+    assert data["by_node"][0]["avg_latency_ms"] == 1500.0
+    assert {group["key"] for group in data["by_model"]} == {"gpt-4o", "gpt-4o-mini"}
+
+@pytest.mark.asyncio
+async def test_thread_usage_of_foreign_thread_is_hidden(client, mock_session, auth_headers, test_user):
+    mock_session.execute.side_effect = [_result(test_user), _result(None)]
+
+    response = await client.get("/threads/someone_elses/usage", headers=auth_headers)
+
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_admin_usage_requires_admin(client, mock_session, auth_headers, test_user, monkeypatch):
+    monkeypatch.setattr("src.config.settings.ADMIN_EMAILS", [])
+    mock_session.execute.side_effect = [_result(test_user)]
+
+    response = await client.get("/admin/usage", headers=auth_headers)
+
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_admin_usage_grouped_by_model(client, mock_session, auth_headers, test_user, monkeypatch):
+    monkeypatch.setattr("src.config.settings.ADMIN_EMAILS", [test_user.email])
+    rows = [("gpt-4o-mini", 10, 1000, 200, 1200, 3000.0, 4), ("gpt-4o", 5, 9000, 1000, 10000, 8000.0, 0)]
+    mock_session.execute.side_effect = [_result(test_user), _result(rows=rows)]
+
+    response = await client.get("/admin/usage?group_by=model&limit=1", headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["group_by"] == "model"
+    assert [group["key"] for group in data["groups"]] == ["gpt-4o"]
+    assert data["groups"][0]["total_tokens"] == 10000
+
+@pytest.mark.asyncio
+async def test_admin_tool_latency(client, mock_session, auth_headers, test_user, monkeypatch, reset_tool_limits):
+    monkeypatch.setattr("src.config.settings.ADMIN_EMAILS", [test_user.email])
+    reset_tool_limits.record("get_sec_filing_section", 1.8)
+    reset_tool_limits.record("get_sec_filing_section", 60.0, "timeout")
+    mock_session.execute.side_effect = [_result(test_user)]
+
+    response = await client.get("/admin/tools", headers=auth_headers)
+
+    assert response.status_code == 200
+    tool = response.json()["tools"][0]
+    assert (tool["tool"], tool["calls"], tool["timeout"]) == ("get_sec_filing_section", 2, 1)
+    assert tool["buckets"]["le_2500"] == 1
+
+@pytest.mark.asyncio
+async def test_admin_run_lock_stats(client, mock_session, auth_headers, test_user, monkeypatch, run_lock_memory):
+    monkeypatch.setattr("src.config.settings.ADMIN_EMAILS", [test_user.email])
+    lease = await run_lock_memory.acquire("thread_123")
+    assert await run_lock_memory.acquire("thread_123") is None
+    mock_session.execute.side_effect = [_result(test_user)]
+
+    response = await client.get("/admin/locks", headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["held"], data["acquired"], data["conflicts"]) == (1, 1, 1)
+    await lease.release()
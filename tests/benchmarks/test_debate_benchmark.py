@@ -0,0 +1,129 @@
+import asyncio
+import time
+from typing import TypedDict
+import pytest
+from langchain_core.messages import AIMessageChunk
+from langgraph.graph import StateGraph, START, END
+from src.graph.agents.analyst.agent import analyst_agent
+from src.graph.agents.analyst.subgraph import (
+    create_debate_graph,
+    Instructions,
+    FinalSynthesis,
+    DEBATE_TOKEN_EVENT
+)
+from src.graph.state import AgentState
+
+# Simulated latency of one LLM call
+LATENCY = 0.1
+TOKENS = ["Strong ", "case ", "here."]
+CONCURRENT_RUNS = 8
+
+class FakeStructuredModel:
+    def __init__(self, schema):
+        self.schema = schema
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(LATENCY)
+        if self.schema is Instructions:
+            return Instructions(bull_instruction="Argue growth", bear_instruction="Argue risk")
+        return FinalSynthesis(report="Balanced view.\nFOLLOW_UP: None", confidence_score=70)
+
+class FakeChatModel:
+    """Async chat model with fixed latency; records when each stream ran."""
+
+    windows = []
+
+    def __init__(self, model, temperature):
+        self.model = model
+
+    def with_structured_output(self, schema, method=None):
+        return FakeStructuredModel(schema)
+
+    async def astream(self, messages):
+        start = time.perf_counter()
+        for token in TOKENS:
+            await asyncio.sleep(LATENCY / len(TOKENS))
+            yield AIMessageChunk(content=token)
+        FakeChatModel.windows.append((start, time.perf_counter()))
+
+class LegacyDebateState(TypedDict):
+    bull_argument: str
+    bear_argument: str
+
+def _blocking_call(state):
+    """The previous nodes: one blocking llm.invoke each, run on LangGraph's thread pool."""
+    time.sleep(LATENCY)
+    return {}
+
+def _legacy_debate_graph():
+    builder = StateGraph(LegacyDebateState)
+    for name in ("generator", "bull", "bear", "synthesizer"):
+        builder.add_node(name, _blocking_call)
+    builder.add_edge(START, "generator")
+    builder.add_edge("generator", "bull")
+    builder.add_edge("generator", "bear")
+    builder.add_edge(["bull", "bear"], "synthesizer")
+    builder.add_edge("synthesizer", END)
+    return builder.compile()
+
+def _debate_input():
+    return {
+        "research_data": "AAPL revenue grew 8%.",
+        "user_input": "Analyze AAPL",
+        "session_context": {"messages": []},
+        "agent_interactions": [{"id": 1, "agent": "fundamental_researcher", "answer": "Revenue +8%", "next_agent": "analyst"}]
+    }
+
+async def _wall_time(graph, payload, runs: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*[graph.ainvoke(payload) for _ in range(runs)])
+    return time.perf_counter() - start
+
+@pytest.fixture
+def fake_llm(reset_llm_registry):
+    FakeChatModel.windows = []
+    reset_llm_registry.set_factory(FakeChatModel)
+    yield FakeChatModel
+
+@pytest.mark.asyncio
+async def test_bull_and_bear_run_concurrently(fake_llm):
+    result = await create_debate_graph().ainvoke(_debate_input())
+
+    assert result["bull_argument"] == result["bear_argument"] == "".join(TOKENS)
+    assert result["confidence_score"] == 70
+    (bull_start, bull_end), (bear_start, bear_end) = fake_llm.windows
+    assert bull_start < bear_end and bear_start < bull_end
+
+@pytest.mark.asyncio
+async def test_debate_tokens_reach_parent_custom_stream(fake_llm):
+    builder = StateGraph(AgentState)
+    builder.add_node("analyst", analyst_agent)
+    builder.add_edge(START, "analyst")
+    builder.add_edge("analyst", END)
+    graph = builder.compile()
+
+    state = {"user_input": "Analyze AAPL", **{k: v for k, v in _debate_input().items() if k != "research_data"}}
+    events = [data async for data in graph.astream(state, stream_mode="custom")]
+
+    tokens = [e for e in events if e["type"] == DEBATE_TOKEN_EVENT]
+    assert {e["agent"] for e in tokens} == {"bull", "bear"}
+    assert "".join(e["content"] for e in tokens if e["agent"] == "bull") == "".join(TOKENS)
+
+@pytest.mark.asyncio
+async def test_analyst_phase_wall_time(fake_llm):
+    legacy = _legacy_debate_graph()
+    debate = create_debate_graph()
+
+    legacy_single = await _wall_time(legacy, {}, 1)
+    async_single = await _wall_time(debate, _debate_input(), 1)
+    legacy_many = await _wall_time(legacy, {}, CONCURRENT_RUNS)
+    async_many = await _wall_time(debate, _debate_input(), CONCURRENT_RUNS)
+
+    print(
+        f"\n[debate] 1 run: blocking nodes {legacy_single * 1000:.0f} ms, async nodes {async_single * 1000:.0f} ms"
+        f"\n[debate] {CONCURRENT_RUNS} concurrent runs: blocking nodes {legacy_many * 1000:.0f} ms, "
+        f"async nodes {async_many * 1000:.0f} ms"
+    )
+    # Three sequential LLM phases, whether one debate runs or many
+    assert async_single < 4 * LATENCY
+    assert async_many < 4 * LATENCY
@@ -0,0 +1,78 @@
+import glob
+import os
+import re
+import time
+import pytest
+from src.graph.utils.scraping import (
+    clean_html,
+    clean_html_readability,
+    extract_article_text,
+    FAST_PATH_MIN_CONFIDENCE
+)
+
+NEWS_CORPUS = sorted(glob.glob("tests/fixtures/news/*.html"))
+SEC_CORPUS = sorted(glob.glob("tests/fixtures/sec/*.html"))
+ROUNDS = 10
+
+def _load(paths):
+    docs = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            docs[os.path.basename(path)] = f.read()
+    return docs
+
+def _tokens(text: str) -> set:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+def _recall(candidate: str, reference: str) -> float:
+    """Share of the readability tokens that the candidate extraction also produced."""
+    ref = _tokens(reference)
+    if not ref:
+        return 1.0
+    return len(_tokens(candidate) & ref) / len(ref)
+
+def _docs_per_second(func, docs) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for html in docs:
+            func(html)
+    elapsed = time.perf_counter() - start
+    return (ROUNDS * len(docs)) / elapsed if elapsed > 0 else float("inf")
+
+def test_corpus_present():
+    assert len(NEWS_CORPUS) >= 5
+    assert len(SEC_CORPUS) >= 3
+
+@pytest.mark.parametrize("name,html", list(_load(NEWS_CORPUS).items()))
+def test_news_fast_path_parity(name, html):
+    text, confidence = extract_article_text(html)
+    reference = clean_html_readability(html)
+
+    # News pages should be handled by the fast path without falling back
+    assert confidence >= FAST_PATH_MIN_CONFIDENCE, name
+    assert _recall(text, reference) >= 0.9, name
+    # Comment threads, share bars and sidebars must not leak into the body
+    for junk in ("Share on", "Sponsored", "Trending tickers", "Most Popular", "thoughts on"):
+        assert junk not in text, f"{junk!r} leaked into {name}"
+
+@pytest.mark.parametrize("name,html", list(_load(SEC_CORPUS).items()))
+def test_sec_clean_html_parity(name, html):
+    # Filings are low-confidence for the article heuristics and fall back to readability
+    assert _recall(clean_html(html), clean_html_readability(html)) >= 0.95, name
+
+def test_extraction_throughput():
+    news = list(_load(NEWS_CORPUS).values())
+    corpus = news + list(_load(SEC_CORPUS).values())
+
+    legacy_news = _docs_per_second(clean_html_readability, news)
+    fast_news = _docs_per_second(clean_html, news)
+    legacy_all = _docs_per_second(clean_html_readability, corpus)
+    fast_all = _docs_per_second(clean_html, corpus)
+
+    print(
+        f"\n[extraction] news: readability {legacy_news:.0f} docs/s, fast path {fast_news:.0f} docs/s "
+        f"({fast_news / legacy_news:.1f}x)"
+        f"\n[extraction] news+sec: readability {legacy_all:.0f} docs/s, fast path {fast_all:.0f} docs/s "
+        f"({fast_all / legacy_all:.1f}x)"
+    )
+    assert fast_news > 0 and legacy_news > 0
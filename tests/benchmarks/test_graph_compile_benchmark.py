@@ -0,0 +1,64 @@
+import time
+import pytest
+from unittest.mock import AsyncMock, patch
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.redis.aio import AsyncRedisSaver
+from src.graph.graph import create_graph, get_graph, get_persistent_graph
+from src.graph.agents.analyst.subgraph import create_debate_graph, get_debate_graph
+from src.graph.persistence import CheckpointerPool, checkpoint_ttl
+
+REQUESTS = 20
+
+def _per_request_ms(func) -> float:
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        func()
+    return (time.perf_counter() - start) / REQUESTS * 1000
+
+def _new_saver() -> AsyncRedisSaver:
+    # Client, pool and index definitions; connecting is lazy, so no Redis server is needed
+    return AsyncRedisSaver("redis://localhost:6379", ttl=checkpoint_ttl())
+
+def test_graphs_compiled_once():
+    saver = InMemorySaver()
+    assert get_graph(saver) is get_graph(saver)
+    assert get_graph(saver).checkpointer is saver
+    assert get_graph(InMemorySaver()) is not get_graph(saver)
+    assert get_debate_graph() is get_debate_graph()
+
+@pytest.mark.asyncio
+async def test_pool_opens_once():
+    pool = CheckpointerPool()
+    with patch.object(AsyncRedisSaver, "asetup", new_callable=AsyncMock) as setup:
+        first = await pool.get()
+        assert await pool.get() is first
+        assert setup.await_count == 1
+        await pool.aclose()
+        assert pool.checkpointer is None
+
+@pytest.mark.asyncio
+async def test_persistent_graph_is_bound_to_shared_checkpointer():
+    with patch.object(AsyncRedisSaver, "asetup", new_callable=AsyncMock):
+        with patch("src.graph.graph.checkpointer_pool", CheckpointerPool()) as pool:
+            graph = await get_persistent_graph()
+            assert graph is await get_persistent_graph()
+            assert graph.checkpointer is pool.checkpointer
+            await pool.aclose()
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_per_request_setup_benchmark():
+    saver = InMemorySaver()
+    get_graph(saver)
+    get_debate_graph()
+
+    per_request = {
+        "compile main graph": _per_request_ms(lambda: create_graph(checkpointer=saver)),
+        "reuse main graph": _per_request_ms(lambda: get_graph(saver)),
+        "compile debate graph": _per_request_ms(create_debate_graph),
+        "reuse debate graph": _per_request_ms(get_debate_graph),
+        "new Redis checkpointer": _per_request_ms(_new_saver)
+    }
+    print("\n" + "\n".join(f"[graph setup] {name}: {ms:.3f} ms/request" for name, ms in per_request.items()))
+
+    assert per_request["reuse main graph"] < per_request["compile main graph"]
+    assert per_request["reuse debate graph"] < per_request["compile debate graph"]
@@ -0,0 +1,191 @@
+import asyncio
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+import pytest
+from unittest.mock import AsyncMock
+from langchain_core.callbacks import AsyncCallbackHandler
+from langgraph.checkpoint.memory import InMemorySaver
+from src.graph.graph import create_graph
+from src.graph.agents.research.utils import set_tool_overrides
+from src.services.offline import OfflineToolkit, offline_model_factory
+
+CONCURRENT_RUNS = 10
+# Simulated provider and tool latency for the prefetch comparison
+LLM_LATENCY = 0.05
+TOOL_LATENCY = 0.2
+PREFETCH_RUNS = 5
+
+# Representative question types: the supervisor route decides which nodes run
+SCENARIOS = {
+    "stock": {
+        "question": "Is AAPL a buy after earnings?",
+        "responses": {"SupervisorResponse": {"next_agents": ["fundamental_researcher", "sentiment_researcher"]}},
+        "nodes": {"supervisor", "fundamental_researcher", "sentiment_researcher", "analyst", "summarizer"}
+    },
+    "macro": {
+        "question": "How will rate cuts affect the economy?",
+        "responses": {"SupervisorResponse": {"next_agents": ["macro_researcher"]}},
+        "nodes": {"supervisor", "macro_researcher", "analyst", "summarizer"}
+    },
+    "narrative": {
+        "question": "What is the market narrative this week?",
+        "responses": {"SupervisorResponse": {"next_agents": ["narrative_researcher", "generic_researcher"]}},
+        "nodes": {"supervisor", "narrative_researcher", "generic_researcher", "analyst", "summarizer"}
+    },
+    "off_topic": {
+        "question": "Hi there!",
+        "responses": {"SupervisorResponse": {"next_agents": ["off_topic"]}},
+        "nodes": {"supervisor", "off_topic", "summarizer"}
+    }
+}
+
+class NodeTimer(AsyncCallbackHandler):
+    """Wall time of every graph node run, keyed by node name."""
+
+    def __init__(self):
+        self.started: Dict[uuid.UUID, tuple] = {}
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+
+    async def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self.started[run_id] = (node, time.perf_counter())
+
+    async def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id in self.started:
+            node, start = self.started.pop(run_id)
+            self.durations[node].append(time.perf_counter() - start)
+
+def checkpoint_bytes(saver: InMemorySaver, thread_id: str) -> int:
+    """Serialized size of every checkpoint, channel blob and pending write stored for a thread."""
+    total = 0
+    for checkpoints in saver.storage[thread_id].values():
+        for checkpoint, metadata, _ in checkpoints.values():
+            total += len(checkpoint[1]) + len(metadata[1])
+    total += sum(len(blob[1]) for key, blob in saver.blobs.items() if key[0] == thread_id)
+    for key, writes in saver.writes.items():
+        if key[0] == thread_id:
+            total += sum(len(write[2][1]) for write in writes.values())
+    return total
+
+def research_plan_with(*tool_names: str) -> dict:
+    return {"next_agent": "analyst", "subject": "AAPL", "steps": [{"tool_name": name, "tool_params": {}} for name in tool_names]}
+
+def _input(question: str) -> dict:
+    return {
+        "user_input": question,
+        "session_context": {"messages": []},
+        "user_context": {},
+        "agent_interactions": [],
+        "output": ""
+    }
+
+async def _run(graph, question: str, thread_id: str, timer: NodeTimer) -> dict:
+    config = {"configurable": {"thread_id": thread_id}, "callbacks": [timer]}
+    return await graph.ainvoke(_input(question), config=config)
+
+@pytest.fixture
+def offline(reset_llm_registry):
+    set_tool_overrides(OfflineToolkit().tools())
+    yield reset_llm_registry
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("scenario", list(SCENARIOS))
+async def test_graph_runs_end_to_end_offline(offline, scenario):
+    spec = SCENARIOS[scenario]
+    offline.set_factory(offline_model_factory(spec["responses"]))
+    timer = NodeTimer()
+
+    result = await _run(create_graph(checkpointer=InMemorySaver()), spec["question"], "offline-1", timer)
+
+    assert result["output"]
+    assert spec["nodes"] <= set(timer.durations)
+    research = [i for i in result["agent_interactions"] if i["agent"].endswith("_researcher")]
+    assert all("not found" not in i["answer"] and "Error" not in i["answer"] for i in research)
+
+@pytest.mark.asyncio
+async def test_orchestration_benchmark(offline):
+    lines = []
+    for scenario, spec in SCENARIOS.items():
+        offline.set_factory(offline_model_factory(spec["responses"]))
+        saver = InMemorySaver()
+        graph = create_graph(checkpointer=saver)
+        timer = NodeTimer()
+
+        # Warm-up run keeps one-time imports and compilation out of the numbers
+        await _run(graph, spec["question"], f"{scenario}-warmup", NodeTimer())
+
+        thread_ids = [f"{scenario}-{i}" for i in range(CONCURRENT_RUNS)]
+        start = time.perf_counter()
+        await asyncio.gather(*[_run(graph, spec["question"], t, timer) for t in thread_ids])
+        elapsed = time.perf_counter() - start
+
+        per_node = ", ".join(
+            f"{node} {sum(times) / len(times) * 1000:.1f} ms"
+            for node, times in sorted(timer.durations.items())
+        )
+        avg_bytes = sum(checkpoint_bytes(saver, t) for t in thread_ids) / len(thread_ids)
+        lines.append(
+            f"[orchestration] {scenario}: {CONCURRENT_RUNS / elapsed:.1f} runs/s, "
+            f"{avg_bytes / 1024:.1f} KiB checkpoints/run\n    {per_node}"
+        )
+        assert avg_bytes > 0
+
+    print("\n" + "\n".join(lines))
+
+@pytest.mark.asyncio
+async def test_speculative_prefetch_benchmark(reset_llm_registry, prefetch_disabled, monkeypatch):
+    spec = SCENARIOS["stock"]
+    # Plans that only need the predictable calls, so prefetching shortens the critical path
+    responses = {
+        **spec["responses"],
+        "fundamental_researcher:ResearchPlan": research_plan_with("get_stock_financials"),
+        "sentiment_researcher:ResearchPlan": research_plan_with("get_stock_news")
+    }
+    reset_llm_registry.set_factory(offline_model_factory(responses, latency=LLM_LATENCY))
+    set_tool_overrides(OfflineToolkit(latency=TOOL_LATENCY).tools())
+    graph = create_graph(checkpointer=InMemorySaver())
+
+    timings = {}
+    for enabled in (False, True):
+        monkeypatch.setattr("src.config.settings.PREFETCH_ENABLED", enabled)
+        # Sequential runs: prefetching cuts per-run latency, not throughput
+        start = time.perf_counter()
+        for i in range(PREFETCH_RUNS):
+            await _run(graph, spec["question"], f"prefetch-{enabled}-{i}", NodeTimer())
+        timings[enabled] = (time.perf_counter() - start) / PREFETCH_RUNS
+
+    stats = prefetch_disabled.stats
+    print(
+        f"\n[prefetch] stock: {timings[False] * 1000:.0f} ms/run without, {timings[True] * 1000:.0f} ms/run with "
+        f"speculative calls ({stats['started']} started, {stats['used']} used, {stats['cancelled']} cancelled)"
+    )
+    # Financials and news for AAPL are reused; indices are cancelled once the route is known
+    assert stats["used"] == 2 * PREFETCH_RUNS
+    assert stats["cancelled"] == PREFETCH_RUNS
+
+@pytest.mark.asyncio
+async def test_blob_offload_checkpoint_benchmark(offline, blob_store_memory, monkeypatch):
+    spec = SCENARIOS["stock"]
+    offline.set_factory(offline_model_factory(spec["responses"]))
+    # A realistic SEC section dominates the fundamental researcher's answer
+    toolkit = OfflineToolkit()
+    set_tool_overrides({**toolkit.tools(), "get_sec_filing_section": AsyncMock(return_value="Risk factor disclosure. " * 800)})
+
+    sizes = {}
+    for backend in ("none", "memory"):
+        monkeypatch.setattr("src.config.settings.BLOB_STORE_BACKEND", backend)
+        blob_store_memory.reset()
+        saver = InMemorySaver()
+        result = await _run(create_graph(checkpointer=saver), spec["question"], f"blobs-{backend}", NodeTimer())
+        sizes[backend] = checkpoint_bytes(saver, f"blobs-{backend}")
+        assert result["output"]
+
+    print(
+        f"\n[blobs] stock: {sizes['none'] / 1024:.1f} KiB checkpoints inline, "
+        f"{sizes['memory'] / 1024:.1f} KiB with offloaded answers "
+        f"({blob_store_memory.stats['offloaded']} answers, {blob_store_memory.stats['offloaded_chars'] / 1024:.1f} KiB stored once)"
+    )
+    assert sizes["memory"] < sizes["none"] / 2
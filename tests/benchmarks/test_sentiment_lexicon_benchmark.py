@@ -0,0 +1,55 @@
+import json
+import time
+import pytest
+from src.config import settings
+from src.database.models import ResearchSourceType
+from src.graph.tools.sentiment import SentimentRequest, lexicon_prescore
+from src.graph.utils.lexicon import lexicon_scores
+
+# Reference LLM scores (gpt-4o-mini scale, -1.0 to 1.0) for representative source texts
+REFERENCE_FILE = "tests/fixtures/sentiment/reference_scores.json"
+SOURCE_TYPES = {
+    "x": ResearchSourceType.X,
+    "reddit": ResearchSourceType.SOCIAL,
+    "news": ResearchSourceType.NEWS,
+    "sec": ResearchSourceType.SEC
+}
+# Scores within this band count as neutral when comparing directions
+NEUTRAL_BAND = 0.2
+
+def _direction(score: float) -> int:
+    if abs(score) < NEUTRAL_BAND:
+        return 0
+    return 1 if score > 0 else -1
+
+def _samples():
+    with open(REFERENCE_FILE) as f:
+        return json.load(f)
+
+def test_lexicon_agreement_with_llm_scores():
+    samples = _samples()
+    requests = [
+        SentimentRequest(key=str(i), text=s["text"], source_type=SOURCE_TYPES[s["source"]])
+        for i, s in enumerate(samples)
+    ]
+
+    start = time.perf_counter()
+    settled = lexicon_prescore(requests)
+    elapsed = time.perf_counter() - start
+
+    agree = [_direction(settled[str(i)].sentiment_score) == _direction(s["llm_score"]) for i, s in enumerate(samples) if str(i) in settled]
+    errors = [abs(settled[str(i)].sentiment_score - s["llm_score"]) for i, s in enumerate(samples) if str(i) in settled]
+    all_scores = lexicon_scores([s["text"] for s in samples])
+    overall = sum(_direction(p.score) == _direction(s["llm_score"]) for p, s in zip(all_scores, samples)) / len(samples)
+    low_weight = sum(SOURCE_TYPES[s["source"]] in (ResearchSourceType.X, ResearchSourceType.SOCIAL) for s in samples)
+
+    print(
+        f"\n[lexicon] threshold {settings.SENTIMENT_LEXICON_CONFIDENCE}: settled {len(settled)}/{low_weight} social texts "
+        f"({len(settled) / len(samples):.0%} of all LLM calls skipped) in {elapsed * 1000:.2f} ms"
+        f"\n[lexicon] direction agreement: settled {sum(agree) / len(agree):.0%}, all texts {overall:.0%}; "
+        f"settled mean abs error {sum(errors) / len(errors):.2f}"
+    )
+    # High-weight sources always go to the LLM
+    assert all(SOURCE_TYPES[samples[int(key)]["source"]] in (ResearchSourceType.X, ResearchSourceType.SOCIAL) for key in settled)
+    assert len(settled) / low_weight >= 0.5
+    assert sum(agree) / len(agree) >= 0.9
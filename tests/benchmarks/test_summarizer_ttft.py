@@ -0,0 +1,104 @@
+import asyncio
+import time
+from typing import Any, List
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.graph import StateGraph, START, END
+from src.graph.agents.summarizer.agent import summarizer_agent, SummarizerOutput, SummaryMetadata
+from src.graph.state import AgentState
+
+# Simulated decode speed of the summarizer model
+TOKEN_DELAY = 0.01
+ANSWER_TOKENS = ["Apple ", "looks ", "fairly ", "valued. "] * 10
+
+class FakeStructuredModel:
+    def __init__(self, schema):
+        self.schema = schema
+
+    async def ainvoke(self, messages, config=None):
+        if self.schema is SummarizerOutput:
+            # The answer is only usable once the whole JSON object is generated
+            await asyncio.sleep(TOKEN_DELAY * (len(ANSWER_TOKENS) + 10))
+            return SummarizerOutput(
+                final_answer="".join(ANSWER_TOKENS), title="Apple", category="STOCK", topic="AAPL", tags=["#value"]
+            )
+        await asyncio.sleep(TOKEN_DELAY * 10)
+        return SummaryMetadata(title="Apple", category="STOCK", topic="AAPL", tags=["#value"])
+
+class SlowChatModel(BaseChatModel):
+    """Chat model that streams ANSWER_TOKENS at TOKEN_DELAY each through the callback system."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(ANSWER_TOKENS)))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        for token in ANSWER_TOKENS:
+            await asyncio.sleep(TOKEN_DELAY)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def with_structured_output(self, schema, **kwargs: Any):
+        return FakeStructuredModel(schema)
+
+def _fake_factory(model: str, temperature: float) -> SlowChatModel:
+    return SlowChatModel()
+
+def _summarizer_graph():
+    builder = StateGraph(AgentState)
+    builder.add_node("summarizer", summarizer_agent)
+    builder.add_edge(START, "summarizer")
+    builder.add_edge("summarizer", END)
+    return builder.compile()
+
+def _state() -> dict:
+    return {
+        "user_input": "What do you think of AAPL?",
+        "session_context": {"messages": []},
+        "user_context": {},
+        "agent_interactions": [{"id": 1, "agent": "analyst", "answer": "Fairly valued", "next_agent": "summarizer"}],
+        "output": ""
+    }
+
+async def _time_to_first_answer_text(graph) -> tuple:
+    """Seconds until the client first sees answer text, and the full streamed text."""
+    start = time.perf_counter()
+    first = None
+    streamed: List[str] = []
+    async for mode, data in graph.astream(_state(), stream_mode=["messages", "updates"]):
+        if mode == "messages" and data[0].content:
+            streamed.append(data[0].content)
+            first = first or time.perf_counter() - start
+        elif mode == "updates" and "summarizer" in data:
+            first = first or time.perf_counter() - start
+    return first, "".join(streamed)
+
+@pytest.fixture
+def slow_llm(reset_llm_registry):
+    reset_llm_registry.set_factory(_fake_factory)
+    yield
+
+@pytest.mark.asyncio
+async def test_summarizer_time_to_first_token(slow_llm, monkeypatch):
+    graph = _summarizer_graph()
+
+    monkeypatch.setattr("src.config.settings.SUMMARIZER_STREAMING", False)
+    structured_ttft, structured_text = await _time_to_first_answer_text(graph)
+    monkeypatch.setattr("src.config.settings.SUMMARIZER_STREAMING", True)
+    streaming_ttft, streaming_text = await _time_to_first_answer_text(graph)
+
+    print(
+        f"\n[summarizer] time to first answer text: structured {structured_ttft * 1000:.0f} ms, "
+        f"streaming {streaming_ttft * 1000:.0f} ms"
+    )
+    assert structured_text == ""
+    # Only answer tokens reach the messages stream; metadata is generated out of band
+    assert streaming_text == "".join(ANSWER_TOKENS)
+    assert streaming_ttft < structured_ttft / 5
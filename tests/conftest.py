@@ -6,6 +6,20 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from main import app
 from src.services.auth import create_access_token
 from src.database.models import User, UserStatus, RiskTolerance
+from src.graph.agents.research import utils as research_utils
+from src.graph.utils.crawl import crawl_scheduler
+from src.graph.utils.news import article_index
+from src.graph.utils.prefetch import tool_prefetcher
+from src.graph.utils.tool_call import tool_metrics
+from src.services.admission import run_admission
+from src.services.blobs import blob_store
+from src.services.edgar import edgar_index
+from src.services.llm import llm_registry
+from src.services.llm_cache import llm_cache
+from src.services.market_data import news_feed_index
+from src.services.run_lock import run_locks
+from src.services.run_stream import run_streams
+from src.services.usage import usage_ledger
 
 class TraceableAsyncClient(AsyncClient):
     """
@@ -72,3 +86,77 @@ def pytest_runtest_makereport(item, call):
                 if request_id:
                     # Print with newline to ensure it's visible in pytest output
                     print(f"\n[FAILURE TRACE] X-Request-ID: {request_id}")
+
+# Settings every test runs with: offline EDGAR, no speculative tool calls, in-memory backends
+TEST_SETTINGS = {
+    "EDGAR_OFFLINE_DIR": "tests/fixtures/sec/edgar",
+    "PREFETCH_ENABLED": False,
+    "LLM_CACHE_BACKEND": "memory",
+    "BLOB_STORE_BACKEND": "memory",
+    "RUN_LOCK_BACKEND": "memory",
+    "RUN_ADMISSION_BACKEND": "memory",
+    "RUN_STREAM_BACKEND": "memory",
+}
+
+def reset_singletons():
+    """Clears every module-level singleton a test can leave state in; backends re-read their settings."""
+    for singleton in (
+        edgar_index, crawl_scheduler, article_index, news_feed_index, llm_registry, llm_cache,
+        usage_ledger, tool_metrics, tool_prefetcher, blob_store, run_locks, run_admission, run_streams
+    ):
+        singleton.reset()
+    research_utils.reset_tool_limits()
+    research_utils.set_tool_overrides(None)
+
+@pytest.fixture(autouse=True)
+def isolated_services(tmp_path, monkeypatch):
+    """Applies TEST_SETTINGS with per-test cache directories and resets all singletons around each test."""
+    for name, value in TEST_SETTINGS.items():
+        monkeypatch.setattr(f"src.config.settings.{name}", value)
+    monkeypatch.setattr("src.config.settings.SEC_CACHE_DIR", str(tmp_path / "sec"))
+    monkeypatch.setattr("src.config.settings.EDGAR_CACHE_DIR", str(tmp_path / "edgar"))
+    reset_singletons()
+    yield
+    reset_singletons()
+
+# Named handles on the (already reset) singletons, for tests that inspect or configure them
+
+@pytest.fixture
+def sec_cache_dir(tmp_path):
+    return tmp_path / "sec"
+
+@pytest.fixture
+def edgar_offline():
+    return edgar_index
+
+@pytest.fixture
+def reset_llm_registry():
+    return llm_registry
+
+@pytest.fixture
+def reset_usage_ledger():
+    return usage_ledger
+
+@pytest.fixture
+def reset_tool_limits():
+    return tool_metrics
+
+@pytest.fixture
+def prefetch_disabled():
+    return tool_prefetcher
+
+@pytest.fixture
+def blob_store_memory():
+    return blob_store
+
+@pytest.fixture
+def run_lock_memory():
+    return run_locks
+
+@pytest.fixture
+def run_admission_memory():
+    return run_admission
+
+@pytest.fixture
+def run_streams_memory():
+    return run_streams
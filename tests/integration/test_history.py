@@ -62,37 +62,33 @@ async def test_get_history_triggers_backfill(client, mock_session, test_user_his
     
     app.dependency_overrides[get_db] = lambda: mock_session
     
-    with patch("src.services.history.get_checkpointer") as mock_cp_ctx:
-        mock_checkpointer = AsyncMock()
-        mock_cp_ctx.return_value.__aenter__.return_value = mock_checkpointer
-        
-        with patch("src.services.history.create_graph") as mock_create_graph:
-            mock_graph = MagicMock()
-            mock_graph.aget_state = AsyncMock() # Ensure it is awaitable
-            from langchain_core.messages import HumanMessage, AIMessage
+    with patch("src.services.history.get_persistent_graph", new_callable=AsyncMock) as mock_create_graph:
+        mock_graph = MagicMock()
+        mock_graph.aget_state = AsyncMock() # Ensure it is awaitable
+        from langchain_core.messages import HumanMessage, AIMessage
             
-            # Mock graph state messages
-            mock_state = MagicMock()
-            mock_state.values = {
-                "session_context": {
-                    "messages": [
-                        HumanMessage(content="Hi", id="lc-1"),
-                        AIMessage(content="Hello", id="lc-2")
-                    ]
-                }
+        # Mock graph state messages
+        mock_state = MagicMock()
+        mock_state.values = {
+            "session_context": {
+                "messages": [
+                    HumanMessage(content="Hi", id="lc-1"),
+                    AIMessage(content="Hello", id="lc-2")
+                ]
             }
-            mock_graph.aget_state.return_value = mock_state
-            mock_create_graph.return_value = mock_graph
+        }
+        mock_graph.aget_state.return_value = mock_state
+        mock_create_graph.return_value = mock_graph
             
-            # Execute
-            response = await client.get(f"/threads/{thread_id}/history", headers=auth_headers_history)
+        # Execute
+        response = await client.get(f"/threads/{thread_id}/history", headers=auth_headers_history)
             
-            assert response.status_code == 200
-            # Verify backfill was attempted
-            mock_graph.aget_state.assert_called_once()
-            # Verify database additions (sync_conversation_to_postgres)
-            # 2 messages synced
-            assert mock_session.add.call_count >= 2
+        assert response.status_code == 200
+        # Verify backfill was attempted
+        mock_graph.aget_state.assert_called_once()
+        # Verify database additions (sync_conversation_to_postgres)
+        # 2 messages synced
+        assert mock_session.add.call_count >= 2
             
     app.dependency_overrides.clear()
 
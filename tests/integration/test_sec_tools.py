@@ -15,7 +15,7 @@ async def test_get_sec_filing_section_integration(mocker):
 @pytest.mark.asyncio
 async def test_get_sec_filing_delta_integration(mocker):
     # Mocking the tools used inside delta
-    mocker.patch("src.graph.tools.sec.get_sec_filing_section", return_value="Current Section Content")
+    mocker.patch("src.graph.tools.sec.get_filing_section", return_value="Current Section Content")
     
     # Mock LLM chain invoke
     mock_response = AsyncMock()
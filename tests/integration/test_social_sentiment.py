@@ -28,15 +28,18 @@ async def test_get_market_sentiment_aggregation(mocker):
     mocker.patch("src.services.social.x_client.get_recent_cashtag_tweets", return_value=[{"text": "Bullish on $NVDA!"}])
     mocker.patch("src.graph.tools.sentiment.fetch_ddgs_urls", return_value=[{"title": "Reddit post about NVDA"}])
     
-    # Mock analyze_sentiment for each call
-    mock_sentiments = [
-        SentimentResult(sentiment_score=0.7, rationale="News is positive."),
-        SentimentResult(sentiment_score=0.2, rationale="SEC risks are standard."),
-        SentimentResult(sentiment_score=0.9, rationale="Social is very bullish."),
-        SentimentResult(sentiment_score=0.8, rationale="Reddit is hyped.")
-    ]
+    # Mock the batched scorer: one score per source
+    mock_sentiments = {
+        "news": SentimentResult(sentiment_score=0.7, rationale="News is positive."),
+        "sec": SentimentResult(sentiment_score=0.2, rationale="SEC risks are standard."),
+        "x": SentimentResult(sentiment_score=0.9, rationale="Social is very bullish."),
+        "reddit": SentimentResult(sentiment_score=0.8, rationale="Reddit is hyped.")
+    }
+
+    async def mock_analyze(requests):
+        return {r.key: mock_sentiments[r.key.split("_")[0]] for r in requests}
     
-    with patch("src.graph.tools.sentiment.analyze_sentiment", side_effect=mock_sentiments):
+    with patch("src.graph.tools.sentiment.analyze_sentiments", side_effect=mock_analyze):
         result = await get_market_sentiment(ticker)
         assert f"Market Sentiment for {ticker}" in result
         assert "Aggregate Score:" in result
@@ -53,10 +53,10 @@ async def test_get_macro_economic_news(mock_ticker_data):
     
     with patch("src.services.market_data.get_ticker", return_value=mock_ticker_data), \
          patch("src.graph.utils.news.DDGS") as mock_ddgs_class, \
-         patch("src.graph.utils.news.get_summary", new_callable=AsyncMock) as mock_get_summary:
+         patch("src.graph.utils.news.get_cached_summaries", new_callable=AsyncMock) as mock_cached:
         
         mock_ddgs_class.return_value.__enter__.return_value = mock_ddgs_instance
-        mock_get_summary.return_value = "Mock summary content."
+        mock_cached.side_effect = lambda db, urls: {url: "Mock summary content." for url in urls}
         
         result = await get_macro_economic_news()
         assert "Macro Economic News:" in result
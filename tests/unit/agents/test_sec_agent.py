@@ -5,7 +5,9 @@ from src.graph.tools.sec import (
     extract_section, 
     get_sec_filing_section, 
     get_cached_section, 
-    save_to_cache
+    save_to_cache,
+    get_latest_filing_urls,
+    get_sec_filing_delta
 )
 
 def test_extract_section_risk_factors():
@@ -81,3 +83,48 @@ async def test_save_to_cache_research(mocker):
         # Should call session.add once for ResearchCache
         assert mock_session.add.call_count == 1
         assert mock_session.commit.called
+
+def test_extract_section_heading_based_filing():
+    with open("tests/fixtures/sec/MSFT_10Q.html", "r") as f:
+        html_content = f.read()
+    
+    content = extract_section(html_content, "item2")
+    assert content.startswith("Item 2. Management's Discussion")
+    assert "Azure" in content
+    assert "Item 3." not in content
+
+@pytest.mark.asyncio
+async def test_get_sec_filing_section_reuses_indexed_filing(mocker):
+    mocker.patch("src.graph.tools.sec.get_cached_section", return_value=None)
+    mocker.patch("src.graph.tools.sec.save_to_cache")
+    with open("tests/fixtures/sec/AAPL_10K.html", "r") as f:
+        mock_fetch = mocker.patch("src.graph.tools.sec.fetch_filing_content", return_value=f.read())
+    
+    risk_factors = await get_sec_filing_section("AAPL", "10-K", "item1a")
+    mda = await get_sec_filing_section("AAPL", "10-K", "item7")
+    
+    assert "iPhones" in risk_factors
+    assert "services revenue" in mda
+    # The second section is sliced from the persisted filing instead of refetched
+    assert mock_fetch.call_count == 1
+
+@pytest.mark.asyncio
+async def test_get_latest_filing_urls_per_ticker():
+    aapl = await get_latest_filing_urls("AAPL", "10-K")
+    nvda = await get_latest_filing_urls("NVDA", "10-K")
+    
+    assert aapl[0]["accession_number"] == "0000320193-23-000106"
+    assert nvda[0]["accession_number"] == "0001045810-26-000010"
+    assert nvda[0]["url"].endswith("/1045810/000104581026000010/nvda-20260125.htm")
+
+@pytest.mark.asyncio
+async def test_get_sec_filing_delta_uses_previous_filing(mocker):
+    mock_section = mocker.patch("src.graph.tools.sec.get_filing_section", side_effect=["Current risks", "Previous risks"])
+    mock_llm = mocker.patch("langchain_openai.ChatOpenAI.ainvoke", new_callable=AsyncMock)
+    mock_llm.return_value = MagicMock(content="- New risk: tariffs")
+    
+    result = await get_sec_filing_delta("AAPL", "10-K", "item1a")
+    
+    assert result == "- New risk: tariffs"
+    compared = [call.args[1]["accession_number"] for call in mock_section.call_args_list]
+    assert compared == ["0000320193-23-000106", "0000320193-22-000108"]
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
-from src.graph.agents.summarizer.agent import summarizer_agent, SummarizerOutput
+from langchain_core.messages import AIMessageChunk
+from src.graph.agents.summarizer.agent import summarizer_agent, SummarizerOutput, SummaryMetadata
 from src.graph.state import AgentState
 
 @pytest.fixture
@@ -16,8 +17,13 @@ def sample_state() -> AgentState:
         "output": ""
     }
 
+async def _stream(*items):
+    for item in items:
+        yield item
+
 @pytest.mark.asyncio
-async def test_summarizer_agent_success(sample_state):
+async def test_summarizer_agent_success(sample_state, monkeypatch):
+    monkeypatch.setattr("src.config.settings.SUMMARIZER_STREAMING", False)
     mock_output = SummarizerOutput(
         final_answer="Final Synthesis",
         title="Apple Analysis",
@@ -26,7 +32,7 @@ async def test_summarizer_agent_success(sample_state):
         tags=["#growth", "#tech"]
     )
     
-    with patch("src.graph.agents.summarizer.agent.ChatOpenAI") as mock_llm_class:
+    with patch("src.services.llm.ChatOpenAI") as mock_llm_class:
         mock_llm = MagicMock()
         mock_llm_class.return_value = mock_llm
         
@@ -38,3 +44,39 @@ async def test_summarizer_agent_success(sample_state):
         
         assert result["output"] == "Final Synthesis"
         assert result["agent_interactions"][0]["agent"] == "summarizer"
+        assert result["report_metadata"]["topic"] == "AAPL"
+
+@pytest.mark.asyncio
+async def test_summarizer_agent_streams_answer_then_metadata(sample_state):
+    metadata = SummaryMetadata(title="Apple Analysis", category="STOCK", topic="AAPL", tags=["#growth"])
+
+    with patch("src.services.llm.ChatOpenAI") as mock_llm_class:
+        mock_llm = MagicMock()
+        mock_llm_class.return_value = mock_llm
+        mock_llm.astream.return_value = _stream(AIMessageChunk(content="Final "), AIMessageChunk(content="Synthesis"))
+
+        mock_structured = MagicMock()
+        mock_structured.ainvoke = AsyncMock(return_value=metadata)
+        mock_llm.with_structured_output.return_value = mock_structured
+
+        result = await summarizer_agent(sample_state)
+
+    assert result["output"] == "Final Synthesis"
+    assert result["session_context"]["messages"][0].content == "Final Synthesis"
+    assert result["report_metadata"] == metadata.model_dump()
+    # Metadata is generated from the finished answer, outside the messages stream
+    assert "Final Synthesis" in mock_structured.ainvoke.call_args.args[0][0].content
+    assert mock_structured.ainvoke.call_args.kwargs["config"] == {"tags": ["nostream"]}
+
+@pytest.mark.asyncio
+async def test_summarizer_agent_keeps_answer_when_metadata_fails(sample_state):
+    with patch("src.services.llm.ChatOpenAI") as mock_llm_class:
+        mock_llm = MagicMock()
+        mock_llm_class.return_value = mock_llm
+        mock_llm.astream.return_value = _stream(AIMessageChunk(content="Answer"))
+        mock_llm.with_structured_output.return_value.ainvoke = AsyncMock(side_effect=ValueError("bad schema"))
+
+        result = await summarizer_agent(sample_state)
+
+    assert result["output"] == "Answer"
+    assert result["report_metadata"] == {}
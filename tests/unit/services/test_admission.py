@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from src.services.admission import MemorySlotBackend, RunAdmission
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr("src.config.settings.RUN_MAX_CONCURRENT", 1)
+    monkeypatch.setattr("src.config.settings.RUN_QUEUE_MAX_SIZE", 3)
+    monkeypatch.setattr("src.config.settings.RUN_ADMISSION_POLL_SECONDS", 0.01)
+    return monkeypatch
+
+@pytest.mark.asyncio
+async def test_runs_queue_then_start_in_turn(run_admission_memory, limits):
+    first = await run_admission_memory.admit("alice")
+    second = await run_admission_memory.admit("bob")
+
+    assert first.admitted.is_set()
+    assert not second.admitted.is_set() and second.position == 1
+
+    await run_admission_memory.release(first)
+    assert second.admitted.is_set()
+    assert run_admission_memory.snapshot()["running"] == 1
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_with_retry_after(run_admission_memory, limits):
+    tickets = [await run_admission_memory.admit(f"user{i}") for i in range(4)]
+    assert all(tickets)
+
+    assert await run_admission_memory.admit("late") is None
+    assert run_admission_memory.stats["rejected"] == 1
+    assert run_admission_memory.retry_after() >= 1
+
+@pytest.mark.asyncio
+async def test_weighted_fairness(run_admission_memory, limits):
+    limits.setattr("src.config.settings.RUN_QUEUE_MAX_SIZE", 10)
+    limits.setattr("src.config.settings.RUN_USER_WEIGHTS", {"vip": 2.0})
+    running = await run_admission_memory.admit("alice")
+    burst = [await run_admission_memory.admit("alice") for _ in range(3)]
+    bob = await run_admission_memory.admit("bob")
+    vip = [await run_admission_memory.admit("vip") for _ in range(2)]
+
+    # alice already runs, so bob and the higher-weight vip go ahead of her burst
+    order = [t.user_id for t in run_admission_memory.waiting]
+    assert order == ["bob", "vip", "vip", "alice", "alice", "alice"]
+    assert (bob.position, vip[1].position, burst[0].position) == (1, 3, 4)
+
+    limits.setattr("src.config.settings.RUN_MAX_CONCURRENT", 3)
+    await run_admission_memory.dispatch()
+    assert bob.admitted.is_set() and vip[0].admitted.is_set()
+    assert not vip[1].admitted.is_set() and vip[1].position == 1
+    assert running in run_admission_memory.running
+
+@pytest.mark.asyncio
+async def test_positions_stream_until_admitted(run_admission_memory, limits):
+    running = await run_admission_memory.admit("alice")
+    ahead = await run_admission_memory.admit("bob")
+    queued = await run_admission_memory.admit("carol")
+
+    seen = []
+    async def follow():
+        async for position in run_admission_memory.positions(queued, timeout=1):
+            seen.append(position)
+    follower = asyncio.create_task(follow())
+    await asyncio.sleep(0.01)
+    await run_admission_memory.release(ahead)
+    await asyncio.sleep(0.01)
+    await run_admission_memory.release(running)
+    await asyncio.wait_for(follower, 1)
+
+    assert seen == [2, 1]
+    assert queued.admitted.is_set()
+    assert run_admission_memory.stats["cancelled"] == 1
+
+@pytest.mark.asyncio
+async def test_queue_wait_times_out(run_admission_memory, limits):
+    await run_admission_memory.admit("alice")
+    queued = await run_admission_memory.admit("bob")
+
+    with pytest.raises(asyncio.TimeoutError):
+        async for _ in run_admission_memory.positions(queued, timeout=0.05):
+            pass
+    assert run_admission_memory.stats["timed_out"] == 1
+
+@pytest.mark.asyncio
+async def test_cluster_limit_spans_workers(limits):
+    limits.setattr("src.config.settings.RUN_MAX_CONCURRENT", 4)
+    limits.setattr("src.config.settings.RUN_MAX_CONCURRENT_CLUSTER", 1)
+    shared = MemorySlotBackend()
+    worker_a, worker_b = RunAdmission(shared), RunAdmission(shared)
+
+    running = await worker_a.admit("alice")
+    queued = await worker_b.admit("bob")
+    assert running.admitted.is_set() and not queued.admitted.is_set()
+    assert worker_b.stats["cluster_full"] >= 1
+
+    # worker_b is not told about the release; it finds the free slot by polling
+    await worker_a.release(running)
+    await asyncio.wait_for(queued.admitted.wait(), 1)
+    await worker_b.release(queued)
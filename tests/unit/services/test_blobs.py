@@ -0,0 +1,64 @@
+import pytest
+from unittest.mock import AsyncMock
+from src.graph.utils.prompt import convert_state_to_prompt, render_state_prompt
+from src.services.blobs import BlobStore, MemoryBlobBackend, blob_ref, interaction_answer
+
+LONG_ANSWER = "Item 1A risk factors. " * 200
+
+def _interaction(answer: str, agent: str = "fundamental_researcher") -> dict:
+    return {"id": 1, "agent": agent, "answer": answer, "next_agent": "analyst"}
+
+@pytest.mark.asyncio
+async def test_large_answers_are_offloaded_once(blob_store_memory):
+    small = _interaction("AAPL P/E 28")
+    stored = await blob_store_memory.offload_interactions([_interaction(LONG_ANSWER), small])
+
+    assert stored[1] == small
+    assert stored[0]["answer_ref"] == blob_ref(LONG_ANSWER)
+    assert len(stored[0]["answer"]) < 400 and stored[0]["answer_ref"] in stored[0]["answer"]
+    assert interaction_answer(stored[0]) == LONG_ANSWER
+
+    again = await blob_store_memory.offload_interactions([_interaction(LONG_ANSWER, "macro_researcher")])
+    assert again[0]["answer_ref"] == stored[0]["answer_ref"]
+    assert len(blob_store_memory.backend._entries) == 1
+
+@pytest.mark.asyncio
+async def test_other_process_resolves_from_backend(blob_store_memory):
+    stored = await blob_store_memory.offload_interactions([_interaction(LONG_ANSWER)])
+
+    # A fresh process sharing the backend only sees the preview until it loads the blob
+    blob_store_memory.reset(blob_store_memory.backend)
+    state = {"user_input": "Is AAPL risky?", "agent_interactions": stored}
+    assert LONG_ANSWER not in convert_state_to_prompt(state, "summarizer")
+
+    prompt = await render_state_prompt(state, "summarizer")
+    assert LONG_ANSWER.strip() in prompt
+    assert blob_store_memory.stats["fetched"] == 1
+
+@pytest.mark.asyncio
+async def test_missing_blob_falls_back_to_preview(blob_store_memory):
+    stored = await blob_store_memory.offload_interactions([_interaction(LONG_ANSWER)])
+    blob_store_memory.reset(MemoryBlobBackend())
+
+    resolved = await blob_store_memory.resolve_interactions(stored)
+    assert resolved[0]["answer"] == stored[0]["answer"]
+    assert blob_store_memory.stats["missing"] == 1
+
+@pytest.mark.asyncio
+async def test_backend_failure_keeps_answers_inline():
+    backend = MemoryBlobBackend()
+    backend.put = AsyncMock(side_effect=ConnectionError("redis down"))
+    store = BlobStore(backend=backend)
+
+    stored = await store.offload_interactions([_interaction(LONG_ANSWER)])
+    assert stored[0]["answer"] == LONG_ANSWER
+    assert "answer_ref" not in stored[0]
+    assert store.stats["errors"] == 1
+
+@pytest.mark.asyncio
+async def test_offloading_disabled(blob_store_memory, monkeypatch):
+    monkeypatch.setattr("src.config.settings.BLOB_STORE_BACKEND", "none")
+    blob_store_memory.reset()
+
+    stored = await blob_store_memory.offload_interactions([_interaction(LONG_ANSWER)])
+    assert stored[0]["answer"] == LONG_ANSWER
@@ -0,0 +1,126 @@
+import json
+import pytest
+from src.services.edgar import EdgarIndex, FileEdgarSource
+
+FIXTURE_DIR = "tests/fixtures/sec/edgar"
+
+@pytest.mark.asyncio
+async def test_latest_filings_by_type(edgar_offline):
+    filings = await edgar_offline.latest_filings("aapl", "10-K", limit=2)
+
+    assert [f["accession_number"] for f in filings] == ["0000320193-23-000106", "0000320193-22-000108"]
+    assert filings[0]["filing_date"] == "2023-11-03"
+    assert filings[0]["type"] == "10-K"
+    assert filings[0]["url"] == "https://www.sec.gov/Archives/edgar/data/320193/000032019323000106/aapl-20230930.htm"
+
+    quarterly = await edgar_offline.latest_filings("AAPL", "10-Q", limit=5)
+    assert [f["filing_date"] for f in quarterly] == ["2024-02-02", "2023-08-04", "2023-05-05"]
+
+@pytest.mark.asyncio
+async def test_latest_filings_unknown_ticker(edgar_offline):
+    assert await edgar_offline.latest_filings("ZZZZ", "10-K") == []
+
+@pytest.mark.asyncio
+async def test_lookups_served_from_memory(edgar_offline, mocker):
+    await edgar_offline.latest_filings("NVDA", "10-K")
+    spy = mocker.spy(FileEdgarSource, "get_submissions")
+
+    filings = await edgar_offline.latest_filings("NVDA", "10-K")
+    assert filings[0]["accession_number"] == "0001045810-26-000010"
+    assert edgar_offline.get_cik("NVDA") == "0001045810"
+    assert spy.call_count == 0
+
+@pytest.mark.asyncio
+async def test_disk_cache_survives_restart(tmp_path):
+    first = EdgarIndex(source=FileEdgarSource(FIXTURE_DIR), cache_dir=str(tmp_path))
+    await first.latest_filings("MSFT", "10-K")
+    await first.latest_filings("AAPL", "10-K")
+    assert (tmp_path / "company_tickers.json").exists()
+    assert (tmp_path / "CIK0000320193.json").exists()
+
+    # A fresh process with no upstream source answers from the disk cache
+    second = EdgarIndex(source=FileEdgarSource(str(tmp_path / "missing")), cache_dir=str(tmp_path))
+    filings = await second.latest_filings("AAPL", "10-K")
+    assert filings[0]["accession_number"] == "0000320193-23-000106"
+
+@pytest.mark.asyncio
+async def test_incremental_refresh_merges_new_accessions(tmp_path, monkeypatch):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    with open(f"{FIXTURE_DIR}/company_tickers.json") as f:
+        (source_dir / "company_tickers.json").write_text(f.read())
+    with open(f"{FIXTURE_DIR}/CIK0000320193.json") as f:
+        submissions = json.load(f)
+    (source_dir / "CIK0000320193.json").write_text(json.dumps(submissions))
+
+    index = EdgarIndex(source=FileEdgarSource(str(source_dir)), cache_dir=str(tmp_path / "cache"))
+    await index.latest_filings("AAPL", "10-K")
+
+    # EDGAR publishes a new 10-K and only keeps the newest entries in 'recent'
+    recent = submissions["filings"]["recent"]
+    recent["accessionNumber"] = ["0000320193-24-000123", "0000320193-24-000006"]
+    recent["filingDate"] = ["2024-11-01", "2024-02-02"]
+    recent["reportDate"] = ["2024-09-28", "2023-12-30"]
+    recent["form"] = ["10-K", "10-Q"]
+    recent["primaryDocument"] = ["aapl-20240928.htm", "aapl-20231230.htm"]
+    (source_dir / "CIK0000320193.json").write_text(json.dumps(submissions))
+    monkeypatch.setattr("src.config.settings.EDGAR_REFRESH_MINUTES", 0)
+
+    filings = await index.latest_filings("AAPL", "10-K", limit=3)
+    assert [f["accession_number"] for f in filings] == [
+        "0000320193-24-000123", "0000320193-23-000106", "0000320193-22-000108"
+    ]
+
+@pytest.mark.asyncio
+async def test_slow_refresh_blocks_only_its_company(tmp_path):
+    import asyncio
+
+    class SlowAppleSource(FileEdgarSource):
+        def __init__(self, directory):
+            super().__init__(directory)
+            self.calls = []
+
+        async def get_submissions(self, cik):
+            self.calls.append(cik)
+            if cik == "0000320193":
+                await asyncio.sleep(0.5)
+            return await super().get_submissions(cik)
+
+    source = SlowAppleSource(FIXTURE_DIR)
+    index = EdgarIndex(source=source, cache_dir=str(tmp_path))
+    apple = [asyncio.create_task(index.latest_filings("AAPL", "10-K")) for _ in range(3)]
+    await asyncio.sleep(0.01)
+
+    # NVDA is answered while Apple's refresh is still in flight
+    nvda = await asyncio.wait_for(index.latest_filings("NVDA", "10-K"), 0.2)
+    assert nvda and not any(task.done() for task in apple)
+
+    results = await asyncio.gather(*apple)
+    assert all(r[0]["accession_number"] == "0000320193-23-000106" for r in results)
+    assert source.calls.count("0000320193") == 1
+
+@pytest.mark.asyncio
+async def test_stale_ticker_map_is_reloaded(tmp_path, monkeypatch):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    with open(f"{FIXTURE_DIR}/company_tickers.json") as f:
+        tickers = json.load(f)
+    (source_dir / "company_tickers.json").write_text(json.dumps(tickers))
+    index = EdgarIndex(source=FileEdgarSource(str(source_dir)), cache_dir=str(tmp_path / "cache"))
+    await index.latest_filings("AAPL", "10-K")
+
+    # Apple is listed under a new ticker; the map only picks it up once stale
+    tickers["renamed"] = {**next(e for e in tickers.values() if e["ticker"] == "AAPL"), "ticker": "APPL2"}
+    (source_dir / "company_tickers.json").write_text(json.dumps(tickers))
+    await index.latest_filings("AAPL", "10-K")
+    assert index.get_cik("APPL2") is None
+
+    monkeypatch.setattr("src.config.settings.EDGAR_TICKERS_REFRESH_HOURS", 0)
+    await index.latest_filings("AAPL", "10-K")
+    assert index.get_cik("APPL2") == "0000320193"
+    assert "renamed" in json.loads((tmp_path / "cache" / "company_tickers.json").read_text())
+
+    # An unreachable source keeps the map it has
+    (source_dir / "company_tickers.json").unlink()
+    await index.latest_filings("AAPL", "10-K")
+    assert index.get_cik("APPL2") == "0000320193"
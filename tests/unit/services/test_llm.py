@@ -0,0 +1,58 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from pydantic import BaseModel
+from src.services.llm import LLMRegistry
+
+class Verdict(BaseModel):
+    verdict: str
+
+@pytest.mark.asyncio
+async def test_registry_reuses_clients_per_model_and_temperature():
+    registry = LLMRegistry()
+    try:
+        first = registry.get("gpt-4o", 0)
+        assert registry.get("gpt-4o", 0) is first
+        assert registry.get("gpt-4o", 0.7) is not first
+        assert registry.get("gpt-4o-mini", 0) is not first
+    finally:
+        await registry.aclose()
+
+@pytest.mark.asyncio
+async def test_registry_shares_pooled_http_clients():
+    registry = LLMRegistry()
+    try:
+        with patch("src.services.llm.ChatOpenAI") as mock_llm_class:
+            registry.get("gpt-4o", 0)
+            registry.get("gpt-4o-mini", 0.7)
+
+        first_kwargs, second_kwargs = [call.kwargs for call in mock_llm_class.call_args_list]
+        assert first_kwargs["http_async_client"] is second_kwargs["http_async_client"]
+        assert first_kwargs["http_client"] is second_kwargs["http_client"]
+        assert first_kwargs["http_async_client"] is not None
+    finally:
+        await registry.aclose()
+
+def test_registry_caches_structured_output_per_schema():
+    registry = LLMRegistry()
+    with patch("src.services.llm.ChatOpenAI") as mock_llm_class:
+        structured = registry.get("gpt-4o", 0, Verdict, method="function_calling")
+        assert registry.get("gpt-4o", 0, Verdict, method="function_calling") is structured
+        registry.get("gpt-4o", 0, Verdict)
+
+    assert mock_llm_class.call_count == 1
+    mock_llm = mock_llm_class.return_value
+    assert mock_llm.with_structured_output.call_count == 2
+    mock_llm.with_structured_output.assert_any_call(Verdict, method="function_calling")
+
+def test_registry_custom_factory():
+    registry = LLMRegistry()
+    offline_llm = MagicMock()
+    factory = MagicMock(return_value=offline_llm)
+    registry.set_factory(factory)
+
+    assert registry.get("gpt-4o", 0) is offline_llm
+    factory.assert_called_once_with(model="gpt-4o", temperature=0)
+
+    registry.reset()
+    with patch("src.services.llm.ChatOpenAI") as mock_llm_class:
+        assert registry.get("gpt-4o", 0) is mock_llm_class.return_value
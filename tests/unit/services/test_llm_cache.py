@@ -0,0 +1,87 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel
+from src.services.llm_cache import LLMResponseCache, MemoryLLMCacheBackend, cache_key
+
+class Verdict(BaseModel):
+    verdict: str
+
+def fake_factory(response):
+    """Registry factory whose models all answer with `response`."""
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(return_value=response)
+    llm.with_structured_output.return_value = llm
+    return llm, MagicMock(return_value=llm)
+
+def test_cache_key_normalizes_whitespace_and_separates_params():
+    messages = [SystemMessage(content="Be brief."), HumanMessage(content="Summarize  this\n text")]
+    same = [SystemMessage(content="Be brief. "), HumanMessage(content="Summarize this text")]
+
+    assert cache_key("gpt-4o", 0, messages) == cache_key("gpt-4o", 0, same)
+    assert cache_key("gpt-4o", 0, messages) != cache_key("gpt-4o-mini", 0, messages)
+    assert cache_key("gpt-4o", 0, messages) != cache_key("gpt-4o", 0.7, messages)
+    assert cache_key("gpt-4o", 0, messages) != cache_key("gpt-4o", 0, messages, Verdict)
+    # A bare string prompt is the same request as a single human message
+    assert cache_key("gpt-4o", 0, "hello") == cache_key("gpt-4o", 0, [HumanMessage(content="hello")])
+
+@pytest.mark.asyncio
+async def test_repeated_call_is_served_from_cache(reset_llm_registry):
+    llm, factory = fake_factory(AIMessage(
+        content="Summary",
+        usage_metadata={"input_tokens": 90, "output_tokens": 10, "total_tokens": 100}
+    ))
+    reset_llm_registry.set_factory(factory)
+    cache = LLMResponseCache(MemoryLLMCacheBackend())
+
+    first = await cache.ainvoke("article_summary", "Summarize this", "gpt-4o", ttl_seconds=60)
+    second = await cache.ainvoke("article_summary", "Summarize  this", "gpt-4o", ttl_seconds=60)
+
+    assert first.content == second.content == "Summary"
+    assert llm.ainvoke.await_count == 1
+    stats = cache.stats()
+    assert stats["sites"]["article_summary"]["hits"] == 1
+    assert stats["sites"]["article_summary"]["misses"] == 1
+    assert stats["saved_tokens"] == 100
+    assert stats["hit_rate"] == 0.5
+
+@pytest.mark.asyncio
+async def test_structured_output_round_trips(reset_llm_registry):
+    llm, factory = fake_factory(Verdict(verdict="bullish"))
+    reset_llm_registry.set_factory(factory)
+    cache = LLMResponseCache(MemoryLLMCacheBackend())
+
+    await cache.ainvoke("sentiment", "Rate this", "gpt-4o-mini", schema=Verdict)
+    cached = await cache.ainvoke("sentiment", "Rate this", "gpt-4o-mini", schema=Verdict)
+
+    assert cached == Verdict(verdict="bullish")
+    assert llm.ainvoke.await_count == 1
+    assert cache.stats()["sites"]["sentiment"]["saved_tokens"] > 0
+
+@pytest.mark.asyncio
+async def test_backend_failure_falls_through_to_llm(reset_llm_registry):
+    llm, factory = fake_factory(AIMessage(content="Fresh"))
+    reset_llm_registry.set_factory(factory)
+    backend = MagicMock()
+    backend.get = AsyncMock(side_effect=ConnectionError("redis down"))
+    backend.set = AsyncMock(side_effect=ConnectionError("redis down"))
+    cache = LLMResponseCache(backend)
+
+    response = await cache.ainvoke("macro_analysis", "Analyze", "gpt-4o")
+
+    assert response.content == "Fresh"
+    assert cache.stats()["sites"]["macro_analysis"]["errors"] == 2
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_ttl(reset_llm_registry, monkeypatch):
+    llm, factory = fake_factory(AIMessage(content="Summary"))
+    reset_llm_registry.set_factory(factory)
+    cache = LLMResponseCache(MemoryLLMCacheBackend())
+    clock = [1000.0]
+    monkeypatch.setattr("src.services.llm_cache.time.monotonic", lambda: clock[0])
+
+    await cache.ainvoke("article_summary", "Summarize", "gpt-4o", ttl_seconds=60)
+    clock[0] += 61
+    await cache.ainvoke("article_summary", "Summarize", "gpt-4o", ttl_seconds=60)
+
+    assert llm.ainvoke.await_count == 2
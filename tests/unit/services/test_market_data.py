@@ -1,3 +1,4 @@
+import time
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock, PropertyMock
 from datetime import date
@@ -7,7 +8,8 @@ from src.services.market_data import (
     get_current_price,
     _parse_yf_news_item,
     fetch_yfinance_news_urls,
-    validate_transaction_price
+    validate_transaction_price,
+    NewsFeedIndex
 )
 from src.database.models import FXRate, Asset, AssetType
 import pandas as pd
@@ -199,3 +201,52 @@ async def test_validate_transaction_price_empty_history():
         mock_ticker.history.return_value = pd.DataFrame()
         
         assert await validate_transaction_price("AAPL", transaction_date, Decimal("100.0")) is True
+
+@pytest.mark.asyncio
+async def test_news_feed_index_caches_per_ticker():
+    index = NewsFeedIndex(ttl_seconds=60)
+    with patch("src.services.market_data.get_stock_news_data", new_callable=AsyncMock) as mock_news:
+        mock_news.return_value = [{"title": "T1", "link": "L1"}, {"invalid": "item"}]
+
+        first = await index.get_news("aapl")
+        first[0]["user_agent"] = "UA"
+        second = await index.get_news("AAPL")
+
+    assert second == [{"title": "T1", "link": "L1"}]
+    assert mock_news.call_count == 1
+
+@pytest.mark.asyncio
+async def test_news_feed_index_expires():
+    index = NewsFeedIndex(ttl_seconds=0)
+    with patch("src.services.market_data.get_stock_news_data", new_callable=AsyncMock) as mock_news:
+        mock_news.return_value = [{"title": "T1", "link": "L1"}]
+        await index.get_news("AAPL")
+        await index.get_news("AAPL")
+
+    assert mock_news.call_count == 2
+
+@pytest.mark.asyncio
+async def test_news_feed_index_many_fetches_concurrently():
+    index = NewsFeedIndex(ttl_seconds=60)
+
+    def slow_news(symbol):
+        time.sleep(0.1)
+        if symbol == "BAD":
+            raise ValueError("yfinance down")
+        return [{"title": f"{symbol} news", "link": f"https://example.com/{symbol}"}]
+
+    with patch("src.services.market_data.get_ticker") as mock_get_ticker:
+        mock_get_ticker.side_effect = lambda symbol: _ticker_with_news(slow_news, symbol)
+        started = time.monotonic()
+        news = await index.get_news_many(["^GSPC", "^VIX", "^TNX", "BAD"])
+        elapsed = time.monotonic() - started
+
+    assert list(news) == ["^GSPC", "^VIX", "^TNX", "BAD"]
+    assert news["^VIX"] == [{"title": "^VIX news", "link": "https://example.com/^VIX"}]
+    assert news["BAD"] == []
+    assert elapsed < 0.3
+
+def _ticker_with_news(loader, symbol):
+    ticker = MagicMock()
+    type(ticker).news = PropertyMock(side_effect=lambda: loader(symbol))
+    return ticker
@@ -0,0 +1,37 @@
+import pytest
+from langchain_core.messages import HumanMessage
+from src.graph.agents.research.research_plan import ResearchPlan
+from src.graph.agents.research.utils import execute_tool, set_tool_overrides
+from src.graph.agents.supervisor.response import SupervisorResponse
+from src.graph.tools.research import get_stock_financials
+from src.graph.utils.tool_call import ToolCall
+from src.services.offline import OfflineChatModel, OfflineToolkit
+
+@pytest.mark.asyncio
+async def test_structured_output_uses_scenario_then_template():
+    model = OfflineChatModel(responses={"SupervisorResponse": {"next_agents": ["macro_researcher"]}})
+
+    routed = await model.with_structured_output(SupervisorResponse).ainvoke([HumanMessage(content="Rates?")])
+    plan = await model.with_structured_output(ResearchPlan).ainvoke([HumanMessage(content="Plan")])
+    text = await model.ainvoke("Summarize")
+
+    assert routed.next_agents == ["macro_researcher"]
+    assert plan.steps and plan.subject == "AAPL"
+    assert text.content and text.usage_metadata["total_tokens"] > 0
+
+@pytest.mark.asyncio
+async def test_offline_responses_are_deterministic():
+    first = await OfflineToolkit().get_stock_financials("MSFT")
+    second = await OfflineToolkit().get_stock_financials("MSFT")
+    assert first == second
+    assert first != await OfflineToolkit().get_stock_financials("NVDA")
+
+@pytest.mark.asyncio
+async def test_tool_overrides_replace_allowed_tools_only():
+    set_tool_overrides(OfflineToolkit().tools())
+
+    result = await execute_tool(ToolCall(tool_name="get_stock_financials"), [get_stock_financials], subject="MSFT")
+    missing = await execute_tool(ToolCall(tool_name="get_market_sentiment", tool_params={"ticker": "MSFT"}), [get_stock_financials])
+
+    assert result.startswith("**Financial Data for MSFT**")
+    assert "not found" in missing
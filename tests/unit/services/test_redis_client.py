@@ -0,0 +1,33 @@
+import pytest
+from src.services.admission import RedisSlotBackend
+from src.services.blobs import RedisBlobBackend
+from src.services.redis_client import SharedRedis, shared_redis, stream_redis
+from src.services.run_lock import RedisRunLockBackend
+
+@pytest.mark.asyncio
+async def test_backends_share_one_client():
+    try:
+        assert RedisRunLockBackend().client is RedisSlotBackend().client is RedisBlobBackend().client
+        assert RedisRunLockBackend().client is shared_redis.client
+    finally:
+        await shared_redis.aclose()
+
+@pytest.mark.asyncio
+async def test_close_and_reopen():
+    pool = SharedRedis("test", "REDIS_MAX_CONNECTIONS")
+    first = pool.open()
+    await pool.aclose()
+    assert pool.open() is not first
+    await pool.aclose()
+
+@pytest.mark.asyncio
+async def test_stream_reads_get_their_own_sized_pool(monkeypatch):
+    monkeypatch.setattr("src.config.settings.REDIS_MAX_CONNECTIONS", 7)
+    monkeypatch.setattr("src.config.settings.REDIS_STREAM_MAX_CONNECTIONS", 11)
+    try:
+        assert stream_redis.client is not shared_redis.client
+        assert shared_redis.client.connection_pool.max_connections == 7
+        assert stream_redis.client.connection_pool.max_connections == 11
+    finally:
+        await shared_redis.aclose()
+        await stream_redis.aclose()
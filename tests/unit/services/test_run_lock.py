@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from src.services.run_lock import LOCK_KEY_PREFIX
+
+@pytest.mark.asyncio
+async def test_one_run_per_thread(run_lock_memory):
+    lease = await run_lock_memory.acquire("t1")
+    assert lease is not None
+    assert await run_lock_memory.acquire("t1") is None
+    assert await run_lock_memory.acquire("t2") is not None
+
+    await lease.release()
+    await lease.release()
+    assert await run_lock_memory.acquire("t1") is not None
+    assert run_lock_memory.stats["conflicts"] == 1
+    assert run_lock_memory.stats["released"] == 1
+
+@pytest.mark.asyncio
+async def test_waiting_run_gets_lock_when_released(run_lock_memory, monkeypatch):
+    monkeypatch.setattr("src.config.settings.RUN_LOCK_RETRY_SECONDS", 0.01)
+    first = await run_lock_memory.acquire("t1")
+    asyncio.get_running_loop().call_later(0.05, lambda: asyncio.ensure_future(first.release()))
+
+    second = await run_lock_memory.acquire("t1", wait_seconds=1.0)
+
+    assert second is not None
+    snapshot = run_lock_memory.snapshot()
+    assert snapshot["waited"] == 1 and snapshot["held"] == 1
+    assert 40 <= snapshot["wait_max_ms"] < 1000
+
+@pytest.mark.asyncio
+async def test_heartbeat_keeps_lock_past_ttl(run_lock_memory, monkeypatch):
+    monkeypatch.setattr("src.config.settings.RUN_LOCK_TTL_SECONDS", 0.06)
+    lease = await run_lock_memory.acquire("t1")
+
+    await asyncio.sleep(0.2)
+
+    assert await run_lock_memory.acquire("t1") is None
+    assert run_lock_memory.stats["renewals"] >= 3
+    assert not lease.lost
+    await lease.release()
+
+@pytest.mark.asyncio
+async def test_lease_taken_over_is_marked_lost(run_lock_memory, monkeypatch):
+    monkeypatch.setattr("src.config.settings.RUN_LOCK_TTL_SECONDS", 0.06)
+    lease = await run_lock_memory.acquire("t1")
+
+    # Another worker takes the key, e.g. after this one stalled past the TTL
+    await run_lock_memory.backend.release(LOCK_KEY_PREFIX + "t1", lease.token)
+    await run_lock_memory.backend.acquire(LOCK_KEY_PREFIX + "t1", "other-worker", 10)
+    await asyncio.sleep(0.05)
+
+    assert lease.lost
+    assert run_lock_memory.stats["lost"] == 1
+    await lease.release()
+    assert await run_lock_memory.backend.renew(LOCK_KEY_PREFIX + "t1", "other-worker", 10)
+
+@pytest.mark.asyncio
+async def test_lease_past_max_hold_is_marked_lost(run_lock_memory, monkeypatch):
+    monkeypatch.setattr("src.config.settings.RUN_LOCK_TTL_SECONDS", 0.06)
+    lease = await run_lock_memory.acquire("t1", max_hold_seconds=0.05)
+
+    await asyncio.sleep(0.08)
+    assert lease.lost
+    assert run_lock_memory.stats["lost"] == 1
+
+    # No longer renewed, the lock lapses within a TTL and the thread frees up
+    await asyncio.sleep(0.07)
+    assert await run_lock_memory.acquire("t1") is not None
@@ -0,0 +1,121 @@
+import asyncio
+import pytest
+from src.services.run_stream import MemoryRunStreamBackend, RunStreams
+
+@pytest.fixture
+def streams(monkeypatch):
+    monkeypatch.setattr("src.config.settings.RUN_STREAM_BLOCK_SECONDS", 0.02)
+    monkeypatch.setattr("src.config.settings.RUN_STREAM_IDLE_TIMEOUT_SECONDS", 0.1)
+    return RunStreams(MemoryRunStreamBackend())
+
+async def _collect(streams, run_id, last_event_id=None):
+    return [entry async for entry in streams.events(run_id, last_event_id) if entry is not None]
+
+@pytest.mark.asyncio
+async def test_replay_after_last_event_id(streams):
+    await streams.create("run-1", "thread-1", "7")
+    first = await streams.publish("run-1", "messages", "[1]")
+    await streams.publish("run-1", "messages", "[2]")
+    await streams.publish("run-1", "end", "{}")
+
+    assert await streams.meta("run-1") == {"thread_id": "thread-1", "user_id": "7"}
+    assert [e[2] for e in await _collect(streams, "run-1")] == ["[1]", "[2]", "{}"]
+    assert [e[1] for e in await _collect(streams, "run-1", first)] == ["messages", "end"]
+
+@pytest.mark.asyncio
+async def test_live_reader_follows_until_terminal_event(streams):
+    await streams.create("run-2", "thread-1", "7")
+    reader = asyncio.create_task(_collect(streams, "run-2"))
+
+    async def run():
+        for n in range(3):
+            await asyncio.sleep(0.01)
+            await streams.publish("run-2", "messages", f"[{n}]")
+        await streams.publish("run-2", "error", "[]")
+        await streams.publish("run-2", "messages", "[late]")
+    streams.spawn("run-2", run())
+
+    entries = await asyncio.wait_for(reader, 1)
+    assert [e[1] for e in entries] == ["messages"] * 3 + ["error"]
+    assert "run-2" not in streams.tasks
+
+@pytest.mark.asyncio
+async def test_silent_run_sends_keep_alives_then_gives_up(streams):
+    await streams.create("run-3", "thread-1", "7")
+    keep_alives = 0
+    with pytest.raises(asyncio.TimeoutError):
+        async for entry in streams.events("run-3"):
+            assert entry is None
+            keep_alives += 1
+    assert keep_alives >= 2
+
+@pytest.mark.asyncio
+async def test_publish_failure_does_not_stop_the_run(streams):
+    class BrokenBackend(MemoryRunStreamBackend):
+        async def append(self, run_id, event, data):
+            raise ConnectionError("redis down")
+    streams.reset(BrokenBackend())
+    assert await streams.publish("run-4", "messages", "[]") is None
+
+@pytest.mark.asyncio
+async def test_cancel_all_stops_background_runs(streams):
+    started = asyncio.Event()
+    async def forever():
+        started.set()
+        await asyncio.sleep(60)
+    task = streams.spawn("run-5", forever())
+    await started.wait()
+    await streams.cancel_all()
+    assert task.cancelled()
+
+@pytest.mark.asyncio
+async def test_memory_backend_trims_and_expires(streams, monkeypatch):
+    monkeypatch.setattr("src.config.settings.RUN_STREAM_MAX_EVENTS", 3)
+    backend = streams.backend
+    await streams.create("run-6", "thread-1", "7")
+    ids = [await streams.publish("run-6", "messages", f"[{n}]") for n in range(5)]
+    await streams.publish("run-6", "end", "{}")
+
+    # Only the newest events are kept; ids keep counting
+    assert [e[2] for e in await _collect(streams, "run-6")] == ["[3]", "[4]", "{}"]
+    assert [e[2] for e in await _collect(streams, "run-6", ids[3])] == ["[4]", "{}"]
+
+    monkeypatch.setattr("src.config.settings.RUN_STREAM_TTL_SECONDS", 0.01)
+    await streams.create("run-7", "thread-1", "7")
+    await asyncio.sleep(0.02)
+    assert await streams.meta("run-7") is None
+    # The next write prunes expired runs; run-6 was written under the long TTL
+    await streams.create("run-8", "thread-1", "7")
+    assert "run-7" not in backend._meta and "run-7" not in backend._events
+    assert "run-6" in backend._events
+
+@pytest.mark.asyncio
+async def test_redis_readers_beyond_pool_size_wait_without_starving_writes(monkeypatch):
+    from src.services.run_stream import RedisRunStreamBackend
+    monkeypatch.setattr("src.config.settings.REDIS_STREAM_MAX_CONNECTIONS", 2)
+
+    class BlockingStreamClient:
+        """XREAD that blocks for its whole window, counting connections in use."""
+        def __init__(self):
+            self.active = self.peak = self.calls = 0
+        async def xread(self, streams, count, block):
+            self.active += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(block / 1000)
+            self.active -= 1
+            return []
+
+    class ShortClient:
+        async def get(self, key):
+            return '{"thread_id": "t", "user_id": "7"}'
+
+    stream_client = BlockingStreamClient()
+    backend = RedisRunStreamBackend(client=ShortClient(), stream_client=stream_client)
+    readers = [asyncio.create_task(backend.read(f"run-{n}", None, 0.05)) for n in range(6)]
+    await asyncio.sleep(0.01)
+
+    # Short commands are not queued behind the attached readers
+    assert await asyncio.wait_for(backend.meta("run-0"), 0.01) == {"thread_id": "t", "user_id": "7"}
+    assert await asyncio.gather(*readers) == [[]] * 6
+    assert stream_client.peak == 2
@@ -5,7 +5,7 @@ from src.database.models import ChatThread
 
 @pytest.mark.asyncio
 async def test_generate_thread_title_success():
-    with patch("src.services.titler.ChatOpenAI") as mock_llm_class:
+    with patch("src.services.llm.ChatOpenAI") as mock_llm_class:
         mock_llm = MagicMock()
         mock_llm_class.return_value = mock_llm
         
@@ -18,7 +18,7 @@ async def test_generate_thread_title_success():
 
 @pytest.mark.asyncio
 async def test_generate_thread_title_fallback():
-    with patch("src.services.titler.ChatOpenAI") as mock_llm_class:
+    with patch("src.services.llm.ChatOpenAI") as mock_llm_class:
         mock_llm = MagicMock()
         mock_llm_class.return_value = mock_llm
         mock_llm.ainvoke = AsyncMock(side_effect=Exception("Service Down"))
@@ -0,0 +1,119 @@
+import pytest
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.graph import StateGraph, START, END
+from typing_extensions import TypedDict
+from src.services.llm import llm_registry
+from src.services.llm_cache import LLMResponseCache, MemoryLLMCacheBackend
+from src.services.usage import UsageLedger, aggregate_usage, rollup
+
+class FakeUsageModel(BaseChatModel):
+    """Chat model that reports fixed token usage."""
+    model_name: str = "fake-gpt"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-usage"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        message = AIMessage(
+            content="ok",
+            usage_metadata={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150}
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+class ResearchState(TypedDict):
+    answer: str
+
+async def researcher(state: ResearchState):
+    response = await llm_registry.get("fake-gpt").ainvoke("What moved AAPL today?")
+    return {"answer": response.content}
+
+@pytest.fixture
+def ledger_llm(reset_llm_registry, reset_usage_ledger, monkeypatch):
+    monkeypatch.setattr(reset_llm_registry, "_callbacks", [reset_usage_ledger.callback])
+    reset_llm_registry.set_factory(lambda model, temperature: FakeUsageModel(model_name=model))
+    yield reset_usage_ledger
+
+@pytest.mark.asyncio
+async def test_calls_inside_graph_are_tagged_with_thread_and_node(ledger_llm):
+    builder = StateGraph(ResearchState)
+    builder.add_node("researcher", researcher)
+    builder.add_edge(START, "researcher")
+    builder.add_edge("researcher", END)
+
+    await builder.compile().ainvoke({"answer": ""}, config={"configurable": {"thread_id": "thread-1"}})
+
+    [entry] = ledger_llm.pending()
+    assert entry["thread_id"] == "thread-1"
+    assert entry["node"] == "researcher"
+    assert entry["model"] == "fake-gpt"
+    assert (entry["prompt_tokens"], entry["completion_tokens"], entry["total_tokens"]) == (120, 30, 150)
+    assert entry["latency_ms"] >= 0
+    assert entry["cache_hit"] is False
+
+@pytest.mark.asyncio
+async def test_cache_hits_are_recorded_without_tokens(ledger_llm):
+    cache = LLMResponseCache(MemoryLLMCacheBackend())
+
+    await cache.ainvoke("sentiment", "Score this headline", "fake-gpt")
+    await cache.ainvoke("sentiment", "Score this headline", "fake-gpt")
+
+    miss, hit = ledger_llm.pending()
+    assert miss["cache_hit"] is False and miss["total_tokens"] == 150
+    assert hit["cache_hit"] is True and hit["total_tokens"] == 0
+    assert hit["model"] == "fake-gpt"
+
+def test_ring_buffer_drops_oldest_records():
+    ledger = UsageLedger(capacity=2)
+    for node in ("supervisor", "researcher", "summarizer"):
+        ledger.record("gpt-4o", node, prompt_tokens=10)
+
+    assert [entry["node"] for entry in ledger.pending()] == ["researcher", "summarizer"]
+    assert ledger.dropped == 1
+
+@pytest.mark.asyncio
+async def test_flush_writes_buffer_and_requeues_on_failure(monkeypatch):
+    ledger = UsageLedger(capacity=10)
+    ledger.record("gpt-4o", "supervisor", thread_id="t1", prompt_tokens=10)
+
+    broken = MagicMock()
+    broken.return_value.__aenter__ = AsyncMock(side_effect=ConnectionError("db down"))
+    monkeypatch.setattr("src.services.usage.AsyncSessionLocal", broken)
+    assert await ledger.flush() == 0
+    assert len(ledger.pending()) == 1
+
+    session = MagicMock()
+    session.commit = AsyncMock()
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    monkeypatch.setattr("src.services.usage.AsyncSessionLocal", factory)
+    assert await ledger.flush() == 1
+    [row] = session.add_all.call_args.args[0]
+    assert (row.thread_id, row.node, row.total_tokens) == ("t1", "supervisor", 10)
+    assert ledger.pending() == []
+
+@pytest.mark.asyncio
+async def test_aggregate_merges_flushed_rows_with_buffered_records(reset_usage_ledger):
+    reset_usage_ledger.record("gpt-4o", "researcher", thread_id="t1", prompt_tokens=100, completion_tokens=20, latency_ms=400)
+    reset_usage_ledger.record("gpt-4o-mini", "researcher", thread_id="t1", cache_hit=True)
+    reset_usage_ledger.record("gpt-4o", "researcher", thread_id="other", prompt_tokens=999)
+
+    result = MagicMock()
+    # (node, model, calls, prompt, completion, total, latency_ms, cache_hits)
+    result.all.return_value = [("researcher", "gpt-4o", 2, 300, 50, 350, 900.0, 0)]
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=result)
+
+    groups = await aggregate_usage(db, ("node", "model"), thread_id="t1")
+
+    assert groups[("researcher", "gpt-4o")]["calls"] == 3
+    assert groups[("researcher", "gpt-4o")]["total_tokens"] == 470
+    assert groups[("researcher", "gpt-4o-mini")]["cache_hits"] == 1
+    by_node = rollup(groups, 0)
+    assert by_node["researcher"]["calls"] == 4
+    assert by_node["researcher"]["latency_ms"] == 1300.0
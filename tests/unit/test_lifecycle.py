@@ -10,11 +10,11 @@ async def test_lifespan_startup_shutdown():
     mock_app = MagicMock()
     
     # Patch dependencies inside lifespan
-    with patch("main.get_checkpointer") as mock_get_cp:
-        # get_checkpointer returns an AsyncRedisSaver (async context manager)
-        mock_checkpointer = AsyncMock()
-        mock_checkpointer.__aenter__.return_value = mock_checkpointer
-        mock_get_cp.return_value = mock_checkpointer
+    with patch("main.checkpointer_pool") as mock_pool, patch("main.get_graph") as mock_get_graph:
+        # The shared checkpointer is opened once and the graph compiled against it
+        mock_checkpointer = MagicMock()
+        mock_pool.open = AsyncMock(return_value=mock_checkpointer)
+        mock_pool.aclose = AsyncMock()
         
         with patch("main.AsyncIOScheduler") as mock_scheduler_class:
             mock_scheduler = MagicMock()
@@ -29,13 +29,14 @@ async def test_lifespan_startup_shutdown():
                     # Use the context manager
                     async with lifespan(mock_app):
                         # Verify startup
-                        mock_get_cp.assert_called_once()
-                        mock_checkpointer.setup.assert_called_once()
+                        mock_pool.open.assert_awaited_once()
+                        mock_get_graph.assert_called_once_with(mock_checkpointer)
                         mock_scheduler.start.assert_called_once()
                         mock_cb_call.assert_called_once()
                         
                     # Verify shutdown
                     mock_scheduler.shutdown.assert_called_once()
+                    mock_pool.aclose.assert_awaited_once()
                     mock_engine.dispose.assert_called_once()
 
 @pytest.mark.asyncio
@@ -1,6 +1,16 @@
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
-from src.graph.tools.sentiment import analyze_sentiment, get_market_sentiment, SentimentResult
+from src.graph.tools.sentiment import (
+    analyze_sentiment,
+    analyze_sentiments,
+    get_market_sentiment,
+    get_portfolio_sentiment,
+    score_batch,
+    KeyedSentimentResult,
+    SentimentBatch,
+    SentimentRequest,
+    SentimentResult
+)
 from src.database.models import ResearchSourceType
 
 @pytest.mark.asyncio
@@ -61,3 +71,89 @@ async def test_get_market_sentiment_no_data(mocker):
     
     result = await get_market_sentiment("AAPL")
     assert "No data available" in result
+
+def _sentiment_llm(reset_llm_registry, batch_side_effect, single=None):
+    """Registry factory whose structured calls answer SentimentBatch and SentimentResult requests."""
+    batch_llm = MagicMock()
+    batch_llm.ainvoke = AsyncMock(side_effect=batch_side_effect)
+    single_llm = MagicMock()
+    single_llm.ainvoke = AsyncMock(return_value=single or SentimentResult(sentiment_score=0.1, rationale="Single"))
+    llm = MagicMock()
+    llm.with_structured_output.side_effect = lambda schema, **kwargs: batch_llm if schema is SentimentBatch else single_llm
+    reset_llm_registry.set_factory(MagicMock(return_value=llm))
+    return batch_llm, single_llm
+
+def _db(cached_rows):
+    """AsyncSessionLocal stand-in: the first query returns cached_rows, later ones nothing."""
+    session = AsyncMock()
+    session.add = MagicMock()
+    first, rest = MagicMock(), MagicMock()
+    first.scalars.return_value.all.return_value = cached_rows
+    rest.scalars.return_value.all.return_value = []
+    session.execute.side_effect = [first, rest]
+    factory = MagicMock()
+    factory.return_value.__aenter__.return_value = session
+    return factory, session
+
+@pytest.mark.asyncio
+async def test_analyze_sentiments_one_cache_query_and_one_batch_call(reset_llm_registry):
+    cached = MagicMock(key="news_AAPL", sentiment_score=0.5, sentiment_reason="Cached reason")
+    requests = [
+        SentimentRequest(key="news_AAPL", text="Apple beats estimates on services growth.", source_type=ResearchSourceType.NEWS, ticker="AAPL"),
+        SentimentRequest(key="sec_AAPL_item1a", text="Risk factors: supply chain concentration in Asia.", source_type=ResearchSourceType.SEC, ticker="AAPL"),
+        SentimentRequest(key="x_MSFT_2026101812", text="$MSFT looking strong into earnings, loading up.", source_type=ResearchSourceType.X, ticker="MSFT"),
+        SentimentRequest(key="reddit_MSFT_2026101812", text="short", source_type=ResearchSourceType.SOCIAL, ticker="MSFT")
+    ]
+    batch_llm, single_llm = _sentiment_llm(reset_llm_registry, [SentimentBatch(results=[
+        KeyedSentimentResult(id="1", sentiment_score=-0.3, rationale="Concentration risk"),
+        KeyedSentimentResult(id="2", sentiment_score=1.4, rationale="Bullish posts")
+    ])])
+    factory, session = _db([cached])
+
+    with patch("src.graph.tools.sentiment.AsyncSessionLocal", factory):
+        results = await analyze_sentiments(requests)
+
+    assert results["news_AAPL"].rationale == "Cached reason"
+    assert results["sec_AAPL_item1a"].sentiment_score == -0.3
+    assert results["x_MSFT_2026101812"].sentiment_score == 1.0
+    assert results["reddit_MSFT_2026101812"].rationale == "Insufficient text for analysis."
+    assert batch_llm.ainvoke.call_count == 1
+    single_llm.ainvoke.assert_not_called()
+    # One cache read, one upsert read, two new rows in one commit
+    assert session.execute.call_count == 2
+    assert session.add.call_count == 2
+    session.commit.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_score_batch_falls_back_for_missing_ids(reset_llm_registry):
+    requests = [
+        SentimentRequest(key=f"news_{t}", text=f"{t} shares rally after strong guidance.", source_type=ResearchSourceType.NEWS, ticker=t)
+        for t in ("AAPL", "MSFT")
+    ]
+    batch_llm, single_llm = _sentiment_llm(reset_llm_registry, [SentimentBatch(results=[
+        KeyedSentimentResult(id="1", sentiment_score=0.6, rationale="Rally"),
+        KeyedSentimentResult(id="7", sentiment_score=0.9, rationale="Unknown id")
+    ])])
+
+    scores = await score_batch(requests)
+
+    assert scores["news_AAPL"].sentiment_score == 0.6
+    assert scores["news_MSFT"].rationale == "Single"
+    assert single_llm.ainvoke.call_count == 1
+
+@pytest.mark.asyncio
+async def test_portfolio_sentiment_scores_all_tickers_together(mocker):
+    async def sources(ticker, **kwargs):
+        return [SentimentRequest(key=f"news_{ticker}", text=f"{ticker} news that is long enough.", source_type=ResearchSourceType.NEWS, ticker=ticker)]
+
+    mocker.patch("src.graph.tools.sentiment.fetch_sentiment_sources", side_effect=sources)
+    analyze = mocker.patch(
+        "src.graph.tools.sentiment.analyze_sentiments",
+        side_effect=lambda requests: {r.key: SentimentResult(sentiment_score=0.4, rationale="Upbeat") for r in requests}
+    )
+
+    result = await get_portfolio_sentiment(["aapl", "MSFT", "AAPL"])
+
+    assert analyze.call_count == 1
+    assert [r.key for r in analyze.call_args.args[0]] == ["news_AAPL", "news_MSFT"]
+    assert "Market Sentiment for AAPL" in result and "Market Sentiment for MSFT" in result
@@ -0,0 +1,124 @@
+from langchain_core.messages import HumanMessage, AIMessage
+from src.graph.utils.context import (
+    PromptContextBuilder,
+    ROLE_TOKEN_BUDGETS,
+    TRUNCATION_MARKER,
+    fair_shares,
+    truncate_to_tokens
+)
+from src.graph.utils import context
+from src.graph.utils.tokens import estimate_tokens
+
+def _interaction(i, agent, answer, next_agent="supervisor"):
+    return {"id": i, "agent": agent, "answer": answer, "next_agent": next_agent}
+
+def test_fair_shares_keeps_small_sections_whole():
+    assert fair_shares([10, 1000, 20, 5000], 600) == [10, 285, 20, 285]
+    assert fair_shares([10, 20], 600) == [10, 20]
+
+def test_truncate_to_tokens_marks_cut():
+    text = "x" * 4000
+    truncated = truncate_to_tokens(text, 100)
+    assert truncated.endswith(TRUNCATION_MARKER)
+    assert estimate_tokens(truncated) <= 100
+    assert truncate_to_tokens("short", 100) == "short"
+
+def test_render_stays_within_role_budget():
+    sec_dump = "Risk factor paragraph. " * 8000
+    state = {
+        "user_input": "Compare AAPL and MSFT",
+        "session_context": {"messages": [HumanMessage(content="Compare AAPL and MSFT")]},
+        "agent_interactions": [
+            _interaction(1, "supervisor", "Routed to fundamental,sentiment", "fundamental,sentiment"),
+            _interaction(2, "fundamental", sec_dump),
+            _interaction(3, "sentiment", "Sentiment is mildly bullish."),
+        ]
+    }
+    builder = PromptContextBuilder()
+
+    result = builder.render(state, "supervisor")
+
+    assert estimate_tokens(result) <= ROLE_TOKEN_BUDGETS["supervisor"]
+    assert "[fundamental -> supervisor]: Risk factor paragraph." in result
+    assert TRUNCATION_MARKER in result
+    # Short answers are never truncated to make room for the dump
+    assert "[sentiment -> supervisor]: Sentiment is mildly bullish." in result
+    assert "[supervisor -> fundamental,sentiment]: Routed to fundamental,sentiment" in result
+
+def test_older_turns_condensed_and_superseded_answers_dropped_first():
+    messages = []
+    for i in range(10):
+        messages.append(HumanMessage(content=f"Question {i} " + "detail " * 200))
+        messages.append(AIMessage(content=f"Answer {i} " + "analysis " * 200))
+    interactions = [_interaction(i, "fundamental", f"Run {i} " + "data " * 2000) for i in range(30)]
+    state = {"session_context": {"messages": messages}, "agent_interactions": interactions}
+
+    result = PromptContextBuilder().render(state, "off_topic")
+
+    # The condensed history goes first, then the oldest superseded answers
+    assert "[Earlier conversation, condensed]" not in result
+    assert "AI: Answer 9" in result
+    assert "[fundamental -> supervisor]: Run 29" in result
+    assert "[fundamental -> supervisor]: Run 0" not in result
+    assert "agent interactions omitted" in result
+    assert estimate_tokens(result) <= ROLE_TOKEN_BUDGETS["off_topic"]
+
+def test_history_condensed_when_budget_allows():
+    messages = [HumanMessage(content=f"Question {i}. " + "More context here. " * 30) for i in range(6)]
+    result = PromptContextBuilder().render({"session_context": {"messages": messages}}, "summarizer")
+
+    assert "[Earlier conversation, condensed]" in result
+    assert "User: Question 0." in result
+    assert "User: Question 5. More context here." in result
+
+def test_render_memoized_per_state_version_and_role():
+    state = {
+        "user_input": "hi",
+        "session_context": {"messages": [HumanMessage(content="hi")]},
+        "agent_interactions": [_interaction(1, "supervisor", "Routed to summarizer", "summarizer")]
+    }
+    builder = PromptContextBuilder()
+
+    first = builder.render(state, "researcher")
+    assert builder.render(state, "researcher") is first
+    builder.render(state, "summarizer")
+    state["agent_interactions"] = state["agent_interactions"] + [_interaction(2, "summarizer", "Done", "end")]
+    updated = builder.render(state, "researcher")
+
+    assert "[summarizer -> end]: Done" in updated
+    assert (builder.hits, builder.misses) == (1, 3)
+
+def test_memo_keys_hold_no_state():
+    answer = "x" * 10000
+    state = {"user_input": "hi", "agent_interactions": [_interaction(1, "fundamental_researcher", answer)]}
+    builder = PromptContextBuilder()
+    builder.render(state, "summarizer")
+
+    role, header, messages, interactions = next(iter(builder._rendered))
+    assert (role, messages) == ("summarizer", ())
+    assert len(header) == 16 and len(interactions[0]) == 16
+    # Parts are length-prefixed, so shifting text between them changes the key
+    assert builder._version({"user_input": "ab", "session_context": {"current_datetime": "c"}}, "x") != \
+        builder._version({"user_input": "a", "session_context": {"current_datetime": "bc"}}, "x")
+
+def test_memo_keys_segments_by_message_id_and_answer_ref(mocker):
+    from src.services.blobs import blob_ref, blob_store
+    full = "Full filing analysis. " * 500
+    ref = blob_ref(full)
+    offloaded = {**_interaction(1, "fundamental", "Full filing... [preview]"), "answer_ref": ref}
+    state = {
+        "session_context": {"messages": [HumanMessage(content="hi", id="m1")]},
+        "agent_interactions": [offloaded]
+    }
+    builder = PromptContextBuilder()
+    digest = mocker.spy(context, "_digest")
+
+    preview_key = builder._version(state, "summarizer")
+    # Only the header is hashed: the message and the answer are keyed by id and ref
+    assert digest.call_count == 1
+    assert preview_key[2] == (("id", "m1"),)
+
+    blob_store._remember(ref, full)
+    loaded_key = builder._version(state, "summarizer")
+    assert loaded_key != preview_key
+    assert "Full filing analysis." in builder.render(state, "summarizer")
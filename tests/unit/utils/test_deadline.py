@@ -0,0 +1,119 @@
+import time
+import pytest
+from langchain_core.runnables.config import var_child_runnable_config
+from langgraph.checkpoint.memory import InMemorySaver
+from src.graph.graph import MeshRouter, create_graph
+from src.graph.agents.research.utils import ToolSpec, run_tool, set_tool_overrides
+from src.graph.utils.deadline import bounded_timeout, budget_below, budget_event, deadline_config, remaining_budget
+from src.graph.utils.tool_call import tool_policy
+from src.services.offline import OfflineToolkit, offline_model_factory
+
+RESPONSES = {"SupervisorResponse": {"next_agents": ["fundamental_researcher"]}}
+
+@pytest.fixture
+def offline(reset_llm_registry):
+    reset_llm_registry.set_factory(offline_model_factory(RESPONSES))
+    set_tool_overrides(OfflineToolkit().tools())
+    yield reset_llm_registry
+
+@pytest.fixture
+def with_budget():
+    tokens = []
+    def bound(seconds):
+        tokens.append(var_child_runnable_config.set({"configurable": deadline_config(seconds)}))
+    yield bound
+    for token in reversed(tokens):
+        var_child_runnable_config.reset(token)
+
+async def _run(budget_seconds: float):
+    graph = create_graph(checkpointer=InMemorySaver())
+    config = {"configurable": {"thread_id": f"budget-{budget_seconds}", **deadline_config(budget_seconds)}}
+    state_input = {"user_input": "Is AAPL a buy?", "session_context": {"messages": []}, "user_context": {}, "agent_interactions": [], "output": ""}
+    events, state = [], {}
+    async for mode, data in graph.astream(state_input, config, stream_mode=["custom", "values"]):
+        if mode == "custom" and data.get("type") == "budget":
+            events.append(data)
+        elif mode == "values":
+            state = data
+    return state, events
+
+def test_budget_arithmetic(monkeypatch):
+    monkeypatch.setattr("src.config.settings.RUN_SUMMARY_RESERVE_SECONDS", 15.0)
+    now = time.time()
+    config = {"configurable": deadline_config(60, now=now)}
+    assert config["configurable"]["budget_seconds"] == 60
+    assert 59 < remaining_budget(config) <= 60
+    assert bounded_timeout(60, config) == pytest.approx(45, abs=1)
+    assert bounded_timeout(10, config) == 10
+    assert not budget_below(30, config)
+
+    spent = {"configurable": deadline_config(60, now=now - 120)}
+    assert remaining_budget(spent) == 0.0
+    assert bounded_timeout(60, spent) == 1.0
+    assert budget_event("end", config=spent)["elapsed_seconds"] == 60
+
+    monkeypatch.setattr("src.config.settings.RUN_BUDGET_SECONDS", 0)
+    assert deadline_config() == {}
+    assert remaining_budget({"configurable": {}}) is None
+
+def test_router_skips_follow_ups_when_budget_low(with_budget):
+    router = MeshRouter(["supervisor", "macro_researcher", "summarizer"], optional_destinations=["supervisor", "macro_researcher"])
+    state = {"agent_interactions": [{"id": 1, "agent": "analyst", "answer": "", "next_agent": "macro_researcher"}]}
+
+    assert router(state) == "macro_researcher"
+    with_budget(120)
+    assert router(state) == "macro_researcher"
+    with_budget(20)
+    assert router(state) == "summarizer"
+
+@pytest.mark.asyncio
+async def test_tool_retries_stop_when_budget_runs_out(monkeypatch):
+    monkeypatch.setattr("src.config.settings.RUN_SUMMARY_RESERVE_SECONDS", 0.0)
+    attempts = []
+
+    @tool_policy(timeout=30, retries=3, retry_backoff=0.01)
+    async def flaky_filing(ticker: str) -> str:
+        attempts.append(ticker)
+        raise ConnectionError("reset by peer")
+    spec = ToolSpec.build(flaky_filing)
+
+    with pytest.raises(ConnectionError):
+        await run_tool(spec, {"ticker": "AAPL"})
+    assert len(attempts) == 4
+
+    # Less left than a backoff plus a minimal attempt: the first failure is final
+    attempts.clear()
+    token = var_child_runnable_config.set({"configurable": deadline_config(0.5)})
+    try:
+        with pytest.raises(ConnectionError):
+            await run_tool(spec, {"ticker": "AAPL"})
+    finally:
+        var_child_runnable_config.reset(token)
+    assert len(attempts) == 1
+
+@pytest.mark.asyncio
+async def test_tight_budget_skips_debate(offline):
+    state, events = await _run(40)
+
+    agents = [itr["agent"] for itr in state["agent_interactions"]]
+    assert agents == ["supervisor", "fundamental_researcher", "analyst", "summarizer"]
+    assert "debate_output" not in state["agent_interactions"][2]
+    assert state["output"]
+    assert [event["stage"] for event in events] == ["supervisor", "analyst", "summarizer"]
+    assert events[1]["skipped"] == ["debate", "follow_up"]
+    assert all(0 < event["remaining_seconds"] <= 40 for event in events)
+
+@pytest.mark.asyncio
+async def test_exhausted_budget_goes_straight_to_summarizer(offline):
+    state, events = await _run(5)
+
+    assert [itr["agent"] for itr in state["agent_interactions"]] == ["supervisor", "summarizer"]
+    assert events[0]["skipped"] == ["research"]
+
+@pytest.mark.asyncio
+async def test_ample_budget_runs_every_stage(offline):
+    state, events = await _run(600)
+
+    analyst = next(itr for itr in state["agent_interactions"] if itr["agent"] == "analyst")
+    assert "debate_output" in analyst
+    assert all(not event["skipped"] for event in events)
@@ -0,0 +1,71 @@
+import json
+import pytest
+from src.graph.utils.filings import (
+    index_sections,
+    normalize_section_id,
+    store_filing,
+    load_section_offsets,
+    read_section
+)
+
+def _read_fixture(name: str) -> bytes:
+    with open(f"tests/fixtures/sec/{name}", "rb") as f:
+        return f.read()
+
+def test_normalize_section_id():
+    assert normalize_section_id("item1a") == "item1a"
+    assert normalize_section_id("Item 1A") == "item1a"
+    assert normalize_section_id("item_7") == "item7"
+    assert normalize_section_id("nonexistent") is None
+
+def test_index_sections_id_containers():
+    offsets = index_sections(_read_fixture("NVDA_10K.html"))
+    assert set(offsets) == {"item1", "item1a", "item1b", "item7", "item7a"}
+    # Sections are disjoint and ordered like the filing
+    spans = sorted(offsets.values())
+    assert all(prev[1] <= curr[0] for prev, curr in zip(spans, spans[1:]))
+
+def test_index_sections_heading_fallback_skips_toc():
+    raw = _read_fixture("MSFT_10Q.html")
+    offsets = index_sections(raw)
+    start, end = offsets["item1a"]
+    section = raw[start:end].decode("utf-8")
+    # The body section wins over the much shorter table of contents entry
+    assert "AI infrastructure investments" in section
+    assert "Item 6. Exhibits" not in section
+
+def test_index_sections_byte_offsets_with_multibyte_text():
+    raw = (
+        "<html><body><p>Café — résumé ✓</p>"
+        "<div id='item7'>Item 7. Revenue grew 12% — driven by Azure ✓</div>"
+        "</body></html>"
+    ).encode("utf-8")
+    start, end = index_sections(raw)["item7"]
+    assert raw[start:end].decode("utf-8") == "<div id='item7'>Item 7. Revenue grew 12% — driven by Azure ✓</div>"
+
+def test_store_filing_and_read_section(sec_cache_dir):
+    offsets = store_filing("0001045810-26-000010", _read_fixture("NVDA_10K.html"))
+
+    assert (sec_cache_dir / "0001045810-26-000010.htm").exists()
+    persisted = json.loads((sec_cache_dir / "0001045810-26-000010.offsets.json").read_text())
+    assert persisted == offsets
+    assert load_section_offsets("0001045810-26-000010") == offsets
+
+    content = read_section("0001045810-26-000010", "item7")
+    assert content.startswith("Item 7. Management's Discussion")
+    assert "Blackwell" in content
+    assert "export controls" not in content
+
+def test_read_section_missing():
+    assert read_section("0000000000-00-000000", "item1a") is None
+    store_filing("0000000000-00-000001", b"<html><body>Nothing here</body></html>")
+    assert read_section("0000000000-00-000001", "item1a") == ""
+
+def test_failed_write_leaves_no_temp_file(sec_cache_dir, monkeypatch):
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr("src.graph.utils.filings.os.replace", failing_replace)
+
+    with pytest.raises(OSError):
+        store_filing("0000000000-00-000002", b"<html><body>Partial</body></html>")
+    assert list(sec_cache_dir.iterdir()) == []
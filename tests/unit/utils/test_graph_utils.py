@@ -4,6 +4,7 @@ from langchain_core.messages import HumanMessage, AIMessage
 from src.graph.utils.prompt import convert_state_to_prompt, convert_tools_to_prompt
 from src.graph.utils.agents import with_logging, get_next_interaction_id
 from src.graph.utils.news import get_summary_result
+from src.graph.utils.crawl import PRIORITY_USER
 
 def test_convert_state_to_prompt_empty():
     state = {}
@@ -93,4 +94,4 @@ async def test_get_summary_result_mapping():
         
         result = await get_summary_result(item)
         assert result == {"title": "T", "summary": "S", "url": "L"}
-        mock_sum.assert_called_with("L", "UA", expire_at=None)
+        mock_sum.assert_called_with("L", "UA", expire_at=None, priority=PRIORITY_USER)
@@ -0,0 +1,49 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from src.database.models import ResearchSourceType
+from src.graph.tools.sentiment import analyze_sentiment, SentimentResult
+from src.graph.utils.lexicon import lexicon_score, lexicon_scores
+
+def test_one_sided_text_is_confident():
+    bullish = lexicon_score("$TSLA breakout, bullish calls, rally looks strong")
+    bearish = lexicon_score("Guidance cut, layoffs and losses, shares plunge")
+
+    assert bullish.score == 1.0 and bullish.confidence == 1.0
+    assert bearish.score == -1.0 and bearish.confidence == 1.0
+
+def test_negated_positive_counts_as_negative():
+    result = lexicon_score("Cloud growth was not strong this quarter")
+    assert result.negative == 1 and result.positive == 1
+    assert result.score == 0.0
+
+def test_mixed_and_hedged_text_is_not_confident():
+    assert lexicon_score("Revenue up but losses widen").confidence < 0.5
+    assert lexicon_score("Shares might rally or might fall, unclear").confidence < 0.5
+
+def test_long_text_without_sentiment_terms_is_confident_neutral():
+    boilerplate = " ".join(["Daily discussion thread for Wednesday, post your positions below."] * 5)
+    result = lexicon_score(boilerplate)
+    assert result.score == 0.0
+    assert result.confidence >= 0.6
+
+def test_batch_scores_match_single_scores():
+    texts = ["Bullish rally", "Bearish crash and losses", "Meeting on Tuesday"]
+    assert lexicon_scores(texts) == [lexicon_score(t) for t in texts]
+
+@pytest.mark.asyncio
+async def test_confident_social_text_skips_llm():
+    with patch("src.graph.tools.sentiment.score_text", new_callable=AsyncMock) as score_text:
+        result = await analyze_sentiment("$NVDA record highs, bullish, calls printing, strong demand", ResearchSourceType.X)
+
+    score_text.assert_not_called()
+    assert result.sentiment_score == 1.0
+    assert result.rationale.startswith("Lexicon pre-score")
+
+@pytest.mark.asyncio
+async def test_high_weight_source_always_uses_llm():
+    llm_result = SentimentResult(sentiment_score=0.8, rationale="LLM reason")
+    with patch("src.graph.tools.sentiment.score_text", new_callable=AsyncMock, return_value=llm_result) as score_text:
+        result = await analyze_sentiment("Record profit, strong growth and a raised dividend", ResearchSourceType.SEC)
+
+    score_text.assert_awaited_once()
+    assert result == llm_result
@@ -1,6 +1,29 @@
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
-from src.graph.utils.news import get_summary, summarize_content
+import asyncio
+import json
+import time
+from datetime import date
+from src.graph.utils.news import (
+    get_summary,
+    summarize_content,
+    simhash,
+    hamming_distance,
+    fingerprint_keys,
+    NEAR_DUPLICATE_MAX_DISTANCE,
+    search_urls,
+    search_many,
+    search_cache_key,
+    pack_articles,
+    summarize_batch,
+    get_summary_results,
+    get_fingerprint_summary,
+    summarize_fetched,
+    default_summary_expiry,
+    ArticleSummary,
+    ArticleSummaryBatch
+)
+from src.graph.utils.scraping import clean_html
 from src.database.models import ResearchCache, ResearchSourceType
 
 @pytest.mark.asyncio
@@ -62,3 +85,289 @@ async def test_summarize_content_llm_call():
         
         result = await summarize_content(content, "https://url.com")
         assert result == "LLM Summary"
+
+
+def _article_text(name: str) -> str:
+    with open(f"tests/fixtures/news/{name}", "r") as f:
+        return clean_html(f.read())
+
+def _mock_session_factory(mock_session_factory, cached_rows=None):
+    mock_session = AsyncMock()
+    mock_session.add = MagicMock()
+    mock_session_factory.return_value.__aenter__.return_value = mock_session
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = None
+    mock_result.scalars.return_value.all.return_value = cached_rows or []
+    mock_session.execute.return_value = mock_result
+    return mock_session
+
+def test_simhash_near_duplicates():
+    original = _article_text("reuters_fed_holds_rates.html")
+    syndicated = "WASHINGTON (AP) - " + original + " Copyright 2026 The Associated Press. All rights reserved."
+    unrelated = _article_text("ap_oil_prices.html")
+
+    assert hamming_distance(simhash(original), simhash(syndicated)) <= NEAR_DUPLICATE_MAX_DISTANCE
+    assert hamming_distance(simhash(original), simhash(unrelated)) > NEAR_DUPLICATE_MAX_DISTANCE
+
+@pytest.mark.asyncio
+async def test_get_summary_concurrent_syndicated_copies_summarized_once():
+    original = _article_text("reuters_fed_holds_rates.html")
+    copies = {
+        "https://reuters.com/fed": original,
+        "https://finance.yahoo.com/fed-copy": "(Reuters) - " + original
+    }
+
+    async def slow_summary(content, url):
+        await asyncio.sleep(0.05)
+        return "Fed holds rates"
+
+    with patch("src.graph.utils.news.AsyncSessionLocal") as mock_session_factory, \
+         patch("src.graph.utils.news.fetch_content", new_callable=AsyncMock) as mock_fetch, \
+         patch("src.graph.utils.news.clean_html", side_effect=lambda html: copies[html]), \
+         patch("src.graph.utils.news.summarize_content", side_effect=slow_summary) as mock_summ:
+
+        _mock_session_factory(mock_session_factory)
+        mock_fetch.side_effect = lambda url, ua: url
+
+        results = await asyncio.gather(*[get_summary(url) for url in copies])
+
+    assert results == ["Fed holds rates", "Fed holds rates"]
+    assert mock_summ.call_count == 1
+
+@pytest.mark.asyncio
+async def test_get_summary_reuses_fingerprint_from_research_cache():
+    content = _article_text("reuters_fed_holds_rates.html")
+    indexed = MagicMock()
+    indexed.key = fingerprint_keys(simhash(content))[0]
+    indexed.content = "Summary from an earlier request"
+
+    with patch("src.graph.utils.news.AsyncSessionLocal") as mock_session_factory, \
+         patch("src.graph.utils.news.fetch_content", new_callable=AsyncMock) as mock_fetch, \
+         patch("src.graph.utils.news.clean_html", return_value=content), \
+         patch("src.graph.utils.news.summarize_content", new_callable=AsyncMock) as mock_summ:
+
+        mock_session = _mock_session_factory(mock_session_factory, cached_rows=[indexed])
+        mock_fetch.return_value = "<html>Syndicated copy</html>"
+
+        result = await get_summary("https://apnews.com/fed-copy")
+
+    assert result == "Summary from an earlier request"
+    assert not mock_summ.called
+    # Only the URL row is cached; the fingerprint is already indexed
+    assert mock_session.add.call_count == 1
+
+@pytest.mark.asyncio
+async def test_get_summary_indexes_new_fingerprint():
+    content = _article_text("ap_oil_prices.html")
+
+    with patch("src.graph.utils.news.AsyncSessionLocal") as mock_session_factory, \
+         patch("src.graph.utils.news.fetch_content", new_callable=AsyncMock) as mock_fetch, \
+         patch("src.graph.utils.news.clean_html", return_value=content), \
+         patch("src.graph.utils.news.summarize_content", new_callable=AsyncMock) as mock_summ:
+
+        mock_session = _mock_session_factory(mock_session_factory)
+        mock_fetch.return_value = "<html>Oil</html>"
+        mock_summ.return_value = "Oil prices rise"
+
+        await get_summary("https://apnews.com/oil")
+
+    rows = [call.args[0] for call in mock_session.add.call_args_list]
+    assert [row.key for row in rows] == ["https://apnews.com/oil"] + fingerprint_keys(simhash(content))
+    # The summary is stored once; band rows only point at its URL row
+    assert rows[0].content == "Oil prices rise"
+    assert all(row.content == "ref:https://apnews.com/oil" for row in rows[1:])
+
+@pytest.mark.asyncio
+async def test_get_summary_follows_fingerprint_pointer():
+    content = _article_text("reuters_fed_holds_rates.html")
+    band_row = MagicMock(key=fingerprint_keys(simhash(content))[0], content="ref:https://reuters.com/fed")
+    summary_row = MagicMock(content="Summary stored under the original URL")
+
+    url_miss, bands, pointer = MagicMock(), MagicMock(), MagicMock()
+    url_miss.scalar_one_or_none.return_value = None
+    bands.scalars.return_value.all.return_value = [band_row]
+    pointer.scalar_one_or_none.return_value = summary_row
+
+    with patch("src.graph.utils.news.AsyncSessionLocal") as mock_session_factory, \
+         patch("src.graph.utils.news.fetch_content", new_callable=AsyncMock) as mock_fetch, \
+         patch("src.graph.utils.news.clean_html", return_value=content), \
+         patch("src.graph.utils.news.summarize_content", new_callable=AsyncMock) as mock_summ:
+
+        mock_session = _mock_session_factory(mock_session_factory)
+        mock_session.execute.side_effect = [url_miss, bands, pointer]
+        mock_fetch.return_value = "<html>Syndicated copy</html>"
+
+        result = await get_summary("https://finance.yahoo.com/fed-copy")
+
+    assert result == "Summary stored under the original URL"
+    assert not mock_summ.called
+
+def test_search_cache_key_normalizes_query():
+    day = date(2026, 3, 2)
+    assert search_cache_key("  Fed  Rate Decision ", day) == "ddgs_2026-03-02_fed rate decision"
+
+@pytest.mark.asyncio
+async def test_search_many_runs_queries_concurrently():
+    def slow_search(query):
+        time.sleep(0.1)
+        return [{"title": query, "link": f"https://example.com/{query}"}]
+
+    with patch("src.graph.utils.news.get_cached_search", new_callable=AsyncMock, return_value=None), \
+         patch("src.graph.utils.news.save_search", new_callable=AsyncMock) as mock_save, \
+         patch("src.graph.utils.news.fetch_ddgs_urls", side_effect=slow_search):
+        started = time.monotonic()
+        results = await search_many(["a", "b", "c", "d"])
+        elapsed = time.monotonic() - started
+
+    assert [r[0]["title"] for r in results] == ["a", "b", "c", "d"]
+    assert elapsed < 0.3
+    assert mock_save.call_count == 4
+
+@pytest.mark.asyncio
+async def test_search_urls_dedupes_parallel_identical_queries():
+    def slow_search(query):
+        time.sleep(0.05)
+        return [{"title": "T", "link": "https://example.com/t"}]
+
+    with patch("src.graph.utils.news.get_cached_search", new_callable=AsyncMock, return_value=None), \
+         patch("src.graph.utils.news.save_search", new_callable=AsyncMock), \
+         patch("src.graph.utils.news.fetch_ddgs_urls", side_effect=slow_search) as mock_search:
+        first, second = await asyncio.gather(search_urls("nvda export controls"), search_urls("NVDA  export controls"))
+
+    assert mock_search.call_count == 1
+    assert first == second
+    # Each caller can annotate its own copy
+    first[0]["user_agent"] = "UA"
+    assert "user_agent" not in second[0]
+
+@pytest.mark.asyncio
+async def test_search_urls_research_cache_hit():
+    cached = MagicMock()
+    cached.content = json.dumps([{"title": "Cached", "link": "https://example.com/cached"}])
+
+    with patch("src.graph.utils.news.AsyncSessionLocal") as mock_session_factory, \
+         patch("src.graph.utils.news.fetch_ddgs_urls") as mock_search:
+        mock_session = _mock_session_factory(mock_session_factory)
+        mock_session.execute.return_value.scalar_one_or_none.return_value = cached
+
+        results = await search_urls("fed rate decision")
+
+    assert results == [{"title": "Cached", "link": "https://example.com/cached"}]
+    assert not mock_search.called
+
+def test_pack_articles_respects_token_budget_and_order():
+    articles = [(f"https://news.com/{i}", "word " * 800) for i in range(5)]
+
+    batches = pack_articles(articles, max_tokens=2500, max_articles=10)
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [url for batch in batches for url, _ in batch] == [url for url, _ in articles]
+    assert [len(batch) for batch in pack_articles(articles, max_tokens=100000, max_articles=3)] == [3, 2]
+
+@pytest.mark.asyncio
+async def test_summarize_batch_single_structured_call():
+    articles = [("https://news.com/a", "Alpha " * 50), ("https://news.com/b", "Beta " * 50)]
+    batch = ArticleSummaryBatch(summaries=[
+        ArticleSummary(url="https://news.com/a", summary="A summary"),
+        ArticleSummary(url="https://news.com/b", summary="B summary")
+    ])
+
+    with patch("langchain_openai.ChatOpenAI.with_structured_output") as mock_structured, \
+         patch("src.graph.utils.news.summarize_content", new_callable=AsyncMock) as mock_single:
+        mock_structured.return_value.ainvoke = AsyncMock(return_value=batch)
+        result = await summarize_batch(articles)
+
+    assert result == {"https://news.com/a": "A summary", "https://news.com/b": "B summary"}
+    assert mock_structured.return_value.ainvoke.await_count == 1
+    assert not mock_single.called
+
+@pytest.mark.asyncio
+async def test_summarize_batch_falls_back_per_article():
+    articles = [("https://news.com/a", "Alpha " * 50), ("https://news.com/b", "Beta " * 50)]
+    partial = ArticleSummaryBatch(summaries=[ArticleSummary(url="https://news.com/a", summary="A summary")])
+
+    with patch("langchain_openai.ChatOpenAI.with_structured_output") as mock_structured, \
+         patch("src.graph.utils.news.summarize_content", new_callable=AsyncMock) as mock_single:
+        mock_single.side_effect = lambda content, url: f"Single {url}"
+
+        mock_structured.return_value.ainvoke = AsyncMock(side_effect=ValueError("schema validation failed"))
+        failed = await summarize_batch(articles)
+
+        mock_structured.return_value.ainvoke = AsyncMock(return_value=partial)
+        mock_single.reset_mock()
+        missing = await summarize_batch(list(reversed(articles)))
+
+    assert failed == {"https://news.com/a": "Single https://news.com/a", "https://news.com/b": "Single https://news.com/b"}
+    assert missing == {"https://news.com/a": "A summary", "https://news.com/b": "Single https://news.com/b"}
+    assert mock_single.call_count == 1
+
+@pytest.mark.asyncio
+async def test_get_summary_results_caches_each_url():
+    contents = {
+        "https://apnews.com/oil": _article_text("ap_oil_prices.html"),
+        "https://reuters.com/fed": _article_text("reuters_fed_holds_rates.html")
+    }
+    items = [{"title": "Oil", "link": "https://apnews.com/oil"}, {"title": "Fed", "link": "https://reuters.com/fed"}]
+
+    async def batch(articles):
+        return {url: f"Summary of {url}" for url, _ in articles}
+
+    with patch("src.graph.utils.news.AsyncSessionLocal") as mock_session_factory, \
+         patch("src.graph.utils.news.fetch_content", new_callable=AsyncMock) as mock_fetch, \
+         patch("src.graph.utils.news.clean_html", side_effect=lambda html: contents[html]), \
+         patch("src.graph.utils.news.summarize_batch", side_effect=batch) as mock_batch:
+
+        mock_session = _mock_session_factory(mock_session_factory)
+        mock_fetch.side_effect = lambda url, ua: url
+
+        results = await get_summary_results(items)
+
+    assert [r["summary"] for r in results] == ["Summary of https://apnews.com/oil", "Summary of https://reuters.com/fed"]
+    assert mock_batch.call_count == 1
+    keys = [call.args[0].key for call in mock_session.add.call_args_list]
+    assert "https://apnews.com/oil" in keys and "https://reuters.com/fed" in keys
+
+@pytest.mark.asyncio
+async def test_get_summary_results_serves_cached_urls():
+    cached = MagicMock()
+    cached.key = "https://news.com/cached"
+    cached.content = "Cached Summary"
+    items = [{"title": "Cached", "link": "https://news.com/cached"}]
+
+    with patch("src.graph.utils.news.AsyncSessionLocal") as mock_session_factory, \
+         patch("src.graph.utils.news.fetch_content", new_callable=AsyncMock) as mock_fetch:
+        _mock_session_factory(mock_session_factory, cached_rows=[cached])
+        results = await get_summary_results(items)
+
+    assert results == [{"title": "Cached", "summary": "Cached Summary", "url": "https://news.com/cached"}]
+    assert not mock_fetch.called
+
+@pytest.mark.asyncio
+async def test_batch_path_indexes_fingerprint_pointing_at_url():
+    url = "https://apnews.com/oil"
+    content = _article_text("ap_oil_prices.html")
+    db = AsyncMock()
+    db.add = MagicMock()
+    empty = MagicMock()
+    empty.scalars.return_value.all.return_value = []
+    db.execute.return_value = empty
+
+    with patch("src.graph.utils.news.summarize_batch", new_callable=AsyncMock, return_value={url: "Oil prices rise"}):
+        await summarize_fetched(db, [(url, content)], default_summary_expiry())
+
+    rows = [call.args[0] for call in db.add.call_args_list]
+    summary_row, band_rows = rows[0], rows[1:]
+    assert (summary_row.key, summary_row.content) == (url, "Oil prices rise")
+    assert [row.key for row in band_rows] == fingerprint_keys(simhash(content))
+    assert all(row.content == f"ref:{url}" for row in band_rows)
+
+    # A syndicated copy seen by a later request follows the band row to the URL row
+    bands, pointer = MagicMock(), MagicMock()
+    bands.scalars.return_value.all.return_value = band_rows[:1]
+    pointer.scalar_one_or_none.return_value = summary_row
+    lookup = AsyncMock()
+    lookup.execute.side_effect = [bands, pointer]
+
+    assert await get_fingerprint_summary(lookup, simhash("(AP) - " + content)) == "Oil prices rise"
+    pointer_query = lookup.execute.call_args_list[1].args[0].compile(compile_kwargs={"literal_binds": True})
+    assert f"'{url}'" in str(pointer_query)
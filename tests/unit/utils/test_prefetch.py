@@ -0,0 +1,149 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from src.graph.agents.research.utils import execute_tool, prefetch_calls, set_tool_overrides
+from src.graph.agents.supervisor.agent import routed_tool_names
+from src.graph.utils.prefetch import call_key, extract_symbols
+from src.graph.utils.tool_call import ToolCall
+from src.services.offline import OfflineToolkit
+
+class CountingToolkit(OfflineToolkit):
+    """Offline tools that count calls per (tool, symbol)."""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency)
+        self.calls = []
+
+    async def get_stock_financials(self, symbol: str, **kwargs) -> str:
+        self.calls.append(("get_stock_financials", symbol))
+        return await super().get_stock_financials(symbol, **kwargs)
+
+    async def get_stock_news(self, symbol: str, max_results: int = 3, **kwargs) -> str:
+        self.calls.append(("get_stock_news", symbol))
+        return await super().get_stock_news(symbol, max_results, **kwargs)
+
+    async def get_indices_performance(self, **kwargs) -> str:
+        self.calls.append(("get_indices_performance", None))
+        return await super().get_indices_performance(**kwargs)
+
+@pytest.fixture
+def prefetcher(prefetch_disabled, monkeypatch):
+    monkeypatch.setattr("src.config.settings.PREFETCH_ENABLED", True)
+    return prefetch_disabled
+
+def test_extract_symbols():
+    assert extract_symbols("Is AAPL a buy vs MSFT after the CEO change?") == ["AAPL", "MSFT"]
+    assert extract_symbols("Thoughts on $nvda and $F?") == ["NVDA", "F"]
+    assert extract_symbols("How will the FED and CPI affect the USD?") == []
+    assert extract_symbols("WHAT IS GOING ON WITH $TSLA") == ["TSLA"]
+    assert extract_symbols("Compare AAPL, MSFT and NVDA", limit=2) == ["AAPL", "MSFT"]
+
+def test_call_key_normalizes_defaults_case_and_passthrough():
+    toolkit = OfflineToolkit()
+    assert call_key(toolkit.get_stock_news, {"symbol": "aapl", "user_agent": "ua"}) == \
+        call_key(toolkit.get_stock_news, {"symbol": "AAPL", "max_results": 3, "ticker": "AAPL"})
+    assert call_key(toolkit.get_stock_news, {"symbol": "AAPL", "max_results": 5}) != \
+        call_key(toolkit.get_stock_news, {"symbol": "AAPL"})
+
+def test_routed_tool_names():
+    names = routed_tool_names(["fundamental_researcher", "off_topic"])
+    assert "get_stock_financials" in names
+    assert "get_stock_news" not in names
+
+@pytest.mark.asyncio
+async def test_plan_reuses_speculative_call(prefetcher):
+    toolkit = CountingToolkit(latency=0.05)
+    set_tool_overrides(toolkit.tools())
+
+    started = prefetcher.start("t1", "Is AAPL a buy?", prefetch_calls("Is AAPL a buy?"))
+    assert started == 3
+
+    with patch("src.graph.agents.research.utils.current_thread_id", return_value="t1"):
+        step = ToolCall(tool_name="get_stock_news", tool_params={"symbol": "aapl"})
+        result = await execute_tool(step, [toolkit.get_stock_news], "ua", "AAPL")
+
+    assert "AAPL" in result
+    assert toolkit.calls.count(("get_stock_news", "AAPL")) == 1
+    assert prefetcher.stats["used"] == 1
+
+@pytest.mark.asyncio
+async def test_unrouted_and_unused_calls_are_cancelled(prefetcher):
+    toolkit = CountingToolkit(latency=10)
+    set_tool_overrides(toolkit.tools())
+    prefetcher.start("t1", "AAPL outlook", prefetch_calls("AAPL outlook"))
+
+    prefetcher.retain("t1", routed_tool_names(["fundamental_researcher"]))
+    assert prefetcher.stats["cancelled"] == 2
+
+    prefetcher.discard("t1")
+    assert prefetcher.stats["cancelled"] == 3
+    assert prefetcher.active("t1", "AAPL outlook")
+
+    prefetcher.close("t1")
+    assert not prefetcher.active("t1", "AAPL outlook")
+
+@pytest.mark.asyncio
+async def test_prefetch_expires(prefetcher, monkeypatch):
+    monkeypatch.setattr("src.config.settings.PREFETCH_TTL_SECONDS", 0.01)
+    set_tool_overrides(CountingToolkit(latency=10).tools())
+    prefetcher.start("t1", "AAPL outlook", prefetch_calls("AAPL outlook"))
+
+    await asyncio.sleep(0.05)
+    assert not prefetcher.active("t1", "AAPL outlook")
+    assert prefetcher.stats["cancelled"] == 3
+
+@pytest.mark.asyncio
+async def test_failed_speculation_falls_back_to_real_call(prefetcher):
+    toolkit = CountingToolkit()
+    calls = []
+
+    async def flaky_financials(symbol: str, **kwargs) -> str:
+        calls.append(symbol)
+        if len(calls) == 1:
+            raise RuntimeError("timeout")
+        return f"{symbol} financials"
+
+    set_tool_overrides({**toolkit.tools(), "get_stock_financials": flaky_financials})
+    prefetcher.start("t1", "Is AAPL cheap?", prefetch_calls("Is AAPL cheap?"))
+
+    with patch("src.graph.agents.research.utils.current_thread_id", return_value="t1"):
+        step = ToolCall(tool_name="get_stock_financials", tool_params={})
+        result = await execute_tool(step, [toolkit.get_stock_financials], "", "AAPL")
+
+    assert result == "AAPL financials"
+    assert calls == ["AAPL", "AAPL"]
+
+@pytest.mark.asyncio
+async def test_speculative_none_result_is_reused(prefetcher):
+    toolkit = CountingToolkit()
+    calls = []
+
+    async def empty_financials(symbol: str, **kwargs):
+        calls.append(symbol)
+        return None
+
+    set_tool_overrides({**toolkit.tools(), "get_stock_financials": empty_financials})
+    prefetcher.start("t1", "Is AAPL cheap?", prefetch_calls("Is AAPL cheap?"))
+
+    with patch("src.graph.agents.research.utils.current_thread_id", return_value="t1"):
+        step = ToolCall(tool_name="get_stock_financials", tool_params={})
+        result = await execute_tool(step, [toolkit.get_stock_financials], "", "AAPL")
+
+    assert result == "None\n"
+    assert calls == ["AAPL"]
+
+@pytest.mark.asyncio
+async def test_disabled_or_threadless_prefetch_does_nothing(prefetch_disabled):
+    assert prefetch_disabled.start("t1", "Is AAPL cheap?", prefetch_calls("Is AAPL cheap?")) == 0
+    assert prefetch_disabled.start(None, "Is AAPL cheap?", []) == 0
+
+@pytest.mark.asyncio
+async def test_speculative_calls_run_under_tool_policy(prefetcher, reset_tool_limits):
+    toolkit = CountingToolkit()
+    set_tool_overrides(toolkit.tools())
+    prefetcher.start("t1", "Is AAPL a buy?", prefetch_calls("Is AAPL a buy?"))
+    await asyncio.sleep(0.01)
+
+    stats = {row["tool"]: row for row in reset_tool_limits.snapshot()}
+    assert {"get_stock_financials", "get_stock_news", "get_indices_performance"} <= set(stats)
+    assert stats["get_stock_news"]["calls"] == 1
@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
-from src.graph.utils.scraping import fetch_content, clean_html
+from src.graph.utils.scraping import fetch_content, clean_html, extract_article_text, FAST_PATH_MIN_CONFIDENCE
 
 @pytest.mark.asyncio
 async def test_fetch_content_success():
@@ -52,3 +52,42 @@ def test_clean_html_empty():
 def test_clean_html_exception():
     with patch("src.graph.utils.scraping.Document", side_effect=Exception("Parsing error")):
         assert clean_html("<html></html>") == ""
+
+def test_extract_article_text_fast_path():
+    paragraphs = "".join(
+        f"<p>Paragraph {i} discusses earnings, guidance, margins and the outlook for the semiconductor sector in detail.</p>"
+        for i in range(8)
+    )
+    html = (
+        "<html><body><nav><a href='/'>Home</a></nav>"
+        f"<div class='article-body'>{paragraphs}</div>"
+        "<div class='comments'><p>First! This stock is going to the moon, buy buy buy everyone.</p></div>"
+        "<footer>Copyright</footer></body></html>"
+    )
+    text, confidence = extract_article_text(html)
+    assert "Paragraph 0 discusses earnings" in text
+    assert "Paragraph 7" in text
+    assert "moon" not in text
+    assert "Home" not in text
+    assert confidence >= FAST_PATH_MIN_CONFIDENCE
+
+def test_extract_article_text_low_confidence():
+    text, confidence = extract_article_text("<html><body><p>Short note.</p></body></html>")
+    assert confidence < FAST_PATH_MIN_CONFIDENCE
+
+def test_clean_html_skips_readability_when_confident():
+    paragraphs = "".join(
+        f"<p>Sentence {i} about inflation, rates, payrolls and the dollar, with plenty of supporting detail.</p>"
+        for i in range(10)
+    )
+    html = f"<html><body><article>{paragraphs}</article></body></html>"
+    with patch("src.graph.utils.scraping.Document") as mock_doc:
+        result = clean_html(html)
+        assert "Sentence 9 about inflation" in result
+        assert not mock_doc.called
+
+def test_clean_html_falls_back_to_readability():
+    with patch("src.graph.utils.scraping.extract_article_text", return_value=("Thin", 0.1)), \
+         patch("src.graph.utils.scraping.clean_html_readability", return_value="Readability text") as mock_legacy:
+        assert clean_html("<html><body><p>Thin</p></body></html>") == "Readability text"
+        assert mock_legacy.called
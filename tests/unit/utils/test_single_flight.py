@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from src.graph.utils.concurrency import SingleFlight
+
+async def _slow_value(calls, value):
+    calls.append(value)
+    await asyncio.sleep(0.02)
+    return value
+
+async def _failing(calls):
+    calls.append("boom")
+    await asyncio.sleep(0.02)
+    raise ValueError("boom")
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_result():
+    flight = SingleFlight()
+    calls = []
+    results = await asyncio.gather(*[flight.do("k", _slow_value, calls, 42) for _ in range(5)])
+
+    assert results == [42] * 5
+    assert calls == [42]
+    assert not flight.in_flight("k")
+
+@pytest.mark.asyncio
+async def test_single_flight_distinct_keys_and_reuse():
+    flight = SingleFlight()
+    calls = []
+    await asyncio.gather(flight.do("a", _slow_value, calls, 1), flight.do("b", _slow_value, calls, 2))
+    await flight.do("a", _slow_value, calls, 3)
+
+    assert sorted(calls) == [1, 2, 3]
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_exception():
+    flight = SingleFlight()
+    calls = []
+    results = await asyncio.gather(*[flight.do("k", _failing, calls) for _ in range(3)], return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert calls == ["boom"]
+
+@pytest.mark.asyncio
+async def test_cancelled_owner_does_not_cancel_followers():
+    flight = SingleFlight()
+    calls = []
+    owner = asyncio.create_task(flight.do("k", _slow_value, calls, 7))
+    await asyncio.sleep(0)
+    followers = [asyncio.create_task(flight.do("k", _slow_value, calls, 7)) for _ in range(2)]
+    await asyncio.sleep(0.005)
+    owner.cancel()
+
+    assert await asyncio.gather(*followers) == [7, 7]
+    assert owner.cancelled()
+    # One follower re-ran the call, the other shared it
+    assert calls == [7, 7]
+    assert not flight.in_flight("k")
@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+from src.graph.agents.research import fundamental
+from src.graph.agents.research.utils import ToolRegistry, execute_tool, set_tool_overrides
+from src.graph.utils.tool_call import ToolCall, ToolMetrics, tool_policy
+
+class Calls:
+    active = 0
+    peak = 0
+    attempts = 0
+
+@tool_policy(timeout=0.05)
+async def slow_filing(ticker: str) -> str:
+    await asyncio.sleep(1)
+    return f"{ticker} filing"
+
+@tool_policy(timeout=1)
+async def quick_quote(symbol: str, **kwargs) -> str:
+    return f"{symbol} 190.00"
+
+@tool_policy(timeout=1, retries=2, retry_backoff=0.01)
+async def flaky_quote(symbol: str) -> str:
+    Calls.attempts += 1
+    if Calls.attempts < 3:
+        raise ConnectionError("reset by peer")
+    return f"{symbol} 191.00"
+
+@tool_policy(timeout=1, max_concurrency=2)
+async def limited_search(queries: list, **kwargs) -> str:
+    Calls.active += 1
+    Calls.peak = max(Calls.peak, Calls.active)
+    await asyncio.sleep(0.02)
+    Calls.active -= 1
+    return "results"
+
+REGISTRY = ToolRegistry([slow_filing, quick_quote, flaky_quote, limited_search])
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    Calls.active = Calls.peak = Calls.attempts = 0
+
+def test_registry_precomputes_signatures_and_policies():
+    spec = REGISTRY.resolve("quick_quote")
+    assert spec.params == frozenset({"symbol", "kwargs"})
+    assert spec.accepts_user_agent and spec.is_coroutine
+    assert REGISTRY.resolve("slow_filing").policy.timeout == 0.05
+    assert REGISTRY.resolve("get_stock_news") is None
+
+    real = fundamental.TOOL_REGISTRY.resolve("get_sec_filing_section")
+    assert real.policy.max_concurrency == 4
+
+    async def stand_in(ticker: str, **kwargs) -> str:
+        return "offline filing"
+    set_tool_overrides({"get_sec_filing_section": stand_in})
+    override = fundamental.TOOL_REGISTRY.resolve("get_sec_filing_section")
+    assert override.func is stand_in
+    assert override.policy == real.policy
+    assert fundamental.TOOL_REGISTRY.resolve("get_sec_filing_section") is override
+
+@pytest.mark.asyncio
+async def test_timed_out_step_leaves_partial_results(reset_tool_limits):
+    steps = [ToolCall(tool_name="slow_filing"), ToolCall(tool_name="quick_quote")]
+    results = await asyncio.wait_for(asyncio.gather(*(execute_tool(step, REGISTRY, "ua", "AAPL") for step in steps)), 0.5)
+
+    assert "timed out after 0.05s" in results[0]
+    assert results[1] == "AAPL 190.00"
+    assert steps[1].tool_params == {"symbol": "AAPL", "user_agent": "ua"}
+    stats = {row["tool"]: row for row in reset_tool_limits.snapshot()}
+    assert stats["slow_filing"]["timeout"] == 1
+    assert stats["quick_quote"]["ok"] == 1
+
+@pytest.mark.asyncio
+async def test_failures_are_retried_with_backoff(reset_tool_limits):
+    result = await execute_tool(ToolCall(tool_name="flaky_quote"), REGISTRY, subject="MSFT")
+
+    assert result == "MSFT 191.00"
+    stats = reset_tool_limits.snapshot()[0]
+    assert (stats["calls"], stats["error"], stats["ok"]) == (3, 2, 1)
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped_per_tool():
+    steps = [ToolCall(tool_name="limited_search", tool_params={"queries": [f"q{i}"]}) for i in range(6)]
+    results = await asyncio.gather(*(execute_tool(step, REGISTRY) for step in steps))
+
+    assert results == ["results"] * 6
+    assert Calls.peak == 2
+
+def test_latency_histogram():
+    metrics = ToolMetrics()
+    for seconds in (0.01, 0.2, 0.2, 0.2, 3.0):
+        metrics.record("get_stock_news", seconds)
+    metrics.record("get_stock_news", 90.0, "timeout")
+
+    row = metrics.snapshot()[0]
+    assert row["calls"] == 6 and row["timeout"] == 1
+    assert row["buckets"]["le_50"] == 1
+    assert row["buckets"]["le_250"] == 3
+    assert row["buckets"]["le_5000"] == 1
+    assert row["buckets"]["inf"] == 1
+    assert row["p95_latency_ms"] is None